@@ -0,0 +1,251 @@
+"""Sweep a grid of game parameters and record how the battles turn out.
+
+Each cell of the grid is a combination of enemy distance, player strength, enemy AI chances, and
+a move timing scale. Every cell gets its own seed (derived from the base seed and the cell
+itself), so a cell always produces the same numbers no matter which process runs it or in what
+order. The cells are farmed out to a process pool, and the results are appended to a CSV file as
+they come in. If the sweep gets interrupted, running it again skips the cells that are already in
+the file.
+
+Run it with:
+
+    python -m pw32n.balance_sweep --output balance_sweep.csv
+
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import math
+import multiprocessing
+import multiprocessing.pool
+import os
+import random
+import statistics
+import sys
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Sequence, TypeVar
+
+from pw32n import sprite_images
+from pw32n.battle_simulation import simulate_battle, scaled_battle_moves
+from pw32n.geography import OriginPoint
+from pw32n.lookahead_ai import LookaheadAI
+from pw32n.models import EnemyModel, PlayerModel, pick_enemy_strength
+from pw32n.units import Secs
+
+T = TypeVar("T")
+
+
+class SweepCell(NamedTuple):
+    enemy_distance: int
+    player_strength: float
+    attack_chance_per_tick: float
+    counter_move_chance: float
+    timing_scale: float
+
+
+class CellResult(NamedTuple):
+    seed: int
+    battles: int
+    kill_rate: float
+    mean_duration: float
+    mean_enemy_strength: float
+    mean_player_strength_lost: float
+
+
+COLUMNS = list(SweepCell._fields) + list(CellResult._fields)
+
+
+def expand_grid(
+    enemy_distances: Sequence[int],
+    player_strengths: Sequence[float],
+    attack_chances_per_tick: Sequence[float],
+    counter_move_chances: Sequence[float],
+    timing_scales: Sequence[float],
+) -> list[SweepCell]:
+    return [
+        SweepCell(*values)
+        for values in itertools.product(
+            enemy_distances,
+            player_strengths,
+            attack_chances_per_tick,
+            counter_move_chances,
+            timing_scales,
+        )
+    ]
+
+
+def seed_for_cell(base_seed: int, cell: SweepCell) -> int:
+    """Python's hash() is salted per process, so we use something stable instead."""
+    digest = hashlib.sha256(repr((base_seed, tuple(cell))).encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def make_enemy_ai(cell: SweepCell) -> LookaheadAI:
+    """Give the enemy the same AI it has in the game, tuned for this cell."""
+    ai = LookaheadAI()
+    ai.ATTACK_CHANCE_PER_TICK = cell.attack_chance_per_tick
+    ai.COUNTER_MOVE_CHANCE = cell.counter_move_chance
+
+    # Running out of time depends on how fast the machine is, which would make the results
+    # differ from run to run.
+    ai.TIME_BUDGET = Secs(math.inf)
+    return ai
+
+
+def run_cell(cell: SweepCell, seed: int, battles: int) -> CellResult:
+    random.seed(seed)
+    results = []
+    enemy_strengths = []
+    with scaled_battle_moves(cell.timing_scale):
+        for i in range(battles):
+            player_model = PlayerModel()
+            player_model.strength = cell.player_strength
+            position = OriginPoint(cell.enemy_distance, 0)
+            enemy_model = EnemyModel(
+                sprite_image=sprite_images.ZOMBIE_IMAGE,
+                position=position,
+                strength=pick_enemy_strength(position),
+                player_model=player_model,
+            )
+            enemy_model.ai = make_enemy_ai(cell)
+            enemy_strengths.append(enemy_model.strength)
+            results.append(simulate_battle(player_model, enemy_model))
+
+    return CellResult(
+        seed=seed,
+        battles=battles,
+        kill_rate=sum(r.enemy_died for r in results) / battles,
+        mean_duration=statistics.fmean(r.duration for r in results),
+        mean_enemy_strength=statistics.fmean(enemy_strengths),
+        mean_player_strength_lost=statistics.fmean(
+            r.player_strength_lost for r in results
+        ),
+    )
+
+
+def _run_cell_star(args: tuple[SweepCell, int, int]) -> tuple[SweepCell, CellResult]:
+    """Pool.imap_unordered only passes a single argument."""
+    cell, seed, battles = args
+    return cell, run_cell(cell, seed, battles)
+
+
+def read_finished_cells(path: str) -> set[SweepCell]:
+    """Figure out which cells are already in the output file.
+
+    If we were killed in the middle of writing a row, that row is chopped off so that we can
+    append cleanly.
+
+    """
+    if not os.path.exists(path):
+        return set()
+
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+    finished = set()
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            finished.add(
+                SweepCell(
+                    enemy_distance=int(row["enemy_distance"]),
+                    player_strength=float(row["player_strength"]),
+                    attack_chance_per_tick=float(row["attack_chance_per_tick"]),
+                    counter_move_chance=float(row["counter_move_chance"]),
+                    timing_scale=float(row["timing_scale"]),
+                )
+            )
+    return finished
+
+
+def run_sweep(
+    cells: Iterable[SweepCell],
+    output: str,
+    base_seed: int = 0,
+    battles: int = 100,
+    processes: int = None,
+) -> Iterator[tuple[SweepCell, CellResult]]:
+    """Run every cell that isn't already in output, appending rows as they finish.
+
+    This yields each cell as it's written so that callers can report progress. If processes is 1,
+    everything runs in this process, which is handy for tests and debugging.
+
+    """
+    finished = read_finished_cells(output)
+    todo = [
+        (cell, seed_for_cell(base_seed, cell), battles)
+        for cell in cells
+        if cell not in finished
+    ]
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    is_new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+    with open(output, "a", newline="") as f:
+        writer = csv.writer(f)
+        if is_new_file:
+            writer.writerow(COLUMNS)
+            f.flush()
+
+        pool: Optional[multiprocessing.pool.Pool] = None
+        if processes > 1 and len(todo) > 1:
+            pool = multiprocessing.Pool(processes)
+            results: Iterable[tuple[SweepCell, CellResult]] = pool.imap_unordered(
+                _run_cell_star, todo, chunksize=1
+            )
+        else:
+            results = map(_run_cell_star, todo)
+
+        try:
+            for cell, result in results:
+                writer.writerow(list(cell) + list(result))
+                f.flush()
+                yield cell, result
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+
+def _parse_list(parse: Callable[[str], T], s: str) -> list[T]:
+    return [parse(i) for i in s.split(",")]
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="balance_sweep.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--battles-per-cell", type=int, default=100)
+    parser.add_argument(
+        "--processes", type=int, default=None, help="Defaults to the number of CPUs"
+    )
+    parser.add_argument("--enemy-distances", default="0,1000,5000,20000")
+    parser.add_argument("--player-strengths", default="1,5,20,100")
+    parser.add_argument("--attack-chances-per-tick", default="0.0125,0.025,0.05")
+    parser.add_argument("--counter-move-chances", default="0,0.25,0.5")
+    parser.add_argument("--timing-scales", default="0.75,1,1.5")
+    args = parser.parse_args(argv)
+
+    cells = expand_grid(
+        enemy_distances=_parse_list(int, args.enemy_distances),
+        player_strengths=_parse_list(float, args.player_strengths),
+        attack_chances_per_tick=_parse_list(float, args.attack_chances_per_tick),
+        counter_move_chances=_parse_list(float, args.counter_move_chances),
+        timing_scales=_parse_list(float, args.timing_scales),
+    )
+    for i, (cell, result) in enumerate(
+        run_sweep(
+            cells,
+            output=args.output,
+            base_seed=args.seed,
+            battles=args.battles_per_cell,
+            processes=args.processes,
+        )
+    ):
+        print(f"{i + 1}: {cell} kill_rate={result.kill_rate:.2f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from pw32n.balance_sweep import (
+    COLUMNS,
+    SweepCell,
+    expand_grid,
+    read_finished_cells,
+    run_cell,
+    run_sweep,
+    seed_for_cell,
+)
+
+
+class BalanceSweepTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cells = expand_grid(
+            enemy_distances=[0, 1000],
+            player_strengths=[5.0],
+            attack_chances_per_tick=[0.025],
+            counter_move_chances=[0.25],
+            timing_scales=[1.0, 0.5],
+        )
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp_dir.name, "sweep.csv")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def read_rows(self) -> list[dict[str, str]]:
+        with open(self.output, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def test_expand_grid(self) -> None:
+        self.assertEqual(len(self.cells), 4)
+        self.assertIn(SweepCell(1000, 5.0, 0.025, 0.25, 0.5), self.cells)
+
+    def test_seed_for_cell_is_stable_and_distinct(self) -> None:
+        seeds = {seed_for_cell(0, cell) for cell in self.cells}
+        self.assertEqual(len(seeds), len(self.cells))
+        self.assertEqual(
+            seed_for_cell(0, self.cells[0]), seed_for_cell(0, self.cells[0])
+        )
+        self.assertNotEqual(
+            seed_for_cell(0, self.cells[0]), seed_for_cell(1, self.cells[0])
+        )
+
+    def test_run_cell_is_deterministic(self) -> None:
+        cell = self.cells[0]
+        self.assertEqual(run_cell(cell, 42, battles=3), run_cell(cell, 42, battles=3))
+
+    def test_run_sweep_writes_every_cell(self) -> None:
+        list(run_sweep(self.cells, self.output, battles=2, processes=1))
+        rows = self.read_rows()
+        self.assertEqual(list(rows[0].keys()), COLUMNS)
+        self.assertEqual(len(rows), len(self.cells))
+        self.assertEqual(read_finished_cells(self.output), set(self.cells))
+
+    def test_run_sweep_resumes(self) -> None:
+        list(run_sweep(self.cells[:1], self.output, battles=2, processes=1))
+
+        # Simulate getting killed in the middle of writing a row.
+        with open(self.output, "a") as f:
+            f.write("1000,5.0,0.0")
+
+        finished = list(run_sweep(self.cells, self.output, battles=2, processes=1))
+        self.assertEqual([cell for (cell, result) in finished], self.cells[1:])
+        self.assertEqual(len(self.read_rows()), len(self.cells))
+
+    def test_run_sweep_in_parallel_matches_serial(self) -> None:
+        serial = dict(run_sweep(self.cells, self.output, battles=2, processes=1))
+        os.remove(self.output)
+        parallel = dict(run_sweep(self.cells, self.output, battles=2, processes=2))
+        self.assertEqual(serial, parallel)
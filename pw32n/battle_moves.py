@@ -14,6 +14,9 @@ class BattleMove(NamedTuple):
     delta_x: int
     delta_y: int
 
+    # This is for logs and reports.
+    name: str = ""
+
 
 DODGE = BattleMove(
     base_strength=0.0,
@@ -22,6 +25,7 @@ DODGE = BattleMove(
     cooldown_period=Secs(0.2),
     delta_x=-1,
     delta_y=0,
+    name="dodge",
 )
 JAB = BattleMove(
     base_strength=1,
@@ -30,6 +34,7 @@ JAB = BattleMove(
     cooldown_period=Secs(0.15),
     delta_x=1,
     delta_y=0,
+    name="jab",
 )
 UPPERCUT = BattleMove(
     base_strength=3,
@@ -38,6 +43,7 @@ UPPERCUT = BattleMove(
     cooldown_period=Secs(0.2),
     delta_x=0,
     delta_y=1,
+    name="uppercut",
 )
 STUNNED = BattleMove(
     base_strength=0.0,
@@ -46,4 +52,5 @@ STUNNED = BattleMove(
     cooldown_period=Secs(0.0),
     delta_x=0,
     delta_y=0,
+    name="stunned",
 )
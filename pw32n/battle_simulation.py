@@ -0,0 +1,129 @@
+"""Run battles without a window so that we can study how the game is balanced.
+
+In the game, BattleView feeds the player's key presses into the PlayerModel and ticks both models
+once per frame. Here, PlayerBot stands in for the human, and simulate_battle does the ticking.
+
+"""
+
+import contextlib
+import random
+from typing import Iterator, NamedTuple
+
+from pw32n import battle_moves
+from pw32n.models import (
+    CombatantModel,
+    EnemyModel,
+    PlayerModel,
+    IdleState,
+    WarmingUpState,
+    advance_battle,
+)
+from pw32n.units import Secs
+
+DEFAULT_DELTA_TIME = Secs(1.0 / 60)
+DEFAULT_MAX_DURATION = Secs(60.0)
+
+
+class BattleResult(NamedTuple):
+    enemy_died: bool
+    duration: Secs
+    player_strength_lost: float
+    enemy_strength_lost: float
+
+
+class PlayerBot:
+
+    """This plays the part of the human. It's about as clever as EnemyModel's built-in AI."""
+
+    # Humans mash buttons a little faster than the enemies attack.
+    ATTACK_CHANCE_PER_TICK = 4 / (60 * 2)
+
+    # How often do we dodge an uppercut that we can see coming?
+    DODGE_CHANCE = 1 / 2
+
+    def __init__(self, player_model: PlayerModel, enemy_model: EnemyModel) -> None:
+        self.player_model = player_model
+        self.enemy_model = enemy_model
+
+    def on_battle_view_update(self, delta_time: float) -> None:
+        if not isinstance(self.player_model.state, IdleState):
+            return
+
+        if random.random() >= self.ATTACK_CHANCE_PER_TICK:
+            return
+
+        if (
+            self.enemy_model.current_battle_move == battle_moves.UPPERCUT
+            and isinstance(self.enemy_model.state, WarmingUpState)
+            and random.random() < self.DODGE_CHANCE
+        ):
+            move = battle_moves.DODGE
+        else:
+            move = random.choice(
+                [battle_moves.DODGE, battle_moves.JAB, battle_moves.UPPERCUT]
+            )
+
+        self.player_model.attempt_battle_move(move, self.enemy_model)
+
+
+def simulate_battle(
+    player_model: PlayerModel,
+    enemy_model: EnemyModel,
+    bot: PlayerBot = None,
+    delta_time: Secs = DEFAULT_DELTA_TIME,
+    max_duration: Secs = DEFAULT_MAX_DURATION,
+) -> BattleResult:
+    """Fight until the enemy dies or we run out of time.
+
+    This ticks the models the same way BattleView does: input first, then advance_battle.
+
+    """
+    if bot is None:
+        bot = PlayerBot(player_model, enemy_model)
+
+    player_model.on_battle_view_begin()
+    enemy_model.on_battle_view_begin()
+
+    duration = Secs(0.0)
+    while duration < max_duration and not enemy_model.is_dead:
+        bot.on_battle_view_update(delta_time)
+        advance_battle(player_model, enemy_model, delta_time)
+        duration += delta_time
+
+    return BattleResult(
+        enemy_died=enemy_model.is_dead,
+        duration=duration,
+        player_strength_lost=_strength_lost(player_model),
+        enemy_strength_lost=_strength_lost(enemy_model),
+    )
+
+
+def _strength_lost(model: CombatantModel) -> float:
+    return model.strength_at_the_beginning_of_battle - model.strength
+
+
+@contextlib.contextmanager
+def scaled_battle_moves(timing_scale: float) -> Iterator[None]:
+    """Temporarily make every battle move faster (< 1.0) or slower (> 1.0).
+
+    The models look up the moves in battle_moves every time they use them, so swapping out the
+    module's constants is enough. They're put back when you're done.
+
+    """
+    names = ("DODGE", "JAB", "UPPERCUT", "STUNNED")
+    originals = {name: getattr(battle_moves, name) for name in names}
+    try:
+        for name, move in originals.items():
+            setattr(
+                battle_moves,
+                name,
+                move._replace(
+                    warmup_period=move.warmup_period * timing_scale,
+                    execution_period=move.execution_period * timing_scale,
+                    cooldown_period=move.cooldown_period * timing_scale,
+                ),
+            )
+        yield
+    finally:
+        for name, move in originals.items():
+            setattr(battle_moves, name, move)
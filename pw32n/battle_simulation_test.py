@@ -0,0 +1,71 @@
+import random
+import unittest
+
+from pw32n import battle_moves, sprite_images
+from pw32n.battle_simulation import (
+    PlayerBot,
+    simulate_battle,
+    scaled_battle_moves,
+)
+from pw32n.geography import OriginPoint
+from pw32n.models import EnemyModel, PlayerModel
+
+
+class BattleSimulationTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(0)
+        self.player_model = PlayerModel()
+        self.player_model.strength = 10.0
+        self.enemy_model = EnemyModel(
+            sprite_image=sprite_images.ZOMBIE_IMAGE,
+            position=OriginPoint(0, 0),
+            strength=1.0,
+            player_model=self.player_model,
+        )
+
+    def test_player_bot_occasionally_attacks(self) -> None:
+        bot = PlayerBot(self.player_model, self.enemy_model)
+        for i in range(10000):
+            bot.on_battle_view_update(0.0)
+            if self.player_model.current_workflow:
+                break
+        else:
+            raise AssertionError("PlayerBot never attacked")
+
+    def test_simulate_battle_until_the_enemy_dies(self) -> None:
+        result = simulate_battle(self.player_model, self.enemy_model)
+        self.assertTrue(result.enemy_died)
+        self.assertTrue(self.enemy_model.is_dead)
+        self.assertGreater(result.duration, 0.0)
+        self.assertEqual(result.enemy_strength_lost, 1.0)
+
+    def test_simulate_battle_gives_up_eventually(self) -> None:
+        self.enemy_model.strength = 1_000_000.0
+        result = simulate_battle(self.player_model, self.enemy_model, max_duration=1.0)
+        self.assertFalse(result.enemy_died)
+        self.assertAlmostEqual(result.duration, 1.0, places=1)
+
+    def test_simulate_battle_is_deterministic_given_a_seed(self) -> None:
+        def run() -> tuple[bool, float]:
+            random.seed(1234)
+            player_model = PlayerModel()
+            player_model.strength = 5.0
+            enemy_model = EnemyModel(
+                sprite_image=sprite_images.ZOMBIE_IMAGE,
+                position=OriginPoint(0, 0),
+                strength=5.0,
+                player_model=player_model,
+            )
+            result = simulate_battle(player_model, enemy_model)
+            return result.enemy_died, result.duration
+
+        self.assertEqual(run(), run())
+
+    def test_scaled_battle_moves(self) -> None:
+        original = battle_moves.JAB
+        with scaled_battle_moves(2.0):
+            self.assertAlmostEqual(
+                battle_moves.JAB.warmup_period, original.warmup_period * 2.0
+            )
+            self.assertEqual(battle_moves.JAB.base_strength, original.base_strength)
+        self.assertIs(battle_moves.JAB, original)
@@ -0,0 +1,598 @@
+"""Time the hot paths of the game without a window and catch performance regressions.
+
+Each benchmark has a setup function that builds whatever it needs and returns a run function.
+The run function does the work once and returns how many operations it did. We call it a few
+times and keep the fastest run, since the slower runs are mostly noise from the rest of the
+machine.
+
+The results are written as JSON. Pass --compare with an earlier results file (a baseline) to get
+a report of everything that got slower than the threshold allows; the exit status is 1 if
+anything regressed.
+
+Run it with:
+
+    python -m pw32n.benchmark --output benchmark.json
+    python -m pw32n.benchmark --compare benchmark_baseline.json
+
+"""
+
+import argparse
+import functools
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from pw32n import geography, sprite_images, tiles
+from pw32n.battle_simulation import simulate_battle
+from pw32n.enemy_pool import EnemyPool, LevelOfDetail
+from pw32n.flow_field import FlowField
+from pw32n.headless import HeadlessWorld
+from pw32n.lru_dict import LRUDict
+from pw32n.models import EnemyModel, PlayerModel
+from pw32n.spectator import SpectatorEncoder
+from pw32n.tile_picker import TilePicker
+from pw32n.tile_store import TileStore
+from pw32n.timed_workflow import TimedStep, TimedWorkflow
+from pw32n.units import Secs
+
+# The window sizes we care about: the minimum, 1080p, and 4K.
+WINDOW_SIZES = ((800, 600), (1920, 1080), (3840, 2160))
+
+DEFAULT_REPEATS = 5
+
+# A benchmark that's more than this much slower than the baseline counts as a regression.
+DEFAULT_THRESHOLD = 0.10
+
+RunFunction = Callable[[], int]
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], RunFunction]
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    ops: int
+    seconds: float
+
+    @property
+    def seconds_per_op(self) -> float:
+        return self.seconds / self.ops
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.ops / self.seconds if self.seconds else float("inf")
+
+
+class Regression(NamedTuple):
+    name: str
+    baseline_seconds_per_op: float
+    seconds_per_op: float
+
+    @property
+    def ratio(self) -> float:
+        return self.seconds_per_op / self.baseline_seconds_per_op
+
+
+def _make_geo(screen_width: int, screen_height: int) -> geography.Geography[tiles.Tile]:
+    geo: geography.Geography[tiles.Tile] = geography.Geography()
+    geo.screen_width = screen_width
+    geo.screen_height = screen_height
+    return geo
+
+
+def generate_tile_points(screen_width: int, screen_height: int) -> RunFunction:
+    geo = _make_geo(screen_width, screen_height)
+
+    def run() -> int:
+        return sum(1 for _ in geo.generate_tile_points())
+
+    return run
+
+
+def diff_tile_points(screen_width: int, screen_height: int) -> RunFunction:
+    """Diff the tile points one tile to the east, the way the game used to on every frame."""
+    geo = _make_geo(screen_width, screen_height)
+    prev_tile_points = set(geo.generate_tile_points())
+    geo.position = geography.OriginPoint(geo.tile_width, 0)
+
+    def run() -> int:
+        geo.diff_tile_points(prev_tile_points, set(geo.generate_tile_points()))
+        return 1
+
+    return run
+
+
+def diff_tile_rects(screen_width: int, screen_height: int) -> RunFunction:
+    """Diff the tile rects one tile to the east, the way WorldView does now."""
+    geo = _make_geo(screen_width, screen_height)
+    prev_rect = geo.tile_rect()
+    geo.position = geography.OriginPoint(geo.tile_width, 0)
+    new_rect = geo.tile_rect()
+    diff = geography.TilePointDiff(added=set(), removed=set())
+
+    def run() -> int:
+        geo.diff_tile_rects(prev_rect, new_rect, diff)
+        return 1
+
+    return run
+
+
+def lru_dict_get(capacity: int, ops: int) -> RunFunction:
+    """Get keys that are all in the cache."""
+    lru: LRUDict[int, int] = LRUDict(capacity)
+    for i in range(capacity):
+        lru.put(i, i)
+    keys = [random.randrange(capacity) for _ in range(ops)]
+
+    def run() -> int:
+        get = lru.get
+        for key in keys:
+            get(key)
+        return ops
+
+    return run
+
+
+def tile_map_get(capacity: int, ops: int, by_index: bool) -> RunFunction:
+    """Get tiles that are all in geo.tile_map, by OriginPoint or by (col, row)."""
+    geo: geography.Geography[tiles.Tile] = geography.Geography()
+    side = int(capacity ** 0.5)
+    points = [
+        geography.OriginPoint(col * geo.tile_width, row * geo.tile_height)
+        for col in range(-side // 2, side - side // 2)
+        for row in range(-side // 2, side - side // 2)
+    ]
+    for p in points:
+        geo.tile_map.put(p, tiles.GRASS_TILE)
+    keys = [random.choice(points) for _ in range(ops)]
+    indices = [(p.x // geo.tile_width, p.y // geo.tile_height) for p in keys]
+
+    def run() -> int:
+        get = geo.tile_map.get
+        for key in keys:
+            get(key)
+        return ops
+
+    def run_by_index() -> int:
+        get_by_index = geo.tile_map.get_by_index
+        for col, row in indices:
+            get_by_index(col, row)
+        return ops
+
+    return run_by_index if by_index else run
+
+
+def lru_dict_put(capacity: int, ops: int, beyond_capacity: bool) -> RunFunction:
+    """Put keys into a full cache, either overwriting keys (at capacity) or evicting them."""
+    lru: LRUDict[int, int] = LRUDict(capacity)
+    for i in range(capacity):
+        lru.put(i, i)
+    if beyond_capacity:
+        start = [capacity]
+
+        def run() -> int:
+            put = lru.put
+            first = start[0]
+            for key in range(first, first + ops):
+                put(key, key)
+            start[0] = first + ops
+            return ops
+
+    else:
+        keys = [random.randrange(capacity) for _ in range(ops)]
+
+        def run() -> int:
+            put = lru.put
+            for key in keys:
+                put(key, key)
+            return ops
+
+    return run
+
+
+def walk(screen_width: int, screen_height: int, frames: int) -> RunFunction:
+    """Walk east at a steady speed, loading tiles like WorldView.update_tiles does.
+
+    Each run starts from a fresh world so that every run generates the same number of tiles.
+
+    """
+    pixels_per_frame = 4
+
+    def run() -> int:
+        random.seed(0)
+        world = HeadlessWorld(_make_geo(screen_width, screen_height))
+        for _ in range(frames):
+            world.move(pixels_per_frame, 0)
+        return frames
+
+    return run
+
+
+def chase(enemies: int, frames: int) -> RunFunction:
+    """Have enemies chase a player who crosses into a new tile on every frame.
+
+    That's the worst case for the flow field, since it has to redo its search every time. The
+    search is shared, so the cost per frame should barely change with the number of enemies.
+
+    """
+    random.seed(0)
+    geo = _make_geo(*WINDOW_SIZES[0])
+    tile_store = TileStore(geo)
+    tile_picker = TilePicker(geo, tile_store)
+
+    def on_tile_evicted(tile_point: geography.OriginPoint, tile: tiles.Tile) -> None:
+        tile_picker.on_tile_evicted(tile_point, tile)
+        tile_store.on_tile_evicted(tile_point)
+
+    geo.tile_map.on_evict = on_tile_evicted
+    radius = FlowField.RADIUS
+    for col in range(-radius - 1, radius + 2):
+        for row in range(-radius - 1, radius + 2):
+            tile_picker.get_tile(
+                geography.OriginPoint(col * geo.tile_width, row * geo.tile_height)
+            )
+    flow_field = FlowField(tile_picker.tile_store, radius)
+
+    pool = EnemyPool(capacity=max(enemies, 1), seed=0)
+    spread = EnemyPool.CHASING_DISTANCE * geo.tile_width
+    for _ in range(enemies):
+        pool.spawn(
+            geography.OriginPoint(
+                random.randrange(-spread, spread), random.randrange(-spread, spread)
+            ),
+            1.0,
+            sprite_images.ROBOT_IMAGE,
+        )
+    positions = [
+        geography.OriginPoint(geo.tile_width // 2, -geo.tile_height // 2),
+        geography.OriginPoint(geo.tile_width * 3 // 2, -geo.tile_height // 2),
+    ]
+    delta_time = 1.0 / 60
+
+    def run() -> int:
+        for i in range(frames):
+            position = positions[i % 2]
+            flow_field.update(position)
+            pool.update(delta_time, flow_field, position, tile_store=tile_store)
+        return frames
+
+    return run
+
+
+def enemy_pool_update(
+    enemies: int, frames: int, use_level_of_detail: bool
+) -> RunFunction:
+    """Update enemies spread out over the area WorldView keeps alive at 800x600.
+
+    Like WorldView, this does a little bit of Python for each enemy that moved (to place its
+    sprite), which is what the level of detail mostly saves.
+
+    """
+    width, height = WINDOW_SIZES[0]
+    pool = EnemyPool(capacity=max(enemies, 1), seed=0)
+    rng = random.Random(0)
+    for _ in range(enemies):
+        pool.spawn(
+            geography.OriginPoint(
+                rng.randrange(-3 * width, 3 * width),
+                rng.randrange(-3 * height, 3 * height),
+            ),
+            1.0,
+            sprite_images.ROBOT_IMAGE,
+        )
+    level_of_detail = None
+    if use_level_of_detail:
+        level_of_detail = LevelOfDetail(
+            geography.OriginPoint(0, 0), width / 2 + 64, height / 2 + 64, width, height
+        )
+    delta_time = 1.0 / 60
+
+    def run() -> int:
+        for _ in range(frames):
+            for index in pool.update(delta_time, level_of_detail=level_of_detail):
+                pool.handle(int(index)).position
+        return frames
+
+    return run
+
+
+def spectator_encode(enemies: int, frames: int) -> RunFunction:
+    """Encode the frames of a walk for spectators, with enemies wandering around.
+
+    The walk is done ahead of time, so this only times SpectatorEncoder.
+
+    """
+    width, height = WINDOW_SIZES[0]
+    random.seed(0)
+    geo = _make_geo(width, height)
+    world = HeadlessWorld(geo)
+    # The position, the tiles added, and the tiles removed on each frame.
+    walk: list[
+        tuple[
+            geography.OriginPoint,
+            list[tuple[geography.OriginPoint, int]],
+            list[geography.OriginPoint],
+        ]
+    ] = [
+        (
+            geo.position,
+            [(p, world.tile_picker.get_tile(p)[0].id) for p in world.loaded],
+            [],
+        )
+    ]
+    for _ in range(frames - 1):
+        diff = world.move(4, 0)
+        walk.append(
+            (
+                geo.position,
+                [(p, world.tile_picker.get_tile(p)[0].id) for p in diff.added],
+                list(diff.removed),
+            )
+        )
+
+    rng = np.random.default_rng(0)
+    velocity_x = rng.uniform(-1, 1, enemies)
+    velocity_y = rng.uniform(-1, 1, enemies)
+    delta_time = 1.0 / 60
+
+    def run() -> int:
+        encoder = SpectatorEncoder(geo)
+        pool = EnemyPool(capacity=max(enemies, 1), seed=0)
+        spawn_rng = random.Random(0)
+        for _ in range(enemies):
+            pool.spawn(
+                geography.OriginPoint(
+                    spawn_rng.randrange(-width, width),
+                    spawn_rng.randrange(-height, height),
+                ),
+                1.0,
+                sprite_images.ROBOT_IMAGE,
+            )
+        for position, added, removed in walk:
+            pool.x[:enemies] += velocity_x
+            pool.y[:enemies] += velocity_y
+            for tile_point in removed:
+                encoder.tile_removed(tile_point)
+            for tile_point, tile_id in added:
+                encoder.tile_added(tile_point, tile_id)
+            encoder.end_frame(delta_time, position, pool)
+        return frames
+
+    return run
+
+
+def timed_workflow(updates: int) -> RunFunction:
+    """Update a workflow that keeps starting over, like a combatant fighting forever."""
+    delta_time = 1.0 / 60
+
+    def callback(late_by: Secs) -> int:
+        return 0
+
+    def new_workflow() -> TimedWorkflow:
+        steps = [TimedStep(Secs(0.1), callback) for _ in range(3)]
+        return TimedWorkflow("benchmark", steps, carry_late_by=True)
+
+    def run() -> int:
+        workflow = new_workflow()
+        for _ in range(updates):
+            workflow.on_update(delta_time)
+            if not workflow.steps:
+                workflow = new_workflow()
+        return updates
+
+    return run
+
+
+def battle(battles: int) -> RunFunction:
+    """Fight full battles between a bot and the built-in enemy AI."""
+
+    def run() -> int:
+        random.seed(0)
+        for _ in range(battles):
+            player_model = PlayerModel()
+            enemy_model = EnemyModel(
+                sprite_image=sprite_images.ROBOT_IMAGE,
+                strength=5.0,
+                position=geography.OriginPoint(0, 0),
+                player_model=player_model,
+            )
+            simulate_battle(player_model, enemy_model)
+        return battles
+
+    return run
+
+
+def build_benchmarks(quick: bool = False) -> list[Benchmark]:
+    """quick makes everything small enough to run in a unit test."""
+    scale = 1 if not quick else 0
+    window_sizes = WINDOW_SIZES if not quick else WINDOW_SIZES[:1]
+    capacity = 100_000 if not quick else 100
+    ops = 100_000 if not quick else 100
+    benchmarks = []
+    for width, height in window_sizes:
+        size = f"{width}x{height}"
+        benchmarks += [
+            Benchmark(
+                f"geography.generate_tile_points[{size}]",
+                functools.partial(generate_tile_points, width, height),
+            ),
+            Benchmark(
+                f"geography.diff_tile_points[{size}]",
+                functools.partial(diff_tile_points, width, height),
+            ),
+            Benchmark(
+                f"geography.diff_tile_rects[{size}]",
+                functools.partial(diff_tile_rects, width, height),
+            ),
+            Benchmark(
+                f"headless.walk[{size}]",
+                functools.partial(walk, width, height, 600 * scale + 10),
+            ),
+        ]
+    benchmarks += [
+        Benchmark("lru_dict.get", lambda: lru_dict_get(capacity, ops)),
+        Benchmark(
+            "geography.tile_map.get",
+            lambda: tile_map_get(capacity, ops, by_index=False),
+        ),
+        Benchmark(
+            "geography.tile_map.get_by_index",
+            lambda: tile_map_get(capacity, ops, by_index=True),
+        ),
+        Benchmark(
+            "lru_dict.put[at_capacity]",
+            lambda: lru_dict_put(capacity, ops, beyond_capacity=False),
+        ),
+        Benchmark(
+            "lru_dict.put[beyond_capacity]",
+            lambda: lru_dict_put(capacity, ops, beyond_capacity=True),
+        ),
+        Benchmark("timed_workflow.update", lambda: timed_workflow(ops)),
+    ]
+    for enemies in (0, 100, 1000):
+        benchmarks.append(
+            Benchmark(
+                f"flow_field.chase[enemies={enemies}]",
+                functools.partial(chase, enemies, 100 * scale + 2),
+            )
+        )
+    for enemies in (1000, 10_000):
+        for use_level_of_detail in (False, True):
+            lod = "lod" if use_level_of_detail else "every_frame"
+            benchmarks.append(
+                Benchmark(
+                    f"enemy_pool.update[enemies={enemies},{lod}]",
+                    functools.partial(
+                        enemy_pool_update, enemies, 100 * scale + 2, use_level_of_detail
+                    ),
+                )
+            )
+    for enemies in (0, 100):
+        benchmarks.append(
+            Benchmark(
+                f"spectator.encode[enemies={enemies}]",
+                functools.partial(spectator_encode, enemies, 600 * scale + 10),
+            )
+        )
+    benchmarks += [
+        Benchmark("battle_simulation.simulate_battle", lambda: battle(10 * scale + 1)),
+    ]
+    return benchmarks
+
+
+def run_benchmark(benchmark: Benchmark, repeats: int) -> BenchmarkResult:
+    random.seed(0)
+    run = benchmark.setup()
+    best: Optional[BenchmarkResult] = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        ops = run()
+        seconds = time.perf_counter() - start
+        if best is None or seconds / ops < best.seconds_per_op:
+            best = BenchmarkResult(benchmark.name, ops, seconds)
+    assert best is not None
+    return best
+
+
+def run_benchmarks(
+    benchmarks: Iterable[Benchmark], repeats: int = DEFAULT_REPEATS
+) -> Iterable[BenchmarkResult]:
+    for benchmark in benchmarks:
+        yield run_benchmark(benchmark, repeats)
+
+
+def results_to_json(results: Iterable[BenchmarkResult]) -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": {
+            result.name: {
+                "ops": result.ops,
+                "seconds": result.seconds,
+                "seconds_per_op": result.seconds_per_op,
+                "ops_per_sec": result.ops_per_sec,
+            }
+            for result in results
+        },
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> list[Regression]:
+    """Return the benchmarks that got slower by more than threshold (0.10 is 10%).
+
+    Benchmarks that are only in one of the two files are ignored.
+
+    """
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        baseline_result = baseline["benchmarks"].get(name)
+        if baseline_result is None:
+            continue
+        regression = Regression(
+            name=name,
+            baseline_seconds_per_op=baseline_result["seconds_per_op"],
+            seconds_per_op=result["seconds_per_op"],
+        )
+        if regression.ratio > 1.0 + threshold:
+            regressions.append(regression)
+    return regressions
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="A baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument(
+        "--filter", default="", help="Only run benchmarks with this in their name"
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Tiny sizes, for smoke testing"
+    )
+    args = parser.parse_args(argv)
+
+    benchmarks = [i for i in build_benchmarks(args.quick) if args.filter in i.name]
+    results = []
+    for result in run_benchmarks(benchmarks, args.repeats):
+        print(
+            f"{result.name}: {result.seconds_per_op * 1e6:.3f} us/op "
+            f"({result.ops_per_sec:,.0f} ops/sec)",
+            file=sys.stderr,
+        )
+        results.append(result)
+    current = results_to_json(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression.name}: "
+                f"{regression.baseline_seconds_per_op * 1e6:.3f} us/op -> "
+                f"{regression.seconds_per_op * 1e6:.3f} us/op "
+                f"({(regression.ratio - 1.0) * 100:.0f}% slower)",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from typing import Any
+
+from pw32n import benchmark
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    def test_quick_benchmarks_run(self) -> None:
+        results = list(
+            benchmark.run_benchmarks(benchmark.build_benchmarks(quick=True), repeats=1)
+        )
+        self.assertTrue(results)
+        for result in results:
+            self.assertGreater(result.ops, 0)
+            self.assertGreater(result.seconds_per_op, 0.0)
+        names = [result.name for result in results]
+        self.assertEqual(len(names), len(set(names)))
+
+        as_json = benchmark.results_to_json(results)
+        self.assertEqual(
+            json.loads(json.dumps(as_json))["benchmarks"].keys(), set(names)
+        )
+
+    def test_compare(self) -> None:
+        def results(**seconds_per_op: float) -> dict[str, Any]:
+            return {
+                "benchmarks": {
+                    name: {"seconds_per_op": value}
+                    for name, value in seconds_per_op.items()
+                }
+            }
+
+        baseline = results(same=1.0, slower=1.0, faster=1.0, removed=1.0)
+        current = results(same=1.05, slower=1.5, faster=0.5, added=1.0)
+        regressions = benchmark.compare(baseline, current, threshold=0.10)
+        self.assertEqual([i.name for i in regressions], ["slower"])
+        self.assertAlmostEqual(regressions[0].ratio, 1.5)
+
+    def test_main_writes_and_compares(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "benchmark.json")
+            args = ["--quick", "--repeats", "1", "--filter", "lru_dict.get"]
+            stderr = io.StringIO()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(
+                stderr
+            ):
+                benchmark.main(args + ["--output", output])
+            self.assertIn("lru_dict.get: ", stderr.getvalue())
+            with open(output) as f:
+                self.assertIn("lru_dict.get", json.load(f)["benchmarks"])
+
+            # Comparing against a baseline that's impossibly fast fails.
+            with open(output) as f:
+                baseline = json.load(f)
+            baseline["benchmarks"]["lru_dict.get"]["seconds_per_op"] = 1e-15
+            with open(output, "w") as f:
+                json.dump(baseline, f)
+            stderr = io.StringIO()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(
+                stderr
+            ), self.assertRaises(SystemExit):
+                benchmark.main(args + ["--compare", output])
+            self.assertIn("REGRESSION lru_dict.get: ", stderr.getvalue())
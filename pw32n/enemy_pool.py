@@ -0,0 +1,546 @@
+"""This keeps track of all the enemies in the world as a struct of arrays.
+
+An EnemyModel is a fairly heavy object: it has a state NamedTuple, a workflow, and a bunch of
+references. That's fine for the one enemy you're fighting, but it's a lot of overhead when you
+want to update thousands of enemies that are just wandering around. Hence, EnemyPool stores
+each field in its own NumPy array, and the batch update methods work on all of the enemies at
+once.
+
+If you need to talk about a single enemy, use an EnemyHandle. If you need to fight one, use
+battle_model to get a PooledEnemyModel, which is an EnemyModel whose position and strength
+live in the pool.
+
+Enemies that are close enough to the player (going around the crates) chase her by following a
+shared FlowField. They go back to standing around once she gets away.
+
+If you pass a TileStore to update, enemies don't walk into crates. An enemy that would bump into
+one slides along it if it can, and otherwise stops (or turns around, if it's wandering). Tiles
+that haven't been generated yet don't stop anyone, since there's nothing there to bump into.
+
+Enemies far from the player don't need to be simulated as carefully as the ones on the screen.
+If you pass a LevelOfDetail to update, only the enemies on the screen are ticked on every frame.
+The ones near the screen are split into NEAR_TICK_PERIOD groups, and each frame ticks one group
+with a correspondingly larger delta time. The ones further away aren't ticked at all. When they
+come back into range, we skip the details and move them as far as they would have wandered on
+average (see fast_forward). Hence, the number of enemies that get ticked per frame depends on
+how many fit on and near the screen, not on how many are alive.
+
+Slots are reused after an enemy dies. Each slot has a generation counter so that a stale
+handle can tell that its enemy is gone.
+
+"""
+
+from __future__ import annotations
+
+import math
+from typing import NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+from pw32n import geography, sprite_images, tiles
+from pw32n.flow_field import FlowField
+from pw32n.models import EnemyModel, PlayerModel
+from pw32n.tile_store import WALKABLE, TileStore
+from pw32n.units import Secs
+
+# These are the possible values of EnemyPool.state.
+STANDING = 0
+WANDERING = 1
+FIGHTING = 2
+CHASING = 3
+
+# EnemyPool.sprite_image_id is an index into this.
+SPRITE_IMAGES = (
+    sprite_images.ZOMBIE_IMAGE,
+    sprite_images.MALE_PERSON_IMAGE,
+    sprite_images.FEMALE_PERSON_IMAGE,
+    sprite_images.MALE_ADVENTURER_IMAGE,
+    sprite_images.ROBOT_IMAGE,
+)
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.intp]
+BoolArray = npt.NDArray[np.bool_]
+
+
+class LevelOfDetail(NamedTuple):
+
+    """Which enemies are on or near the screen. The distances are from center to the edges."""
+
+    center: geography.OriginPoint
+    on_screen_x: float
+    on_screen_y: float
+    near_x: float
+    near_y: float
+
+
+class EnemyPool:
+    INITIAL_CAPACITY = 64
+
+    # Enemies that are near the screen are ticked every this many frames.
+    NEAR_TICK_PERIOD = 4
+
+    # Enemies that haven't been ticked for this long are fast forwarded instead.
+    DORMANT_PERIOD = Secs(6.0)
+
+    # Enemies stand around for a bit, then wander in a random direction for a bit.
+    MIN_STANDING_PERIOD = Secs(1.0)
+    MAX_STANDING_PERIOD = Secs(4.0)
+    MIN_WANDERING_PERIOD = Secs(0.5)
+    MAX_WANDERING_PERIOD = Secs(2.0)
+
+    # In OriginDistance per second.
+    WANDERING_SPEED = 60.0
+    CHASING_SPEED = 120.0
+
+    # Enemies that are at most this many steps away from the player chase her.
+    CHASING_DISTANCE = 8
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY, seed: int = None) -> None:
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+
+        # The total delta time so far and the number of updates. See LevelOfDetail.
+        self.clock = 0.0
+        self.frame = 0
+
+        # How many enemies were ticked and fast forwarded in the last update.
+        self.ticked = 0
+        self.fast_forwarded = 0
+        self.x: FloatArray = np.zeros(capacity)
+        self.y: FloatArray = np.zeros(capacity)
+        self.velocity_x: FloatArray = np.zeros(capacity)
+        self.velocity_y: FloatArray = np.zeros(capacity)
+        self.strength: FloatArray = np.zeros(capacity)
+        self.timer: FloatArray = np.zeros(capacity)
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.sprite_image_id = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=np.bool_)
+        self.generation = np.zeros(capacity, dtype=np.int64)
+
+        # When each enemy was last ticked (according to clock) and how much time it's being
+        # ticked for right now.
+        self.last_ticked: FloatArray = np.zeros(capacity)
+        self.delta_times: FloatArray = np.zeros(capacity)
+
+        # Which group each slot is in for the enemies near the screen.
+        self.tick_group = np.arange(capacity) % self.NEAR_TICK_PERIOD
+        self.free_slots: list[int] = list(range(capacity - 1, -1, -1))
+
+    @property
+    def capacity(self) -> int:
+        return len(self.alive)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _grow(self) -> None:
+        old_capacity = self.capacity
+        new_capacity = old_capacity * 2
+        for name in (
+            "x",
+            "y",
+            "velocity_x",
+            "velocity_y",
+            "strength",
+            "timer",
+            "state",
+            "sprite_image_id",
+            "alive",
+            "generation",
+            "last_ticked",
+            "delta_times",
+        ):
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:old_capacity] = old
+            setattr(self, name, new)
+        self.tick_group = np.arange(new_capacity) % self.NEAR_TICK_PERIOD
+        self.free_slots.extend(range(new_capacity - 1, old_capacity - 1, -1))
+
+    def spawn(
+        self,
+        position: geography.OriginPoint,
+        strength: float,
+        sprite_image: sprite_images.SpriteImage,
+    ) -> EnemyHandle:
+        if not self.free_slots:
+            self._grow()
+        index = self.free_slots.pop()
+        self.x[index] = position.x
+        self.y[index] = position.y
+        self.velocity_x[index] = 0.0
+        self.velocity_y[index] = 0.0
+        self.strength[index] = strength
+        self.state[index] = STANDING
+        self.timer[index] = self.rng.uniform(
+            self.MIN_STANDING_PERIOD, self.MAX_STANDING_PERIOD
+        )
+        self.sprite_image_id[index] = SPRITE_IMAGES.index(sprite_image)
+        self.alive[index] = True
+        self.last_ticked[index] = self.clock
+        self.count += 1
+        return EnemyHandle(self, index)
+
+    def kill(self, index: int) -> None:
+        if not self.alive[index]:
+            return
+        self.alive[index] = False
+        self.generation[index] += 1
+        self.free_slots.append(index)
+        self.count -= 1
+
+    def handle(self, index: int) -> EnemyHandle:
+        return EnemyHandle(self, index)
+
+    def alive_indices(self) -> IntArray:
+        return np.flatnonzero(self.alive)
+
+    def update(
+        self,
+        delta_time: float,
+        flow_field: FlowField = None,
+        player_position: geography.OriginPoint = None,
+        level_of_detail: LevelOfDetail = None,
+        tile_store: TileStore = None,
+    ) -> IntArray:
+        """Advance the enemies that aren't in a battle.
+
+        If there's a flow_field, it should already be up to date for player_position. Without a
+        level_of_detail, every enemy is ticked. Without a tile_store, nothing gets in their way.
+
+        Returns the indices of the enemies that moved.
+
+        """
+        self.clock += delta_time
+        self.frame += 1
+        is_ticking = self.alive & (self.state != FIGHTING)
+        if level_of_detail is not None:
+            is_ticking &= self.is_due(level_of_detail)
+        ticking = np.flatnonzero(is_ticking)
+
+        # From here on, we only look at the enemies that are ticking.
+        delta_times = self.delta_times
+        delta_times[ticking] = self.clock - self.last_ticked[ticking]
+        self.last_ticked[ticking] = self.clock
+        is_dormant = delta_times[ticking] > self.DORMANT_PERIOD
+        dormant = ticking[is_dormant]
+        self.fast_forwarded = len(dormant)
+        if len(dormant):
+            self.fast_forward(dormant, tile_store)
+            ticking = ticking[~is_dormant]
+        self.ticked = len(ticking)
+
+        if flow_field is not None:
+            self.update_chasing(ticking, flow_field, player_position)
+        self.timer[ticking] -= delta_times[ticking]
+        expired = ticking[self.timer[ticking] <= 0.0]
+        expired_state = self.state[expired]
+
+        start_wandering = expired[expired_state == STANDING]
+        stop_wandering = expired[expired_state == WANDERING]
+
+        if len(start_wandering):
+            angle = self.rng.uniform(0.0, 2 * math.pi, len(start_wandering))
+            self.velocity_x[start_wandering] = np.cos(angle) * self.WANDERING_SPEED
+            self.velocity_y[start_wandering] = np.sin(angle) * self.WANDERING_SPEED
+            self.timer[start_wandering] = self.rng.uniform(
+                self.MIN_WANDERING_PERIOD,
+                self.MAX_WANDERING_PERIOD,
+                len(start_wandering),
+            )
+            self.state[start_wandering] = WANDERING
+
+        if len(stop_wandering):
+            self.velocity_x[stop_wandering] = 0.0
+            self.velocity_y[stop_wandering] = 0.0
+            self.timer[stop_wandering] = self.rng.uniform(
+                self.MIN_STANDING_PERIOD,
+                self.MAX_STANDING_PERIOD,
+                len(stop_wandering),
+            )
+            self.state[stop_wandering] = STANDING
+
+        ticking_state = self.state[ticking]
+        moving: IntArray = ticking[
+            (ticking_state == WANDERING) | (ticking_state == CHASING)
+        ]
+        moving = self.move(moving, tile_store)
+        if len(dormant):
+            moving = np.concatenate((moving, dormant))
+        return moving
+
+    def move(self, indices: IntArray, tile_store: TileStore = None) -> IntArray:
+        """Move these enemies by their velocities, and return the ones that got anywhere."""
+        old_x = self.x[indices]
+        old_y = self.y[indices]
+        delta_times = self.delta_times[indices]
+        new_x = old_x + self.velocity_x[indices] * delta_times
+        new_y = old_y + self.velocity_y[indices] * delta_times
+        if tile_store is not None and len(indices):
+            is_free = ~self.is_blocked(tile_store, new_x, new_y)
+            blocked = np.flatnonzero(~is_free)
+            if len(blocked):
+                # Enemies that are already stuck in a crate (e.g. one that was generated on top
+                # of them) are allowed to walk out of it.
+                is_stuck_already = self.is_blocked(
+                    tile_store, old_x[blocked], old_y[blocked]
+                )
+                is_free[blocked[is_stuck_already]] = True
+                blocked = blocked[~is_stuck_already]
+            if len(blocked):
+                # Try sliding along x, and then along y.
+                can_move_x = (new_x[blocked] != old_x[blocked]) & ~self.is_blocked(
+                    tile_store, new_x[blocked], old_y[blocked]
+                )
+                can_move_y = (
+                    ~can_move_x
+                    & (new_y[blocked] != old_y[blocked])
+                    & ~self.is_blocked(tile_store, old_x[blocked], new_y[blocked])
+                )
+                new_y[blocked[can_move_x]] = old_y[blocked[can_move_x]]
+                new_x[blocked[can_move_y]] = old_x[blocked[can_move_y]]
+                stuck = blocked[~can_move_x & ~can_move_y]
+                new_x[stuck] = old_x[stuck]
+                new_y[stuck] = old_y[stuck]
+                is_free[blocked] = can_move_x | can_move_y
+
+                turning = indices[stuck][self.state[indices[stuck]] == WANDERING]
+                self.velocity_x[turning] *= -1
+                self.velocity_y[turning] *= -1
+                indices = indices[is_free]
+                new_x = new_x[is_free]
+                new_y = new_y[is_free]
+        self.x[indices] = new_x
+        self.y[indices] = new_y
+        return indices
+
+    def is_blocked(
+        self, tile_store: TileStore, x: FloatArray, y: FloatArray
+    ) -> BoolArray:
+        """Would tile sized enemies with these top left corners overlap any crates?"""
+        geo = tile_store.geo
+        tile_width = geo.tile_width
+        tile_height = geo.tile_height
+
+        # See Geography.align_point: x rounds down and y rounds up. The corners are the same as
+        # TilePicker.points_under's.
+        left_cols = np.floor(x / tile_width).astype(np.intp)
+        right_cols = np.floor((x + tile_width - 1) / tile_width).astype(np.intp)
+        top_rows = np.ceil(y / tile_height).astype(np.intp)
+        bottom_rows = np.ceil((y - tile_height + 1) / tile_height).astype(np.intp)
+        tile_ids = tile_store.get_by_indices(
+            np.concatenate((left_cols, right_cols, left_cols, right_cols)),
+            np.concatenate((top_rows, top_rows, bottom_rows, bottom_rows)),
+        )
+        is_blocked_corner = (tile_ids != tiles.UNKNOWN_TILE_ID) & ~WALKABLE[tile_ids]
+        is_blocked: BoolArray = is_blocked_corner.reshape(4, len(x)).any(axis=0)
+        return is_blocked
+
+    def is_due(self, level_of_detail: LevelOfDetail) -> npt.NDArray[np.bool_]:
+        """Which enemies should be ticked this frame?"""
+        distance_x = np.abs(self.x - level_of_detail.center.x)
+        distance_y = np.abs(self.y - level_of_detail.center.y)
+        is_on_screen = (distance_x <= level_of_detail.on_screen_x) & (
+            distance_y <= level_of_detail.on_screen_y
+        )
+        is_near = (distance_x <= level_of_detail.near_x) & (
+            distance_y <= level_of_detail.near_y
+        )
+        group = self.frame % self.NEAR_TICK_PERIOD
+        is_due: npt.NDArray[np.bool_] = is_on_screen | (
+            is_near & (self.tick_group == group)
+        )
+        return is_due
+
+    def fast_forward(self, indices: IntArray, tile_store: TileStore = None) -> None:
+        """Jump these enemies ahead by their delta_times all at once.
+
+        Standing around and wandering in random directions is a random walk, so after many
+        legs, how far an enemy gets in each direction is roughly normally distributed with a
+        variance of (number of legs) * (mean squared leg length) / 2. Each leg takes one
+        standing period and one wandering period on average.
+
+        """
+        mean_cycle_period = (
+            self.MIN_STANDING_PERIOD
+            + self.MAX_STANDING_PERIOD
+            + self.MIN_WANDERING_PERIOD
+            + self.MAX_WANDERING_PERIOD
+        ) / 2
+
+        # The mean of T ** 2 where T is uniform between a and b is (a² + ab + b²) / 3.
+        a = self.MIN_WANDERING_PERIOD
+        b = self.MAX_WANDERING_PERIOD
+        mean_squared_leg_length = (
+            self.WANDERING_SPEED ** 2 * (a * a + a * b + b * b) / 3
+        )
+
+        legs = self.delta_times[indices] / mean_cycle_period
+        scale = np.sqrt(legs * mean_squared_leg_length / 2)
+        new_x = self.x[indices] + self.rng.normal(0.0, scale)
+        new_y = self.y[indices] + self.rng.normal(0.0, scale)
+        if tile_store is not None:
+            # Enemies that would land in a crate stay where they are instead.
+            is_free = ~self.is_blocked(tile_store, new_x, new_y)
+            self.x[indices[is_free]] = new_x[is_free]
+            self.y[indices[is_free]] = new_y[is_free]
+        else:
+            self.x[indices] = new_x
+            self.y[indices] = new_y
+        self.velocity_x[indices] = 0.0
+        self.velocity_y[indices] = 0.0
+        self.timer[indices] = self.rng.uniform(
+            self.MIN_STANDING_PERIOD, self.MAX_STANDING_PERIOD, len(indices)
+        )
+        self.state[indices] = STANDING
+
+    def update_chasing(
+        self,
+        indices: IntArray,
+        flow_field: FlowField,
+        player_position: geography.OriginPoint,
+    ) -> None:
+        """Decide which of these enemies are chasing the player, and point them downhill."""
+        if not len(indices):
+            return
+        x = self.x[indices]
+        y = self.y[indices]
+        distances, target_x, target_y = flow_field.lookup(x, y)
+        is_chasing = distances <= self.CHASING_DISTANCE
+
+        gave_up = indices[~is_chasing & (self.state[indices] == CHASING)]
+        if len(gave_up):
+            self.velocity_x[gave_up] = 0.0
+            self.velocity_y[gave_up] = 0.0
+            self.timer[gave_up] = self.MIN_STANDING_PERIOD
+            self.state[gave_up] = STANDING
+
+        chasing = indices[is_chasing]
+        if not len(chasing):
+            return
+
+        # Once they're on the player's tile, they go straight for her.
+        target_x = target_x[is_chasing]
+        target_y = target_y[is_chasing]
+        is_on_player_tile = distances[is_chasing] == 0
+        target_x[is_on_player_tile] = player_position.x
+        target_y[is_on_player_tile] = player_position.y
+
+        # Aim their centers at the targets. x and y are their top left corners.
+        delta_x = target_x - (x[is_chasing] + flow_field.geo.tile_width / 2)
+        delta_y = target_y - (y[is_chasing] - flow_field.geo.tile_height / 2)
+        length = np.maximum(np.hypot(delta_x, delta_y), 1.0)
+        self.velocity_x[chasing] = delta_x / length * self.CHASING_SPEED
+        self.velocity_y[chasing] = delta_y / length * self.CHASING_SPEED
+        self.state[chasing] = CHASING
+
+    def cull(
+        self,
+        center: geography.OriginPoint,
+        max_distance_x: float,
+        max_distance_y: float,
+    ) -> IntArray:
+        """Kill every enemy that is too far away from the center.
+
+        Returns the indices of the enemies that were killed.
+
+        """
+        too_far = self.alive & (
+            (np.abs(self.x - center.x) > max_distance_x)
+            | (np.abs(self.y - center.y) > max_distance_y)
+        )
+        indices = np.flatnonzero(too_far)
+        for index in indices:
+            self.kill(int(index))
+        return indices
+
+    def battle_model(self, index: int, player_model: PlayerModel) -> PooledEnemyModel:
+        return PooledEnemyModel(self, index, player_model)
+
+
+class EnemyHandle:
+
+    """This is a lightweight way to refer to a single enemy in an EnemyPool."""
+
+    __slots__ = ("pool", "index", "generation")
+
+    def __init__(self, pool: EnemyPool, index: int) -> None:
+        self.pool = pool
+        self.index = index
+        self.generation = int(pool.generation[index])
+
+    @property
+    def is_alive(self) -> bool:
+        return bool(
+            self.pool.alive[self.index]
+            and self.pool.generation[self.index] == self.generation
+        )
+
+    @property
+    def position(self) -> geography.OriginPoint:
+        return geography.OriginPoint(
+            round(self.pool.x[self.index]), round(self.pool.y[self.index])
+        )
+
+    @property
+    def strength(self) -> float:
+        return float(self.pool.strength[self.index])
+
+    @property
+    def state(self) -> int:
+        return int(self.pool.state[self.index])
+
+    @property
+    def sprite_image(self) -> sprite_images.SpriteImage:
+        return SPRITE_IMAGES[self.pool.sprite_image_id[self.index]]
+
+
+class PooledEnemyModel(EnemyModel):
+
+    """This is an EnemyModel whose position and strength are stored in an EnemyPool.
+
+    While it exists, the enemy is FIGHTING, so the pool's batch updates leave it alone. Call
+    on_battle_view_end when the battle is over.
+
+    """
+
+    def __init__(self, pool: EnemyPool, index: int, player_model: PlayerModel) -> None:
+        # These need to be set before calling super().__init__ because it uses the properties.
+        self.pool = pool
+        self.index = index
+        handle = pool.handle(index)
+        super().__init__(
+            sprite_image=handle.sprite_image,
+            position=handle.position,
+            strength=handle.strength,
+            player_model=player_model,
+        )
+        pool.state[index] = FIGHTING
+        pool.velocity_x[index] = 0.0
+        pool.velocity_y[index] = 0.0
+
+    @property
+    def strength(self) -> float:
+        return float(self.pool.strength[self.index])
+
+    @strength.setter
+    def strength(self, strength: float) -> None:
+        self.pool.strength[self.index] = max(strength, self.MIN_STRENGTH)
+
+    @property
+    def position(self) -> geography.OriginPoint:
+        return geography.OriginPoint(
+            round(self.pool.x[self.index]), round(self.pool.y[self.index])
+        )
+
+    @position.setter
+    def position(self, position: geography.OriginPoint) -> None:
+        self.pool.x[self.index] = position.x
+        self.pool.y[self.index] = position.y
+
+    def on_battle_view_end(self) -> None:
+        if self.pool.alive[self.index]:
+            self.pool.state[self.index] = STANDING
+            self.pool.timer[self.index] = self.pool.MIN_STANDING_PERIOD
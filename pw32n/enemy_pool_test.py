@@ -0,0 +1,220 @@
+import random
+import unittest
+
+import numpy as np
+
+from pw32n import sprite_images, tiles
+from pw32n.enemy_pool import (
+    EnemyPool,
+    LevelOfDetail,
+    PooledEnemyModel,
+    STANDING,
+    WANDERING,
+    FIGHTING,
+)
+from pw32n.geography import Geography, OriginPoint
+from pw32n.models import PlayerModel, EnemyModel
+from pw32n.tile_picker import TilePicker
+from pw32n.tile_store import TileStore
+from pw32n.units import Secs
+
+
+class EnemyPoolTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool = EnemyPool(capacity=2, seed=0)
+
+    def spawn(self, x: int = 0, y: int = 0, strength: float = 1.0) -> int:
+        handle = self.pool.spawn(OriginPoint(x, y), strength, sprite_images.ROBOT_IMAGE)
+        return handle.index
+
+    def test_spawn_and_handle(self) -> None:
+        handle = self.pool.spawn(OriginPoint(10, -20), 3.0, sprite_images.ROBOT_IMAGE)
+        self.assertEqual(len(self.pool), 1)
+        self.assertTrue(handle.is_alive)
+        self.assertEqual(handle.position, OriginPoint(10, -20))
+        self.assertEqual(handle.strength, 3.0)
+        self.assertEqual(handle.state, STANDING)
+        self.assertEqual(handle.sprite_image, sprite_images.ROBOT_IMAGE)
+
+    def test_handles_use_slots(self) -> None:
+        handle = self.pool.handle(self.spawn())
+        with self.assertRaises(AttributeError):
+            handle.__dict__
+
+    def test_grows_past_its_capacity(self) -> None:
+        indices = [self.spawn(x=i) for i in range(5)]
+        self.assertEqual(len(set(indices)), 5)
+        self.assertGreaterEqual(self.pool.capacity, 5)
+        self.assertEqual(
+            [self.pool.handle(i).position.x for i in indices], list(range(5))
+        )
+
+    def test_kill_reuses_slots_and_invalidates_handles(self) -> None:
+        index = self.spawn()
+        handle = self.pool.handle(index)
+        self.pool.kill(index)
+        self.assertEqual(len(self.pool), 0)
+        self.assertFalse(handle.is_alive)
+
+        # Killing twice is harmless.
+        self.pool.kill(index)
+        self.assertEqual(len(self.pool), 0)
+
+        self.assertEqual(self.spawn(), index)
+        self.assertFalse(handle.is_alive)
+
+    def test_update_wanders_and_stops(self) -> None:
+        index = self.spawn()
+        self.pool.update(EnemyPool.MAX_STANDING_PERIOD)
+        self.assertEqual(self.pool.state[index], WANDERING)
+
+        moved = self.pool.update(Secs(0.1))
+        self.assertIn(index, moved)
+        self.assertNotEqual((self.pool.x[index], self.pool.y[index]), (0.0, 0.0))
+
+        self.pool.update(EnemyPool.MAX_WANDERING_PERIOD)
+        self.assertEqual(self.pool.state[index], STANDING)
+        self.assertEqual(len(self.pool.update(Secs(0.0))), 0)
+
+    def test_update_leaves_the_dead_and_fighting_alone(self) -> None:
+        dead = self.spawn()
+        self.pool.kill(dead)
+        fighting = self.spawn()
+        self.pool.state[fighting] = FIGHTING
+        timer = self.pool.timer[fighting]
+        self.pool.update(Secs(100.0))
+        self.assertEqual(self.pool.state[fighting], FIGHTING)
+        self.assertEqual(self.pool.timer[fighting], timer)
+
+    def test_cull(self) -> None:
+        near = self.spawn(x=10)
+        far = self.spawn(x=1000)
+        culled = self.pool.cull(OriginPoint(0, 0), 100, 100)
+        self.assertEqual(list(culled), [far])
+        self.assertTrue(self.pool.alive[near])
+        self.assertFalse(self.pool.alive[far])
+
+    def test_level_of_detail(self) -> None:
+        level_of_detail = LevelOfDetail(OriginPoint(0, 0), 100, 100, 1000, 1000)
+        on_screen = self.spawn(x=10)
+        near = [self.spawn(x=500) for _ in range(EnemyPool.NEAR_TICK_PERIOD)]
+        far = self.spawn(x=5000)
+        last_ticked = self.pool.last_ticked
+        for frame in range(EnemyPool.NEAR_TICK_PERIOD):
+            self.pool.update(Secs(0.1), level_of_detail=level_of_detail)
+            self.assertEqual(self.pool.ticked, 2)
+            self.assertAlmostEqual(last_ticked[on_screen], self.pool.clock)
+
+        # Each of the near enemies was ticked once, on a different frame.
+        self.assertEqual(
+            sorted(round(last_ticked[index], 6) for index in near), [0.1, 0.2, 0.3, 0.4]
+        )
+        self.assertEqual(last_ticked[far], 0.0)
+
+    def test_dormant_enemies_are_fast_forwarded(self) -> None:
+        index = self.spawn(x=5000)
+        level_of_detail = LevelOfDetail(OriginPoint(0, 0), 100, 100, 1000, 1000)
+        for _ in range(100):
+            self.pool.update(Secs(1.0), level_of_detail=level_of_detail)
+        self.assertEqual(self.pool.last_ticked[index], 0.0)
+
+        level_of_detail = LevelOfDetail(OriginPoint(5000, 0), 5000, 5000, 5000, 5000)
+        moved = self.pool.update(Secs(1.0), level_of_detail=level_of_detail)
+        self.assertEqual(list(moved), [index])
+        self.assertEqual(self.pool.fast_forwarded, 1)
+        self.assertEqual(self.pool.ticked, 0)
+        self.assertEqual(self.pool.state[index], STANDING)
+        self.assertNotEqual((self.pool.x[index], self.pool.y[index]), (5000.0, 0.0))
+
+        self.pool.update(Secs(1.0), level_of_detail=level_of_detail)
+        self.assertEqual(self.pool.fast_forwarded, 0)
+        self.assertEqual(self.pool.ticked, 1)
+
+
+class EnemyPoolCrateTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.geo: Geography[tiles.Tile] = Geography()
+        self.tile_store = TileStore(self.geo)
+        self.pool = EnemyPool(seed=0)
+
+    def wander(self, x: int, y: int, velocity_x: float, velocity_y: float) -> int:
+        index = self.pool.spawn(OriginPoint(x, y), 1.0, sprite_images.ROBOT_IMAGE).index
+        self.pool.state[index] = WANDERING
+        self.pool.timer[index] = EnemyPool.MAX_WANDERING_PERIOD
+        self.pool.velocity_x[index] = velocity_x
+        self.pool.velocity_y[index] = velocity_y
+        return index
+
+    def test_wanderers_turn_around_at_crates(self) -> None:
+        self.tile_store.set_by_index(1, 0, tiles.BOX_CRATE_TILE.id)
+        index = self.wander(0, 0, EnemyPool.WANDERING_SPEED, 0.0)
+        moved = self.pool.update(Secs(0.1), tile_store=self.tile_store)
+        self.assertEqual(len(moved), 0)
+        self.assertEqual(self.pool.x[index], 0.0)
+        self.assertEqual(self.pool.velocity_x[index], -EnemyPool.WANDERING_SPEED)
+
+    def test_enemies_slide_along_crates(self) -> None:
+        self.tile_store.set_by_index(1, 0, tiles.BOX_CRATE_TILE.id)
+        index = self.wander(0, 0, 60.0, 60.0)
+        self.pool.update(Secs(0.1), tile_store=self.tile_store)
+        self.assertEqual((self.pool.x[index], self.pool.y[index]), (0.0, 6.0))
+
+    def test_ungenerated_tiles_dont_block(self) -> None:
+        index = self.wander(0, 0, EnemyPool.WANDERING_SPEED, 0.0)
+        self.pool.update(Secs(0.1), tile_store=self.tile_store)
+        self.assertEqual(self.pool.x[index], 6.0)
+
+    def test_enemies_never_walk_into_crates(self) -> None:
+        random.seed(0)
+        tile_picker = TilePicker(self.geo, self.tile_store)
+        for col in range(-20, 20):
+            for row in range(-20, 20):
+                tile_picker.get_tile(
+                    OriginPoint(col * self.geo.tile_width, row * self.geo.tile_height)
+                )
+        for col in range(-10, 10):
+            for row in range(-10, 10):
+                p = OriginPoint(col * self.geo.tile_width, row * self.geo.tile_height)
+                if self.geo.tile_map.peek(p).is_walkable:
+                    self.pool.spawn(p, 1.0, sprite_images.ROBOT_IMAGE)
+        for _ in range(600):
+            self.pool.update(Secs(1 / 10), tile_store=self.tile_store)
+        alive = self.pool.alive_indices()
+        self.assertFalse(
+            np.any(
+                self.pool.is_blocked(
+                    self.tile_store, self.pool.x[alive], self.pool.y[alive]
+                )
+            )
+        )
+
+
+class PooledEnemyModelTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool = EnemyPool(seed=0)
+        self.index = self.pool.spawn(
+            OriginPoint(64, 128), 5.0, sprite_images.ZOMBIE_IMAGE
+        ).index
+        self.player_model = PlayerModel()
+        self.model = self.pool.battle_model(self.index, self.player_model)
+
+    def test_is_an_enemy_model(self) -> None:
+        self.assertIsInstance(self.model, EnemyModel)
+        self.assertIsInstance(self.model, PooledEnemyModel)
+        self.assertEqual(self.model.sprite_image, sprite_images.ZOMBIE_IMAGE)
+        self.assertEqual(self.model.position, OriginPoint(64, 128))
+
+    def test_strength_lives_in_the_pool(self) -> None:
+        self.assertEqual(self.model.strength, 5.0)
+        self.model.strength -= 2.0
+        self.assertEqual(self.pool.strength[self.index], 3.0)
+        self.model.strength -= 100.0
+        self.assertTrue(self.model.is_dead)
+
+    def test_fighting_enemies_stay_put(self) -> None:
+        self.assertEqual(self.pool.state[self.index], FIGHTING)
+        self.pool.update(Secs(100.0))
+        self.assertEqual(self.model.position, OriginPoint(64, 128))
+
+        self.model.on_battle_view_end()
+        self.assertEqual(self.pool.state[self.index], STANDING)
@@ -2,10 +2,12 @@ from typing import Any
 
 import arcade
 
-from pw32n import models
+from pw32n import enemy_pool
 
 
 class EnemySprite(arcade.Sprite):
-    def __init__(self, model: models.EnemyModel, *args: Any, **kargs: Any) -> None:
+    def __init__(
+        self, handle: enemy_pool.EnemyHandle, *args: Any, **kargs: Any
+    ) -> None:
         super().__init__(*args, **kargs)
-        self.model = model
+        self.handle = handle
@@ -0,0 +1,139 @@
+"""A structured log of what happened during a session, for analysis after the fact.
+
+The game emits events on an EventBus:
+
+    window.events.emit("enemy_spawned", index=3, strength=1.5, distance=1200.0)
+
+Nobody is listening unless the game was started with an event log, and emit is called for every
+tile that's generated or evicted, so hot paths check events.enabled first to skip building the
+keyword arguments at all.
+
+Anything can subscribe to the bus. EventLog is the subscriber that streams events to a JSONL
+file, one event per line. emit runs on the frame loop, so EventLog never does I/O there. It
+just appends the event to a bounded buffer. A background thread drains the buffer and does the
+JSON encoding and writing. If the writer falls behind and the buffer fills up, new events are
+dropped and counted rather than making the frame loop wait. The count is written at the end of
+the file when the log is closed.
+
+These are the events the game emits, and where:
+
+- tile_generated and tile_reused: WorldView.get_tile, with whatever TilePicker.get_tile returned
+- tile_evicted: GameWindow.on_tile_evicted
+- enemy_spawned: WorldView.possibly_create_an_enemy
+- new_territory: WorldView.visit_player_tile
+- battle_started: BattleView.__init__
+- battle_move and damage: BattleView, as the BattleObserver of both combatants
+- battle_ended: BattleView.on_enemy_died
+
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, NamedTuple, TextIO
+
+
+class Event(NamedTuple):
+    time: float
+    kind: str
+    fields: dict[str, Any]
+
+
+Subscriber = Callable[[Event], None]
+
+
+class EventBus:
+    def __init__(self) -> None:
+        self.subscribers: list[Subscriber] = []
+
+        # This is True if anybody is listening.
+        self.enabled = False
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.append(subscriber)
+        self.enabled = True
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.remove(subscriber)
+        self.enabled = bool(self.subscribers)
+
+    def emit(self, kind: str, **fields: Any) -> None:
+        # Don't even build the event if nobody is listening.
+        if not self.enabled:
+            return
+        event = Event(time.time(), kind, fields)
+        for subscriber in self.subscribers:
+            subscriber(event)
+
+
+class EventLog:
+    # How many events can be waiting for the writer before we start dropping them.
+    CAPACITY = 10_000
+
+    # How often the writer wakes up to drain the buffer.
+    FLUSH_PERIOD = 0.1
+
+    def __init__(self, path: str, capacity: int = CAPACITY) -> None:
+        self.path = path
+        self.capacity = capacity
+        self.dropped = 0
+        self.written = 0
+
+        # deque's append and popleft are atomic, so the frame loop and the writer can share it
+        # without a lock. Only the frame loop appends, so it never grows past capacity.
+        self.buffer: deque[Event] = deque()
+
+        self._stopping = threading.Event()
+        self._file = open(path, "w")
+        self._thread = threading.Thread(
+            target=self._run, name="EventLog writer", daemon=True
+        )
+        self._thread.start()
+
+    def __call__(self, event: Event) -> None:
+        """This is the EventBus subscriber. It never blocks."""
+        if len(self.buffer) >= self.capacity:
+            self.dropped += 1
+            return
+        self.buffer.append(event)
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.FLUSH_PERIOD):
+            self._drain(self._file)
+        self._drain(self._file)
+
+    def _drain(self, f: TextIO) -> None:
+        buffer = self.buffer
+        if not buffer:
+            return
+        while buffer:
+            event = buffer.popleft()
+            record = {"time": event.time, "kind": event.kind}
+            record.update(event.fields)
+            f.write(json.dumps(record, default=str))
+            f.write("\n")
+            self.written += 1
+        f.flush()
+
+    def close(self) -> None:
+        """Write everything that's left, plus a final event with the number of dropped events."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._thread.join()
+        record = {
+            "time": time.time(),
+            "kind": "event_log_closed",
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+        self._file.write(json.dumps(record))
+        self._file.write("\n")
+        self._file.close()
+
+    def report(self) -> str:
+        return (
+            f"Event log: {self.written} events written to {self.path}, "
+            f"{self.dropped} dropped"
+        )
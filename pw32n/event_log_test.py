@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+from typing import Any
+
+from pw32n.event_log import Event, EventBus, EventLog
+
+
+class EventBusTestCase(unittest.TestCase):
+    def test_emit(self) -> None:
+        bus = EventBus()
+        self.assertFalse(bus.enabled)
+        bus.emit("nobody_is_listening")
+        events: list[Event] = []
+        bus.subscribe(events.append)
+        self.assertTrue(bus.enabled)
+        bus.emit("enemy_spawned", strength=1.5)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].kind, "enemy_spawned")
+        self.assertEqual(events[0].fields, {"strength": 1.5})
+        bus.unsubscribe(events.append)
+        self.assertFalse(bus.enabled)
+        bus.emit("enemy_spawned", strength=2.5)
+        self.assertEqual(len(events), 1)
+
+
+class SlowEventLog(EventLog):
+
+    """The writer doesn't get around to draining the buffer until it's closed."""
+
+    FLUSH_PERIOD = 60.0
+
+
+class EventLogTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "events.jsonl")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def read_records(self) -> list[dict[str, Any]]:
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_writes_jsonl(self) -> None:
+        event_log = EventLog(self.path)
+        bus = EventBus()
+        bus.subscribe(event_log)
+        for i in range(100):
+            bus.emit("tile_generated", x=i, y=-i)
+        event_log.close()
+
+        records = self.read_records()
+        self.assertEqual(len(records), 101)
+        self.assertEqual(records[5]["kind"], "tile_generated")
+        self.assertEqual((records[5]["x"], records[5]["y"]), (5, -5))
+        self.assertEqual(records[-1]["kind"], "event_log_closed")
+        self.assertEqual(records[-1]["written"], 100)
+        self.assertEqual(records[-1]["dropped"], 0)
+
+        # Closing twice is harmless.
+        event_log.close()
+
+    def test_drops_events_instead_of_blocking(self) -> None:
+        event_log = SlowEventLog(self.path, capacity=10)
+        bus = EventBus()
+        bus.subscribe(event_log)
+        for i in range(25):
+            bus.emit("tile_reused", x=i, y=0)
+        self.assertEqual(len(event_log.buffer), 10)
+        self.assertEqual(event_log.dropped, 15)
+        event_log.close()
+
+        records = self.read_records()
+        self.assertEqual([i["x"] for i in records[:-1]], list(range(10)))
+        self.assertEqual(records[-1]["dropped"], 15)
+        self.assertIn("dropped", event_log.report())
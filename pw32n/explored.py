@@ -0,0 +1,131 @@
+"""Remember every tile the player has ever stood on, a bit per tile.
+
+This is separate from geo.tile_map on purpose. The tile map forgets tiles when it's full, but
+exploration history should last forever (and get saved with the game).
+
+The bits live in CHUNK_SIZE x CHUNK_SIZE chunks, and only chunks with at least one visited tile
+exist. Each chunk is a Python int used as a bitset: bit (row * CHUNK_SIZE + col) is the tile at
+(col, row) within the chunk. Tiles are addressed by tile index, like TileStore.
+
+"""
+
+import struct
+from typing import Iterator
+
+CHUNK_SIZE = 64
+CHUNK_BITS = CHUNK_SIZE * CHUNK_SIZE
+CHUNK_BYTES = CHUNK_BITS // 8
+
+ChunkKey = tuple[int, int]
+
+_MAGIC = b"PW32NEXP"
+_HEADER = struct.Struct("<8sI")
+_CHUNK_HEADER = struct.Struct("<ii")
+
+# _ROW_MASKS[n] has the low n bits set.
+_ROW_MASKS = [(1 << n) - 1 for n in range(CHUNK_SIZE + 1)]
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+def _rect_mask(left: int, right: int, bottom: int, top: int) -> int:
+    """Return a chunk mask for the local columns [left, right) and rows [bottom, top)."""
+    row_mask = _ROW_MASKS[right - left] << left
+    mask = 0
+    for row in range(bottom, top):
+        mask |= row_mask << (row * CHUNK_SIZE)
+    return mask
+
+
+class ExploredMap:
+    def __init__(self) -> None:
+        self.chunks: dict[ChunkKey, int] = {}
+        self.count = 0
+
+    def __len__(self) -> int:
+        """How many tiles have been visited."""
+        return self.count
+
+    def is_visited(self, col: int, row: int) -> bool:
+        bits = self.chunks.get((col // CHUNK_SIZE, row // CHUNK_SIZE), 0)
+        return bool(bits >> ((row % CHUNK_SIZE) * CHUNK_SIZE + col % CHUNK_SIZE) & 1)
+
+    def visit(self, col: int, row: int) -> bool:
+        """Mark a tile as visited. Returns True if it's new territory."""
+        key = (col // CHUNK_SIZE, row // CHUNK_SIZE)
+        bit = 1 << ((row % CHUNK_SIZE) * CHUNK_SIZE + col % CHUNK_SIZE)
+        bits = self.chunks.get(key, 0)
+        if bits & bit:
+            return False
+        self.chunks[key] = bits | bit
+        self.count += 1
+        return True
+
+    def _chunk_parts(
+        self, left: int, right: int, bottom: int, top: int
+    ) -> Iterator[tuple[int, int]]:
+        """Yield (bits, mask) for every existing chunk overlapping the rect."""
+        for chunk_x in range(left // CHUNK_SIZE, (right - 1) // CHUNK_SIZE + 1):
+            chunk_left = chunk_x * CHUNK_SIZE
+            for chunk_y in range(bottom // CHUNK_SIZE, (top - 1) // CHUNK_SIZE + 1):
+                bits = self.chunks.get((chunk_x, chunk_y))
+                if not bits:
+                    continue
+                chunk_bottom = chunk_y * CHUNK_SIZE
+                yield bits, _rect_mask(
+                    max(left - chunk_left, 0),
+                    min(right - chunk_left, CHUNK_SIZE),
+                    max(bottom - chunk_bottom, 0),
+                    min(top - chunk_bottom, CHUNK_SIZE),
+                )
+
+    def count_in_rect(self, left: int, right: int, bottom: int, top: int) -> int:
+        """How many tiles in the columns [left, right) and rows [bottom, top) were visited?"""
+        if left >= right or bottom >= top:
+            return 0
+        return sum(
+            _popcount(bits & mask)
+            for bits, mask in self._chunk_parts(left, right, bottom, top)
+        )
+
+    def any_in_rect(self, left: int, right: int, bottom: int, top: int) -> bool:
+        if left >= right or bottom >= top:
+            return False
+        return any(
+            bits & mask for bits, mask in self._chunk_parts(left, right, bottom, top)
+        )
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(_MAGIC, len(self.chunks))]
+        for (chunk_x, chunk_y), bits in sorted(self.chunks.items()):
+            parts.append(_CHUNK_HEADER.pack(chunk_x, chunk_y))
+            parts.append(bits.to_bytes(CHUNK_BYTES, "little"))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ExploredMap":
+        magic, chunk_count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not an explored map")
+        explored = cls()
+        offset = _HEADER.size
+        for _ in range(chunk_count):
+            key = _CHUNK_HEADER.unpack_from(data, offset)
+            offset += _CHUNK_HEADER.size
+            bits = int.from_bytes(data[offset : offset + CHUNK_BYTES], "little")
+            offset += CHUNK_BYTES
+            if bits:
+                explored.chunks[key] = bits
+                explored.count += _popcount(bits)
+        return explored
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "ExploredMap":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
@@ -0,0 +1,71 @@
+import os
+import random
+import tempfile
+import unittest
+
+from pw32n.explored import CHUNK_SIZE, ExploredMap
+
+
+class ExploredMapTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.explored = ExploredMap()
+
+    def test_visit(self) -> None:
+        self.assertFalse(self.explored.is_visited(-1, 5))
+        self.assertTrue(self.explored.visit(-1, 5))
+        self.assertFalse(self.explored.visit(-1, 5))
+        self.assertTrue(self.explored.is_visited(-1, 5))
+        self.assertFalse(self.explored.is_visited(-1, 4))
+        self.assertFalse(self.explored.is_visited(-1 + CHUNK_SIZE, 5))
+        self.assertEqual(len(self.explored), 1)
+        self.assertEqual(list(self.explored.chunks), [(-1, 0)])
+
+    def test_rect_queries_match_brute_force(self) -> None:
+        rng = random.Random(0)
+        visited = set()
+        for _ in range(500):
+            col = rng.randrange(-100, 100)
+            row = rng.randrange(-100, 100)
+            self.explored.visit(col, row)
+            visited.add((col, row))
+        self.assertEqual(len(self.explored), len(visited))
+
+        for _ in range(50):
+            left = rng.randrange(-120, 120)
+            right = left + rng.randrange(0, 150)
+            bottom = rng.randrange(-120, 120)
+            top = bottom + rng.randrange(0, 150)
+            expected = sum(
+                1
+                for (col, row) in visited
+                if left <= col < right and bottom <= row < top
+            )
+            self.assertEqual(
+                self.explored.count_in_rect(left, right, bottom, top), expected
+            )
+            self.assertEqual(
+                self.explored.any_in_rect(left, right, bottom, top), expected > 0
+            )
+
+    def test_serialization(self) -> None:
+        for i in range(200):
+            self.explored.visit(i * 7 - 300, i * 3 - 100)
+        data = self.explored.to_bytes()
+        loaded = ExploredMap.from_bytes(data)
+        self.assertEqual(loaded.chunks, self.explored.chunks)
+        self.assertEqual(len(loaded), 200)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "explored.bin")
+            self.explored.save(path)
+            self.assertEqual(ExploredMap.load(path).chunks, self.explored.chunks)
+
+        with self.assertRaises(ValueError):
+            ExploredMap.from_bytes(b"x" * len(data))
+
+    def test_a_few_bits_per_tile(self) -> None:
+        for col in range(CHUNK_SIZE):
+            for row in range(CHUNK_SIZE):
+                self.explored.visit(col, row)
+        data = self.explored.to_bytes()
+        self.assertLess(len(data) * 8 / len(self.explored), 1.1)
@@ -0,0 +1,52 @@
+"""Run the simulation in fixed size steps, no matter how often arcade calls on_update.
+
+arcade calls on_update once per frame with however much time passed, which is about 1/60 s
+when things are going well, but can be anything. If the simulation just uses that delta_time
+(or worse, ignores it), how fast the player walks and where she ends up after bumping into a
+crate depend on the frame rate.
+
+Instead, on_update adds delta_time to an accumulator and runs as many STEP sized steps as fit.
+Whatever is left over carries into the next frame. On a slow machine, a frame runs several steps
+so the game doesn't slow down; on a fast one, some frames run no steps at all. Drawing then
+interpolates between the last two steps using alpha, the fraction of a step that's left over,
+so motion stays smooth even when steps and frames don't line up.
+
+If we fall more than MAX_LAG behind (e.g. while the window is being dragged), the extra time is
+dropped rather than simulated all at once.
+
+"""
+
+from pw32n.units import Secs
+
+# Without this, 1/60 s of accumulated time is sometimes a hair less than 2 steps of 1/120 s.
+_EPSILON = 1e-9
+
+
+class FixedTimestep:
+    STEP = Secs(1 / 120)
+    MAX_LAG = Secs(0.25)
+
+    def __init__(self, step: Secs = STEP, max_lag: Secs = MAX_LAG) -> None:
+        self.step = step
+        self.max_lag = max_lag
+        self.accumulator = Secs(0.0)
+
+        # These are just for curiosity's sake.
+        self.steps = 0
+        self.dropped_time = Secs(0.0)
+
+    def advance(self, delta_time: Secs) -> int:
+        """Add delta_time to the accumulator and return how many steps to run now."""
+        accumulator = self.accumulator + delta_time
+        if accumulator > self.max_lag:
+            self.dropped_time += accumulator - self.max_lag
+            accumulator = self.max_lag
+        steps = int(accumulator / self.step + _EPSILON)
+        self.accumulator = max(accumulator - steps * self.step, 0.0)
+        self.steps += steps
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """How far we are between the last step and the next one, from 0.0 to 1.0."""
+        return min(self.accumulator / self.step, 1.0)
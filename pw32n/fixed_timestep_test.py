@@ -0,0 +1,27 @@
+import unittest
+
+from pw32n.fixed_timestep import FixedTimestep
+
+
+class FixedTimestepTestCase(unittest.TestCase):
+    def test_steps_and_alpha(self) -> None:
+        timestep = FixedTimestep(step=0.25, max_lag=1.0)
+        self.assertEqual(timestep.advance(0.125), 0)
+        self.assertEqual(timestep.alpha, 0.5)
+        self.assertEqual(timestep.advance(0.375), 2)
+        self.assertEqual(timestep.alpha, 0.0)
+        self.assertEqual(timestep.advance(0.3125), 1)
+        self.assertEqual(timestep.alpha, 0.25)
+        self.assertEqual(timestep.steps, 3)
+
+    def test_same_number_of_steps_at_any_frame_rate(self) -> None:
+        for hz in (30, 60, 144, 1000):
+            timestep = FixedTimestep()
+            steps = sum(timestep.advance(1.0 / hz) for _ in range(hz))
+            self.assertIn(steps, (119, 120), hz)
+
+    def test_drops_time_when_too_far_behind(self) -> None:
+        timestep = FixedTimestep(step=0.25, max_lag=1.0)
+        self.assertEqual(timestep.advance(3.0), 4)
+        self.assertEqual(timestep.dropped_time, 2.0)
+        self.assertEqual(timestep.alpha, 0.0)
@@ -0,0 +1,189 @@
+"""A shared map of which way to go to reach the player, so that enemies can chase her.
+
+Instead of having every enemy search for its own path, we do one breadth first search outward
+from the player's tile over the walkable tiles in a square around her. That gives each tile its
+distance (in steps) from the player, and each tile points at the neighbor that's one step closer.
+Any number of enemies can then follow the arrows downhill by looking up the tile they're on, so
+the cost of the search doesn't depend on how many enemies there are.
+
+The search is only redone when the player moves to a different tile or one of the tiles in the
+square changes (see TileStore.subscribe). Otherwise, update does nothing.
+
+Tiles that haven't been generated yet count as unwalkable, just like crates.
+
+"""
+
+import collections
+
+import numpy as np
+import numpy.typing as npt
+
+from pw32n import geography
+from pw32n.tile_store import CHUNK_SIZE, WALKABLE, ChunkKey, TileStore
+
+# The distance of tiles that can't reach the player.
+UNREACHABLE = np.iinfo(np.int32).max
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int32]
+
+# These are (col, row) steps in the order we try them.
+_STEPS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+
+class FlowField:
+    # How many tiles the square reaches out from the player in each direction.
+    RADIUS = 16
+
+    def __init__(self, tile_store: TileStore, radius: int = RADIUS) -> None:
+        self.tile_store = tile_store
+        self.geo = tile_store.geo
+        self.radius = radius
+        self.size = 2 * radius + 1
+        self.dirty_chunks: set[ChunkKey] = tile_store.subscribe()
+
+        # The player's tile. The square goes from (col - radius, row - radius) to
+        # (col + radius, row + radius).
+        self.col = 0
+        self.row = 0
+        self.has_distances = False
+        self.updates = 0
+
+        shape = (self.size, self.size)
+        self.tile_ids = np.zeros(shape, np.uint8)
+        self.distances: IntArray = np.full(shape, UNREACHABLE, np.int32)
+
+        # The (col, row) step toward the player from each tile. It's (0, 0) for the player's
+        # tile and for tiles that can't reach her.
+        self.step_cols = np.zeros(shape, np.int8)
+        self.step_rows = np.zeros(shape, np.int8)
+
+    def player_tile(self, position: geography.OriginPoint) -> tuple[int, int]:
+        """Return the (col, row) of the tile at position."""
+        tile_point = self.geo.align_point(position)
+        return (
+            tile_point.x // self.geo.tile_width,
+            tile_point.y // self.geo.tile_height,
+        )
+
+    def is_stale(self, col: int, row: int) -> bool:
+        if not self.has_distances or col != self.col or row != self.row:
+            return True
+        if not self.dirty_chunks:
+            return False
+        left_chunk = (col - self.radius) // CHUNK_SIZE
+        right_chunk = (col + self.radius) // CHUNK_SIZE
+        bottom_chunk = (row - self.radius) // CHUNK_SIZE
+        top_chunk = (row + self.radius) // CHUNK_SIZE
+        return any(
+            left_chunk <= chunk_x <= right_chunk
+            and bottom_chunk <= chunk_y <= top_chunk
+            for chunk_x, chunk_y in self.dirty_chunks
+        )
+
+    def update(self, position: geography.OriginPoint) -> bool:
+        """Redo the search if the player moved to another tile or the tiles changed.
+
+        Returns True if it did the search.
+
+        """
+        col, row = self.player_tile(position)
+        is_stale = self.is_stale(col, row)
+        self.dirty_chunks.clear()
+        if not is_stale:
+            return False
+        self.col = col
+        self.row = row
+        self.has_distances = True
+        self.updates += 1
+        self.tile_store.copy_region(col - self.radius, row - self.radius, self.tile_ids)
+        self.search()
+        self.point_downhill()
+        return True
+
+    def search(self) -> None:
+        """Fill in the distances with a breadth first search from the player's tile."""
+        size = self.size
+
+        # Work on a flat list with a border of unwalkable tiles all the way around, so that we
+        # don't need to check whether each step falls off the edge.
+        width = size + 2
+        walkable = np.zeros((width, width), np.bool_)
+        walkable[1:-1, 1:-1] = WALKABLE[self.tile_ids]
+        is_open = walkable.ravel().tolist()
+        distances = [UNREACHABLE] * (width * width)
+        offsets = (width, -width, 1, -1)
+
+        start = (self.radius + 1) * width + self.radius + 1
+        distances[start] = 0
+        is_open[start] = False
+        queue = collections.deque([start])
+        while queue:
+            i = queue.popleft()
+            distance = distances[i] + 1
+            for offset in offsets:
+                j = i + offset
+                if is_open[j]:
+                    is_open[j] = False
+                    distances[j] = distance
+                    queue.append(j)
+
+        padded = np.array(distances, np.int32).reshape((width, width))
+        self.distances[:] = padded[1:-1, 1:-1]
+
+    def point_downhill(self) -> None:
+        """Point each tile at the neighbor that's closest to the player."""
+        size = self.size
+        padded = np.full((size + 2, size + 2), UNREACHABLE, np.int32)
+        padded[1:-1, 1:-1] = self.distances
+        best = self.distances.copy()
+        self.step_cols.fill(0)
+        self.step_rows.fill(0)
+        for step_col, step_row in _STEPS:
+            neighbor = padded[
+                1 + step_row : size + 1 + step_row, 1 + step_col : size + 1 + step_col
+            ]
+            is_better = neighbor < best
+            best[is_better] = neighbor[is_better]
+            self.step_cols[is_better] = step_col
+            self.step_rows[is_better] = step_row
+
+    def lookup(
+        self, x: FloatArray, y: FloatArray
+    ) -> tuple[IntArray, FloatArray, FloatArray]:
+        """Look up where a bunch of tile sized things should head next.
+
+        x and y are the OriginPoints of their top left corners, like EnemyPool's. This returns
+        their distances from the player in steps (UNREACHABLE if they're outside the square or
+        can't get to her) and the centers of the tiles they should head for next.
+
+        """
+        tile_width = self.geo.tile_width
+        tile_height = self.geo.tile_height
+        center_x = x + tile_width / 2
+        center_y = y - tile_height / 2
+
+        # See Geography.align_point: x rounds down and y rounds up.
+        cols = np.floor(center_x / tile_width).astype(np.intp)
+        rows = np.ceil(center_y / tile_height).astype(np.intp)
+        local_cols = cols - (self.col - self.radius)
+        local_rows = rows - (self.row - self.radius)
+        is_inside = (
+            (local_cols >= 0)
+            & (local_cols < self.size)
+            & (local_rows >= 0)
+            & (local_rows < self.size)
+        )
+        local_cols = np.where(is_inside, local_cols, 0)
+        local_rows = np.where(is_inside, local_rows, 0)
+
+        distances = np.where(
+            is_inside, self.distances[local_rows, local_cols], UNREACHABLE
+        ).astype(np.int32)
+        next_cols = cols + self.step_cols[local_rows, local_cols]
+        next_rows = rows + self.step_rows[local_rows, local_cols]
+
+        # The center of the tile at (col, row) is half a tile right of and below its corner.
+        target_x = ((next_cols + 0.5) * tile_width).astype(np.float64)
+        target_y = ((next_rows - 0.5) * tile_height).astype(np.float64)
+        return distances, target_x, target_y
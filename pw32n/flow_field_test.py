@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+
+from pw32n import sprite_images, tiles
+from pw32n.enemy_pool import CHASING, STANDING, EnemyPool
+from pw32n.flow_field import UNREACHABLE, FlowField
+from pw32n.geography import Geography, OriginPoint
+from pw32n.tile_store import TileStore
+from pw32n.units import Secs
+
+# The player is at P, and there's a wall of crates (#) between her and the enemy at E.
+MAP = """
+.......
+...P...
+.......
+..###..
+...E...
+"""
+
+
+class FlowFieldTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.geo: Geography[tiles.Tile] = Geography()
+        self.store = TileStore(self.geo)
+        self.points: dict[str, OriginPoint] = {}
+        lines = MAP.strip().splitlines()
+        for i, line in enumerate(lines):
+            row = len(lines) - 1 - i
+            for col, c in enumerate(line):
+                tile = tiles.BOX_CRATE_TILE if c == "#" else tiles.GRASS_TILE
+                self.store.set_by_index(col, row, tile.id)
+                self.points[c] = OriginPoint(
+                    col * self.geo.tile_width, row * self.geo.tile_height
+                )
+        self.flow_field = FlowField(self.store, radius=8)
+
+        # The player's position is the middle of her tile.
+        p = self.points["P"]
+        self.player_position = OriginPoint(
+            p.x + self.geo.tile_width // 2, p.y - self.geo.tile_height // 2
+        )
+
+    def lookup(self, p: OriginPoint) -> tuple[int, float, float]:
+        distances, target_x, target_y = self.flow_field.lookup(
+            np.array([p.x], np.float64), np.array([p.y], np.float64)
+        )
+        return int(distances[0]), float(target_x[0]), float(target_y[0])
+
+    def test_goes_around_crates(self) -> None:
+        self.assertTrue(self.flow_field.update(self.player_position))
+        e = self.points["E"]
+
+        # E has to go east 2, north 3, and west 2 to get around the wall.
+        distance, target_x, target_y = self.lookup(e)
+        self.assertEqual(distance, 7)
+        self.assertEqual(
+            (target_x, target_y),
+            (e.x + 1.5 * self.geo.tile_width, e.y - 0.5 * self.geo.tile_height),
+        )
+        self.assertEqual(self.lookup(self.points["P"])[0], 0)
+        self.assertEqual(self.lookup(self.points["#"])[0], UNREACHABLE)
+        self.assertEqual(self.lookup(OriginPoint(-64 * 20, 0))[0], UNREACHABLE)
+
+    def test_only_updates_when_something_changed(self) -> None:
+        self.assertTrue(self.flow_field.update(self.player_position))
+        self.assertFalse(self.flow_field.update(self.player_position))
+
+        # Moving within the same tile doesn't count.
+        moved = OriginPoint(self.player_position.x + 5, self.player_position.y)
+        self.assertFalse(self.flow_field.update(moved))
+
+        # Changing a tile far away doesn't count either.
+        self.store.set_by_index(1000, 1000, tiles.GRASS_TILE.id)
+        self.assertFalse(self.flow_field.update(moved))
+
+        # Opening up the wall does.
+        self.store.set_by_index(3, 1, tiles.GRASS_TILE.id)
+        self.assertTrue(self.flow_field.update(moved))
+        self.assertEqual(self.lookup(self.points["E"])[0], 3)
+
+        moved = OriginPoint(moved.x + self.geo.tile_width, moved.y)
+        self.assertTrue(self.flow_field.update(moved))
+        self.assertEqual(self.flow_field.updates, 3)
+
+    def test_enemies_chase_the_player(self) -> None:
+        pool = EnemyPool(seed=0)
+        near = pool.spawn(self.points["E"], 1.0, sprite_images.ROBOT_IMAGE).index
+        far = pool.spawn(OriginPoint(-64 * 20, 0), 1.0, sprite_images.ROBOT_IMAGE).index
+        self.flow_field.update(self.player_position)
+
+        moved = pool.update(Secs(0.1), self.flow_field, self.player_position)
+        self.assertEqual(list(moved), [near])
+        self.assertEqual(pool.state[near], CHASING)
+        self.assertEqual(pool.state[far], STANDING)
+        self.assertGreater(pool.velocity_x[near], 0.0)
+        self.assertEqual(pool.velocity_y[near], 0.0)
+
+        # Once the player gets away, they give up.
+        pool.CHASING_DISTANCE = 0
+        pool.update(Secs(0.1), self.flow_field, self.player_position)
+        self.assertEqual(pool.state[near], STANDING)
@@ -0,0 +1,242 @@
+"""Time the expensive parts of each frame so that we can see what's causing stutters.
+
+Wrap each section of the frame in a with statement:
+
+    with profiler.section("update_tiles"):
+        self.update_tiles()
+
+and call on_frame once per frame, at the very end of the frame. When the profiler is disabled,
+section returns a shared do-nothing context manager, so the only cost is a method call.
+
+While it's enabled, the profiler keeps a rolling window of per-frame timings for each section
+(for the p50 / p99 / max overlay) and records every frame so that it can be written out as a CSV
+file or as a Chrome trace (load it at chrome://tracing or https://ui.perfetto.dev).
+
+"""
+
+import csv
+import json
+import time
+from collections import deque
+from types import TracebackType
+from typing import ContextManager, NamedTuple, Optional, Type
+
+# The sections the game times. Other names work too; they're added the first time they're used.
+SECTIONS = (
+    "physics_engine.update",
+    "update_tiles",
+    "update_enemies",
+    "sprite_list.move",
+    "on_draw",
+    "draw_text",
+)
+
+# The whole frame, from the end of one call to on_frame to the end of the next.
+FRAME = "frame"
+
+
+class SectionStats(NamedTuple):
+    p50: float
+    p99: float
+    max: float
+
+
+class TraceEvent(NamedTuple):
+    name: str
+    start: float
+    duration: float
+
+
+class RecordedFrame(NamedTuple):
+    start: float
+    duration: float
+    section_durations: dict[str, float]
+
+
+class _NullSection:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        pass
+
+
+NULL_SECTION = _NullSection()
+
+
+class _Section:
+    """There's exactly one of these per section name, and it's reused every frame."""
+
+    def __init__(self, profiler: "FrameProfiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.started_at = 0.0
+        self.duration_this_frame = 0.0
+        self.history: deque[float] = deque(maxlen=profiler.HISTORY)
+
+    def __enter__(self) -> None:
+        self.started_at = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        duration = time.perf_counter() - self.started_at
+        self.duration_this_frame += duration
+        if self.profiler.is_recording:
+            self.profiler.trace_events.append(
+                TraceEvent(self.name, self.started_at, duration)
+            )
+
+
+class FrameProfiler:
+    # How many frames the rolling stats cover.
+    HISTORY = 300
+
+    # Stop recording after this many frames so that leaving the profiler on doesn't eat all the
+    # memory. That's about half an hour at 60 FPS.
+    MAX_RECORDED_FRAMES = 100_000
+
+    def __init__(self, is_recording: bool = False) -> None:
+        """If is_recording is True, every frame is kept so that it can be dumped later."""
+        self.enabled = False
+        self.is_recording = is_recording
+        self.sections: dict[str, _Section] = {}
+        for name in SECTIONS:
+            self._get_section(name)
+        self.frame_history: deque[float] = deque(maxlen=self.HISTORY)
+        self.frame_started_at: Optional[float] = None
+        self.recorded_frames: list[RecordedFrame] = []
+        self.trace_events: list[TraceEvent] = []
+
+    def _get_section(self, name: str) -> _Section:
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = _Section(self, name)
+        return section
+
+    def section(self, name: str) -> ContextManager[None]:
+        if not self.enabled:
+            return NULL_SECTION
+        return self._get_section(name)
+
+    def toggle(self) -> None:
+        self.enabled = not self.enabled
+
+        # Don't count the time we spent disabled as part of a frame.
+        self.frame_started_at = None
+        for section in self.sections.values():
+            section.duration_this_frame = 0.0
+
+    def on_frame(self) -> None:
+        """End the current frame and start the next one."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_started_at is not None:
+            frame_duration = now - self.frame_started_at
+            self.frame_history.append(frame_duration)
+            if self.is_recording:
+                self.recorded_frames.append(
+                    RecordedFrame(
+                        start=self.frame_started_at,
+                        duration=frame_duration,
+                        section_durations={
+                            name: section.duration_this_frame
+                            for name, section in self.sections.items()
+                        },
+                    )
+                )
+                if len(self.recorded_frames) >= self.MAX_RECORDED_FRAMES:
+                    self.is_recording = False
+        for section in self.sections.values():
+            section.history.append(section.duration_this_frame)
+            section.duration_this_frame = 0.0
+        self.frame_started_at = now
+
+    def stats(self, name: str) -> SectionStats:
+        """Return the rolling stats for a section (or FRAME) in seconds."""
+        if name == FRAME:
+            history = self.frame_history
+        else:
+            history = self._get_section(name).history
+        if not history:
+            return SectionStats(0.0, 0.0, 0.0)
+        values = sorted(history)
+        return SectionStats(
+            p50=values[len(values) // 2],
+            p99=values[min(len(values) - 1, int(len(values) * 0.99))],
+            max=values[-1],
+        )
+
+    def overlay_lines(self) -> list[str]:
+        lines = [f"{'':24}{'p50':>8}{'p99':>8}{'max':>8}  (ms)"]
+        for name in (FRAME, *self.sections):
+            stats = self.stats(name)
+            lines.append(
+                f"{name:24}{stats.p50 * 1000:8.2f}{stats.p99 * 1000:8.2f}"
+                f"{stats.max * 1000:8.2f}"
+            )
+        return lines
+
+    def dump(self, path: str) -> None:
+        """Write the recorded frames to path. .json means a Chrome trace; anything else is CSV."""
+        if path.endswith(".json"):
+            self.dump_chrome_trace(path)
+        else:
+            self.dump_csv(path)
+
+    def dump_csv(self, path: str) -> None:
+        names = list(self.sections)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["frame", "start_ms", "frame_ms"] + [f"{i}_ms" for i in names]
+            )
+            start = self.recorded_frames[0].start if self.recorded_frames else 0.0
+            for i, frame in enumerate(self.recorded_frames):
+                writer.writerow(
+                    [
+                        i,
+                        f"{(frame.start - start) * 1000:.3f}",
+                        f"{frame.duration * 1000:.3f}",
+                    ]
+                    + [
+                        f"{frame.section_durations.get(name, 0.0) * 1000:.3f}"
+                        for name in names
+                    ]
+                )
+
+    def dump_chrome_trace(self, path: str) -> None:
+        """See the "Trace Event Format" doc. Complete ("X") events use microseconds."""
+        events = [
+            {
+                "name": FRAME,
+                "ph": "X",
+                "ts": frame.start * 1e6,
+                "dur": frame.duration * 1e6,
+                "pid": 0,
+                "tid": 0,
+            }
+            for frame in self.recorded_frames
+        ]
+        events += [
+            {
+                "name": event.name,
+                "ph": "X",
+                "ts": event.start * 1e6,
+                "dur": event.duration * 1e6,
+                "pid": 0,
+                "tid": 0,
+            }
+            for event in self.trace_events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
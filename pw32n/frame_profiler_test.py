@@ -0,0 +1,80 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from pw32n.frame_profiler import FRAME, FrameProfiler, NULL_SECTION, SECTIONS
+
+
+class FrameProfilerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.profiler = FrameProfiler(is_recording=True)
+
+    def run_frames(self, count: int) -> None:
+        for _ in range(count):
+            with self.profiler.section("update_tiles"):
+                pass
+            with self.profiler.section("custom"):
+                pass
+            self.profiler.on_frame()
+
+    def test_disabled_does_nothing(self) -> None:
+        self.assertIs(self.profiler.section("update_tiles"), NULL_SECTION)
+        self.run_frames(3)
+        self.assertEqual(self.profiler.stats(FRAME).max, 0.0)
+        self.assertEqual(self.profiler.recorded_frames, [])
+        self.assertEqual(self.profiler.trace_events, [])
+
+    def test_enabled_times_sections(self) -> None:
+        self.profiler.toggle()
+        self.run_frames(5)
+
+        # The first call to on_frame only starts the first frame.
+        self.assertEqual(len(self.profiler.recorded_frames), 4)
+        self.assertEqual(len(self.profiler.frame_history), 4)
+        self.assertEqual(len(self.profiler.trace_events), 10)
+        self.assertIn("custom", self.profiler.sections)
+        stats = self.profiler.stats("update_tiles")
+        self.assertGreater(stats.max, 0.0)
+        self.assertLessEqual(stats.p50, stats.p99)
+        self.assertLessEqual(stats.p99, stats.max)
+        self.assertGreaterEqual(self.profiler.stats(FRAME).max, stats.max)
+
+        lines = self.profiler.overlay_lines()
+        for name in (FRAME, "custom") + SECTIONS:
+            self.assertTrue(any(line.startswith(name) for line in lines), name)
+
+    def test_toggling_off_drops_the_partial_frame(self) -> None:
+        self.profiler.toggle()
+        self.run_frames(2)
+        self.profiler.toggle()
+        self.profiler.toggle()
+        self.run_frames(1)
+        self.assertEqual(len(self.profiler.recorded_frames), 1)
+
+    def test_stops_recording_at_the_limit(self) -> None:
+        self.profiler.MAX_RECORDED_FRAMES = 3
+        self.profiler.toggle()
+        self.run_frames(10)
+        self.assertEqual(len(self.profiler.recorded_frames), 3)
+        self.assertEqual(len(self.profiler.frame_history), 9)
+
+    def test_dump(self) -> None:
+        self.profiler.toggle()
+        self.run_frames(3)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, "frames.csv")
+            self.profiler.dump(csv_path)
+            with open(csv_path) as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 2)
+            self.assertIn("update_tiles_ms", rows[0])
+
+            trace_path = os.path.join(tmp_dir, "frames.json")
+            self.profiler.dump(trace_path)
+            with open(trace_path) as f:
+                events = json.load(f)["traceEvents"]
+            self.assertEqual(len([i for i in events if i["name"] == FRAME]), 2)
+            self.assertEqual(len([i for i in events if i["name"] == "update_tiles"]), 3)
+            self.assertTrue(all(i["ph"] == "X" for i in events))
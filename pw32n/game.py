@@ -1,26 +1,176 @@
+import argparse
+import functools
+import math
+import os
 import random
+import sys
+import time
+from typing import Any, NamedTuple, Sequence
 
 import arcade
 from pyglet.math import Vec2  # type: ignore
 
-from pw32n import geography, sprite_images, models, tiles, enemy_sprites, battle_moves
+from pw32n import (
+    geography,
+    sprite_images,
+    models,
+    tiles,
+    enemy_sprites,
+    enemy_pool,
+    battle_moves,
+    lookahead_ai,
+    gc_monitor,
+    tile_picker,
+    frame_profiler,
+    event_log,
+    metrics,
+    tile_streaming,
+    tile_store,
+    lod_pyramid,
+    minimap,
+    minimap_renderer,
+    lod_renderer,
+    explored,
+    flow_field,
+    hud,
+    idle_throttle,
+    fixed_timestep,
+    journal,
+    spectator,
+)
 
 SCREEN_TITLE = "Lil Miss Vampire"
 
 
+class WorldStatus(NamedTuple):
+
+    """What WorldView shows in its status bar, rounded to what's actually displayed."""
+
+    col: int
+    row: int
+    strength: float
+    explored_tiles: int
+    zoom_level: int
+
+
+class BattleStatus(NamedTuple):
+
+    """What BattleView shows in its status bar, rounded to what's actually displayed."""
+
+    is_weak: bool
+    strength: float
+    enemy_strength: float
+
+
+class GameOptions(NamedTuple):
+    gc_monitor: bool = False
+    profiler: bool = False
+    profiler_output: str = None
+    event_log: str = None
+    metrics_port: int = None
+    explored: str = None
+    idle_throttle: bool = False
+    journal: str = None
+    spectate: str = None
+
+
 class GameWindow(arcade.Window):
     STATUS_HEIGHT = 40
 
-    def __init__(self) -> None:
+    # How often to print the GC monitor's report.
+    GC_MONITOR_REPORT_PERIOD = 5.0
+
+    PROFILER_KEY = arcade.key.F3
+    PROFILER_LINE_HEIGHT = 16
+
+    # How often to write down the player's position and strength, if they changed.
+    JOURNAL_PLAYER_PERIOD = 0.5
+
+    def __init__(self, options: GameOptions = GameOptions()) -> None:
+        self.options = options
         self.geo: geography.Geography[tiles.Tile] = geography.Geography()
         super().__init__(
             self.geo.screen_width, self.geo.screen_height, SCREEN_TITLE, resizable=True
         )
 
+        self.gc_monitor: gc_monitor.GCMonitor = None
+        self.time_since_gc_monitor_report = 0.0
+        if options.gc_monitor:
+            self.gc_monitor = gc_monitor.GCMonitor()
+            self.gc_monitor.install()
+
+        # The profiler always exists so that the views can time their sections unconditionally.
+        # It costs almost nothing until it's toggled on.
+        self.profiler = frame_profiler.FrameProfiler(
+            is_recording=(options.profiler_output is not None)
+        )
+        if options.profiler:
+            self.profiler.toggle()
+
+        # Like the profiler, the event bus always exists. Emitting an event is nearly free when
+        # nothing is subscribed.
+        self.events = event_log.EventBus()
+        self.event_log: event_log.EventLog = None
+        if options.event_log:
+            self.event_log = event_log.EventLog(options.event_log)
+            self.events.subscribe(self.event_log)
+
+        self.metrics: metrics.GameMetrics = None
+        self.metrics_server: metrics.MetricsServer = None
+        if options.metrics_port is not None:
+            self.metrics = metrics.GameMetrics()
+            self.metrics_server = metrics.MetricsServer(
+                self.metrics.registry, options.metrics_port
+            )
+            print(
+                f"Serving metrics at http://127.0.0.1:{self.metrics_server.port}/metrics",
+                file=sys.stderr,
+            )
+
         # The models exist "outside" of the sprites because we have two different
         # views interacting with the same models.
         self.player_model = models.PlayerModel()
-        self.enemy_models: set[models.EnemyModel] = set()
+        self.enemy_pool = enemy_pool.EnemyPool()
+
+        # These live here rather than in WorldView so that they survive battles. The tile store
+        # mirrors geo.tile_map, so it needs to hear about evictions.
+        self.tile_store = tile_store.TileStore(self.geo)
+        self.tile_picker = tile_picker.TilePicker(self.geo, self.tile_store)
+        self.geo.tile_map.on_evict = self.on_tile_evicted
+        self.lod_pyramid = lod_pyramid.LODPyramid(self.tile_store)
+        self.minimap = minimap.Minimap(self.tile_store)
+        self.flow_field = flow_field.FlowField(self.tile_store)
+        self.minimap_renderer = minimap_renderer.MinimapRenderer(self.ctx, self.minimap)
+        self.lod_renderer = lod_renderer.LODRenderer(self.ctx, self.lod_pyramid)
+
+        # Unlike the tile store, this never forgets anything.
+        self.explored = explored.ExploredMap()
+        if options.explored and os.path.exists(options.explored):
+            self.explored = explored.ExploredMap.load(options.explored)
+
+        # When this is on, views only redraw when something changed, and updates slow down when
+        # nothing has changed for a while. See idle_throttle.
+        self.idle_throttle: idle_throttle.IdleThrottle = None
+        if options.idle_throttle:
+            self.idle_throttle = idle_throttle.IdleThrottle()
+
+        # This has to be set up before WorldView starts loading tiles.
+        self.journal: journal.Journal = None
+        self.time_since_journal_player = 0.0
+        self.journaled_player: journal.PlayerRecord = None
+        if options.journal:
+            if os.path.exists(options.journal):
+                self.restore(journal.recover(options.journal))
+            self.journal = journal.Journal(options.journal, self.journal_state())
+
+        # WorldView tells this about the tiles it shows, so it has to exist first too.
+        self.spectator: spectator.SpectatorStream = None
+        if options.spectate:
+            self.spectator = spectator.SpectatorStream(options.spectate, self.geo)
+            print(
+                f"Streaming to spectators at {self.spectator.address or options.spectate}",
+                file=sys.stderr,
+            )
 
         self.set_min_size(self.geo.min_screen_width, self.geo.min_screen_height)
         self.show_view(WorldView())
@@ -31,47 +181,276 @@ class GameWindow(arcade.Window):
         super().on_resize(width, height)
         self.geo.screen_width = width
         self.geo.screen_height = height
+        self.on_input()
 
-    def on_enemy_died(self, enemy: models.EnemyModel) -> None:
-        self.enemy_models.remove(enemy)
+    def on_update(self, delta_time: float) -> None:
+        # This gets called after the current view's on_update.
+        if self.gc_monitor:
+            self.gc_monitor.on_frame()
+            self.time_since_gc_monitor_report += delta_time
+            if self.time_since_gc_monitor_report >= self.GC_MONITOR_REPORT_PERIOD:
+                print(self.gc_monitor.report(), file=sys.stderr)
+                self.time_since_gc_monitor_report = 0.0
+        if self.metrics:
+            self.update_metrics(delta_time)
+        if self.idle_throttle:
+            self.apply_update_rate(self.idle_throttle.update_rate())
+        if self.journal:
+            self.time_since_journal_player += delta_time
+            if self.time_since_journal_player >= self.JOURNAL_PLAYER_PERIOD:
+                self.journal_player()
+                self.time_since_journal_player = 0.0
+        if self.spectator:
+            self.spectator.end_frame(delta_time, self.geo.position, self.enemy_pool)
+
+    def restore(self, state: journal.GameState) -> None:
+        """Pick up where a previous session left off. See journal."""
+        geo = self.geo
+        for (col, row), tile_id in state.tiles.items():
+            geo.tile_map.put(
+                geography.OriginPoint(col * geo.tile_width, row * geo.tile_height),
+                tiles.TILES_BY_ID[tile_id],
+            )
+            self.tile_store.set_by_index(col, row, tile_id)
+        self.tile_picker.regions.rebuild()
+        for enemy in state.enemies.values():
+            self.enemy_pool.spawn(
+                geography.OriginPoint(enemy.x, enemy.y),
+                enemy.strength,
+                enemy_pool.SPRITE_IMAGES[enemy.sprite_image_id],
+            )
+        if state.player is not None:
+            geo.position = geography.OriginPoint(state.player.x, state.player.y)
+            self.player_model.strength = state.player.strength
+
+    def journal_state(self) -> journal.GameState:
+        """Return everything the journal needs to know to start a new snapshot."""
+        geo = self.geo
+        state = journal.GameState()
+        for tile_point, tile in geo.tile_map.items():
+            state.tiles[
+                (tile_point.x // geo.tile_width, tile_point.y // geo.tile_height)
+            ] = tile.id
+        pool = self.enemy_pool
+        for index in pool.alive_indices().tolist():
+            handle = pool.handle(index)
+            state.enemies[index] = journal.EnemyRecord(
+                handle.position.x,
+                handle.position.y,
+                handle.strength,
+                int(pool.sprite_image_id[index]),
+            )
+        state.player = self.player_record()
+        return state
 
-    def draw_status_at_bottom(self, status: str) -> None:
-        """This is a helper function for the different views to have a similar status field at the bottom."""
-        arcade.draw_rectangle_filled(
-            center_x=self.width // 2,
-            center_y=self.STATUS_HEIGHT // 2,
-            width=self.width,
-            height=self.STATUS_HEIGHT,
-            color=arcade.color.ALMOND,
+    def player_record(self) -> journal.PlayerRecord:
+        return journal.PlayerRecord(
+            self.geo.position.x, self.geo.position.y, self.player_model.strength
         )
-        arcade.draw_text(
-            text=status,
-            start_x=10,
-            start_y=10,
-            color=arcade.color.BLACK_BEAN,
-            font_size=20,
+
+    def journal_player(self) -> None:
+        record = self.player_record()
+        if record != self.journaled_player:
+            self.journal.player(*record)
+            self.journaled_player = record
+
+    def update_metrics(self, delta_time: float) -> None:
+        self.metrics.on_frame(delta_time)
+        self.metrics.set_tile_counts(
+            tile_map_size=len(self.geo.tile_map),
+            tile_map_capacity=self.geo.tile_map.capacity,
+            generated=self.tile_picker.tiles_generated,
+            reused=self.tile_picker.tiles_reused,
         )
+        self.metrics.enemies.value = len(self.enemy_pool)
+        self.metrics.enemies_ticked.value = self.enemy_pool.ticked
+        if self.idle_throttle:
+            self.metrics.frames_skipped.value = self.idle_throttle.frames_skipped
+
+    def mark_dirty(self) -> None:
+        """Views call this when something on the screen changed. See idle_throttle."""
+        if self.idle_throttle:
+            self.idle_throttle.mark_dirty()
+
+    def on_input(self) -> None:
+        if self.idle_throttle:
+            self.apply_update_rate(self.idle_throttle.on_input())
+
+    def apply_update_rate(self, update_rate: float = None) -> None:
+        if update_rate is not None:
+            self.set_update_rate(update_rate)
+
+    def should_draw(self) -> bool:
+        """Views call this at the top of on_draw and skip drawing if it returns False."""
+        if not self.idle_throttle:
+            return True
+
+        # The overlay changes every frame.
+        if self.profiler.enabled:
+            self.idle_throttle.mark_dirty()
+        is_drawing = self.idle_throttle.should_draw()
+
+        # arcade.Window.flip doesn't swap the buffers when static_display is set, so the last
+        # frame that was drawn stays on the screen.
+        self.static_display = not is_drawing
+        self.flip_count = 1
+        return is_drawing
+
+    def on_draw(self) -> None:
+        # This gets called after the current view's on_draw, so it's the end of the frame.
+        if self.profiler.enabled:
+            with self.profiler.section("draw_text"):
+                self.draw_profiler_overlay()
+        self.profiler.on_frame()
+
+    def draw_profiler_overlay(self) -> None:
+        for i, line in enumerate(self.profiler.overlay_lines()):
+            arcade.draw_text(
+                text=line,
+                start_x=10,
+                start_y=self.height - (i + 1) * self.PROFILER_LINE_HEIGHT,
+                color=arcade.color.WHITE,
+                font_size=10,
+                font_name="Courier New",
+            )
+
+    def on_key_press(self, symbol: int, modifiers: int) -> None:
+        # This gets called after the current view's on_key_press.
+        if symbol == self.PROFILER_KEY:
+            self.profiler.toggle()
+        self.on_input()
+
+    def on_key_release(self, symbol: int, modifiers: int) -> None:
+        # This gets called after the current view's on_key_release.
+        self.on_input()
+
+    def on_close(self) -> None:
+        if self.gc_monitor:
+            self.gc_monitor.uninstall()
+            print(self.gc_monitor.report(), file=sys.stderr)
+        if self.options.profiler_output:
+            self.profiler.dump(self.options.profiler_output)
+        if self.event_log:
+            self.event_log.close()
+            print(self.event_log.report(), file=sys.stderr)
+        if self.metrics_server:
+            self.metrics_server.close()
+        if self.options.explored:
+            self.explored.save(self.options.explored)
+        if self.idle_throttle:
+            print(self.idle_throttle.report(), file=sys.stderr)
+        if self.journal:
+            self.journal_player()
+            self.journal.close()
+            print(self.journal.report(), file=sys.stderr)
+        if self.spectator:
+            self.spectator.close()
+            print(self.spectator.report(), file=sys.stderr)
+        super().on_close()
+
+    def on_tile_evicted(
+        self, tile_point: geography.OriginPoint, tile: tiles.Tile
+    ) -> None:
+        self.tile_picker.on_tile_evicted(tile_point, tile)
+        self.tile_store.on_tile_evicted(tile_point)
+        if self.events.enabled:
+            self.events.emit("tile_evicted", x=tile_point.x, y=tile_point.y)
+        if self.journal:
+            self.journal.tile_evicted(*self.tile_store.tile_index(tile_point))
+
+    def on_enemy_died(self, index: int) -> None:
+        self.enemy_pool.kill(index)
+        if self.journal:
+            self.journal.enemy_died(index)
+
+            # Beating an enemy makes the player stronger.
+            self.journal_player()
+
+    def draw_status_at_bottom(self, status_bar: hud.StatusBar[Any]) -> None:
+        """This is a helper function for the different views to have a similar status field at the bottom."""
+        with self.profiler.section("draw_text"):
+            status_bar.draw(self.width)
 
     def format_strength(self, strength: float) -> str:
         return f"{strength:.1f}"
 
 
 class WorldView(arcade.View):
-    PLAYER_MOVEMENT_SPEED = 5
+    # In pixels per second. The simulation runs in fixed steps. See fixed_timestep.
+    PLAYER_MOVEMENT_SPEED = 300
 
-    # This matches the grassy tile.
+    # This matches the grassy tile. It's also what you see where a tile hasn't been loaded yet.
     BACKGROUND_COLOR = (57, 194, 114)
 
+    # How much of each frame update_tiles may spend loading tiles. See tile_streaming.
+    TILE_LOADING_BUDGET = 0.004
+
+    # Each zoom level out halves the size of everything. See lod_pyramid.
+    ZOOM_OUT_KEY = arcade.key.MINUS
+    ZOOM_IN_KEY = arcade.key.EQUAL
+
+    MINIMAP_KEY = arcade.key.M
+    MINIMAP_SIZE = 200
+    MINIMAP_MARGIN = 10
+
     # How fast the camera pans to the player. 1.0 is instant.
     CAMERA_SPEED = 1.0
 
     # How many screen widths or heights can an enemy be away before it gets killed?
     ENEMY_DISTANCE_KEEPALIVE_RATIO = 3
 
+    # Enemies this many screen widths or heights away are ticked less often. Enemies that are
+    # further away (but still alive) aren't ticked at all. See enemy_pool.LevelOfDetail.
+    ENEMY_DISTANCE_NEAR_RATIO = 1
+
     def __init__(self) -> None:
         super().__init__()
         self.geo = self.window.geo
-        self.sprite_map: dict[geography.OriginPoint, arcade.Sprite] = {}
+        self.tile_picker: tile_picker.TilePicker = self.window.tile_picker
+        # This is keyed by geo.tile_map.key(tile_point), just like geo.tile_map.
+        self.sprite_map: dict[int, arcade.Sprite] = {}
+        self.enemy_sprite_map: dict[int, enemy_sprites.EnemySprite] = {}
+
+        # These are reused by update_tiles so that it doesn't allocate anything unless the
+        # player crosses a tile boundary.
+        self.tile_rect = geography.EMPTY_TILE_RECT
+        self.tile_point_diff = geography.TilePointDiff(added=set(), removed=set())
+        self.tile_load_queue = tile_streaming.TileLoadQueue(self.geo)
+
+        # We start over with no tiles (e.g. after a battle), so the spectators do too.
+        if self.window.spectator:
+            self.window.spectator.reset()
+
+        # The tile the player is on. See visit_player_tile.
+        self.player_col = 0
+        self.player_row = 0
+
+        # The physics engine moves the player by a fraction of a pixel per step, but the world
+        # only moves by whole pixels. The rest stays in the player sprite's position. See
+        # move_player.
+        self.timestep = fixed_timestep.FixedTimestep()
+        self.player_step_distance = self.PLAYER_MOVEMENT_SPEED * self.timestep.step
+
+        # How far the player moved in the last step. draw uses this to interpolate.
+        self.last_step_x = 0.0
+        self.last_step_y = 0.0
+        self.status_bar: hud.StatusBar[WorldStatus] = hud.StatusBar(
+            self.format_status, self.window.STATUS_HEIGHT
+        )
+
+        # This stays True until the tiles that were on screen when the view was created have all
+        # been loaded. See get_tile.
+        self.loading_initial_tiles = True
+
+        # At zoom level 0, we draw the tile sprites. Otherwise, we draw the LOD pyramid's chunks.
+        # See lod_renderer.
+        self.zoom_level = 0
+        self.is_minimap_visible = True
+
+        # See on_update.
+        self.camera_width = 0
+        self.camera_height = 0
+        self.camera_position = Vec2(0, 0)
         self.player_list = arcade.SpriteList()
         self.enemy_sprite_list = arcade.SpriteList()
         self.walkable_tiles_sprite_list = arcade.SpriteList()
@@ -96,10 +475,11 @@ class WorldView(arcade.View):
 
         self.player_list.append(self.player_sprite)
 
-        for enemy_model in self.window.enemy_models:
-            self.create_enemy_sprite_from_model(enemy_model)
+        for index in self.window.enemy_pool.alive_indices():
+            self.create_enemy_sprite(self.window.enemy_pool.handle(int(index)))
 
-        self.update_tiles(initial=True)
+        self.update_tiles()
+        self.visit_player_tile()
 
         self.camera_sprites = arcade.Camera(self.window.width, self.window.height)
         self.camera_gui = arcade.Camera(self.window.width, self.window.height)
@@ -111,14 +491,21 @@ class WorldView(arcade.View):
 
     def on_show(self) -> None:
         arcade.set_background_color(self.BACKGROUND_COLOR)
+        self.window.mark_dirty()
 
     def get_tile(
         self, tile_point: geography.OriginPoint, initial: bool = False
     ) -> tiles.Tile:
-        tile: tiles.Tile = self.geo.tile_map.get(tile_point)
-        if tile is None:
-            tile = self.pick_new_tile(tile_point)
-            self.geo.tile_map.put(tile_point, tile)
+        tile, is_new = self.tile_picker.get_tile(tile_point)
+        if is_new and self.window.journal:
+            self.journal_tile(tile_point, tile)
+        if self.window.events.enabled:
+            self.window.events.emit(
+                "tile_generated" if is_new else "tile_reused",
+                x=tile_point.x,
+                y=tile_point.y,
+                is_walkable=tile.is_walkable,
+            )
 
         # If we're calling get_tile, it's because we're walking in a certain direction and loading
         # tiles (pre-existing or not). If the tile is walkable, it's a good time to possibly put
@@ -132,102 +519,194 @@ class WorldView(arcade.View):
 
         return tile
 
-    def pick_new_tile(self, tile_point: geography.OriginPoint) -> tiles.Tile:
-        surrounding_tiles = self.get_surrounding_tiles(tile_point)
-
-        # About 60% of the time, just do the same as one of the neighboring tiles unless there
-        # aren't any. This makes the blocks of tiles "clumpier".
-        if surrounding_tiles and random.randrange(100) < 60:
-            tile = random.choice(surrounding_tiles)
-
-        # Otherwise, there's a 1 in 6 chance of picking a box crate.
-        elif random.randrange(6) == 0:
-            tile = tiles.BOX_CRATE_TILE
-
-        # Otherwise, pick grass.
-        else:
-            tile = tiles.GRASS_TILE
-
-        return tile
-
-    def get_surrounding_tiles(
-        self, tile_point: geography.OriginPoint
-    ) -> list[tiles.Tile]:
-        surrounding_points = self.geo.surrounding_points(tile_point)
-        surrounding_tiles = []
-        for p in surrounding_points:
-            tile = self.geo.tile_map.get(p)
-            if tile is not None:
-                surrounding_tiles.append(tile)
-        return surrounding_tiles
-
     def possibly_create_an_enemy(self, op: geography.OriginPoint) -> None:
         if random.randrange(150) != 0:
             return
         enemy_strength = models.pick_enemy_strength(op)
 
         # Just pick a random image for the enemy. For now, all the behavior is the same.
-        sprite_image = random.choice(
-            (
-                sprite_images.ZOMBIE_IMAGE,
-                sprite_images.MALE_PERSON_IMAGE,
-                sprite_images.FEMALE_PERSON_IMAGE,
-                sprite_images.MALE_ADVENTURER_IMAGE,
-                sprite_images.ROBOT_IMAGE,
+        sprite_image = random.choice(enemy_pool.SPRITE_IMAGES)
+
+        handle = self.window.enemy_pool.spawn(op, enemy_strength, sprite_image)
+        self.create_enemy_sprite(handle)
+        if self.window.journal:
+            self.window.journal.enemy_spawned(
+                handle.index,
+                op.x,
+                op.y,
+                enemy_strength,
+                enemy_pool.SPRITE_IMAGES.index(sprite_image),
+            )
+        if self.window.events.enabled:
+            self.window.events.emit(
+                "enemy_spawned",
+                index=handle.index,
+                x=op.x,
+                y=op.y,
+                strength=enemy_strength,
+                distance=math.hypot(op.x, op.y),
             )
-        )
-
-        enemy_model = models.EnemyModel(
-            sprite_image=sprite_image,
-            position=op,
-            strength=enemy_strength,
-            player_model=self.window.player_model,
-        )
-        self.window.enemy_models.add(enemy_model)
-        self.create_enemy_sprite_from_model(enemy_model)
 
-    def create_enemy_sprite_from_model(
-        self, model: models.EnemyModel
+    def create_enemy_sprite(
+        self, handle: enemy_pool.EnemyHandle
     ) -> enemy_sprites.EnemySprite:
+        sprite_image = handle.sprite_image
         sprite = enemy_sprites.EnemySprite(
-            model,
-            model.sprite_image.filename,
-            scale=(self.geo.tile_width / model.sprite_image.width),
+            handle,
+            sprite_image.filename,
+            scale=(self.geo.tile_width / sprite_image.width),
         )
+        self.place_enemy_sprite(sprite)
+        self.enemy_sprite_list.append(sprite)
+        self.enemy_sprite_map[handle.index] = sprite
+        return sprite
+
+    def place_enemy_sprite(self, sprite: enemy_sprites.EnemySprite) -> None:
         ap: geography.AdventurePoint = self.geo.origin_point_to_adventure_point(
-            model.position
+            sprite.handle.position
         )
         sprite.left = ap.x
         sprite.top = ap.y
-        self.enemy_sprite_list.append(sprite)
-        return sprite
 
     def on_draw(self) -> None:
+        if not self.window.should_draw():
+            return
+        with self.window.profiler.section("on_draw"):
+            self.draw()
+
+    def draw(self) -> None:
         arcade.start_render()
 
-        self.camera_sprites.use()  # type: ignore
-        for i in self.world_sprite_lists:
-            i.draw()
+        # Show the player partway between where she was before the last step and where she is
+        # now. She always stays in the middle of the screen, so the camera and the player sprite
+        # both move back.
+        offset_x, offset_y = self.interpolation_offset()
+        self.camera_sprites.move_to(
+            Vec2(self.camera_position.x - offset_x, self.camera_position.y - offset_y),
+            self.CAMERA_SPEED,
+        )
+        self.player_sprite.center_x -= offset_x
+        self.player_sprite.center_y -= offset_y
+
+        if self.zoom_level:
+            self.camera_gui.use()  # type: ignore
+            self.draw_lod()
+            self.camera_sprites.use()  # type: ignore
+        else:
+            self.camera_sprites.use()  # type: ignore
+            for i in self.world_sprite_lists:
+                i.draw()
         self.player_list.draw()
+        self.player_sprite.center_x += offset_x
+        self.player_sprite.center_y += offset_y
 
         self.camera_gui.use()  # type: ignore
-        status = " ".join(
+        self.window.draw_status_at_bottom(self.status_bar)
+        if self.is_minimap_visible:
+            self.draw_minimap()
+
+    def interpolation_offset(self) -> tuple[float, float]:
+        """Return how far back from the current step to draw things. See fixed_timestep."""
+        remaining = 1.0 - self.timestep.alpha
+        return remaining * self.last_step_x, remaining * self.last_step_y
+
+    def format_status(self, status: WorldStatus) -> str:
+        return " ".join(
             [
-                f"Pos: ({self.geo.position.x}, {self.geo.position.y})",
-                f"Strength: {self.window.format_strength(self.window.player_model.strength)}",
+                f"Pos: ({status.col}, {status.row})",
+                f"Strength: {self.window.format_strength(status.strength)}",
+                f"Explored: {status.explored_tiles}",
             ]
+            + ([f"Zoom: 1/{1 << status.zoom_level}"] if status.zoom_level else [])
         )
-        self.window.draw_status_at_bottom(status)
+
+    def minimap_center(self) -> tuple[float, float]:
+        """Return the player's position in minimap pixels (which are tiles).
+
+        A tile's OriginPoint is its top left corner, so the pixel for row r covers y values
+        from (r - 1) * tile_height to r * tile_height.
+
+        """
+        return (
+            self.geo.position.x / self.geo.tile_width,
+            self.geo.position.y / self.geo.tile_height + 1,
+        )
+
+    def draw_minimap(self) -> None:
+        pool = self.window.enemy_pool
+        enemy_tiles = [
+            (
+                pool.x[index] / self.geo.tile_width,
+                pool.y[index] / self.geo.tile_height + 1,
+            )
+            for index in pool.alive_indices()
+        ]
+        center_col, center_row = self.minimap_center()
+        self.window.minimap_renderer.draw(
+            left=self.window.width - self.MINIMAP_SIZE - self.MINIMAP_MARGIN,
+            bottom=self.window.height - self.MINIMAP_SIZE - self.MINIMAP_MARGIN,
+            size=self.MINIMAP_SIZE,
+            screen_width=self.window.width,
+            screen_height=self.window.height,
+            center_col=center_col,
+            center_row=center_row,
+            enemy_tiles=enemy_tiles,
+        )
+
+    def draw_lod(self) -> None:
+        """Draw the visible chunks of the current zoom level's LOD pyramid level.
+
+        Every chunk is drawn CHUNK_SIZE tiles wide, no matter the level, so the number of chunks
+        on screen stays about the same as you zoom out.
+
+        """
+        level = self.zoom_level
+        scale = 1 << level
+        pyramid: lod_pyramid.LODPyramid = self.window.lod_pyramid
+        offset_x, offset_y = self.interpolation_offset()
+        position_x = self.geo.position.x - offset_x
+        position_y = self.geo.position.y - offset_y
+        half_screen_width = self.window.width / 2
+        half_screen_height = self.window.height / 2
+        renderer: lod_renderer.LODRenderer = self.window.lod_renderer
+        renderer.begin()
+        for key in pyramid.visible_chunks(
+            level,
+            center_col=position_x / self.geo.tile_width,
+            center_row=position_y / self.geo.tile_height,
+            half_width=half_screen_width * scale / self.geo.tile_width,
+            half_height=half_screen_height * scale / self.geo.tile_height,
+        ):
+            left, right, bottom, top = pyramid.chunk_bounds(
+                level, key, self.geo.tile_width, self.geo.tile_height
+            )
+            renderer.draw_chunk(
+                level,
+                key,
+                left=(left - position_x) / scale + half_screen_width,
+                bottom=(bottom - position_y) / scale + half_screen_height,
+                width=(right - left) / scale,
+                height=(top - bottom) / scale,
+                screen_width=self.window.width,
+                screen_height=self.window.height,
+            )
+        renderer.end()
 
     def on_key_press(self, symbol: int, modifiers: int) -> None:
         if symbol == arcade.key.UP:
-            self.player_sprite.change_y = self.PLAYER_MOVEMENT_SPEED
+            self.player_sprite.change_y = self.player_step_distance
         elif symbol == arcade.key.DOWN:
-            self.player_sprite.change_y = -self.PLAYER_MOVEMENT_SPEED
+            self.player_sprite.change_y = -self.player_step_distance
         elif symbol == arcade.key.LEFT:
-            self.player_sprite.change_x = -self.PLAYER_MOVEMENT_SPEED
+            self.player_sprite.change_x = -self.player_step_distance
         elif symbol == arcade.key.RIGHT:
-            self.player_sprite.change_x = self.PLAYER_MOVEMENT_SPEED
+            self.player_sprite.change_x = self.player_step_distance
+        elif symbol == self.ZOOM_OUT_KEY:
+            self.zoom_level = min(self.zoom_level + 1, lod_pyramid.MAX_LEVEL)
+        elif symbol == self.ZOOM_IN_KEY:
+            self.zoom_level = max(self.zoom_level - 1, 0)
+        elif symbol == self.MINIMAP_KEY:
+            self.is_minimap_visible = not self.is_minimap_visible
 
     def on_key_release(self, symbol: int, modifiers: int) -> None:
         if symbol == arcade.key.UP or symbol == arcade.key.DOWN:
@@ -236,39 +715,76 @@ class WorldView(arcade.View):
             self.player_sprite.change_x = 0
 
     def on_update(self, delta_time: float) -> None:
-        prev_player_sprite_center_x = self.player_sprite.center_x
-        prev_player_sprite_center_y = self.player_sprite.center_y
+        profiler = self.window.profiler
+        steps = self.timestep.advance(delta_time)
+        simulated_time = steps * self.timestep.step
+        was_interpolating = self.last_step_x != 0 or self.last_step_y != 0
 
         # This may move the player_sprite.
-        self.physics_engine.update()  # type: ignore
+        with profiler.section("physics_engine.update"):
+            delta_x, delta_y = self.move_player(steps)
+        has_moved = delta_x != 0 or delta_y != 0
 
-        delta_x = round(self.player_sprite.center_x - prev_player_sprite_center_x)
-        delta_y = round(self.player_sprite.center_y - prev_player_sprite_center_y)
-
-        self.geo.position = geography.OriginPoint(
-            self.geo.position.x + delta_x, self.geo.position.y + delta_y
-        )
-
-        self.window.player_model.on_world_view_update(delta_time)
-
-        # Put the player back where he was (at the center of the universe) and instead move the
-        # world in the *opposite* direction.
-        self.player_sprite.center_x = 0
-        self.player_sprite.center_y = 0
-        for i in self.world_sprite_lists:
-            i.move(-delta_x, -delta_y)
-
-        self.update_enemies()
-        self.update_tiles()
-
-        # Move the camera so that the player is in the middle of the screen. This should only be
-        # necessary the first time around or when the window resizes, but it probably doesn't
-        # hurt to leave it here.
-        position = Vec2(
-            self.player_sprite.center_x - self.window.width // 2,
-            self.player_sprite.center_y - self.window.height // 2,
-        )
-        self.camera_sprites.move_to(position, self.CAMERA_SPEED)
+        if has_moved:
+            self.geo.position = geography.OriginPoint(
+                self.geo.position.x + delta_x, self.geo.position.y + delta_y
+            )
+            self.visit_player_tile()
+
+        self.window.player_model.on_world_view_update(simulated_time)
+
+        # Put the player back where he was (at the center of the universe, give or take the
+        # fraction of a pixel that the world didn't move) and instead move the world in the
+        # *opposite* direction.
+        self.player_sprite.center_x -= delta_x
+        self.player_sprite.center_y -= delta_y
+        if has_moved or was_interpolating:
+            self.window.mark_dirty()
+        if has_moved:
+            with profiler.section("sprite_list.move"):
+                for i in self.world_sprite_lists:
+                    i.move(-delta_x, -delta_y)
+
+        if steps:
+            with profiler.section("update_enemies"):
+                self.update_enemies(simulated_time)
+        with profiler.section("update_tiles"):
+            self.update_tiles()
+            if self.zoom_level:
+                self.window.lod_pyramid.update()
+            if self.is_minimap_visible:
+                center_col, center_row = self.minimap_center()
+                self.window.minimap_renderer.update(
+                    math.floor(center_col), math.floor(center_row)
+                )
+
+        if self.window.metrics:
+            self.update_metrics()
+
+        # The status bar is updated here rather than in draw so that we know whether it changed
+        # before deciding whether to draw.
+        if self.status_bar.update(
+            WorldStatus(
+                col=self.player_col,
+                row=self.player_row,
+                strength=round(self.window.player_model.strength, 1),
+                explored_tiles=len(self.window.explored),
+                zoom_level=self.zoom_level,
+            )
+        ):
+            self.window.mark_dirty()
+
+        # Move the camera so that the player is in the middle of the screen. This is only
+        # necessary the first time around or when the window resizes.
+        if (
+            self.camera_width != self.window.width
+            or self.camera_height != self.window.height
+        ):
+            self.camera_width = self.window.width
+            self.camera_height = self.window.height
+            self.camera_position = Vec2(
+                -(self.window.width // 2), -(self.window.height // 2)
+            )
 
         # Now that we've sort of left everything in a good state, if we hit an enemy, we should
         # switch to BattleView.
@@ -276,43 +792,162 @@ class WorldView(arcade.View):
             self.player_sprite, self.enemy_sprite_list
         )
         if enemy_hit_list:
-            enemy_model = enemy_hit_list[0].model
+            enemy_model = self.window.enemy_pool.battle_model(
+                enemy_hit_list[0].handle.index, self.window.player_model
+            )
             self.window.show_view(BattleView(enemy_model))
 
-    def update_tiles(self, initial: bool = False) -> None:
-        """Add and remove tiles as the user "moves" around."""
-        prev_tile_points = set(self.sprite_map.keys())
-        new_tile_points = set(self.geo.generate_tile_points())
-        tile_point_diff = self.geo.diff_tile_points(prev_tile_points, new_tile_points)
-        for tile_point in tile_point_diff.removed:
-            sprite = self.sprite_map.pop(tile_point)
-            sprite.kill()  # type: ignore
-        for tile_point in tile_point_diff.added:
-            tile = self.get_tile(tile_point, initial=initial)
-            sprite = arcade.Sprite(
-                tile.sprite_image.filename,
-                scale=(self.geo.tile_width / tile.sprite_image.width),
+    def move_player(self, steps: int) -> tuple[int, int]:
+        """Run the physics engine once per step. Return how many whole pixels the player moved."""
+        sprite = self.player_sprite
+        if sprite.change_x == 0 and sprite.change_y == 0:
+            # Nothing else moves the player, so there's nothing to check.
+            if steps:
+                self.last_step_x = 0.0
+                self.last_step_y = 0.0
+            return 0, 0
+        for _ in range(steps):
+            prev_x = sprite.center_x
+            prev_y = sprite.center_y
+            self.physics_engine.update()  # type: ignore
+            self.last_step_x = sprite.center_x - prev_x
+            self.last_step_y = sprite.center_y - prev_y
+
+        # The sprite starts each update within half a pixel of the center of the universe, so
+        # this is how far the world has to move.
+        return round(sprite.center_x), round(sprite.center_y)
+
+    def visit_player_tile(self) -> None:
+        tile_point = self.geo.align_point(self.geo.position)
+        col = tile_point.x // self.geo.tile_width
+        row = tile_point.y // self.geo.tile_height
+        self.player_col = col
+        self.player_row = row
+        if self.window.explored.visit(col, row):
+            self.window.events.emit("new_territory", col=col, row=row)
+
+    def update_metrics(self) -> None:
+        window_metrics = self.window.metrics
+        window_metrics.set_sprite_count(
+            "walkable_tiles", len(self.walkable_tiles_sprite_list)
+        )
+        window_metrics.set_sprite_count(
+            "unwalkable_tiles", len(self.unwalkable_tiles_sprite_list)
+        )
+        window_metrics.set_sprite_count("enemies", len(self.enemy_sprite_list))
+        window_metrics.set_sprite_count("player", len(self.player_list))
+
+    def update_tiles(self) -> None:
+        """Add and remove tiles as the user "moves" around.
+
+        New tiles are queued and loaded over the next few frames. See tile_streaming.
+
+        """
+        queue = self.tile_load_queue
+        if not self.geo.is_tile_rect_current(self.tile_rect):
+            new_tile_rect = self.geo.tile_rect()
+            tile_point_diff = self.geo.diff_tile_rects(
+                self.tile_rect, new_tile_rect, self.tile_point_diff
             )
-            self.sprite_map[tile_point] = sprite
-            tile_adventure_point = self.geo.origin_point_to_adventure_point(tile_point)
-            sprite.left = tile_adventure_point.x
-            sprite.top = tile_adventure_point.y
-            if tile.is_walkable:
-                self.walkable_tiles_sprite_list.append(sprite)
-            else:
-                self.unwalkable_tiles_sprite_list.append(sprite)
-
-    def update_enemies(self) -> None:
-        """Throw away enemies that are now too far away from the center of the universe."""
-        for enemy_sprite in self.enemy_sprite_list:
-            if (
-                abs(enemy_sprite.center_x)
-                > self.ENEMY_DISTANCE_KEEPALIVE_RATIO * self.window.width
-                or abs(enemy_sprite.center_y)
-                > self.ENEMY_DISTANCE_KEEPALIVE_RATIO * self.window.height
-            ):
-                enemy_sprite.kill()
-                self.window.on_enemy_died(enemy_sprite.model)
+            self.tile_rect = new_tile_rect
+            for tile_point in tile_point_diff.removed:
+                sprite = self.sprite_map.pop(self.geo.tile_map.key(tile_point), None)
+                if sprite is not None:
+                    sprite.kill()  # type: ignore
+                    if self.window.spectator:
+                        self.window.spectator.tile_removed(tile_point)
+                else:
+                    queue.discard(tile_point)
+            queue.add(tile_point_diff.added)
+
+        if queue:
+            queue.drain(self.load_tile, self.TILE_LOADING_BUDGET)
+            self.window.mark_dirty()
+            if not queue:
+                self.loading_initial_tiles = False
+
+        # Once in a while, the tile picker has to carve through crates that are already on the
+        # screen to keep us from getting walled in.
+        carved = self.tile_picker.carved
+        if carved:
+            for tile_point in carved:
+                if self.window.journal:
+                    self.journal_tile(tile_point, self.geo.tile_map.peek(tile_point))
+                sprite = self.sprite_map.pop(self.geo.tile_map.key(tile_point), None)
+                if sprite is not None:
+                    sprite.kill()  # type: ignore
+                    self.create_tile_sprite(
+                        tile_point, self.geo.tile_map.peek(tile_point)
+                    )
+            carved.clear()
+            self.window.mark_dirty()
+
+    def journal_tile(self, tile_point: geography.OriginPoint, tile: tiles.Tile) -> None:
+        col, row = self.window.tile_store.tile_index(tile_point)
+        self.window.journal.tile(col, row, tile.id)
+
+    def load_tile(self, tile_point: geography.OriginPoint) -> None:
+        tile = self.get_tile(tile_point, initial=self.loading_initial_tiles)
+        self.create_tile_sprite(tile_point, tile)
+
+    def create_tile_sprite(
+        self, tile_point: geography.OriginPoint, tile: tiles.Tile
+    ) -> None:
+        sprite = arcade.Sprite(
+            tile.sprite_image.filename,
+            scale=(self.geo.tile_width / tile.sprite_image.width),
+        )
+        self.sprite_map[self.geo.tile_map.key(tile_point)] = sprite
+        if self.window.spectator:
+            self.window.spectator.tile_added(tile_point, tile.id)
+        tile_adventure_point = self.geo.origin_point_to_adventure_point(tile_point)
+        sprite.left = tile_adventure_point.x
+        sprite.top = tile_adventure_point.y
+        if tile.is_walkable:
+            self.walkable_tiles_sprite_list.append(sprite)
+        else:
+            self.unwalkable_tiles_sprite_list.append(sprite)
+
+    def update_enemies(self, delta_time: float) -> None:
+        """Let the enemies wander or chase us, and throw away the ones that are now too far away."""
+        pool = self.window.enemy_pool
+        self.window.flow_field.update(self.geo.position)
+        level_of_detail = enemy_pool.LevelOfDetail(
+            center=self.geo.position,
+            on_screen_x=self.window.width / 2 + self.geo.tile_width,
+            on_screen_y=self.window.height / 2 + self.geo.tile_height,
+            near_x=self.ENEMY_DISTANCE_NEAR_RATIO * self.window.width,
+            near_y=self.ENEMY_DISTANCE_NEAR_RATIO * self.window.height,
+        )
+        # The minimap shows every enemy, so any of them moving changes the screen. Otherwise, only
+        # the ones on screen matter.
+        is_dirty = False
+        check_on_screen = not self.is_minimap_visible
+        for index in pool.update(
+            delta_time,
+            self.window.flow_field,
+            self.geo.position,
+            level_of_detail,
+            self.window.tile_store,
+        ):
+            sprite = self.enemy_sprite_map[index]
+            self.place_enemy_sprite(sprite)
+            if not is_dirty:
+                is_dirty = not check_on_screen or (
+                    abs(sprite.center_x) < level_of_detail.on_screen_x
+                    and abs(sprite.center_y) < level_of_detail.on_screen_y
+                )
+        if is_dirty:
+            self.window.mark_dirty()
+
+        for index in pool.cull(
+            self.geo.position,
+            self.ENEMY_DISTANCE_KEEPALIVE_RATIO * self.window.width,
+            self.ENEMY_DISTANCE_KEEPALIVE_RATIO * self.window.height,
+        ):
+            self.enemy_sprite_map.pop(index).kill()
+            if self.window.journal:
+                self.window.journal.enemy_died(index)
 
     def on_resize(self, width: float, height: float) -> None:
         # There is no superclass method, but this method definitely gets called.
@@ -327,13 +962,34 @@ class BattleView(arcade.View):
     SIDE_MARGIN = PLAYER_WIDTH
     MAX_PLAYER_MOVEMENT = PLAYER_WIDTH
 
-    def __init__(self, enemy_model: models.EnemyModel) -> None:
+    def __init__(self, enemy_model: enemy_pool.PooledEnemyModel) -> None:
         super().__init__()
         self.geo = self.window.geo
         self.enemy_model = enemy_model
 
+        self.status_bar: hud.StatusBar[BattleStatus] = hud.StatusBar(
+            self.format_status, self.window.STATUS_HEIGHT
+        )
+
         self.window.player_model.on_battle_view_begin()
         enemy_model.on_battle_view_begin()
+        enemy_model.ai = lookahead_ai.LookaheadAI()
+        self.window.player_model.observer = self
+        enemy_model.observer = self
+        self.battle_duration = 0.0
+        self.window.events.emit(
+            "battle_started",
+            enemy_index=enemy_model.index,
+            enemy_strength=enemy_model.strength,
+            player_strength=self.window.player_model.strength,
+        )
+
+        # Key presses are timestamped so that on_update can apply them at the right moment
+        # within the frame instead of at the frame boundary. See models.advance_battle.
+        self.pending_moves: list[tuple[float, battle_moves.BattleMove]] = []
+
+        # The battle advances in fixed steps, just like WorldView. See fixed_timestep.
+        self.timestep = fixed_timestep.FixedTimestep()
 
         self.wall_list: arcade.SpriteList = None
         self.player_list = arcade.SpriteList()
@@ -419,46 +1075,71 @@ class BattleView(arcade.View):
 
     def on_show(self) -> None:
         arcade.set_background_color(arcade.csscolor.CORNFLOWER_BLUE)
+        self.window.mark_dirty()
 
     def on_draw(self) -> None:
+        # Something is always moving during a battle, so this always draws. It still has to ask
+        # so that the window knows to flip.
+        if not self.window.should_draw():
+            return
+        with self.window.profiler.section("on_draw"):
+            self.draw()
+
+    def draw(self) -> None:
         arcade.start_render()
-        if self.window.player_model.strength == self.window.player_model.MIN_STRENGTH:
+        player_model = self.window.player_model
+        self.status_bar.update(
+            BattleStatus(
+                is_weak=player_model.strength == player_model.MIN_STRENGTH,
+                strength=round(player_model.strength, 1),
+                enemy_strength=round(self.enemy_model.strength, 1),
+            )
+        )
+        self.window.draw_status_at_bottom(self.status_bar)
+        self.wall_list.draw()
+        self.player_list.draw()
+        self.enemy_list.draw()
+
+    def format_status(self, status: BattleStatus) -> str:
+        if status.is_weak:
             strength = "Weak"
         else:
-            strength = self.window.format_strength(self.window.player_model.strength)
-        status = " ".join(
+            strength = self.window.format_strength(status.strength)
+        return " ".join(
             [
                 f"Strength: {strength}",
-                f"Enemy: {self.window.format_strength(self.enemy_model.strength)}",
+                f"Enemy: {self.window.format_strength(status.enemy_strength)}",
                 "(d)odge (j)ab (u)ppercut (esc)ape",
             ]
         )
-        self.window.draw_status_at_bottom(status)
-        self.wall_list.draw()
-        self.player_list.draw()
-        self.enemy_list.draw()
 
     def on_key_press(self, symbol: int, modifiers: int) -> None:
         if symbol == arcade.key.D:
-            self.window.player_model.attempt_battle_move(
-                battle_moves.DODGE, self.enemy_model
-            )
+            self.pending_moves.append((time.perf_counter(), battle_moves.DODGE))
         elif symbol == arcade.key.J:
-            self.window.player_model.attempt_battle_move(
-                battle_moves.JAB, self.enemy_model
-            )
+            self.pending_moves.append((time.perf_counter(), battle_moves.JAB))
         elif symbol == arcade.key.U:
-            self.window.player_model.attempt_battle_move(
-                battle_moves.UPPERCUT, self.enemy_model
-            )
+            self.pending_moves.append((time.perf_counter(), battle_moves.UPPERCUT))
 
         # For now, hitting escape just kills the enemy.
         elif symbol == arcade.key.ESCAPE:
             self.on_enemy_died()
 
     def on_update(self, delta_time: float) -> None:
-        self.window.player_model.on_battle_view_update(delta_time)
-        self.enemy_model.on_battle_view_update(delta_time)
+        # The simulation lags behind the clock by whatever was left in the accumulator, so the
+        # time it covers this frame starts that much before the frame did.
+        began_at = time.perf_counter() - delta_time - self.timestep.accumulator
+        steps = self.timestep.advance(delta_time)
+        if steps:
+            simulated_time = steps * self.timestep.step
+            models.advance_battle(
+                self.window.player_model,
+                self.enemy_model,
+                simulated_time,
+                self.take_inputs(began_at, began_at + simulated_time),
+            )
+            self.battle_duration += simulated_time
+        self.window.mark_dirty()
 
         self.update_combatant_position(
             model=self.window.player_model,
@@ -476,9 +1157,65 @@ class BattleView(arcade.View):
         if self.enemy_model.is_dead:
             self.on_enemy_died()
 
+    def take_inputs(
+        self, began_at: float, ends_at: float
+    ) -> Sequence[models.ScheduledInput]:
+        """Turn the moves pressed before ends_at into inputs. Later ones wait for the next step."""
+        if not self.pending_moves:
+            return ()
+        inputs = [
+            models.ScheduledInput(
+                offset=(pressed_at - began_at),
+                apply=functools.partial(
+                    self.window.player_model.attempt_battle_move,
+                    move,
+                    self.enemy_model,
+                ),
+            )
+            for (pressed_at, move) in self.pending_moves
+            if pressed_at < ends_at
+        ]
+        self.pending_moves = [
+            (pressed_at, move)
+            for (pressed_at, move) in self.pending_moves
+            if pressed_at >= ends_at
+        ]
+        return inputs
+
+    def combatant_name(self, combatant: models.CombatantModel) -> str:
+        return "player" if combatant is self.window.player_model else "enemy"
+
+    def on_battle_move(
+        self, combatant: models.CombatantModel, move: battle_moves.BattleMove
+    ) -> None:
+        self.window.events.emit(
+            "battle_move", combatant=self.combatant_name(combatant), move=move.name
+        )
+
+    def on_damage(self, combatant: models.CombatantModel, damage: float) -> None:
+        self.window.events.emit(
+            "damage", target=self.combatant_name(combatant), damage=damage
+        )
+
     def on_enemy_died(self) -> None:
+        player_model = self.window.player_model
+        self.window.events.emit(
+            "battle_ended",
+            enemy_index=self.enemy_model.index,
+            enemy_died=self.enemy_model.is_dead,
+            duration=self.battle_duration,
+            player_strength_lost=(
+                player_model.strength_at_the_beginning_of_battle - player_model.strength
+            ),
+            enemy_strength_lost=(
+                self.enemy_model.strength_at_the_beginning_of_battle
+                - self.enemy_model.strength
+            ),
+        )
+        player_model.observer = None
+        self.enemy_model.observer = None
         self.window.player_model.on_enemy_died(self.enemy_model)
-        self.window.on_enemy_died(self.enemy_model)
+        self.window.on_enemy_died(self.enemy_model.index)
         self.window.show_view(WorldView())
 
     def on_resize(self, width: float, height: float) -> None:
@@ -486,9 +1223,84 @@ class BattleView(arcade.View):
         self.update_background()
 
 
+def parse_args(argv: list[str] = None) -> GameOptions:
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument(
+        "--gc-monitor",
+        action="store_true",
+        help="Report net allocated blocks and GC pauses per frame",
+    )
+    parser.add_argument(
+        "--profiler",
+        action="store_true",
+        help="Start with the frame profiler overlay on (F3 toggles it)",
+    )
+    parser.add_argument(
+        "--profiler-output",
+        metavar="PATH",
+        help=(
+            "When the game exits, write the frames timed by the profiler to this file: "
+            "a Chrome trace if it ends in .json, otherwise CSV"
+        ),
+    )
+    parser.add_argument(
+        "--event-log",
+        metavar="PATH",
+        help="Stream structured events (tiles, enemies, battles) to this JSONL file",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics (0 picks a port)",
+    )
+    parser.add_argument(
+        "--explored",
+        metavar="PATH",
+        help="Load the explored area from this file, if it exists, and save it on exit",
+    )
+    parser.add_argument(
+        "--idle-throttle",
+        action="store_true",
+        help=(
+            "Skip redrawing unchanged frames and update less often while nothing is "
+            "happening, then report the savings on exit"
+        ),
+    )
+    parser.add_argument(
+        "--journal",
+        metavar="PATH",
+        help=(
+            "Recover the game from this save, if it exists, and keep it up to date as you "
+            "play with an append-only journal"
+        ),
+    )
+    parser.add_argument(
+        "--spectate",
+        metavar="TARGET",
+        help=(
+            "Stream what's on the screen to a file, or to spectators who connect to "
+            "unix:PATH or HOST:PORT (see spectator_client)"
+        ),
+    )
+    args = parser.parse_args(argv)
+    return GameOptions(
+        gc_monitor=args.gc_monitor,
+        profiler=args.profiler,
+        profiler_output=args.profiler_output,
+        event_log=args.event_log,
+        metrics_port=args.metrics_port,
+        explored=args.explored,
+        idle_throttle=args.idle_throttle,
+        journal=args.journal,
+        spectate=args.spectate,
+    )
+
+
 def main() -> None:
+    options = parse_args()
     try:
-        GameWindow()
+        GameWindow(options)
         arcade.run()  # type: ignore
     except KeyboardInterrupt:
         pass
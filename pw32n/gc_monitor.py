@@ -0,0 +1,114 @@
+"""This measures how much each frame grows the heap and how long the garbage collector pauses.
+
+The growth is measured with sys.getallocatedblocks, so it's the net number of allocated blocks:
+the blocks allocated during the frame minus the ones freed. Garbage that's freed before the
+frame ends doesn't show up, and a frame that frees more than it allocates comes out negative.
+GC pauses are measured by hooking into gc.callbacks, which the garbage collector calls right
+before and right after every collection.
+
+Call on_frame once per frame. The first call starts the first frame.
+
+"""
+
+import gc
+import sys
+import time
+from collections import deque
+from typing import Any, NamedTuple, Optional
+
+# There are 3 generations. Generation 2 collections are the ones that cause hitches.
+NUM_GENERATIONS = 3
+
+
+class FrameGCStats(NamedTuple):
+    net_allocated_blocks: int
+    gc_pause: float
+    collections: tuple[int, ...]
+
+
+class GCMonitor:
+    # How many frames of history to keep for the report.
+    HISTORY = 600
+
+    def __init__(self) -> None:
+        self.is_installed = False
+        self.history: deque[FrameGCStats] = deque(maxlen=self.HISTORY)
+        self.total_frames = 0
+        self.total_gc_pause = 0.0
+        self.max_gc_pause = 0.0
+        self.total_collections = [0] * NUM_GENERATIONS
+
+        self._frame_started = False
+        self._frame_allocated_blocks_at_start = 0
+        self._frame_gc_pause = 0.0
+        self._frame_collections = [0] * NUM_GENERATIONS
+        self._gc_started_at: Optional[float] = None
+
+    def install(self) -> None:
+        if not self.is_installed:
+            gc.callbacks.append(self._on_gc)
+            self.is_installed = True
+
+    def uninstall(self) -> None:
+        if self.is_installed:
+            gc.callbacks.remove(self._on_gc)
+            self.is_installed = False
+
+    def _on_gc(self, phase: str, info: dict[str, Any]) -> None:
+        if phase == "start":
+            self._gc_started_at = time.perf_counter()
+        elif self._gc_started_at is not None:
+            pause = time.perf_counter() - self._gc_started_at
+            self._gc_started_at = None
+            self._frame_gc_pause += pause
+            self._frame_collections[info["generation"]] += 1
+            self.max_gc_pause = max(self.max_gc_pause, pause)
+
+    def on_frame(self) -> Optional[FrameGCStats]:
+        """End the current frame (if any) and start the next one.
+
+        Returns the stats for the frame that just ended.
+
+        """
+        stats = None
+        if self._frame_started:
+            stats = FrameGCStats(
+                net_allocated_blocks=(
+                    sys.getallocatedblocks() - self._frame_allocated_blocks_at_start
+                ),
+                gc_pause=self._frame_gc_pause,
+                collections=tuple(self._frame_collections),
+            )
+            self.history.append(stats)
+            self.total_frames += 1
+            self.total_gc_pause += self._frame_gc_pause
+            for generation in range(NUM_GENERATIONS):
+                self.total_collections[generation] += self._frame_collections[
+                    generation
+                ]
+
+        self._frame_started = True
+        self._frame_gc_pause = 0.0
+        for generation in range(NUM_GENERATIONS):
+            self._frame_collections[generation] = 0
+
+        # Measure this last so that the bookkeeping above isn't charged to the next frame.
+        self._frame_allocated_blocks_at_start = sys.getallocatedblocks()
+        return stats
+
+    def report(self) -> str:
+        if not self.total_frames:
+            return "GC monitor: no frames"
+        recent = list(self.history)
+        net_allocated_blocks = sorted(i.net_allocated_blocks for i in recent)
+        return " ".join(
+            [
+                f"GC monitor: {self.total_frames} frames.",
+                f"Net allocated blocks per frame (last {len(recent)} frames):",
+                f"median {net_allocated_blocks[len(net_allocated_blocks) // 2]},",
+                f"max {net_allocated_blocks[-1]}.",
+                f"Collections by generation: {self.total_collections}.",
+                f"GC pause: total {self.total_gc_pause * 1000:.1f} ms,",
+                f"max {self.max_gc_pause * 1000:.2f} ms.",
+            ]
+        )
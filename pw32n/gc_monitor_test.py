@@ -0,0 +1,52 @@
+import gc
+import unittest
+
+from pw32n.gc_monitor import GCMonitor
+
+
+class GCMonitorTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.monitor = GCMonitor()
+        self.monitor.install()
+
+    def tearDown(self) -> None:
+        self.monitor.uninstall()
+
+    def test_install_and_uninstall(self) -> None:
+        self.assertIn(self.monitor._on_gc, gc.callbacks)
+        self.monitor.install()
+        self.assertEqual(gc.callbacks.count(self.monitor._on_gc), 1)
+        self.monitor.uninstall()
+        self.assertNotIn(self.monitor._on_gc, gc.callbacks)
+        self.monitor.uninstall()
+
+    def test_first_frame_has_no_stats(self) -> None:
+        self.assertIsNone(self.monitor.on_frame())
+        self.assertEqual(self.monitor.report(), "GC monitor: no frames")
+
+    def test_measures_collections_and_pauses(self) -> None:
+        self.monitor.on_frame()
+        gc.collect()
+        stats = self.monitor.on_frame()
+        self.assertEqual(stats.collections, (0, 0, 1))
+        self.assertGreater(stats.gc_pause, 0.0)
+        self.assertEqual(self.monitor.total_collections, [0, 0, 1])
+        self.assertEqual(self.monitor.max_gc_pause, stats.gc_pause)
+
+        stats = self.monitor.on_frame()
+        self.assertEqual(stats.collections, (0, 0, 0))
+        self.assertEqual(stats.gc_pause, 0.0)
+
+    def test_measures_net_allocated_blocks(self) -> None:
+        self.monitor.on_frame()
+        garbage = [[i] for i in range(10_000)]
+        stats = self.monitor.on_frame()
+        self.assertGreaterEqual(stats.net_allocated_blocks, len(garbage))
+
+    def test_report(self) -> None:
+        for i in range(3):
+            self.monitor.on_frame()
+        report = self.monitor.report()
+        self.assertIn("2 frames", report)
+        self.assertIn("Net allocated blocks per frame", report)
+        self.assertIn("Collections by generation", report)
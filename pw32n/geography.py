@@ -12,11 +12,13 @@ One key innovation is that we use an LRUDict to keep track of the tiles we've se
 back to a place, the same tiles are still there. However, if the LRUDict gets too full, it starts dropping things the
 user hasn't visited in a while. Real life works similarly--if you go back to a city after 20 years, things may have
 changed. It takes about 200 MB to keep track of a maximum capacity of 1,000,000 tiles. Don't worry--it starts empty.
+To keep that down, the LRUDict is keyed by packed ints rather than OriginPoints. See TileMap and tile_keys.
 
 """
 
-from typing import Iterator, NamedTuple, TypeVar, Generic
+from typing import Callable, Iterator, NamedTuple, Optional, TypeVar, Generic
 
+from pw32n import tile_keys
 from pw32n.lru_dict import LRUDict
 
 TileType = TypeVar("TileType")
@@ -39,6 +41,119 @@ class TilePointDiff(NamedTuple):
     removed: set[OriginPoint]
 
 
+class TileRect(NamedTuple):
+    """A rectangle of tile points. left and top are inclusive. right and bottom are exclusive."""
+
+    left: OriginDistance
+    right: OriginDistance
+    top: OriginDistance
+    bottom: OriginDistance
+
+
+EMPTY_TILE_RECT = TileRect(0, 0, 0, 0)
+
+
+class TileMap(Generic[TileType]):
+
+    """An LRUDict of tiles by OriginPoint that's keyed by tile_keys.pack underneath.
+
+    The points have to be aligned (see Geography.align_point). Everything that goes in or comes
+    out is an OriginPoint, including the points passed to on_evict. Use key when you want to key
+    your own dict the same way (like WorldView.sprite_map does). Hot code that already has a
+    tile's (col, row) can use the *_by_index methods to skip making an OriginPoint.
+
+    """
+
+    def __init__(self, geo: "Geography[TileType]", capacity: int) -> None:
+        # The tile size comes from geo every time, since subclasses may change it after
+        # Geography.__init__.
+        self.geo = geo
+        self.lru: LRUDict[int, TileType] = LRUDict(capacity)
+        self.lru.on_evict = self._on_evict
+
+        # The LRUDict's OrderedDict. get and peek use it directly, since going through the
+        # LRUDict costs another call per lookup.
+        self.cache = self.lru.cache
+
+        # If set, this gets called with the point and tile of everything that gets evicted.
+        self.on_evict: Optional[Callable[[OriginPoint, TileType], None]] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.lru.capacity
+
+    @capacity.setter
+    def capacity(self, capacity: int) -> None:
+        self.lru.capacity = capacity
+
+    def key(self, p: OriginPoint) -> int:
+        geo = self.geo
+        return tile_keys.pack(p.x // geo.tile_width, p.y // geo.tile_height)
+
+    def point(self, key: int) -> OriginPoint:
+        col, row = tile_keys.unpack(key)
+        return OriginPoint(col * self.geo.tile_width, row * self.geo.tile_height)
+
+    # These are the hot ones, so they don't call key or each other. Tiles are never None.
+
+    def get(self, p: OriginPoint, default: TileType = None) -> TileType:
+        geo = self.geo
+        key = tile_keys.pack(p.x // geo.tile_width, p.y // geo.tile_height)
+        tile = self.cache.get(key)
+        if tile is None:
+            return default
+        self.cache.move_to_end(key)
+        return tile
+
+    def get_by_index(self, col: int, row: int, default: TileType = None) -> TileType:
+        key = tile_keys.pack(col, row)
+        tile = self.cache.get(key)
+        if tile is None:
+            return default
+        self.cache.move_to_end(key)
+        return tile
+
+    def peek(self, p: OriginPoint, default: TileType = None) -> TileType:
+        """This is like get, but it doesn't count as using the tile."""
+        geo = self.geo
+        return self.cache.get(
+            tile_keys.pack(p.x // geo.tile_width, p.y // geo.tile_height), default
+        )
+
+    def peek_by_index(self, col: int, row: int, default: TileType = None) -> TileType:
+        return self.cache.get(tile_keys.pack(col, row), default)
+
+    def put(self, p: OriginPoint, tile: TileType) -> None:
+        self.lru.put(self.key(p), tile)
+
+    def pop(self, p: OriginPoint, default: TileType = None) -> TileType:
+        """Forget the tile at p without calling on_evict."""
+        return self.cache.pop(self.key(p), default)
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def __contains__(self, p: OriginPoint) -> bool:
+        return self.key(p) in self.cache
+
+    def items(self) -> Iterator[tuple[OriginPoint, TileType]]:
+        """Iterate over the tiles from least to most recently used."""
+        point = self.point
+        for key, tile in self.cache.items():
+            yield point(key), tile
+
+    def items_by_index(self) -> Iterator[tuple[int, int, int, TileType]]:
+        """Like items, but yield (key, col, row, tile) instead."""
+        unpack = tile_keys.unpack
+        for key, tile in self.cache.items():
+            col, row = unpack(key)
+            yield key, col, row, tile
+
+    def _on_evict(self, key: int, tile: TileType) -> None:
+        if self.on_evict is not None:
+            self.on_evict(self.point(key), tile)
+
+
 class Geography(Generic[TileType]):
     def __init__(self) -> None:
         self.tile_width: AdventureDistance = 64
@@ -49,7 +164,7 @@ class Geography(Generic[TileType]):
         self.min_screen_height: AdventureDistance = 600
         self.initial_position = OriginPoint(0, 0)
         self.position = self.initial_position
-        self.tile_map: LRUDict[OriginPoint, TileType] = LRUDict(capacity=1_000_000)
+        self.tile_map: TileMap[TileType] = TileMap(self, capacity=1_000_000)
 
     def align_x(self, x: OriginDistance) -> OriginDistance:
         """See align_point."""
@@ -114,6 +229,53 @@ class Geography(Generic[TileType]):
             ):
                 yield OriginPoint(x, y)
 
+    def tile_rect(self) -> TileRect:
+        return TileRect(
+            self.left_tile_boundary(),
+            self.right_tile_boundary(),
+            self.top_tile_boundary(),
+            self.bottom_tile_boundary(),
+        )
+
+    def is_tile_rect_current(self, rect: TileRect) -> bool:
+        """Is rect still what tile_rect would return?
+
+        This is meant to be called every frame, so it avoids allocating a new TileRect.
+
+        """
+        return (
+            rect.left == self.left_tile_boundary()
+            and rect.right == self.right_tile_boundary()
+            and rect.top == self.top_tile_boundary()
+            and rect.bottom == self.bottom_tile_boundary()
+        )
+
+    def diff_tile_rects(
+        self, prev_rect: TileRect, new_rect: TileRect, diff: TilePointDiff
+    ) -> TilePointDiff:
+        """This is like diff_tile_points, but for two TileRects.
+
+        Instead of building two sets of every point on the screen, it only allocates the points
+        that were actually added or removed. It clears and reuses diff's sets.
+
+        """
+        diff.added.clear()
+        diff.removed.clear()
+        self._add_points_outside(new_rect, prev_rect, diff.added)
+        self._add_points_outside(prev_rect, new_rect, diff.removed)
+        return diff
+
+    def _add_points_outside(
+        self, rect: TileRect, other: TileRect, points: set[OriginPoint]
+    ) -> None:
+        """Add the points in rect that aren't in other."""
+        for x in range(rect.left, rect.right, self.tile_width):
+            x_is_in_other = other.left <= x < other.right
+            for y in range(rect.top, rect.bottom, -self.tile_height):
+                if x_is_in_other and other.bottom < y <= other.top:
+                    continue
+                points.add(OriginPoint(x, y))
+
     def diff_tile_points(
         self, prev_tile_points: set[OriginPoint], new_tile_points: set[OriginPoint]
     ) -> TilePointDiff:
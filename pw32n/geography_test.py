@@ -8,6 +8,8 @@ from pw32n.geography import (
     TileType,
     AdventurePoint,
     OriginPoint,
+    TilePointDiff,
+    EMPTY_TILE_RECT,
 )
 
 
@@ -113,6 +115,31 @@ class GeographyTestCase(unittest.TestCase):
         self.assertSetEqual(diff.removed, {p0})
         self.assertEqual(diff.added, {p2})
 
+    def test_tile_rect(self) -> None:
+        rect = self.geo.tile_rect()
+        self.assertEqual(rect.left, self.geo.left_tile_boundary())
+        self.assertEqual(rect.bottom, self.geo.bottom_tile_boundary())
+        self.assertTrue(self.geo.is_tile_rect_current(rect))
+        self.geo.position = OriginPoint(self.geo.position.x + 5, self.geo.position.y)
+        self.assertFalse(self.geo.is_tile_rect_current(rect))
+
+    def test_diff_tile_rects_matches_diff_tile_points(self) -> None:
+        diff = TilePointDiff(added=set(), removed=set())
+        prev_rect = EMPTY_TILE_RECT
+        prev_points: set[OriginPoint] = set()
+        for (dx, dy) in ((0, 0), (5, 0), (3, -7), (-40, 40), (1000, 1000)):
+            self.geo.position = OriginPoint(
+                self.geo.position.x + dx, self.geo.position.y + dy
+            )
+            new_rect = self.geo.tile_rect()
+            new_points = set(self.geo.generate_tile_points())
+            self.assertIs(self.geo.diff_tile_rects(prev_rect, new_rect, diff), diff)
+            self.assertEqual(
+                diff, self.geo.diff_tile_points(prev_points, new_points), (dx, dy)
+            )
+            prev_rect = new_rect
+            prev_points = new_points
+
     def test_origin_point_to_adventure_point(self) -> None:
         op = OriginPoint(
             self.geo.position.x + 1,
@@ -127,6 +154,43 @@ class GeographyTestCase(unittest.TestCase):
         self.geo.tile_map.put(p, tile)
         self.assertEqual(self.geo.tile_map.get(p), tile)
 
+    def test_tile_map_is_keyed_by_tile(self) -> None:
+        tile_map = self.geo.tile_map
+        tile_map.capacity = 2
+        evicted: list[tuple[OriginPoint, ExampleTile]] = []
+        tile_map.on_evict = lambda p, tile: evicted.append((p, tile))
+        points = [OriginPoint(-5, 10), OriginPoint(0, 0), OriginPoint(5, -5)]
+        tile = ExampleTile()
+        for p in points:
+            tile_map.put(p, tile)
+        self.assertEqual(evicted, [(points[0], tile)])
+        self.assertEqual(list(tile_map.items()), [(p, tile) for p in points[1:]])
+        self.assertTrue(points[1] in tile_map)
+        self.assertFalse(points[0] in tile_map)
+        self.assertEqual(tile_map.pop(points[1]), tile)
+        self.assertEqual(len(tile_map), 1)
+        self.assertEqual(tile_map.point(tile_map.key(points[2])), points[2])
+
+    def test_tile_map_by_index(self) -> None:
+        tile_map = self.geo.tile_map
+        first = ExampleTile()
+        second = ExampleTile()
+        tile_map.put(OriginPoint(5, -5), first)
+        tile_map.put(OriginPoint(-10, 0), second)
+        self.assertIs(tile_map.peek_by_index(1, -1), first)
+        self.assertIsNone(tile_map.peek_by_index(0, 0))
+        self.assertEqual(
+            [(col, row) for key, col, row, tile in tile_map.items_by_index()],
+            [(1, -1), (-2, 0)],
+        )
+
+        # Unlike peek, get counts as using the tile.
+        self.assertIs(tile_map.get_by_index(1, -1), first)
+        self.assertEqual(
+            [tile for key, col, row, tile in tile_map.items_by_index()],
+            [second, first],
+        )
+
     def test_north(self) -> None:
         self.assertEqual(self.geo.north(OriginPoint(0, 0)), OriginPoint(0, 5))
 
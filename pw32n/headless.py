@@ -0,0 +1,51 @@
+"""This walks around the world without a window.
+
+HeadlessWorld does what WorldView.update_tiles does, minus the sprites: it keeps track of which
+tile points are loaded and asks the TilePicker for tiles as new points come into view. That's
+enough for benchmarks, soak tests, and anything else that wants to drive Geography for a long
+time without OpenGL.
+
+"""
+
+from pw32n import geography, tiles
+from pw32n.tile_picker import TilePicker
+
+
+class HeadlessWorld:
+    def __init__(self, geo: geography.Geography[tiles.Tile] = None) -> None:
+        if geo is None:
+            geo = geography.Geography()
+        self.geo = geo
+        self.tile_picker = TilePicker(geo)
+        geo.tile_map.on_evict = self.tile_picker.on_tile_evicted
+        self.loaded: set[geography.OriginPoint] = set()
+        self.tile_rect = geography.EMPTY_TILE_RECT
+        self.tile_point_diff = geography.TilePointDiff(added=set(), removed=set())
+        self.update_tiles()
+
+    def move(self, delta_x: int, delta_y: int) -> geography.TilePointDiff:
+        """Move the player and load or unload tiles as necessary, like WorldView.on_update.
+
+        This returns the diff, which is reused between calls.
+
+        """
+        if delta_x or delta_y:
+            self.geo.position = geography.OriginPoint(
+                self.geo.position.x + delta_x, self.geo.position.y + delta_y
+            )
+        return self.update_tiles()
+
+    def update_tiles(self) -> geography.TilePointDiff:
+        diff = self.tile_point_diff
+        if self.geo.is_tile_rect_current(self.tile_rect):
+            diff.added.clear()
+            diff.removed.clear()
+            return diff
+        new_tile_rect = self.geo.tile_rect()
+        self.geo.diff_tile_rects(self.tile_rect, new_tile_rect, diff)
+        self.tile_rect = new_tile_rect
+        self.loaded -= diff.removed
+        for tile_point in diff.added:
+            self.tile_picker.get_tile(tile_point)
+        self.loaded |= diff.added
+        return diff
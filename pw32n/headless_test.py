@@ -0,0 +1,36 @@
+import random
+import unittest
+
+from pw32n.geography import OriginPoint
+from pw32n.headless import HeadlessWorld
+
+
+class HeadlessWorldTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(0)
+        self.world = HeadlessWorld()
+
+    def test_loads_the_initial_screen(self) -> None:
+        self.assertEqual(self.world.loaded, set(self.world.geo.generate_tile_points()))
+        self.assertEqual(self.world.tile_picker.tiles_generated, len(self.world.loaded))
+        for p in self.world.loaded:
+            self.assertIsNotNone(self.world.geo.tile_map.get(p))
+
+    def test_move_within_a_tile_does_nothing(self) -> None:
+        diff = self.world.move(1, 0)
+        self.assertEqual(diff.added, set())
+        self.assertEqual(diff.removed, set())
+        self.assertEqual(self.world.geo.position, OriginPoint(1, 0))
+
+    def test_move_loads_and_unloads_tiles(self) -> None:
+        tile_width = self.world.geo.tile_width
+        diff = self.world.move(tile_width, 0)
+        self.assertTrue(diff.added)
+        self.assertTrue(diff.removed)
+        self.assertEqual(self.world.loaded, set(self.world.geo.generate_tile_points()))
+
+    def test_coming_back_reuses_tiles(self) -> None:
+        tile_width = self.world.geo.tile_width
+        self.world.move(tile_width, 0)
+        self.world.move(-tile_width, 0)
+        self.assertGreater(self.world.tile_picker.tiles_reused, 0)
@@ -0,0 +1,59 @@
+"""Retained mode drawing for the status bar at the bottom of the screen.
+
+arcade.draw_text and arcade.draw_rectangle_filled build everything from scratch on every call.
+StatusBar keeps an arcade.Text and a ShapeElementList around instead. The text is only laid out
+again when the StatusLine says it changed, and the background is only rebuilt when the window
+is resized.
+
+"""
+
+from typing import Callable, Generic, Optional, TypeVar
+
+import arcade
+
+from pw32n.status_line import StatusLine
+
+T = TypeVar("T")
+
+
+class StatusBar(Generic[T]):
+    BACKGROUND_COLOR = arcade.color.ALMOND
+    TEXT_COLOR = arcade.color.BLACK_BEAN
+    FONT_SIZE = 20
+    MARGIN = 10
+
+    def __init__(self, format: Callable[[T], str], height: int) -> None:
+        self.status_line = StatusLine(format)
+        self.height = height
+        self.text = arcade.Text(
+            "",
+            start_x=self.MARGIN,
+            start_y=self.MARGIN,
+            color=self.TEXT_COLOR,
+            font_size=self.FONT_SIZE,
+        )
+        self.background: Optional[arcade.ShapeElementList] = None
+        self.background_width = 0
+
+    def update(self, values: T) -> bool:
+        """Returns True if the text changed."""
+        if not self.status_line.update(values):
+            return False
+        self.text.text = self.status_line.text
+        return True
+
+    def draw(self, width: int) -> None:
+        if self.background is None or width != self.background_width:
+            self.background = arcade.ShapeElementList()
+            self.background.append(
+                arcade.create_rectangle_filled(
+                    center_x=width // 2,
+                    center_y=self.height // 2,
+                    width=width,
+                    height=self.height,
+                    color=self.BACKGROUND_COLOR,
+                )
+            )
+            self.background_width = width
+        self.background.draw()
+        self.text.draw()
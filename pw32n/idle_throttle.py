@@ -0,0 +1,99 @@
+"""Skip redraws and slow down updates while nothing on the screen is changing.
+
+When the player stands still and no enemies are wandering around on the screen, every frame looks
+exactly like the last one, so drawing it again is a waste of CPU and GPU. WorldView calls
+mark_dirty whenever something visible changes. should_draw says whether the next frame actually
+needs to be drawn. Once nothing has changed for IDLE_DELAY, update_rate asks for updates at
+IDLE_UPDATE_RATE instead of FULL_UPDATE_RATE, and any input (see on_input) switches back to the
+full rate right away.
+
+Even when idle, we redraw every REDRAW_PERIOD just in case something we don't know about (like
+the window manager) messed up the screen.
+
+"""
+
+import time
+from typing import Callable, Optional
+
+
+class IdleThrottle:
+    # These are in seconds per update, like arcade.Window.set_update_rate.
+    FULL_UPDATE_RATE = 1 / 60
+    IDLE_UPDATE_RATE = 1 / 10
+
+    IDLE_DELAY = 1.0
+    REDRAW_PERIOD = 1.0
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        now = clock()
+        self.needs_draw = True
+        self.has_changed = True
+        self.changed_at = now
+        self.drawn_at = now
+        self.is_idle = False
+        self.idle_since = now
+
+        # These are for the report.
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+        self.updates = 0
+        self.idle_updates = 0
+        self.idle_seconds = 0.0
+
+    def mark_dirty(self) -> None:
+        self.needs_draw = True
+        self.has_changed = True
+
+    def on_input(self) -> Optional[float]:
+        """Call this on every key press, etc. Returns the new update rate, if it changed."""
+        self.mark_dirty()
+        return self.update_rate()
+
+    def update_rate(self) -> Optional[float]:
+        """Call this at the end of every update. Returns the new update rate, if it changed."""
+        now = self.clock()
+        self.updates += 1
+        if self.is_idle:
+            self.idle_updates += 1
+        if self.has_changed:
+            self.has_changed = False
+            self.changed_at = now
+        is_idle = now - self.changed_at >= self.IDLE_DELAY
+        if is_idle == self.is_idle:
+            return None
+        self.is_idle = is_idle
+        if is_idle:
+            self.idle_since = now
+            return self.IDLE_UPDATE_RATE
+        self.idle_seconds += now - self.idle_since
+        return self.FULL_UPDATE_RATE
+
+    def should_draw(self) -> bool:
+        now = self.clock()
+        if self.needs_draw or now - self.drawn_at >= self.REDRAW_PERIOD:
+            self.needs_draw = False
+            self.drawn_at = now
+            self.frames_drawn += 1
+            return True
+        self.frames_skipped += 1
+        return False
+
+    def report(self) -> str:
+        frames = self.frames_drawn + self.frames_skipped
+        if not frames:
+            return "Idle throttle: no frames"
+        idle_seconds = self.idle_seconds
+        if self.is_idle:
+            idle_seconds += self.clock() - self.idle_since
+
+        # How many updates we would have done at the full rate while we were idle.
+        updates_saved = idle_seconds / self.FULL_UPDATE_RATE - self.idle_updates
+        return " ".join(
+            [
+                f"Idle throttle: skipped {self.frames_skipped} of {frames} frames",
+                f"({100 * self.frames_skipped / frames:.1f}%).",
+                f"Idle for {idle_seconds:.1f} s,",
+                f"saving about {max(updates_saved, 0):.0f} updates.",
+            ]
+        )
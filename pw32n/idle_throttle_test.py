@@ -0,0 +1,56 @@
+import unittest
+
+from pw32n.idle_throttle import IdleThrottle
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class IdleThrottleTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.throttle = IdleThrottle(self.clock)
+
+    def frame(self, is_dirty: bool = False) -> tuple[bool, object]:
+        """Update and draw one frame, an eighth of a second later."""
+        self.clock.now += 0.125
+        if is_dirty:
+            self.throttle.mark_dirty()
+        update_rate = self.throttle.update_rate()
+        return self.throttle.should_draw(), update_rate
+
+    def test_skips_frames_when_nothing_changed(self) -> None:
+        self.assertEqual(self.frame(), (True, None))
+        self.assertEqual(self.frame(), (False, None))
+        self.assertEqual(self.frame(is_dirty=True), (True, None))
+        self.assertEqual(self.frame(), (False, None))
+        self.assertEqual(self.throttle.frames_drawn, 2)
+        self.assertEqual(self.throttle.frames_skipped, 2)
+
+    def test_redraws_every_so_often_anyway(self) -> None:
+        drawn = [self.frame()[0] for _ in range(25)]
+        self.assertEqual(drawn.count(True), 4)
+
+    def test_slows_down_when_idle_and_snaps_back_on_input(self) -> None:
+        # The first update counts as a change.
+        update_rates = [self.frame()[1] for _ in range(9)]
+        self.assertEqual(update_rates[:8], [None] * 8)
+        self.assertEqual(update_rates[8], IdleThrottle.IDLE_UPDATE_RATE)
+        self.assertTrue(self.throttle.is_idle)
+
+        self.clock.now += 5.0
+        self.assertEqual(self.throttle.on_input(), IdleThrottle.FULL_UPDATE_RATE)
+        self.assertFalse(self.throttle.is_idle)
+        self.assertTrue(self.throttle.should_draw())
+        self.assertIn("Idle for 5.0 s", self.throttle.report())
+
+    def test_report(self) -> None:
+        self.assertEqual(self.throttle.report(), "Idle throttle: no frames")
+        for _ in range(10):
+            self.frame()
+        self.assertIn("skipped 8 of 10 frames (80.0%)", self.throttle.report())
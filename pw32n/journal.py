@@ -0,0 +1,328 @@
+"""Crash-safe autosave: an append-only journal of everything that changes the world.
+
+The game can't afford to write a whole save file every second, so instead it writes down each
+change as it happens: tiles being generated (or carved or forgotten), enemies spawning and dying,
+and the player's position and strength. Journal's methods are called on the frame loop, and
+like EventLog, they never do I/O there. They append a tuple to a deque (whose append and popleft
+are atomic, so no lock is needed), and a background thread encodes the records and appends them
+to the journal file. The writer fsyncs at least every SYNC_PERIOD, so a crash loses at most
+about that much.
+
+The records are small fixed size structs, written in batches. Each batch starts with its length
+and a CRC, so if the game dies halfway through a write, recovery sees a bad batch at the end
+and stops there.
+
+The journal would grow forever, so once it gets bigger than COMPACT_SIZE, the writer compacts
+it: it replays the snapshot plus the journal (see recover), writes the result as a new snapshot
+(via a temporary file and os.replace), and starts a new, empty journal. Each snapshot has an
+epoch number, and each journal has the epoch of the snapshot it applies to. That way, if the
+game dies between writing the snapshot and starting the new journal, recovery ignores the old
+journal instead of replaying it on top of a snapshot that already includes it. The snapshot
+stores the tiles as three arrays, so recovering a big world is mostly NumPy.
+
+Compaction happens on the writer thread, but it's Python, so it still competes with the frame
+loop for the GIL while it runs. That's why it's saved for when the journal gets big.
+
+Files: the snapshot is at path, and the journal is at path + JOURNAL_SUFFIX.
+
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, BinaryIO, NamedTuple, Optional
+
+import numpy as np
+
+JOURNAL_SUFFIX = ".journal"
+
+_MAGIC = b"PW32NJNL"
+_HEADER = struct.Struct("<8sQ")  # Magic and epoch.
+_BATCH_HEADER = struct.Struct("<II")  # Length and CRC32 of the records that follow.
+
+# Record kinds.
+TILE = 1
+TILE_EVICTED = 2
+ENEMY_SPAWNED = 3
+ENEMY_DIED = 4
+PLAYER = 5
+TILES = 6  # Only in snapshots. See _write_tiles.
+
+# Each record is its kind followed by its fields. Tiles are addressed by tile index (col, row),
+# like TileStore, and enemies by their index in the EnemyPool.
+_RECORDS = {
+    TILE: struct.Struct("<BqqB"),  # col, row, tile_id
+    TILE_EVICTED: struct.Struct("<Bqq"),  # col, row
+    ENEMY_SPAWNED: struct.Struct("<BIqqdB"),  # index, x, y, strength, sprite_image_id
+    ENEMY_DIED: struct.Struct("<BI"),  # index
+    PLAYER: struct.Struct("<Bqqd"),  # x, y, strength
+    TILES: struct.Struct("<BI"),  # count, followed by the cols, rows and tile IDs
+}
+
+# How many tiles go in each TILES record.
+_TILES_PER_RECORD = 1 << 16
+
+
+class EnemyRecord(NamedTuple):
+    x: int
+    y: int
+    strength: float
+    sprite_image_id: int
+
+
+class PlayerRecord(NamedTuple):
+    x: int
+    y: int
+    strength: float
+
+
+class GameState:
+
+    """What recover returns, and what a snapshot is written from."""
+
+    def __init__(self) -> None:
+        # The tile ID by (col, row), oldest first.
+        self.tiles: dict[tuple[int, int], int] = {}
+        self.enemies: dict[int, EnemyRecord] = {}
+        self.player: Optional[PlayerRecord] = None
+
+    def apply(self, payload: bytes) -> None:
+        """Apply a batch of records."""
+        tiles = self.tiles
+        offset = 0
+        end = len(payload)
+        while offset < end:
+            kind = payload[offset]
+            record = _RECORDS[kind]
+            fields = record.unpack_from(payload, offset)
+            offset += record.size
+            if kind == TILE:
+                key = (fields[1], fields[2])
+                tiles.pop(key, None)
+                tiles[key] = fields[3]
+            elif kind == TILE_EVICTED:
+                tiles.pop((fields[1], fields[2]), None)
+            elif kind == ENEMY_SPAWNED:
+                self.enemies[fields[1]] = EnemyRecord(*fields[2:])
+            elif kind == ENEMY_DIED:
+                self.enemies.pop(fields[1], None)
+            elif kind == PLAYER:
+                self.player = PlayerRecord(*fields[1:])
+            elif kind == TILES:
+                count = fields[1]
+                cols = np.frombuffer(payload, "<i8", count, offset)
+                rows = np.frombuffer(payload, "<i8", count, offset + 8 * count)
+                tile_ids = np.frombuffer(payload, np.uint8, count, offset + 16 * count)
+                offset += 17 * count
+                tiles.update(zip(zip(cols.tolist(), rows.tolist()), tile_ids.tolist()))
+
+
+def _read(path: str, state: GameState) -> Optional[int]:
+    """Apply the file's batches to state and return its epoch, or None if it's not there."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, epoch = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC:
+        raise ValueError(f"{path} is not a journal")
+    offset = _HEADER.size
+    while offset + _BATCH_HEADER.size <= len(data):
+        length, crc = _BATCH_HEADER.unpack_from(data, offset)
+        start = offset + _BATCH_HEADER.size
+        payload = data[start : start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            # The game died while writing this batch.
+            break
+        state.apply(payload)
+        offset = start + length
+    return int(epoch)
+
+
+def _read_epoch(path: str) -> int:
+    with open(path, "rb") as f:
+        return int(_HEADER.unpack(f.read(_HEADER.size))[1])
+
+
+def recover(path: str) -> GameState:
+    """Return the state saved in the snapshot at path plus its journal."""
+    state = GameState()
+    epoch = _read(path, state)
+    if epoch is not None:
+        journal_path = path + JOURNAL_SUFFIX
+        if os.path.exists(journal_path) and _read_epoch(journal_path) == epoch:
+            _read(journal_path, state)
+    return state
+
+
+def _write_batch(f: BinaryIO, payload: bytes) -> None:
+    f.write(_BATCH_HEADER.pack(len(payload), zlib.crc32(payload)))
+    f.write(payload)
+
+
+def _write_tiles(f: BinaryIO, tiles: dict[tuple[int, int], int]) -> None:
+    items = list(tiles.items())
+    for start in range(0, len(items), _TILES_PER_RECORD):
+        chunk = items[start : start + _TILES_PER_RECORD]
+        cols = np.fromiter((key[0] for key, _ in chunk), "<i8", len(chunk))
+        rows = np.fromiter((key[1] for key, _ in chunk), "<i8", len(chunk))
+        tile_ids = np.fromiter((tile_id for _, tile_id in chunk), np.uint8, len(chunk))
+        _write_batch(
+            f,
+            b"".join(
+                [
+                    _RECORDS[TILES].pack(TILES, len(chunk)),
+                    cols.tobytes(),
+                    rows.tobytes(),
+                    tile_ids.tobytes(),
+                ]
+            ),
+        )
+
+
+def write_snapshot(path: str, state: GameState, epoch: int) -> None:
+    """Atomically replace the snapshot at path."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, epoch))
+        _write_tiles(f, state.tiles)
+        records = [
+            _RECORDS[ENEMY_SPAWNED].pack(ENEMY_SPAWNED, index, *enemy)
+            for index, enemy in state.enemies.items()
+        ]
+        if state.player is not None:
+            records.append(_RECORDS[PLAYER].pack(PLAYER, *state.player))
+        if records:
+            _write_batch(f, b"".join(records))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class Journal:
+    # How often the writer wakes up to drain the buffer.
+    FLUSH_PERIOD = 0.1
+
+    # How often the writer makes sure everything it wrote is on disk.
+    SYNC_PERIOD = 1.0
+
+    # Once the journal is this big, it gets folded into the snapshot.
+    COMPACT_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, path: str, state: GameState = None) -> None:
+        """Start a new snapshot from state, which should be everything the game knows now.
+
+        Call recover first if you want to pick up where the last session left off.
+
+        """
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.records_written = 0
+        self.bytes_written = 0
+        self.syncs = 0
+        self.compactions = 0
+
+        # Only the frame loop appends, and only the writer pops.
+        self.buffer: deque[tuple[Any, ...]] = deque()
+
+        self.epoch = 0
+        if os.path.exists(path):
+            self.epoch = _read_epoch(path) + 1
+        write_snapshot(path, state or GameState(), self.epoch)
+        self._file = self._start_journal()
+        self._synced_at = time.monotonic()
+
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="Journal writer", daemon=True
+        )
+        self._thread.start()
+
+    # These are called on the frame loop.
+
+    def tile(self, col: int, row: int, tile_id: int) -> None:
+        self.buffer.append((TILE, col, row, tile_id))
+
+    def tile_evicted(self, col: int, row: int) -> None:
+        self.buffer.append((TILE_EVICTED, col, row))
+
+    def enemy_spawned(
+        self, index: int, x: int, y: int, strength: float, sprite_image_id: int
+    ) -> None:
+        self.buffer.append((ENEMY_SPAWNED, index, x, y, strength, sprite_image_id))
+
+    def enemy_died(self, index: int) -> None:
+        self.buffer.append((ENEMY_DIED, index))
+
+    def player(self, x: int, y: int, strength: float) -> None:
+        self.buffer.append((PLAYER, x, y, strength))
+
+    # The rest runs on the writer thread, except for close.
+
+    def _start_journal(self) -> BinaryIO:
+        f = open(self.journal_path, "wb")
+        f.write(_HEADER.pack(_MAGIC, self.epoch))
+        f.flush()
+        os.fsync(f.fileno())
+        return f
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.FLUSH_PERIOD):
+            self._drain()
+            if time.monotonic() - self._synced_at >= self.SYNC_PERIOD:
+                self._sync()
+            if self._file.tell() >= self.COMPACT_SIZE:
+                self._compact()
+        self._drain()
+        self._sync()
+
+    def _drain(self) -> None:
+        buffer = self.buffer
+        if not buffer:
+            return
+        records = _RECORDS
+        parts = []
+        while buffer:
+            record = buffer.popleft()
+            parts.append(records[record[0]].pack(*record))
+        payload = b"".join(parts)
+        _write_batch(self._file, payload)
+        self.records_written += len(parts)
+        self.bytes_written += _BATCH_HEADER.size + len(payload)
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._synced_at = time.monotonic()
+        self.syncs += 1
+
+    def _compact(self) -> None:
+        self._sync()
+        state = recover(self.path)
+        self.epoch += 1
+        write_snapshot(self.path, state, self.epoch)
+        self._file.close()
+        self._file = self._start_journal()
+        self.compactions += 1
+
+    def close(self) -> None:
+        """Write everything that's left and fold it into the snapshot."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._compact()
+        self._file.close()
+
+    def report(self) -> str:
+        return (
+            f"Journal: {self.records_written} records ({self.bytes_written} bytes) "
+            f"written to {self.journal_path}, {self.syncs} syncs, "
+            f"{self.compactions} compactions"
+        )
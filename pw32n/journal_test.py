@@ -0,0 +1,105 @@
+import os
+import tempfile
+import time
+import unittest
+
+from pw32n.journal import (
+    JOURNAL_SUFFIX,
+    EnemyRecord,
+    GameState,
+    Journal,
+    PlayerRecord,
+    recover,
+    write_snapshot,
+)
+
+
+class FastJournal(Journal):
+    FLUSH_PERIOD = 0.01
+    COMPACT_SIZE = 2000
+
+
+def crash(journal: Journal) -> None:
+    """Stop the writer the way a crash would, minus whatever was still in the buffer."""
+    journal._stopping.set()
+    journal._thread.join()
+
+    # A crash would close it too.
+    journal._file.close()
+
+
+class JournalTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "save")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def play(self, journal: Journal) -> None:
+        for col in range(10):
+            journal.tile(col, -col, col % 3)
+        journal.tile_evicted(0, 0)
+        journal.tile(1, -1, 2)
+        journal.enemy_spawned(0, 64, -64, 1.5, 2)
+        journal.enemy_spawned(1, 128, 0, 2.5, 0)
+        journal.enemy_died(0)
+        journal.player(10, 20, 3.0)
+
+    def assert_played(self, state: GameState) -> None:
+        self.assertEqual(len(state.tiles), 9)
+        self.assertEqual(state.tiles[(1, -1)], 2)
+        self.assertEqual(list(state.tiles)[-1], (1, -1))
+        self.assertNotIn((0, 0), state.tiles)
+        self.assertEqual(state.enemies, {1: EnemyRecord(128, 0, 2.5, 0)})
+        self.assertEqual(state.player, PlayerRecord(10, 20, 3.0))
+
+    def test_recovers_after_a_crash(self) -> None:
+        journal = Journal(self.path)
+        self.play(journal)
+        crash(journal)
+
+        # The game died in the middle of writing another batch.
+        with open(self.path + JOURNAL_SUFFIX, "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x12\x34")
+        self.assert_played(recover(self.path))
+
+    def test_close_folds_the_journal_into_the_snapshot(self) -> None:
+        journal = Journal(self.path)
+        self.play(journal)
+        journal.close()
+        self.assertEqual(os.path.getsize(self.path + JOURNAL_SUFFIX), 16)
+        self.assert_played(recover(self.path))
+        self.assertIn("compactions", journal.report())
+
+        # Starting over from the recovered state keeps it.
+        journal = Journal(self.path, recover(self.path))
+        journal.tile(100, 100, 1)
+        crash(journal)
+        state = recover(self.path)
+        self.assertEqual(len(state.tiles), 10)
+        self.assertEqual(state.player, PlayerRecord(10, 20, 3.0))
+
+    def test_compacts_when_the_journal_gets_big(self) -> None:
+        journal = FastJournal(self.path)
+        for i in range(1000):
+            journal.tile(i, 0, 1)
+            journal.tile_evicted(i - 10, 0)
+        deadline = time.monotonic() + 5.0
+        while not journal.compactions and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(journal.compactions, 0)
+        crash(journal)
+        state = recover(self.path)
+        self.assertEqual(list(state.tiles), [(i, 0) for i in range(990, 1000)])
+
+    def test_ignores_a_journal_from_an_older_snapshot(self) -> None:
+        journal = Journal(self.path)
+        journal.tile(0, 0, 1)
+        crash(journal)
+
+        # The game died right after writing a new snapshot, before starting a new journal.
+        state = GameState()
+        state.tiles[(5, 5)] = 2
+        write_snapshot(self.path, state, journal.epoch + 1)
+        self.assertEqual(recover(self.path).tiles, {(5, 5): 2})
@@ -0,0 +1,273 @@
+"""Point a crowd of headless bots at a world_server and see how it holds up.
+
+Each bot is an asyncio.Protocol that plays the way a bored human might: it walks in a random
+direction for a while (or until it bumps into something), and when it walks into an enemy, it
+mashes battle moves until the battle is over. It keeps its own copy of the chunks the server
+sends it, like a real client would.
+
+Every MOVE carries a sequence number, and the server answers each one with MOVED, so the time
+between the two is the round trip latency of a move, including however long the server took to
+handle it and send its chunks. All the bots run in one process on one event loop, driven by a
+single task, so that the load test itself stays cheap.
+
+By default, the server runs in its own process, so the bots aren't competing with it for the
+GIL:
+
+    python -m pw32n.load_tester --bots 50 --duration 10
+
+Use --address to test a server that's already running.
+
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import signal
+import sys
+import tempfile
+import time
+from typing import Optional, cast
+
+from pw32n.tile_store import ChunkKey, TileIdArray
+from pw32n.world_protocol import (
+    BATTLE_ENDED,
+    BATTLE_MOVE,
+    BATTLE_MOVES,
+    BATTLE_STARTED,
+    CHUNK,
+    CHUNK_DELTA,
+    MOVE,
+    MOVED,
+    WELCOME,
+    MessageReader,
+    apply_chunk,
+    create_connection,
+    pack,
+    unpack,
+)
+
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+# The server lets a player take 30 steps a second. See WorldServer.STEP_DISTANCE.
+DEFAULT_MOVES_PER_SECOND = 30.0
+
+# How often a bot attempts a battle move during a battle.
+BATTLE_MOVES_PER_SECOND = 4.0
+
+
+class Bot(asyncio.Protocol):
+    # A bot walks in one direction for at most this many moves.
+    MAX_LEG = 60
+
+    def __init__(self, rng: random.Random) -> None:
+        self.rng = rng
+        self.reader = MessageReader()
+        self.transport: Optional[asyncio.Transport] = None
+        self.welcomed = asyncio.get_running_loop().create_future()
+        self.player_id = 0
+        self.position = (0, 0)
+        self.chunks: dict[ChunkKey, TileIdArray] = {}
+        self.direction = rng.choice(DIRECTIONS)
+        self.leg = 0
+        self.in_battle = False
+        self.seq = 0
+
+        # When each MOVE that hasn't been answered yet was sent, by seq.
+        self.sent_at: dict[int, float] = {}
+
+        self.latencies: list[float] = []
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.bytes_received = 0
+        self.battles = 0
+        self.disconnected = False
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = cast(asyncio.Transport, transport)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.disconnected = True
+        if not self.welcomed.done():
+            self.welcomed.set_exception(ConnectionError("The server hung up"))
+
+    def data_received(self, data: bytes) -> None:
+        now = time.perf_counter()
+        self.bytes_received += len(data)
+        for kind, body in self.reader.feed(data):
+            self.messages_received += 1
+            if kind == MOVED:
+                seq, x, y = unpack(MOVED, body)
+                sent_at = self.sent_at.pop(seq, None)
+                if sent_at is not None:
+                    self.latencies.append(now - sent_at)
+                if (x, y) == self.position and not self.in_battle:
+                    # We bumped into something.
+                    self.leg = 0
+                self.position = (x, y)
+            elif kind == CHUNK or kind == CHUNK_DELTA:
+                apply_chunk(self.chunks, kind, body)
+            elif kind == BATTLE_STARTED:
+                self.in_battle = True
+                self.battles += 1
+            elif kind == BATTLE_ENDED:
+                self.in_battle = False
+            elif kind == WELCOME:
+                self.player_id, x, y, _, _ = unpack(WELCOME, body)
+                self.position = (x, y)
+                self.welcomed.set_result(None)
+
+    def act(self, battle_chance: float) -> None:
+        """Send whatever a human would send in one move period."""
+        if self.disconnected:
+            return
+        if self.in_battle:
+            if self.rng.random() < battle_chance:
+                self.send(pack(BATTLE_MOVE, self.rng.randrange(len(BATTLE_MOVES))))
+            return
+        if self.leg <= 0:
+            self.direction = self.rng.choice(DIRECTIONS)
+            self.leg = self.rng.randint(1, self.MAX_LEG)
+        self.leg -= 1
+        self.seq = (self.seq + 1) & 0xFFFF
+        self.sent_at[self.seq] = time.perf_counter()
+        self.send(pack(MOVE, self.seq, *self.direction))
+
+    def send(self, data: bytes) -> None:
+        self.transport.write(data)
+        self.messages_sent += 1
+
+
+class LoadTestResult:
+    def __init__(self, bots: list[Bot], duration: float) -> None:
+        self.bots = len(bots)
+        self.duration = duration
+        self.messages_sent = sum(bot.messages_sent for bot in bots)
+        self.messages_received = sum(bot.messages_received for bot in bots)
+        self.bytes_received = sum(bot.bytes_received for bot in bots)
+        self.battles = sum(bot.battles for bot in bots)
+        self.disconnected = sum(bot.disconnected for bot in bots)
+        self.latencies = sorted(latency for bot in bots for latency in bot.latencies)
+
+    def percentile(self, fraction: float) -> float:
+        values = self.latencies
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+    def report(self) -> str:
+        lines = [
+            f"{self.bots} bots for {self.duration:.1f}s",
+            f"  sent     {self.messages_sent / self.duration:>10,.0f} messages/sec",
+            f"  received {self.messages_received / self.duration:>10,.0f} messages/sec "
+            f"({self.bytes_received / self.duration / 1024:,.0f} KiB/sec)",
+            f"  moves    {len(self.latencies):>10,} answered",
+            f"  latency  p50 {self.percentile(0.5) * 1000:.2f}  "
+            f"p95 {self.percentile(0.95) * 1000:.2f}  "
+            f"p99 {self.percentile(0.99) * 1000:.2f}  "
+            f"max {self.percentile(1.0) * 1000:.2f}  (ms)",
+            f"  battles  {self.battles:>10,}",
+        ]
+        if self.disconnected:
+            lines.append(f"  DISCONNECTED: {self.disconnected} bots")
+        return "\n".join(lines)
+
+
+async def run_load_test(
+    address: str,
+    bots: int,
+    duration: float,
+    moves_per_second: float = DEFAULT_MOVES_PER_SECOND,
+    seed: int = 0,
+) -> LoadTestResult:
+    """Connect the bots to the server at address and let them play for duration seconds."""
+    rng = random.Random(seed)
+    connected: list[Bot] = []
+    try:
+        for _ in range(bots):
+            bot = Bot(random.Random(rng.random()))
+            await create_connection(lambda: bot, address)
+            connected.append(bot)
+        await asyncio.gather(*(bot.welcomed for bot in connected))
+
+        # Only count the steady state, not connecting.
+        for bot in connected:
+            bot.messages_sent = bot.messages_received = bot.bytes_received = 0
+        loop = asyncio.get_running_loop()
+        period = 1.0 / moves_per_second
+        battle_chance = BATTLE_MOVES_PER_SECOND * period
+        started_at = loop.time()
+        next_at = started_at
+        while loop.time() - started_at < duration:
+            for bot in connected:
+                bot.act(battle_chance)
+            next_at += period
+            await asyncio.sleep(max(next_at - loop.time(), 0.0))
+        elapsed = loop.time() - started_at
+
+        # Give the last answers a moment to come back.
+        await asyncio.sleep(0.1)
+        return LoadTestResult(connected, elapsed)
+    finally:
+        for bot in connected:
+            if bot.transport is not None:
+                bot.transport.close()
+
+
+async def start_server_process(address: str) -> asyncio.subprocess.Process:
+    """Start world_server in its own process and wait until it's listening."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "pw32n.world_server",
+        "--address",
+        address,
+        stdout=asyncio.subprocess.PIPE,
+    )
+    line = await process.stdout.readline()
+    if not line.startswith(b"Listening on"):
+        process.kill()
+        raise RuntimeError("The world server didn't start")
+    return process
+
+
+async def run_with_server(
+    bots: int, duration: float, moves_per_second: float, address: str = None
+) -> LoadTestResult:
+    process = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if address is None:
+            address = f"unix:{os.path.join(tmp_dir, 'world.sock')}"
+            process = await start_server_process(address)
+        try:
+            return await run_load_test(address, bots, duration, moves_per_second)
+        finally:
+            if process is not None:
+                process.send_signal(signal.SIGINT)  # So that it prints its report.
+                await process.wait()
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bots", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="In seconds")
+    parser.add_argument(
+        "--moves-per-second",
+        type=float,
+        default=DEFAULT_MOVES_PER_SECOND,
+        help="Per bot",
+    )
+    parser.add_argument(
+        "--address",
+        help="A world server that's already running (host:port or unix:path). "
+        "By default, one is started for the test.",
+    )
+    args = parser.parse_args(argv)
+    result = asyncio.run(
+        run_with_server(args.bots, args.duration, args.moves_per_second, args.address)
+    )
+    print(result.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Zoomed out versions of the world, built from the TileStore like mipmaps.
+
+Level 0 is the TileStore itself: one cell per tile. Each cell in level n + 1 covers a 2x2 block
+of cells in level n and holds whichever tile ID is most common in that block (ignoring unknown
+tiles). So a cell in level n covers 2**n x 2**n tiles. Every level is stored in the same
+CHUNK_SIZE x CHUNK_SIZE chunks as the TileStore, so a chunk in any level covers the same area of
+the screen when it's drawn at that level's zoom. That's what keeps rendering cost about the
+same no matter how far out you zoom.
+
+The pyramid subscribes to the TileStore. update only rebuilds the chunks above the level 0
+chunks that changed since the last call, one quarter of a chunk per level.
+
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+from pw32n import tiles
+from pw32n.tile_store import CHUNK_SIZE, ChunkKey, TileIdArray, TileStore
+
+# Level 6 cells cover 64 x 64 tiles.
+MAX_LEVEL = 6
+
+HALF_CHUNK = CHUNK_SIZE // 2
+
+RGBAArray = npt.NDArray[np.uint8]
+
+# Unknown tiles are transparent.
+TILE_COLORS = np.zeros((tiles.TILE_ID_COUNT, 4), np.uint8)
+for _tile in tiles.TILES_BY_ID.values():
+    TILE_COLORS[_tile.id] = (*_tile.color, 255)
+
+
+def downsample(chunk: TileIdArray) -> TileIdArray:
+    """Return the dominant known tile ID in each 2x2 block of chunk."""
+    blocks = chunk.reshape(HALF_CHUNK, 2, HALF_CHUNK, 2)
+    counts = np.stack(
+        [
+            (blocks == tile_id).sum(axis=(1, 3))
+            for tile_id in range(1, tiles.TILE_ID_COUNT)
+        ]
+    )
+    result: TileIdArray = (counts.argmax(axis=0) + 1).astype(np.uint8)
+    result[counts.sum(axis=0) == 0] = tiles.UNKNOWN_TILE_ID
+    return result
+
+
+class LODPyramid:
+    def __init__(self, store: TileStore, max_level: int = MAX_LEVEL) -> None:
+        self.store = store
+        self.max_level = max_level
+        self.dirty = store.subscribe()
+        self.levels: list[dict[ChunkKey, TileIdArray]] = [store.chunks] + [
+            {} for _ in range(max_level)
+        ]
+
+        # This goes up every time a chunk changes so that renderers can cache textures.
+        self.versions: dict[tuple[int, ChunkKey], int] = {}
+        self.update()
+
+    def update(self) -> set[tuple[int, ChunkKey]]:
+        """Catch up with the TileStore. Returns the (level, key) of every chunk that changed."""
+        changed: set[tuple[int, ChunkKey]] = set()
+        if not self.dirty:
+            return changed
+        dirty = set(self.dirty)
+        self.dirty.clear()
+        for key in dirty:
+            changed.add((0, key))
+        for level in range(1, self.max_level + 1):
+            children = self.levels[level - 1]
+            parents = self.levels[level]
+            dirty_parents: set[ChunkKey] = set()
+            for child_key in dirty:
+                parent_key = (child_key[0] >> 1, child_key[1] >> 1)
+                if self._update_quarter(children, parents, child_key, parent_key):
+                    dirty_parents.add(parent_key)
+            for parent_key in dirty_parents:
+                parent = parents.get(parent_key)
+                if parent is not None and not parent.any():
+                    del parents[parent_key]
+                changed.add((level, parent_key))
+            dirty = dirty_parents
+        for level_and_key in changed:
+            self.versions[level_and_key] = self.versions.get(level_and_key, 0) + 1
+        return changed
+
+    def _update_quarter(
+        self,
+        children: dict[ChunkKey, TileIdArray],
+        parents: dict[ChunkKey, TileIdArray],
+        child_key: ChunkKey,
+        parent_key: ChunkKey,
+    ) -> bool:
+        child = children.get(child_key)
+        parent = parents.get(parent_key)
+        if child is None:
+            if parent is None:
+                return False
+            quarter = np.zeros((HALF_CHUNK, HALF_CHUNK), np.uint8)
+        else:
+            quarter = downsample(child)
+            if parent is None:
+                parent = parents[parent_key] = np.zeros(
+                    (CHUNK_SIZE, CHUNK_SIZE), np.uint8
+                )
+        rows = slice(
+            (child_key[1] & 1) * HALF_CHUNK,
+            (child_key[1] & 1) * HALF_CHUNK + HALF_CHUNK,
+        )
+        cols = slice(
+            (child_key[0] & 1) * HALF_CHUNK,
+            (child_key[0] & 1) * HALF_CHUNK + HALF_CHUNK,
+        )
+        if np.array_equal(parent[rows, cols], quarter):
+            return False
+        parent[rows, cols] = quarter
+        return True
+
+    def get(self, level: int, col: int, row: int) -> int:
+        """Return the cell at (col, row) in level's own cell coordinates."""
+        chunk = self.levels[level].get((col // CHUNK_SIZE, row // CHUNK_SIZE))
+        if chunk is None:
+            return tiles.UNKNOWN_TILE_ID
+        return int(chunk[row % CHUNK_SIZE, col % CHUNK_SIZE])
+
+    def visible_chunks(
+        self,
+        level: int,
+        center_col: float,
+        center_row: float,
+        half_width: float,
+        half_height: float,
+    ) -> list[ChunkKey]:
+        """Return the keys of the chunks at level that overlap the given area.
+
+        The center is in tile indices, and the half width and height are in tiles.
+
+        """
+        scale = CHUNK_SIZE << level
+        left = int((center_col - half_width) // scale)
+        right = int((center_col + half_width) // scale)
+        bottom = int((center_row - half_height) // scale)
+        top = int((center_row + half_height) // scale)
+        chunks = self.levels[level]
+        return [
+            (x, y)
+            for x in range(left, right + 1)
+            for y in range(bottom, top + 1)
+            if (x, y) in chunks
+        ]
+
+    def chunk_bounds(
+        self, level: int, key: ChunkKey, tile_width: int, tile_height: int
+    ) -> tuple[int, int, int, int]:
+        """Return the left, right, bottom and top of the chunk in OriginPoint coordinates.
+
+        Remember that a tile's OriginPoint is its top left corner.
+
+        """
+        tiles_per_chunk = CHUNK_SIZE << level
+        left = key[0] * tiles_per_chunk * tile_width
+        bottom = (key[1] * tiles_per_chunk - 1) * tile_height
+        return (
+            left,
+            left + tiles_per_chunk * tile_width,
+            bottom,
+            bottom + tiles_per_chunk * tile_height,
+        )
+
+    def chunk_rgba(self, level: int, key: ChunkKey) -> RGBAArray:
+        """Return the chunk as an image. The first row of pixels is the northernmost row."""
+        chunk = self.levels[level].get(key)
+        if chunk is None:
+            return np.zeros((CHUNK_SIZE, CHUNK_SIZE, 4), np.uint8)
+        rgba: RGBAArray = TILE_COLORS[chunk[::-1]]
+        return rgba
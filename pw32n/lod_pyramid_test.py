@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+
+from pw32n import tiles
+from pw32n.geography import Geography, OriginPoint
+from pw32n.lod_pyramid import LODPyramid, downsample
+from pw32n.tile_store import CHUNK_SIZE, TileStore
+
+GRASS = tiles.GRASS_TILE.id
+CRATE = tiles.BOX_CRATE_TILE.id
+UNKNOWN = tiles.UNKNOWN_TILE_ID
+
+
+class DownsampleTestCase(unittest.TestCase):
+    def test_dominant_known_tile(self) -> None:
+        chunk = np.zeros((CHUNK_SIZE, CHUNK_SIZE), np.uint8)
+        chunk[0:2, 0:2] = [[CRATE, CRATE], [CRATE, GRASS]]
+        chunk[0:2, 2:4] = [[UNKNOWN, UNKNOWN], [UNKNOWN, CRATE]]
+        result = downsample(chunk)
+        self.assertEqual(result.shape, (CHUNK_SIZE // 2, CHUNK_SIZE // 2))
+        self.assertEqual(result[0, 0], CRATE)
+        self.assertEqual(result[0, 1], CRATE)
+        self.assertEqual(result[0, 2], UNKNOWN)
+
+
+class LODPyramidTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.geo: Geography[tiles.Tile] = Geography()
+        self.store = TileStore(self.geo)
+        self.pyramid = LODPyramid(self.store, max_level=3)
+
+    def fill(self, left: int, bottom: int, size: int, tile_id: int) -> None:
+        for col in range(left, left + size):
+            for row in range(bottom, bottom + size):
+                self.store.set_by_index(col, row, tile_id)
+
+    def test_levels_are_built_incrementally(self) -> None:
+        self.fill(-4, -4, 8, CRATE)
+        changed = self.pyramid.update()
+        self.assertIn((0, (-1, -1)), changed)
+        self.assertIn((3, (-1, -1)), changed)
+        self.assertEqual(self.pyramid.get(1, -2, -2), CRATE)
+        self.assertEqual(self.pyramid.get(2, -1, -1), CRATE)
+        self.assertEqual(self.pyramid.get(2, -2, -2), UNKNOWN)
+
+        # Level 3 cell (0, 0) covers tiles 0-7, of which 0-3 are crates.
+        self.assertEqual(self.pyramid.get(3, 0, 0), CRATE)
+        self.assertEqual(self.pyramid.update(), set())
+
+        version = self.pyramid.versions[(1, (0, 0))]
+        self.fill(0, 0, 4, GRASS)
+        changed = self.pyramid.update()
+        self.assertEqual({level for level, _ in changed}, {0, 1, 2, 3})
+        self.assertEqual(self.pyramid.get(2, 0, 0), GRASS)
+        self.assertEqual(self.pyramid.versions[(1, (0, 0))], version + 1)
+
+    def test_forgotten_tiles_disappear(self) -> None:
+        self.fill(0, 0, 2, GRASS)
+        self.pyramid.update()
+        self.assertIn((0, 0), self.pyramid.levels[3])
+        self.fill(0, 0, 2, UNKNOWN)
+        self.pyramid.update()
+        for level in self.pyramid.levels:
+            self.assertEqual(level, {})
+
+    def test_visible_chunks_is_the_same_at_every_level(self) -> None:
+        self.fill(-64, -64, 128, GRASS)
+        self.pyramid.update()
+        counts = [
+            len(
+                self.pyramid.visible_chunks(
+                    level, 0.0, 0.0, half_width=10 << level, half_height=8 << level
+                )
+            )
+            for level in range(4)
+        ]
+        self.assertEqual(counts, [4, 4, 4, 4])
+
+    def test_chunk_bounds_and_rgba(self) -> None:
+        self.store.set(OriginPoint(0, 0), CRATE)
+        self.pyramid.update()
+        self.assertEqual(
+            self.pyramid.chunk_bounds(0, (0, 0), 64, 64),
+            (0, CHUNK_SIZE * 64, -64, (CHUNK_SIZE - 1) * 64),
+        )
+        self.assertEqual(
+            self.pyramid.chunk_bounds(1, (-1, 0), 64, 64)[:2],
+            (-2 * CHUNK_SIZE * 64, 0),
+        )
+        rgba = self.pyramid.chunk_rgba(0, (0, 0))
+        self.assertEqual(rgba.shape, (CHUNK_SIZE, CHUNK_SIZE, 4))
+
+        # Row 0 of the chunk is the southernmost, so it's at the bottom of the image.
+        self.assertEqual(tuple(rgba[-1, 0]), (*tiles.BOX_CRATE_TILE.color, 255))
+        self.assertEqual(tuple(rgba[0, 0]), (0, 0, 0, 0))
@@ -0,0 +1,120 @@
+"""Draw the chunks of an LODPyramid level with OpenGL, one small texture per chunk.
+
+Like minimap_renderer, this owns its textures instead of going through arcade.Texture. arcade
+puts every Texture in its default atlas, which never frees anything, and a zoomed out view
+would add a new one every time a chunk changed. Here, each chunk on the screen has one texture,
+which is rewritten in place when the chunk's version changes. Chunks that go off the screen
+give their textures back to a free list for the next chunk that comes on, so the number of
+textures is about the number of chunks that fit on the screen.
+
+"""
+
+import arcade
+import arcade.gl
+from arcade.gl import geometry
+
+from pw32n import lod_pyramid
+from pw32n.tile_store import CHUNK_SIZE, ChunkKey
+
+VERTEX_SHADER = """
+#version 330
+
+// left, bottom, width, height in normalized device coordinates
+uniform vec4 rect;
+in vec2 in_vert;
+in vec2 in_uv;
+out vec2 uv;
+
+void main() {
+    gl_Position = vec4(rect.xy + in_uv * rect.zw, 0.0, 1.0);
+    uv = in_uv;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330
+
+uniform sampler2D chunk;
+in vec2 uv;
+out vec4 color;
+
+void main() {
+    color = texture(chunk, uv);
+}
+"""
+
+LODKey = tuple[int, ChunkKey]
+
+
+class LODRenderer:
+    def __init__(
+        self, ctx: arcade.ArcadeContext, pyramid: lod_pyramid.LODPyramid
+    ) -> None:
+        self.ctx = ctx
+        self.pyramid = pyramid
+        self.program = ctx.program(
+            vertex_shader=VERTEX_SHADER, fragment_shader=FRAGMENT_SHADER
+        )
+        self.program["chunk"] = 0
+        self.quad = geometry.quad_2d_fs()
+
+        # The texture of each chunk that was drawn this frame and last frame, and the version
+        # of the chunk that's in it.
+        self.textures: dict[LODKey, tuple[int, arcade.gl.Texture]] = {}
+        self.previous_textures: dict[LODKey, tuple[int, arcade.gl.Texture]] = {}
+        self.free_textures: list[arcade.gl.Texture] = []
+
+    def begin(self) -> None:
+        """Start drawing a frame. Chunks that aren't drawn before end lose their textures."""
+        self.previous_textures = self.textures
+        self.textures = {}
+
+    def end(self) -> None:
+        for _, texture in self.previous_textures.values():
+            self.free_textures.append(texture)
+        self.previous_textures = {}
+
+    def draw_chunk(
+        self,
+        level: int,
+        key: ChunkKey,
+        left: float,
+        bottom: float,
+        width: float,
+        height: float,
+        screen_width: int,
+        screen_height: int,
+    ) -> None:
+        """Draw a chunk into a rectangle given in window pixels."""
+        texture = self.texture(level, key)
+        texture.use(0)
+        self.program["rect"] = (
+            2 * left / screen_width - 1,
+            2 * bottom / screen_height - 1,
+            2 * width / screen_width,
+            2 * height / screen_height,
+        )
+        self.quad.render(self.program)
+
+    def texture(self, level: int, key: ChunkKey) -> arcade.gl.Texture:
+        lod_key = (level, key)
+        version = self.pyramid.versions.get(lod_key, 0)
+        cached = self.previous_textures.pop(lod_key, None) or self.textures.get(lod_key)
+        if cached is not None:
+            cached_version, texture = cached
+            if cached_version == version:
+                self.textures[lod_key] = cached
+                return texture
+        elif self.free_textures:
+            texture = self.free_textures.pop()
+        else:
+            texture = self.ctx.texture(
+                (CHUNK_SIZE, CHUNK_SIZE),
+                components=4,
+                filter=(self.ctx.NEAREST, self.ctx.NEAREST),
+            )
+
+        # OpenGL wants the southernmost row first.
+        texture.write(self.pyramid.chunk_rgba(level, key)[::-1].tobytes())
+        self.textures[lod_key] = (version, texture)
+        return texture
@@ -0,0 +1,99 @@
+"""A smarter enemy AI that tries each of its moves in a simulated future before picking one.
+
+Every time the enemy is idle and decides to act, it takes a BattleSnapshot of both combatants,
+and for each candidate (including doing nothing), it copies the snapshot, starts the move, and
+fast-forwards a second or so. The candidate that leaves the enemy furthest ahead wins.
+
+Since this runs on every tick, it has to be quick. The snapshots are allocated once and reused,
+and if the time budget runs out, we go with the best candidate so far.
+
+"""
+
+import random
+import time
+from typing import Optional
+
+from pw32n import battle_moves
+from pw32n.models import (
+    BattleSnapshot,
+    EnemyModel,
+    WarmingUpState,
+    fast_forward_battle,
+)
+from pw32n.units import Secs
+
+
+class LookaheadAI:
+    LOOKAHEAD_PERIOD = Secs(1.0)
+
+    # How much wall clock time we're allowed to spend thinking per tick.
+    TIME_BUDGET = Secs(0.001)
+
+    # When the player isn't threatening us, we don't need to think about it on every tick. This
+    # is the same rate the built-in AI uses to decide whether to attack.
+    ATTACK_CHANCE_PER_TICK = EnemyModel.ATTACK_CHANCE_PER_TICK
+
+    # When the player is warming up a move, this is the chance per tick that we think about
+    # countering it. Like the attack chance, it has the same name and default as the built-in
+    # AI's, so that the balance sweep can tune either one.
+    COUNTER_MOVE_CHANCE = EnemyModel.COUNTER_MOVE_CHANCE
+
+    def __init__(self) -> None:
+        self.current = BattleSnapshot()
+        self.scratch = BattleSnapshot()
+        self.candidates: list[Optional[battle_moves.BattleMove]] = [None]
+        self.last_candidates_evaluated = 0
+
+    def choose_battle_move(
+        self, enemy_model: EnemyModel, delta_time: float
+    ) -> Optional[battle_moves.BattleMove]:
+        player_model = enemy_model.player_model
+        if isinstance(player_model.state, WarmingUpState):
+            chance_per_tick = max(self.ATTACK_CHANCE_PER_TICK, self.COUNTER_MOVE_CHANCE)
+        else:
+            chance_per_tick = self.ATTACK_CHANCE_PER_TICK
+        if random.random() >= enemy_model.chance_per_delta_time(
+            chance_per_tick, delta_time
+        ):
+            return None
+
+        self.current.take(player_model, enemy_model)
+        return self.choose_from_snapshot(self.current)
+
+    def choose_from_snapshot(
+        self, snapshot: BattleSnapshot
+    ) -> Optional[battle_moves.BattleMove]:
+        """Return the best move for the enemy, or None if it should wait."""
+        deadline = time.perf_counter() + self.TIME_BUDGET
+
+        # The moves are looked up every time in case something (like the balance sweep) swapped
+        # them out. Doing nothing is always evaluated first so that we have a fallback.
+        moves = [battle_moves.DODGE, battle_moves.JAB, battle_moves.UPPERCUT]
+        random.shuffle(moves)
+        self.candidates[1:] = moves
+
+        best_move: Optional[battle_moves.BattleMove] = None
+        best_score = float("-inf")
+        self.last_candidates_evaluated = 0
+        for move in self.candidates:
+            score = self.evaluate(snapshot, move)
+            self.last_candidates_evaluated += 1
+            if score > best_score:
+                best_move = move
+                best_score = score
+            if time.perf_counter() > deadline:
+                break
+        return best_move
+
+    def evaluate(
+        self, snapshot: BattleSnapshot, move: Optional[battle_moves.BattleMove]
+    ) -> float:
+        """How much further ahead is the enemy after trying this move?"""
+        scratch = self.scratch
+        scratch.copy_from(snapshot)
+        if move is not None:
+            scratch.enemy.start_battle_move(move)
+        fast_forward_battle(scratch, self.LOOKAHEAD_PERIOD)
+        damage_dealt = snapshot.player.strength - scratch.player.strength
+        damage_taken = snapshot.enemy.strength - scratch.enemy.strength
+        return damage_dealt - damage_taken
@@ -0,0 +1,74 @@
+import unittest
+
+from pw32n import battle_moves, sprite_images
+from pw32n.geography import OriginPoint
+from pw32n.lookahead_ai import LookaheadAI
+from pw32n.models import (
+    BattleSnapshot,
+    EnemyModel,
+    PlayerModel,
+    WarmingUpState,
+)
+from pw32n.units import Secs
+
+
+class LookaheadAITestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ai = LookaheadAI()
+        self.player_model = PlayerModel()
+        self.player_model.strength = 10.0
+        self.enemy_model = EnemyModel(
+            sprite_image=sprite_images.ZOMBIE_IMAGE,
+            position=OriginPoint(0, 0),
+            strength=10.0,
+            player_model=self.player_model,
+        )
+        self.enemy_model.ai = self.ai
+        self.player_model.on_battle_view_begin()
+        self.enemy_model.on_battle_view_begin()
+
+    def choose(self) -> object:
+        snapshot = BattleSnapshot()
+        snapshot.take(self.player_model, self.enemy_model)
+        return self.ai.choose_from_snapshot(snapshot)
+
+    def test_attacks_an_idle_player(self) -> None:
+        self.assertIn(self.choose(), (battle_moves.JAB, battle_moves.UPPERCUT))
+
+    def test_dodges_or_beats_a_slow_uppercut(self) -> None:
+        self.player_model.attempt_battle_move(battle_moves.UPPERCUT, self.enemy_model)
+        self.player_model.on_battle_view_update(Secs(0.0))
+        self.assertIn(self.choose(), (battle_moves.DODGE, battle_moves.JAB))
+
+    def test_does_not_waste_moves_on_a_dodging_player(self) -> None:
+        self.player_model.attempt_battle_move(battle_moves.DODGE, self.enemy_model)
+        self.player_model.on_battle_view_update(Secs(0.0))
+        self.player_model.on_battle_view_update(battle_moves.DODGE.warmup_period)
+        self.assertIsNone(self.choose())
+
+    def test_stays_within_its_time_budget(self) -> None:
+        self.ai.TIME_BUDGET = Secs(0.0)
+        self.choose()
+        self.assertEqual(self.ai.last_candidates_evaluated, 1)
+
+    def test_drives_the_enemy_model(self) -> None:
+        self.player_model.attempt_battle_move(battle_moves.UPPERCUT, self.enemy_model)
+        self.player_model.on_battle_view_update(Secs(0.0))
+        self.assertIsInstance(self.player_model.state, WarmingUpState)
+        self.ai.COUNTER_MOVE_CHANCE = 1.0
+        self.enemy_model.consider_attacking_on_each_tick()
+        self.assertIsNotNone(self.enemy_model.current_battle_move)
+
+    def test_counter_move_chance(self) -> None:
+        self.ai.ATTACK_CHANCE_PER_TICK = 0.0
+        self.ai.COUNTER_MOVE_CHANCE = 0.0
+        self.player_model.attempt_battle_move(battle_moves.UPPERCUT, self.enemy_model)
+        self.player_model.on_battle_view_update(Secs(0.0))
+        self.assertIsNone(self.ai.choose_battle_move(self.enemy_model, 1 / 60))
+        self.ai.COUNTER_MOVE_CHANCE = 1.0
+        self.assertIsNotNone(self.ai.choose_battle_move(self.enemy_model, 1 / 60))
+
+    def test_the_enemy_is_left_alone_when_busy(self) -> None:
+        self.enemy_model.state = WarmingUpState()
+        self.enemy_model.consider_attacking_on_each_tick()
+        self.assertIsNone(self.enemy_model.current_workflow)
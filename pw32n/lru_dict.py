@@ -1,7 +1,7 @@
 # Forked from: https://www.geeksforgeeks.org/lru-cache-in-python-using-ordereddict/
 
 from collections import OrderedDict
-from typing import TypeVar, Generic
+from typing import Callable, Generic, Optional, TypeVar
 
 K = TypeVar("K")
 V = TypeVar("V")
@@ -15,14 +15,26 @@ class LRUDict(Generic[K, V]):
         self.cache: OrderedDict[K, V] = OrderedDict()
         self.capacity = capacity
 
+        # If set, this gets called with the key and value of everything that gets evicted.
+        self.on_evict: Optional[Callable[[K, V], None]] = None
+
     def get(self, key: K, default: V = None) -> V:
         if key not in self.cache:
             return default
         self.cache.move_to_end(key)
         return self.cache[key]
 
+    def peek(self, key: K, default: V = None) -> V:
+        """This is like get, but it doesn't count as using the key."""
+        return self.cache.get(key, default)
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
     def put(self, key: K, value: V) -> None:
         self.cache[key] = value
         self.cache.move_to_end(key)
         if len(self.cache) > self.capacity:
-            self.cache.popitem(last=False)
+            evicted_key, evicted_value = self.cache.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted_value)
@@ -18,3 +18,22 @@ class LRUDictTestCase(unittest.TestCase):
         self.assertEqual(self.lru_dict.get("b"), "b")
         self.assertEqual(self.lru_dict.get("d"), "d")
         self.assertEqual(self.lru_dict.get("a"), None)
+
+    def test_on_evict(self) -> None:
+        evicted: list[tuple[str, str]] = []
+        self.lru_dict.on_evict = lambda key, value: evicted.append((key, value))
+        for letter in "abc":
+            self.lru_dict.put(letter, letter.upper())
+        self.assertEqual(evicted, [])
+        self.lru_dict.get("a")
+        self.lru_dict.put("d", "D")
+        self.assertEqual(evicted, [("b", "B")])
+
+    def test_peek_does_not_count_as_using_the_key(self) -> None:
+        for letter in "abc":
+            self.lru_dict.put(letter, letter)
+        self.assertEqual(self.lru_dict.peek("a"), "a")
+        self.assertEqual(self.lru_dict.peek("missing"), None)
+        self.lru_dict.put("d", "d")
+        self.assertEqual(self.lru_dict.peek("a"), None)
+        self.assertEqual(len(self.lru_dict), 3)
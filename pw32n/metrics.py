@@ -0,0 +1,263 @@
+"""Expose live metrics in the Prometheus text format so that long-running sessions can be scraped.
+
+The game updates plain counters, gauges and histograms as it runs; that's just assigning
+numbers. MetricsServer serves them at http://127.0.0.1:PORT/metrics from a background thread.
+Things that are expensive to measure (like RSS) or that already live somewhere else (like the GC
+counts) are collected by callbacks at scrape time, on the server's thread.
+
+When metrics are disabled, the game doesn't create any of this.
+
+"""
+
+import gc
+import http.server
+import math
+import os
+import sys
+import threading
+from typing import Callable, Iterable, Optional
+
+Labels = tuple[tuple[str, str], ...]
+Sample = tuple[Labels, float]
+Collector = Callable[[], Iterable[Sample]]
+
+# Frame times in seconds. 16.7 ms is 60 FPS.
+FRAME_TIME_BUCKETS = (0.001, 0.002, 0.004, 0.008, 0.0167, 0.0333, 0.05, 0.1, 0.25)
+
+
+def rss_bytes() -> int:
+    """Return the resident set size of this process, or 0 if we can't tell.
+
+    /proc/self/statm is cheap and current. Elsewhere, fall back to the peak RSS, which is the
+    best the standard library can do. The resource module only exists on Unix, so it's imported
+    here rather than at the top, where it would break importing this module on Windows.
+
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # It's in bytes on macOS and kilobytes everywhere else.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class Metric:
+    def __init__(self, name: str, help: str, kind: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labels = labels
+        self.value = 0.0
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        yield self.name, self.labels, self.value
+
+
+class Histogram(Metric):
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...]) -> None:
+        super().__init__(name, help, "histogram")
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        buckets = self.buckets
+        while i < len(buckets) and value > buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.value += value
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        cumulative = 0
+        for upper_bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            le = "+Inf" if upper_bound == math.inf else repr(upper_bound)
+            yield f"{self.name}_bucket", (("le", le),), cumulative
+        yield f"{self.name}_sum", (), self.value
+        yield f"{self.name}_count", (), self.count
+
+
+class CollectedMetric(Metric):
+    def __init__(self, name: str, help: str, kind: str, collector: Collector) -> None:
+        super().__init__(name, help, kind)
+        self.collector = collector
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        for labels, value in self.collector():
+            yield self.name, labels, value
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Labels = ()) -> Metric:
+        return self.add(Metric(name, help, "counter", labels))
+
+    def gauge(self, name: str, help: str, labels: Labels = ()) -> Metric:
+        return self.add(Metric(name, help, "gauge", labels))
+
+    def histogram(self, name: str, help: str, buckets: tuple[float, ...]) -> Histogram:
+        histogram = Histogram(name, help, buckets)
+        self.add(histogram)
+        return histogram
+
+    def collect(self, name: str, help: str, kind: str, collector: Collector) -> None:
+        self.add(CollectedMetric(name, help, kind, collector))
+
+    def render(self) -> str:
+        """Return everything in the Prometheus text exposition format."""
+        lines = []
+        described: set[str] = set()
+        # Copy the list since the game may add metrics (e.g. new sprite lists) while we render.
+        for metric in list(self.metrics):
+            if metric.name not in described:
+                described.add(metric.name)
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{name}{{{label_text}}} {value!r}")
+                else:
+                    lines.append(f"{name} {value!r}")
+        return "\n".join(lines) + "\n"
+
+
+class GameMetrics:
+
+    """The metrics the game reports. GameWindow and WorldView update these once per frame."""
+
+    # How often to recompute FPS.
+    FPS_PERIOD = 1.0
+
+    def __init__(self) -> None:
+        self.registry = registry = Registry()
+        self.frames = registry.counter("pw32n_frames_total", "Frames updated")
+        self.fps = registry.gauge("pw32n_fps", "Frames per second")
+        self.frame_seconds = registry.histogram(
+            "pw32n_frame_seconds", "Time between frames", FRAME_TIME_BUCKETS
+        )
+        self.tile_map_size = registry.gauge(
+            "pw32n_tile_map_size", "Tiles remembered in Geography.tile_map"
+        )
+        self.tile_map_capacity = registry.gauge(
+            "pw32n_tile_map_capacity", "Capacity of Geography.tile_map"
+        )
+        self.tiles_generated = registry.counter(
+            "pw32n_tiles_generated_total", "Tiles that were not in tile_map"
+        )
+        self.tiles_reused = registry.counter(
+            "pw32n_tiles_reused_total", "Tiles that were found in tile_map"
+        )
+        self.tile_map_hit_ratio = registry.gauge(
+            "pw32n_tile_map_hit_ratio",
+            "tiles_reused / (tiles_generated + tiles_reused)",
+        )
+        self.enemies = registry.gauge("pw32n_enemies", "Enemies alive in the world")
+        self.enemies_ticked = registry.gauge(
+            "pw32n_enemies_ticked", "Enemies ticked in the last update"
+        )
+        self.frames_skipped = registry.counter(
+            "pw32n_frames_skipped_total", "Frames not redrawn because nothing changed"
+        )
+        self.sprites: dict[str, Metric] = {}
+        registry.collect(
+            "pw32n_rss_bytes", "Resident set size", "gauge", lambda: [((), rss_bytes())]
+        )
+        registry.collect(
+            "pw32n_gc_collections_total",
+            "Garbage collections by generation",
+            "counter",
+            _gc_collections,
+        )
+
+        self._frames_this_period = 0
+        self._time_this_period = 0.0
+
+    def on_frame(self, delta_time: float) -> None:
+        self.frames.value += 1
+        self.frame_seconds.observe(delta_time)
+        self._frames_this_period += 1
+        self._time_this_period += delta_time
+        if self._time_this_period >= self.FPS_PERIOD:
+            self.fps.value = self._frames_this_period / self._time_this_period
+            self._frames_this_period = 0
+            self._time_this_period = 0.0
+
+    def set_tile_counts(
+        self, tile_map_size: int, tile_map_capacity: int, generated: int, reused: int
+    ) -> None:
+        self.tile_map_size.value = tile_map_size
+        self.tile_map_capacity.value = tile_map_capacity
+        self.tiles_generated.value = generated
+        self.tiles_reused.value = reused
+        total = generated + reused
+        self.tile_map_hit_ratio.value = reused / total if total else 0.0
+
+    def set_sprite_count(self, sprite_list: str, count: int) -> None:
+        gauge = self.sprites.get(sprite_list)
+        if gauge is None:
+            gauge = self.sprites[sprite_list] = self.registry.gauge(
+                "pw32n_sprites", "Sprites per sprite list", (("list", sprite_list),)
+            )
+        gauge.value = count
+
+
+def _gc_collections() -> Iterable[Sample]:
+    for generation, stats in enumerate(gc.get_stats()):
+        yield (("generation", str(generation)),), stats["collections"]
+
+
+class MetricsServer:
+    """Serve a Registry at /metrics on localhost from a daemon thread."""
+
+    def __init__(self, registry: Registry, port: int, host: str = "127.0.0.1") -> None:
+        self.registry = registry
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(handler) -> None:
+                if handler.path != "/metrics":
+                    handler.send_error(404)
+                    return
+                body = registry.render().encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format: str, *args: object) -> None:
+                # Don't spam stderr on every scrape.
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread: Optional[threading.Thread] = threading.Thread(
+            target=self.server.serve_forever, name="MetricsServer", daemon=True
+        )
+        self.thread.start()
+
+    @property
+    def port(self) -> int:
+        return int(self.server.server_address[1])
+
+    def close(self) -> None:
+        if self.thread is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.thread = None
@@ -0,0 +1,69 @@
+import unittest
+import urllib.error
+import urllib.request
+
+from pw32n.metrics import GameMetrics, MetricsServer, Registry, rss_bytes
+
+
+class RegistryTestCase(unittest.TestCase):
+    def test_render(self) -> None:
+        registry = Registry()
+        registry.counter("things_total", "Things").value = 3
+        registry.gauge("sprites", "Sprites", (("list", "a"),)).value = 1
+        registry.gauge("sprites", "Sprites", (("list", "b"),)).value = 2
+        histogram = registry.histogram("seconds", "Seconds", (0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+        registry.collect("collected", "Collected", "gauge", lambda: [((), 7.0)])
+
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE things_total counter", lines)
+        self.assertIn("things_total 3", lines)
+        self.assertEqual(lines.count("# HELP sprites Sprites"), 1)
+        self.assertIn('sprites{list="a"} 1', lines)
+        self.assertIn('sprites{list="b"} 2', lines)
+        self.assertIn('seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('seconds_bucket{le="1.0"} 3', lines)
+        self.assertIn('seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn("seconds_count 4", lines)
+        self.assertIn("seconds_sum 6.05", lines)
+        self.assertIn("collected 7.0", lines)
+
+
+class GameMetricsTestCase(unittest.TestCase):
+    def test_on_frame_computes_fps(self) -> None:
+        game_metrics = GameMetrics()
+        for _ in range(4):
+            game_metrics.on_frame(0.25)
+        self.assertEqual(game_metrics.fps.value, 4.0)
+        self.assertEqual(game_metrics.frames.value, 4)
+
+    def test_set_tile_counts(self) -> None:
+        game_metrics = GameMetrics()
+        game_metrics.set_tile_counts(
+            tile_map_size=10, tile_map_capacity=100, generated=10, reused=30
+        )
+        self.assertEqual(game_metrics.tile_map_hit_ratio.value, 0.75)
+
+    def test_rss_and_gc(self) -> None:
+        self.assertGreater(rss_bytes(), 0)
+        text = GameMetrics().registry.render()
+        self.assertIn("pw32n_rss_bytes", text)
+        self.assertIn('pw32n_gc_collections_total{generation="2"}', text)
+
+
+class MetricsServerTestCase(unittest.TestCase):
+    def test_serves_metrics(self) -> None:
+        game_metrics = GameMetrics()
+        game_metrics.set_sprite_count("enemies", 4)
+        server = MetricsServer(game_metrics.registry, port=0)
+        try:
+            url = f"http://127.0.0.1:{server.port}"
+            with urllib.request.urlopen(f"{url}/metrics") as response:
+                text = response.read().decode()
+            self.assertIn('pw32n_sprites{list="enemies"} 4', text)
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{url}/other")
+        finally:
+            server.close()
+        server.close()
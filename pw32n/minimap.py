@@ -0,0 +1,129 @@
+"""A minimap image that's updated a chunk at a time, straight from the TileStore.
+
+The image is SIZE x SIZE pixels, one per tile, and it wraps around in both directions: the tile
+at (col, row) always lives at pixel (col % SIZE, row % SIZE). That way, when the player walks,
+nothing already in the image has to move. Only the chunks that scroll into the window around the
+player and the chunks that the TileStore says changed get written, and the renderer uploads just
+those blocks. Drawing is a single quad with the texture set to repeat, starting at uv_origin.
+
+Because the window of chunks is chunk aligned but the player isn't, the edges of the image may
+hold chunks that are about to scroll out. So only VISIBLE_TILES (two chunks less than SIZE) are
+shown.
+
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from pw32n.lod_pyramid import TILE_COLORS
+from pw32n.tile_store import CHUNK_SIZE, ChunkKey, TileStore
+
+SIZE = 256
+
+ChunkRange = tuple[int, int, int, int]
+
+
+class Minimap:
+    def __init__(self, store: TileStore, size: int = SIZE) -> None:
+        assert size % CHUNK_SIZE == 0
+        self.store = store
+        self.size = size
+        self.visible_tiles = size - 2 * CHUNK_SIZE
+        self.chunks_across = size // CHUNK_SIZE
+        self.pixels: npt.NDArray[np.uint8] = np.zeros((size, size, 4), np.uint8)
+        self.dirty = store.subscribe()
+
+        # left, right, bottom, top in chunks (right and top are exclusive).
+        self.chunk_range: Optional[ChunkRange] = None
+
+        # This is so that update can return early without allocating anything.
+        self.center_chunk_x: Optional[int] = None
+        self.center_chunk_y: Optional[int] = None
+
+    def chunk_range_around(self, center_col: int, center_row: int) -> ChunkRange:
+        left = center_col // CHUNK_SIZE - self.chunks_across // 2
+        bottom = center_row // CHUNK_SIZE - self.chunks_across // 2
+        return (
+            left,
+            left + self.chunks_across,
+            bottom,
+            bottom + self.chunks_across,
+        )
+
+    def update(self, center_col: int, center_row: int) -> Sequence[tuple[int, int]]:
+        """Bring the image up to date for a player at the given tile index.
+
+        Returns the pixel coordinates of the bottom left corners of the CHUNK_SIZE x
+        CHUNK_SIZE blocks that changed. Row 0 is the southernmost row, which is how OpenGL
+        textures work too.
+
+        """
+        center_chunk_x = center_col // CHUNK_SIZE
+        center_chunk_y = center_row // CHUNK_SIZE
+        if (
+            not self.dirty
+            and center_chunk_x == self.center_chunk_x
+            and center_chunk_y == self.center_chunk_y
+        ):
+            return ()
+        self.center_chunk_x = center_chunk_x
+        self.center_chunk_y = center_chunk_y
+
+        new_range = self.chunk_range_around(center_col, center_row)
+        old_range = self.chunk_range
+        to_write: set[ChunkKey] = set()
+        if new_range != old_range:
+            left, right, bottom, top = new_range
+            for x in range(left, right):
+                for y in range(bottom, top):
+                    if old_range is None or not _contains(old_range, x, y):
+                        to_write.add((x, y))
+            self.chunk_range = new_range
+        if self.dirty:
+            to_write.update(key for key in self.dirty if _contains(new_range, *key))
+            self.dirty.clear()
+        return [self.write_chunk(key) for key in to_write]
+
+    def write_chunk(self, key: ChunkKey) -> tuple[int, int]:
+        x = (key[0] * CHUNK_SIZE) % self.size
+        y = (key[1] * CHUNK_SIZE) % self.size
+        chunk = self.store.chunks.get(key)
+        block = self.pixels[y : y + CHUNK_SIZE, x : x + CHUNK_SIZE]
+        if chunk is None:
+            block[:] = 0
+        else:
+            block[:] = TILE_COLORS[chunk]
+        return x, y
+
+    def block(self, x: int, y: int) -> bytes:
+        """Return the pixels of a block returned by update, ready to upload."""
+        return self.pixels[y : y + CHUNK_SIZE, x : x + CHUNK_SIZE].tobytes()
+
+    def uv_origin(self, center_col: float, center_row: float) -> tuple[float, float]:
+        """Where in the (repeating) texture the bottom left corner of the minimap is."""
+        half = self.visible_tiles / 2
+        return (
+            ((center_col - half) % self.size) / self.size,
+            ((center_row - half) % self.size) / self.size,
+        )
+
+    @property
+    def uv_size(self) -> float:
+        return self.visible_tiles / self.size
+
+    def tile_to_minimap(
+        self, col: float, row: float, center_col: float, center_row: float
+    ) -> Optional[tuple[float, float]]:
+        """Return where a tile is on the minimap, from 0.0 to 1.0, or None if it's off of it."""
+        u = (col - center_col) / self.visible_tiles + 0.5
+        v = (row - center_row) / self.visible_tiles + 0.5
+        if 0.0 <= u <= 1.0 and 0.0 <= v <= 1.0:
+            return u, v
+        return None
+
+
+def _contains(chunk_range: ChunkRange, x: int, y: int) -> bool:
+    left, right, bottom, top = chunk_range
+    return left <= x < right and bottom <= y < top
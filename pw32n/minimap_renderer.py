@@ -0,0 +1,113 @@
+"""Draw a Minimap with OpenGL: one repeating texture and one quad.
+
+Blocks that the Minimap says changed are written into the texture with partial uploads. The
+enemies are drawn on top as a single batch of points.
+
+"""
+
+from typing import Sequence
+
+import arcade
+import arcade.gl
+from arcade.gl import geometry
+
+from pw32n import minimap
+from pw32n.tile_store import CHUNK_SIZE
+
+VERTEX_SHADER = """
+#version 330
+
+in vec2 in_vert;
+in vec2 in_uv;
+out vec2 uv;
+
+void main() {
+    gl_Position = vec4(in_vert, 0.0, 1.0);
+    uv = in_uv;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330
+
+uniform sampler2D minimap;
+uniform vec2 uv_origin;
+uniform float uv_size;
+in vec2 uv;
+out vec4 color;
+
+void main() {
+    // The texture repeats, so this wraps around the edges.
+    color = texture(minimap, uv_origin + uv * uv_size);
+}
+"""
+
+BORDER_COLOR = arcade.color.BLACK
+ENEMY_COLOR = arcade.color.RED
+ENEMY_POINT_SIZE = 4
+
+
+class MinimapRenderer:
+    def __init__(self, ctx: arcade.ArcadeContext, the_minimap: minimap.Minimap) -> None:
+        self.ctx = ctx
+        self.minimap = the_minimap
+        size = the_minimap.size
+        self.texture = ctx.texture(
+            (size, size),
+            components=4,
+            data=the_minimap.pixels.tobytes(),
+            filter=(ctx.NEAREST, ctx.NEAREST),
+            wrap_x=ctx.REPEAT,
+            wrap_y=ctx.REPEAT,
+        )
+        self.program = ctx.program(
+            vertex_shader=VERTEX_SHADER, fragment_shader=FRAGMENT_SHADER
+        )
+        self.program["minimap"] = 0
+        self.quad: arcade.gl.Geometry = None
+        self.quad_rect = (0, 0, 0, 0, 0, 0)
+
+    def update(self, center_col: int, center_row: int) -> None:
+        for x, y in self.minimap.update(center_col, center_row):
+            self.texture.write(
+                self.minimap.block(x, y), viewport=(x, y, CHUNK_SIZE, CHUNK_SIZE)
+            )
+
+    def draw(
+        self,
+        left: int,
+        bottom: int,
+        size: int,
+        screen_width: int,
+        screen_height: int,
+        center_col: float,
+        center_row: float,
+        enemy_tiles: Sequence[tuple[float, float]],
+    ) -> None:
+        rect = (left, bottom, size, size, screen_width, screen_height)
+        if rect != self.quad_rect:
+            # The quad is in normalized device coordinates, so it only changes on resize.
+            self.quad = geometry.quad_2d(
+                size=(2 * size / screen_width, 2 * size / screen_height),
+                pos=(
+                    2 * (left + size / 2) / screen_width - 1,
+                    2 * (bottom + size / 2) / screen_height - 1,
+                ),
+            )
+            self.quad_rect = rect
+
+        self.texture.use(0)
+        self.program["uv_origin"] = self.minimap.uv_origin(center_col, center_row)
+        self.program["uv_size"] = self.minimap.uv_size
+        self.quad.render(self.program)
+
+        arcade.draw_lrtb_rectangle_outline(
+            left, left + size, bottom + size, bottom, BORDER_COLOR
+        )
+        points = []
+        for col, row in enemy_tiles:
+            uv = self.minimap.tile_to_minimap(col, row, center_col, center_row)
+            if uv is not None:
+                points.append((left + uv[0] * size, bottom + uv[1] * size))
+        if points:
+            arcade.draw_points(points, ENEMY_COLOR, ENEMY_POINT_SIZE)
@@ -0,0 +1,63 @@
+import unittest
+
+from pw32n import tiles
+from pw32n.geography import Geography
+from pw32n.minimap import Minimap
+from pw32n.tile_store import CHUNK_SIZE, TileStore
+
+CRATE_PIXEL = (*tiles.BOX_CRATE_TILE.color, 255)
+
+
+class MinimapTestCase(unittest.TestCase):
+    SIZE = 4 * CHUNK_SIZE
+
+    def setUp(self) -> None:
+        self.geo: Geography[tiles.Tile] = Geography()
+        self.store = TileStore(self.geo)
+        self.minimap = Minimap(self.store, size=self.SIZE)
+
+    def test_first_update_writes_the_whole_window(self) -> None:
+        self.store.set_by_index(3, -2, tiles.BOX_CRATE_TILE.id)
+        blocks = self.minimap.update(0, 0)
+        self.assertEqual(len(blocks), 16)
+        self.assertEqual(tuple(self.minimap.pixels[self.SIZE - 2, 3]), CRATE_PIXEL)
+        self.assertEqual(len(self.minimap.block(*blocks[0])), CHUNK_SIZE ** 2 * 4)
+
+    def test_nothing_to_do(self) -> None:
+        self.minimap.update(0, 0)
+        self.assertEqual(len(self.minimap.update(CHUNK_SIZE - 1, 0)), 0)
+
+    def test_only_changed_chunks_are_written(self) -> None:
+        self.minimap.update(0, 0)
+        self.store.set_by_index(1, 1, tiles.BOX_CRATE_TILE.id)
+        self.store.set_by_index(2, 2, tiles.GRASS_TILE.id)
+        self.assertEqual(list(self.minimap.update(0, 0)), [(0, 0)])
+        self.assertEqual(tuple(self.minimap.pixels[1, 1]), CRATE_PIXEL)
+
+        # This is outside of the window, so it'll be written when it scrolls in.
+        self.store.set_by_index(10 * CHUNK_SIZE, 0, tiles.BOX_CRATE_TILE.id)
+        self.assertEqual(len(self.minimap.update(0, 0)), 0)
+
+    def test_scrolling_writes_the_new_column_of_chunks(self) -> None:
+        self.minimap.update(0, 0)
+        self.store.set_by_index(2 * CHUNK_SIZE, 0, tiles.BOX_CRATE_TILE.id)
+        self.store.set_by_index(-2 * CHUNK_SIZE, 0, tiles.GRASS_TILE.id)
+        self.minimap.update(0, 0)
+
+        # Walking a chunk east scrolls in chunk column 2, which wraps around to where column
+        # -2 was.
+        blocks = self.minimap.update(CHUNK_SIZE, 0)
+        self.assertEqual(len(blocks), 4)
+        self.assertEqual({x for x, _ in blocks}, {2 * CHUNK_SIZE})
+        self.assertEqual(tuple(self.minimap.pixels[0, 2 * CHUNK_SIZE]), CRATE_PIXEL)
+
+    def test_uv_and_tile_to_minimap(self) -> None:
+        visible = self.minimap.visible_tiles
+        self.assertEqual(visible, self.SIZE - 2 * CHUNK_SIZE)
+        self.assertEqual(self.minimap.uv_size, visible / self.SIZE)
+        u, v = self.minimap.uv_origin(0.0, visible / 2)
+        self.assertAlmostEqual(u, 1.0 - visible / 2 / self.SIZE)
+        self.assertAlmostEqual(v, 0.0)
+
+        self.assertEqual(self.minimap.tile_to_minimap(5.0, 5.0, 5.0, 5.0), (0.5, 0.5))
+        self.assertIsNone(self.minimap.tile_to_minimap(5.0 + visible, 5.0, 5.0, 5.0))
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import math
 import random
-from typing import NamedTuple, Union
+from typing import Callable, NamedTuple, Optional, Protocol, Sequence, Union
 
 from pw32n import geography, sprite_images, battle_moves
 from pw32n.timed_workflow import TimedWorkflow, TimedStep
@@ -37,9 +37,37 @@ CombatantState = Union[
     IdleState, WarmingUpState, ExecutingMoveState, CoolingDownState, StunnedState
 ]
 
+# The states don't have any fields, so there's no need to allocate a new one on every
+# transition.
+IDLE_STATE = IdleState()
+WARMING_UP_STATE = WarmingUpState()
+EXECUTING_MOVE_STATE = ExecutingMoveState()
+COOLING_DOWN_STATE = CoolingDownState()
+STUNNED_STATE = StunnedState()
+
 BATTLE_MOVE_WORKFLOW = "BATTLE_MOVE_WORKFLOW"
 STUNNED_WORKFLOW = "STUNNED_WORKFLOW"
 
+# These are compact versions of the CombatantStates used by CombatantSnapshot.
+IDLE_STATE_CODE = 0
+WARMING_UP_STATE_CODE = 1
+EXECUTING_MOVE_STATE_CODE = 2
+COOLING_DOWN_STATE_CODE = 3
+STUNNED_STATE_CODE = 4
+
+
+class BattleObserver(Protocol):
+
+    """Something that wants to know what happens during a battle, like BattleView."""
+
+    def on_battle_move(
+        self, combatant: CombatantModel, move: battle_moves.BattleMove
+    ) -> None:
+        ...
+
+    def on_damage(self, combatant: CombatantModel, damage: float) -> None:
+        ...
+
 
 class CombatantModel:
     # Subclasses may want to override this.
@@ -48,12 +76,13 @@ class CombatantModel:
     def __init__(self) -> None:
         self.__strength = self.MIN_STRENGTH
         self.strength_at_the_beginning_of_battle = 0.0
-        self.state: CombatantState = IdleState()
+        self.state: CombatantState = IDLE_STATE
         self.current_workflow: TimedWorkflow = None
         self.current_battle_move: battle_moves.BattleMove = None
         self.other: CombatantModel = None
         self.dodging = False
         self.flip_sprite_upside_down = False
+        self.observer: Optional[BattleObserver] = None
 
     @property
     def strength(self) -> float:
@@ -70,13 +99,17 @@ class CombatantModel:
         if self.dodging or isinstance(self.state, StunnedState):
             return
 
+        strength_before = self.strength
         self.strength -= power
+        if self.observer is not None:
+            self.observer.on_damage(self, strength_before - self.strength)
         self.current_workflow = TimedWorkflow(
             name=STUNNED_WORKFLOW,
             steps=[
                 TimedStep(Secs(0.0), self.enter_stunned_period),
                 TimedStep(battle_moves.STUNNED.execution_period, self.return_to_idle),
             ],
+            carry_late_by=True,
         )
 
     def attempt_battle_move(
@@ -86,6 +119,8 @@ class CombatantModel:
             return
         self.current_battle_move = move
         self.other = other
+        if self.observer is not None:
+            self.observer.on_battle_move(self, move)
         self.current_workflow = TimedWorkflow(
             name=BATTLE_MOVE_WORKFLOW,
             steps=[
@@ -94,17 +129,64 @@ class CombatantModel:
                 TimedStep(move.execution_period, self.enter_cooldown_period),
                 TimedStep(move.cooldown_period, self.return_to_idle),
             ],
+            carry_late_by=True,
         )
 
     def on_battle_view_update(self, delta_time: float) -> None:
         if self.current_workflow:
             self.current_workflow.on_update(delta_time)
 
+    def time_until_next_step(self) -> Secs:
+        """How long until the current workflow does something? See advance_battle."""
+        if self.current_workflow is None:
+            return Secs(math.inf)
+        return max(self.current_workflow.countdown, Secs(0.0))
+
+    def take_snapshot(self, snapshot: CombatantSnapshot) -> None:
+        """Copy everything that matters for the rest of the battle into snapshot.
+
+        A workflow whose first step hasn't fired yet is treated as if it had, since it will fire
+        on the very next update.
+
+        """
+        snapshot.strength = self.strength
+        snapshot.min_strength = self.MIN_STRENGTH
+        snapshot.strength_at_the_beginning_of_battle = (
+            self.strength_at_the_beginning_of_battle
+        )
+        snapshot.dodging = self.dodging
+        snapshot.move = self.current_battle_move
+
+        workflow = self.current_workflow
+        if workflow is None:
+            snapshot.state = IDLE_STATE_CODE
+            snapshot.remaining = Secs(0.0)
+            return
+
+        steps_left = len(workflow.steps)
+        if workflow.name == STUNNED_WORKFLOW:
+            snapshot.state = STUNNED_STATE_CODE
+            snapshot.move = battle_moves.STUNNED
+            if steps_left == 2:
+                snapshot.remaining = battle_moves.STUNNED.execution_period
+            else:
+                snapshot.remaining = max(workflow.countdown, Secs(0.0))
+        elif steps_left == 4:
+            snapshot.state = WARMING_UP_STATE_CODE
+            snapshot.remaining = self.current_battle_move.warmup_period
+        else:
+            snapshot.state = {
+                3: WARMING_UP_STATE_CODE,
+                2: EXECUTING_MOVE_STATE_CODE,
+                1: COOLING_DOWN_STATE_CODE,
+            }[steps_left]
+            snapshot.remaining = max(workflow.countdown, Secs(0.0))
+
     def enter_warmup_period(self, late_by: Secs) -> None:
-        self.state = WarmingUpState()
+        self.state = WARMING_UP_STATE
 
     def enter_execution_period(self, late_by: Secs) -> None:
-        self.state = ExecutingMoveState()
+        self.state = EXECUTING_MOVE_STATE
         if self.current_battle_move == battle_moves.DODGE:
             self.dodging = True
         else:
@@ -119,16 +201,16 @@ class CombatantModel:
         )
 
     def enter_cooldown_period(self, late_by: Secs) -> None:
-        self.state = CoolingDownState()
+        self.state = COOLING_DOWN_STATE
         if self.current_battle_move == battle_moves.DODGE:
             self.dodging = False
 
     def enter_stunned_period(self, late_by: Secs) -> None:
-        self.state = StunnedState()
+        self.state = STUNNED_STATE
         self.flip_sprite_upside_down = True
 
     def return_to_idle(self, late_by: Secs) -> None:
-        self.state = IdleState()
+        self.state = IDLE_STATE
         self.flip_sprite_upside_down = False
 
         # Remember to clean up.
@@ -161,7 +243,30 @@ class PlayerModel(CombatantModel):
         self.strength += enemy.strength_at_the_beginning_of_battle
 
 
+class EnemyAI(Protocol):
+
+    """Something that can pick battle moves for an EnemyModel instead of its built-in AI.
+
+    It's consulted whenever the enemy is idle. delta_time is how much time has passed since the
+    last time it was consulted, which may be 0.0.
+
+    """
+
+    def choose_battle_move(
+        self, enemy_model: EnemyModel, delta_time: float
+    ) -> Optional[battle_moves.BattleMove]:
+        ...
+
+
 class EnemyModel(CombatantModel):
+    # Try to attack about 3 times in every 2 seconds. The chance is per 60th of a second; see
+    # chance_per_delta_time.
+    TICKS_PER_SECOND = 60
+    ATTACK_CHANCE_PER_TICK = 3 / (60 * 2)
+
+    # When the player does something we know how to counter, how often do we counter it?
+    COUNTER_MOVE_CHANCE = 1 / 4
+
     def __init__(
         self,
         sprite_image: sprite_images.SpriteImage,
@@ -174,6 +279,7 @@ class EnemyModel(CombatantModel):
         self.position = position
         self.strength = strength
         self.player_model = player_model
+        self.ai: Optional[EnemyAI] = None
 
     @property
     def is_dead(self) -> bool:
@@ -182,39 +288,53 @@ class EnemyModel(CombatantModel):
 
     def on_battle_view_update(self, delta_time: float) -> None:
         super().on_battle_view_update(delta_time)
-        self.consider_attacking_on_each_tick()
+        self.consider_attacking_on_each_tick(delta_time)
+
+    @classmethod
+    def chance_per_delta_time(cls, chance_per_tick: float, delta_time: float) -> float:
+        """Scale a per-tick chance so that it doesn't depend on how often we're updated."""
+        return 1.0 - math.pow(1.0 - chance_per_tick, delta_time * cls.TICKS_PER_SECOND)
 
-    def consider_attacking_on_each_tick(self) -> None:
+    def consider_attacking_on_each_tick(
+        self, delta_time: float = 1.0 / TICKS_PER_SECOND
+    ) -> None:
         if not isinstance(self.state, IdleState):
             return
 
-        # Try to attack about 3 times in every 2 seconds.
-        if random.randrange(60 * 2) >= 3:
+        if self.ai is not None:
+            ai_move = self.ai.choose_battle_move(self, delta_time)
+            if ai_move is not None:
+                self.attempt_battle_move(ai_move, self.player_model)
+            return
+
+        if random.random() >= self.chance_per_delta_time(
+            self.ATTACK_CHANCE_PER_TICK, delta_time
+        ):
             return
 
         if (
             self.player_model.current_battle_move == battle_moves.JAB
             and isinstance(self.player_model.state, WarmingUpState)
-            and random.randrange(4) == 0
+            and random.random() < self.COUNTER_MOVE_CHANCE
         ):
             move = battle_moves.DODGE
 
         elif (
             self.player_model.current_battle_move == battle_moves.UPPERCUT
             and isinstance(self.player_model.state, WarmingUpState)
-            and random.randrange(4) == 0
+            and random.random() < self.COUNTER_MOVE_CHANCE
         ):
             move = battle_moves.JAB
 
         elif (
             self.player_model.current_battle_move == battle_moves.DODGE
-            and random.randrange(4) == 0
+            and random.random() < self.COUNTER_MOVE_CHANCE
         ):
             move = battle_moves.UPPERCUT
 
         elif (
             isinstance(self.player_model.state, StunnedState)
-            and random.randrange(4) == 0
+            and random.random() < self.COUNTER_MOVE_CHANCE
         ):
             move = battle_moves.UPPERCUT
 
@@ -226,6 +346,186 @@ class EnemyModel(CombatantModel):
         self.attempt_battle_move(move, self.player_model)
 
 
+class ScheduledInput(NamedTuple):
+    # How far into the frame did this input happen?
+    offset: Secs
+    apply: Callable[[], None]
+
+
+def advance_battle(
+    player_model: CombatantModel,
+    enemy_model: CombatantModel,
+    delta_time: float,
+    inputs: Sequence[ScheduledInput] = (),
+) -> None:
+    """Advance both combatants by delta_time, one workflow step at a time.
+
+    If you just call on_battle_view_update once per frame, every step that falls inside the
+    frame happens at the end of it, which means whether an attack lands before a dodge starts
+    depends on the frame rate. Instead, this splits the frame at every step boundary and at every
+    input so that things happen at exactly the right time, in the right order. Inputs are
+    applied at their offsets into the frame. When two things happen at the same time, the
+    player goes first, just like in BattleView.
+
+    """
+    elapsed = Secs(0.0)
+
+    # This gets called every frame, so don't allocate anything if there's no input.
+    pending = sorted(inputs, key=_get_offset) if inputs else inputs
+    for i in range(len(pending) + 1):
+        if i < len(pending):
+            target = min(max(pending[i].offset, Secs(0.0)), delta_time)
+        else:
+            target = delta_time
+
+        while elapsed < target:
+            remaining = target - elapsed
+            step = min(
+                remaining,
+                player_model.time_until_next_step(),
+                enemy_model.time_until_next_step(),
+            )
+
+            # If the player stuns the enemy, the enemy gets a brand new workflow. It shouldn't
+            # be charged for time that passed before it existed.
+            enemy_workflow = enemy_model.current_workflow
+            player_model.on_battle_view_update(step)
+            enemy_model.on_battle_view_update(
+                step if enemy_model.current_workflow is enemy_workflow else Secs(0.0)
+            )
+            elapsed = target if step == remaining else elapsed + step
+
+        if i < len(pending):
+            pending[i].apply()
+
+
+def _get_offset(scheduled_input: ScheduledInput) -> Secs:
+    return scheduled_input.offset
+
+
+class CombatantSnapshot:
+
+    """This is a compact, cheaply copied picture of a CombatantModel in the middle of a battle.
+
+    Instead of a workflow with callbacks, it just has a state code, the move, and how long until
+    the current step is over. See fast_forward_battle.
+
+    """
+
+    __slots__ = (
+        "state",
+        "move",
+        "remaining",
+        "strength",
+        "min_strength",
+        "strength_at_the_beginning_of_battle",
+        "dodging",
+    )
+
+    def __init__(self) -> None:
+        self.state = IDLE_STATE_CODE
+        self.move: battle_moves.BattleMove = None
+        self.remaining = Secs(0.0)
+        self.strength = 0.0
+        self.min_strength = 0.0
+        self.strength_at_the_beginning_of_battle = 0.0
+        self.dodging = False
+
+    def copy_from(self, other: CombatantSnapshot) -> None:
+        self.state = other.state
+        self.move = other.move
+        self.remaining = other.remaining
+        self.strength = other.strength
+        self.min_strength = other.min_strength
+        self.strength_at_the_beginning_of_battle = (
+            other.strength_at_the_beginning_of_battle
+        )
+        self.dodging = other.dodging
+
+    def start_battle_move(self, move: battle_moves.BattleMove) -> None:
+        """This is the snapshot version of CombatantModel.attempt_battle_move."""
+        if self.state != IDLE_STATE_CODE:
+            return
+        self.state = WARMING_UP_STATE_CODE
+        self.move = move
+        self.remaining = move.warmup_period
+
+
+class BattleSnapshot:
+    __slots__ = ("player", "enemy")
+
+    def __init__(self) -> None:
+        self.player = CombatantSnapshot()
+        self.enemy = CombatantSnapshot()
+
+    def copy_from(self, other: BattleSnapshot) -> None:
+        self.player.copy_from(other.player)
+        self.enemy.copy_from(other.enemy)
+
+    def take(self, player_model: CombatantModel, enemy_model: CombatantModel) -> None:
+        player_model.take_snapshot(self.player)
+        enemy_model.take_snapshot(self.enemy)
+
+
+def fast_forward_battle(snapshot: BattleSnapshot, duration: Secs) -> None:
+    """Advance snapshot by duration, assuming neither side starts a new move.
+
+    This follows the same rules as the CombatantModel workflows, but it jumps from one step
+    boundary to the next instead of ticking, so it's exact and cheap. It only touches snapshot.
+
+    """
+    player = snapshot.player
+    enemy = snapshot.enemy
+    while duration > 0.0:
+        step = duration
+        if player.state != IDLE_STATE_CODE and player.remaining < step:
+            step = player.remaining
+        if enemy.state != IDLE_STATE_CODE and enemy.remaining < step:
+            step = enemy.remaining
+        duration -= step
+        if player.state != IDLE_STATE_CODE:
+            player.remaining -= step
+        if enemy.state != IDLE_STATE_CODE:
+            enemy.remaining -= step
+
+        # Like BattleView, the player goes first. If the player stuns the enemy, that resets
+        # the enemy's remaining time, so the enemy's own step never happens.
+        if player.state != IDLE_STATE_CODE and player.remaining <= 0.0:
+            _advance_combatant_snapshot(player, enemy)
+        if enemy.state != IDLE_STATE_CODE and enemy.remaining <= 0.0:
+            _advance_combatant_snapshot(enemy, player)
+
+
+def _advance_combatant_snapshot(
+    me: CombatantSnapshot, other: CombatantSnapshot
+) -> None:
+    """Move on to the next step. This mirrors the CombatantModel callbacks."""
+    if me.state == WARMING_UP_STATE_CODE:
+        me.state = EXECUTING_MOVE_STATE_CODE
+        me.remaining += me.move.execution_period
+        if me.move == battle_moves.DODGE:
+            me.dodging = True
+        elif not other.dodging and other.state != STUNNED_STATE_CODE:
+            power = (
+                (1.0 / 10)
+                * me.strength_at_the_beginning_of_battle
+                * me.move.base_strength
+            )
+            other.strength = max(other.strength - power, other.min_strength)
+            other.state = STUNNED_STATE_CODE
+            other.move = battle_moves.STUNNED
+            other.remaining = battle_moves.STUNNED.execution_period
+    elif me.state == EXECUTING_MOVE_STATE_CODE:
+        me.state = COOLING_DOWN_STATE_CODE
+        me.remaining += me.move.cooldown_period
+        if me.move == battle_moves.DODGE:
+            me.dodging = False
+    else:
+        me.state = IDLE_STATE_CODE
+        me.move = None
+        me.remaining = Secs(0.0)
+
+
 def pick_enemy_strength(op: geography.OriginPoint) -> float:
     return random.uniform(
         MIN_INITIAL_ENEMY_STRENGTH_TO_PICK, _pick_enemy_strength_non_random(op)
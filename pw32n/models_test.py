@@ -1,3 +1,4 @@
+import functools
 import random
 import unittest
 from unittest.mock import patch, Mock
@@ -19,6 +20,15 @@ from pw32n.models import (
     StunnedState,
     BATTLE_MOVE_WORKFLOW,
     STUNNED_WORKFLOW,
+    BattleSnapshot,
+    fast_forward_battle,
+    IDLE_STATE_CODE,
+    WARMING_UP_STATE_CODE,
+    EXECUTING_MOVE_STATE_CODE,
+    COOLING_DOWN_STATE_CODE,
+    STUNNED_STATE_CODE,
+    ScheduledInput,
+    advance_battle,
 )
 from pw32n.units import Secs
 
@@ -149,6 +159,23 @@ class CombatantModelTestCase(unittest.TestCase):
             self.model.current_battle_move = move
             self.assertAlmostEqual(self.model.calculate_power(), expected)
 
+    def test_observer(self) -> None:
+        observer = Mock()
+        self.model.observer = observer
+        self.model.strength = 5.0
+        other = CombatantModel()
+        self.model.attempt_battle_move(battle_moves.JAB, other)
+        observer.on_battle_move.assert_called_once_with(self.model, battle_moves.JAB)
+
+        self.model.on_attacked(2.0)
+        observer.on_damage.assert_called_once_with(self.model, 2.0)
+
+        # Hits that don't land aren't damage.
+        observer.reset_mock()
+        self.model.dodging = True
+        self.model.on_attacked(2.0)
+        observer.on_damage.assert_not_called()
+
 
 class PlayerModelTestCase(unittest.TestCase):
     def setUp(self) -> None:
@@ -212,15 +239,14 @@ class EnemyModelTestCase(unittest.TestCase):
         self.enemy_model.on_battle_view_update(Secs(0.0))
         m_consider_attacking_on_each_tick.assert_called()
 
-    @patch.object(random, "choice")
-    @patch.object(random, "randrange")
+    @patch.object(random, "random", return_value=0.0)
     def test_consider_attacking_on_each_tick_exits_early_when_not_idle(
-        self, m_randrange: Mock, m_choice: Mock
+        self, m_random: Mock
     ) -> None:
         self.enemy_model.state = ExecutingMoveState()
         self.enemy_model.consider_attacking_on_each_tick()
-        m_randrange.assert_not_called()
-        m_choice.assert_not_called()
+        m_random.assert_not_called()
+        self.assertIsNone(self.enemy_model.current_workflow)
 
     @patch.object(CombatantModel, "attempt_battle_move")
     def test_consider_attacking_on_each_tick_occasionally_attacks(
@@ -235,6 +261,207 @@ class EnemyModelTestCase(unittest.TestCase):
             raise AssertionError("attempt_battle_move wasn't called in 1000 attempts")
 
 
+class RecordingCombatantModel(CombatantModel):
+    def __init__(self) -> None:
+        super().__init__()
+        self.hits: list[float] = []
+
+    def on_attacked(self, power: float) -> None:
+        strength_before = self.strength
+        super().on_attacked(power)
+        if self.strength != strength_before:
+            self.hits.append(round(power, 6))
+
+
+class AdvanceBattleTestCase(unittest.TestCase):
+    # (time, who, move) where who is "player" or "enemy". The gaps are deliberately smaller
+    # than a frame at 20 Hz.
+    SCRIPT = [
+        # The enemy's jab lands at 0.45, just before the player starts dodging at 0.46.
+        (0.30, "enemy", battle_moves.JAB),
+        (0.37, "player", battle_moves.DODGE),
+        # The enemy's uppercut lands at 1.50, but the player is dodging from 1.49.
+        (1.00, "enemy", battle_moves.UPPERCUT),
+        (1.40, "player", battle_moves.DODGE),
+        # The player's jab lands at 2.95, but the enemy is dodging from 2.94.
+        (2.80, "player", battle_moves.JAB),
+        (2.85, "enemy", battle_moves.DODGE),
+        # The player's uppercut lands at 4.0, right after the enemy stops dodging at 3.94.
+        (3.50, "player", battle_moves.UPPERCUT),
+    ]
+    DURATION = 5.0
+
+    def run_scripted_battle(
+        self, hz: int
+    ) -> tuple[RecordingCombatantModel, RecordingCombatantModel]:
+        player = RecordingCombatantModel()
+        enemy = RecordingCombatantModel()
+        for model in (player, enemy):
+            model.strength = 10.0
+            model.on_battle_view_begin()
+        delta_time = 1.0 / hz
+        for frame in range(round(self.DURATION * hz)):
+            frame_began_at = frame * delta_time
+            inputs = []
+            for (at, who, move) in self.SCRIPT:
+                if int(at * hz) == frame:
+                    me, other = (player, enemy) if who == "player" else (enemy, player)
+                    inputs.append(
+                        ScheduledInput(
+                            offset=(at - frame_began_at),
+                            apply=functools.partial(
+                                me.attempt_battle_move, move, other
+                            ),
+                        )
+                    )
+            advance_battle(player, enemy, delta_time, inputs)
+        return player, enemy
+
+    def test_the_same_battle_at_different_frame_rates(self) -> None:
+        outcomes = []
+        for hz in (20, 60, 240):
+            player, enemy = self.run_scripted_battle(hz)
+            outcomes.append(
+                (player.hits, enemy.hits, round(player.strength, 6), enemy.strength)
+            )
+            self.assertEqual(player.hits, [1.0], hz)
+            self.assertEqual(enemy.hits, [3.0], hz)
+            self.assertIsInstance(player.state, IdleState, hz)
+            self.assertIsInstance(enemy.state, IdleState, hz)
+        self.assertEqual(outcomes[0], outcomes[1])
+        self.assertEqual(outcomes[1], outcomes[2])
+
+    def test_inputs_happen_at_their_offsets(self) -> None:
+        player = CombatantModel()
+        enemy = CombatantModel()
+        advance_battle(
+            player,
+            enemy,
+            0.1,
+            [
+                ScheduledInput(
+                    0.05,
+                    functools.partial(
+                        player.attempt_battle_move, battle_moves.UPPERCUT, enemy
+                    ),
+                )
+            ],
+        )
+        self.assertIsInstance(player.state, WarmingUpState)
+        self.assertAlmostEqual(
+            player.current_workflow.countdown,
+            battle_moves.UPPERCUT.warmup_period - 0.05,
+        )
+
+    def test_a_stunned_enemy_is_not_charged_for_time_before_the_hit(self) -> None:
+        player = CombatantModel()
+        enemy = CombatantModel()
+        player.strength_at_the_beginning_of_battle = 10.0
+        enemy.strength = 10.0
+        player.attempt_battle_move(battle_moves.JAB, enemy)
+        advance_battle(player, enemy, battle_moves.JAB.warmup_period)
+        self.assertIsInstance(enemy.state, StunnedState)
+        self.assertAlmostEqual(
+            enemy.current_workflow.countdown, battle_moves.STUNNED.execution_period
+        )
+
+
+class BattleSnapshotTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.player_model = PlayerModel()
+        self.player_model.strength = 10.0
+        self.enemy_model = EnemyModel(
+            sprite_image=sprite_images.ZOMBIE_IMAGE,
+            position=OriginPoint(0, 0),
+            strength=10.0,
+            player_model=self.player_model,
+        )
+        self.player_model.on_battle_view_begin()
+        self.enemy_model.on_battle_view_begin()
+        self.snapshot = BattleSnapshot()
+
+    def test_take_snapshot_when_idle(self) -> None:
+        self.snapshot.take(self.player_model, self.enemy_model)
+        self.assertEqual(self.snapshot.player.state, IDLE_STATE_CODE)
+        self.assertEqual(self.snapshot.player.strength, 10.0)
+        self.assertEqual(self.snapshot.player.min_strength, PlayerModel.MIN_STRENGTH)
+        self.assertIsNone(self.snapshot.enemy.move)
+
+    def test_take_snapshot_follows_the_workflow(self) -> None:
+        self.player_model.attempt_battle_move(battle_moves.UPPERCUT, self.enemy_model)
+        expected_states = [
+            (WARMING_UP_STATE_CODE, battle_moves.UPPERCUT.warmup_period),
+            (WARMING_UP_STATE_CODE, battle_moves.UPPERCUT.warmup_period),
+            (EXECUTING_MOVE_STATE_CODE, battle_moves.UPPERCUT.execution_period),
+            (COOLING_DOWN_STATE_CODE, battle_moves.UPPERCUT.cooldown_period),
+        ]
+        for (state, remaining) in expected_states:
+            self.snapshot.take(self.player_model, self.enemy_model)
+            self.assertEqual(self.snapshot.player.state, state)
+            self.assertAlmostEqual(self.snapshot.player.remaining, remaining)
+            self.assertEqual(self.snapshot.player.move, battle_moves.UPPERCUT)
+            self.player_model.on_battle_view_update(
+                self.player_model.current_workflow.countdown
+            )
+
+    def test_take_snapshot_when_stunned(self) -> None:
+        self.enemy_model.on_attacked(1.0)
+        self.snapshot.take(self.player_model, self.enemy_model)
+        self.assertEqual(self.snapshot.enemy.state, STUNNED_STATE_CODE)
+        self.assertEqual(
+            self.snapshot.enemy.remaining, battle_moves.STUNNED.execution_period
+        )
+
+    def test_copy_from(self) -> None:
+        self.player_model.attempt_battle_move(battle_moves.JAB, self.enemy_model)
+        self.snapshot.take(self.player_model, self.enemy_model)
+        copy = BattleSnapshot()
+        copy.copy_from(self.snapshot)
+        for name in copy.player.__slots__:
+            self.assertEqual(
+                getattr(copy.player, name), getattr(self.snapshot.player, name)
+            )
+        copy.player.strength = 0.0
+        self.assertEqual(self.snapshot.player.strength, 10.0)
+
+    def test_fast_forward_battle_matches_the_models(self) -> None:
+        # fast_forward_battle only plays the moves that were started, so the enemy mustn't pick
+        # any of its own.
+        self.enemy_model.ATTACK_CHANCE_PER_TICK = 0.0
+        self.player_model.attempt_battle_move(battle_moves.UPPERCUT, self.enemy_model)
+        self.enemy_model.attempt_battle_move(battle_moves.JAB, self.player_model)
+        self.snapshot.take(self.player_model, self.enemy_model)
+        fast_forward_battle(self.snapshot, Secs(2.0))
+
+        for i in range(2 * 600):
+            self.player_model.on_battle_view_update(Secs(1.0 / 600))
+            self.enemy_model.on_battle_view_update(Secs(1.0 / 600))
+
+        # The jab lands first, which stuns the player and cancels the uppercut.
+        self.assertAlmostEqual(self.snapshot.player.strength, 9.0)
+        self.assertAlmostEqual(self.player_model.strength, 9.0)
+        self.assertAlmostEqual(self.snapshot.enemy.strength, 10.0)
+        self.assertAlmostEqual(self.enemy_model.strength, 10.0)
+        self.assertEqual(self.snapshot.player.state, IDLE_STATE_CODE)
+        self.assertEqual(self.snapshot.enemy.state, IDLE_STATE_CODE)
+
+    def test_fast_forward_battle_respects_dodging(self) -> None:
+        self.snapshot.take(self.player_model, self.enemy_model)
+        self.snapshot.player.start_battle_move(battle_moves.DODGE)
+        self.snapshot.enemy.start_battle_move(battle_moves.UPPERCUT)
+        fast_forward_battle(self.snapshot, Secs(0.5))
+        self.assertTrue(self.snapshot.player.dodging)
+        fast_forward_battle(self.snapshot, Secs(1.0))
+        self.assertFalse(self.snapshot.player.dodging)
+        self.assertEqual(self.snapshot.player.strength, 10.0)
+
+    def test_start_battle_move_only_when_idle(self) -> None:
+        self.snapshot.take(self.player_model, self.enemy_model)
+        self.snapshot.player.start_battle_move(battle_moves.JAB)
+        self.snapshot.player.start_battle_move(battle_moves.UPPERCUT)
+        self.assertEqual(self.snapshot.player.move, battle_moves.JAB)
+
+
 class PickEnemyStrengthTestCase(unittest.TestCase):
     def test__pick_enemy_strength_non_random_short_distance(self) -> None:
         op = OriginPoint(1, 1)
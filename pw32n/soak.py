@@ -0,0 +1,226 @@
+"""Walk the world headlessly for a long time to make sure memory plateaus and nothing slows down.
+
+Geography.tile_map is an LRU cache with room for a million tiles, and until the player has
+generated that many, nothing is ever evicted. These walks go far past that. Each walk is an
+endless stream of moves (in tiles); soak takes a fixed number of them, feeding each to a
+HeadlessWorld, and samples the tile rate, the RSS and the size of the cache as it goes.
+
+Some of the walks are deliberately nasty. Walking in a straight line generates new tiles as fast
+as possible, a spiral generates new tiles all the way around the screen, and going back and
+forth over a stretch that's bigger than the cache makes the LRU evict every tile right before
+it's needed again.
+
+Run it with:
+
+    python -m pw32n.soak --steps 200000
+
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import time
+from typing import Callable, Iterator, NamedTuple
+
+from pw32n import geography, tiles
+from pw32n.headless import HeadlessWorld
+from pw32n.metrics import rss_bytes
+
+Move = tuple[int, int]
+Walk = Callable[[], Iterator[Move]]
+
+DEFAULT_CAPACITY = 1_000_000
+
+# How much can RSS grow once the cache is full? Python never gives all of its memory back, so
+# allow for some slack.
+DEFAULT_MAX_RSS_GROWTH = 0.25
+
+# How much slower can the end of a walk be than the middle of it?
+DEFAULT_MAX_SLOWDOWN = 0.5
+
+
+def straight() -> Iterator[Move]:
+    while True:
+        yield (1, 0)
+
+
+def spiral() -> Iterator[Move]:
+    directions = itertools.cycle([(1, 0), (0, 1), (-1, 0), (0, -1)])
+    for leg in itertools.count(1):
+        # Each leg length is used twice: east 1, north 1, west 2, south 2, east 3, ...
+        for _ in range(2):
+            move = next(directions)
+            for _ in range(leg):
+                yield move
+
+
+def back_and_forth(span: int) -> Walk:
+    def walk() -> Iterator[Move]:
+        while True:
+            for move in ((1, 0), (-1, 0)):
+                for _ in range(span):
+                    yield move
+
+    return walk
+
+
+def random_walk(seed: int = 0, max_leg: int = 50) -> Walk:
+    def walk() -> Iterator[Move]:
+        rng = random.Random(seed)
+        while True:
+            move = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+            for _ in range(rng.randint(1, max_leg)):
+                yield move
+
+    return walk
+
+
+def walks(capacity: int) -> dict[str, Walk]:
+    # Going back and forth over this many tiles (times the height of the screen) is more than
+    # the cache can hold.
+    span = capacity // 5
+    return {
+        "straight": straight,
+        "spiral": spiral,
+        "back_and_forth": back_and_forth(span),
+        "random": random_walk(),
+    }
+
+
+class SoakSample(NamedTuple):
+    steps: int
+    elapsed: float
+    tiles_generated: int
+
+    # Tiles loaded (generated or reused from the cache) per second since the last sample.
+    tiles_per_sec: float
+    tile_map_size: int
+    rss_bytes: int
+
+
+def soak(
+    walk: Walk,
+    steps: int,
+    capacity: int = DEFAULT_CAPACITY,
+    samples: int = 20,
+    seed: int = 0,
+) -> list[SoakSample]:
+    """Take steps moves from the walk and return samples taken at regular intervals."""
+    random.seed(seed)
+    geo: geography.Geography[tiles.Tile] = geography.Geography()
+    geo.tile_map.capacity = capacity
+    world = HeadlessWorld(geo)
+    tile_picker = world.tile_picker
+    sample_every = max(1, steps // samples)
+
+    results = []
+    start = last_time = time.perf_counter()
+    last_tiles_loaded = tile_picker.tiles_generated + tile_picker.tiles_reused
+    moves = walk()
+    for step in range(1, steps + 1):
+        tile_dx, tile_dy = next(moves)
+        world.move(tile_dx * geo.tile_width, tile_dy * geo.tile_height)
+        if step % sample_every == 0 or step == steps:
+            now = time.perf_counter()
+            tiles_generated = tile_picker.tiles_generated
+            tiles_loaded = tiles_generated + tile_picker.tiles_reused
+            results.append(
+                SoakSample(
+                    steps=step,
+                    elapsed=now - start,
+                    tiles_generated=tiles_generated,
+                    tiles_per_sec=(
+                        (tiles_loaded - last_tiles_loaded) / (now - last_time)
+                    ),
+                    tile_map_size=len(geo.tile_map),
+                    rss_bytes=rss_bytes(),
+                )
+            )
+            last_time = now
+            last_tiles_loaded = tiles_loaded
+    return results
+
+
+def check(
+    samples: list[SoakSample],
+    capacity: int,
+    max_rss_growth: float = DEFAULT_MAX_RSS_GROWTH,
+    max_slowdown: float = DEFAULT_MAX_SLOWDOWN,
+) -> list[str]:
+    """Return a list of problems, if any.
+
+    Memory is only expected to plateau once the cache is full, and even then, the dict behind
+    the LRUDict resizes once more as evictions leave deleted slots behind. So RSS is compared
+    between the middle and the end of the samples taken after the cache filled up. Throughput
+    is compared between the first and second halves of those samples, since a cache that's
+    still filling up doesn't have to evict anything.
+
+    """
+    problems = []
+    for sample in samples:
+        if sample.tile_map_size > capacity:
+            problems.append(
+                f"tile_map has {sample.tile_map_size} tiles at step {sample.steps}, "
+                f"but its capacity is {capacity}"
+            )
+            break
+
+    full = [i for i in samples if i.tile_map_size == capacity]
+    # rss_bytes is 0 on platforms where it can't be measured.
+    if len(full) >= 2 and full[0].rss_bytes:
+        settled = full[len(full) // 2 - 1 if len(full) > 2 else 0]
+        growth = (full[-1].rss_bytes - settled.rss_bytes) / settled.rss_bytes
+        if growth > max_rss_growth:
+            problems.append(
+                f"RSS grew {growth:.0%} after the cache filled up "
+                f"({settled.rss_bytes} -> {full[-1].rss_bytes} bytes)"
+            )
+
+    if len(full) >= 4:
+        half = len(full) // 2
+        early = sum(i.tiles_per_sec for i in full[:half]) / half
+        late = sum(i.tiles_per_sec for i in full[half:]) / (len(full) - half)
+        if late < early * (1.0 - max_slowdown):
+            problems.append(
+                f"Throughput dropped from {early:,.0f} to {late:,.0f} tiles/sec"
+            )
+    return problems
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=200_000, help="Steps per walk")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument(
+        "--walk",
+        action="append",
+        help="Which walks to run (may be repeated). Defaults to all of them.",
+    )
+    args = parser.parse_args(argv)
+
+    all_walks = walks(args.capacity)
+    names = args.walk or list(all_walks)
+    failed = False
+    for name in names:
+        print(f"{name}:", file=sys.stderr)
+        samples = soak(all_walks[name], args.steps, args.capacity, args.samples)
+        for sample in samples:
+            print(
+                f"  step {sample.steps:>9,}  {sample.elapsed:7.1f}s  "
+                f"{sample.tiles_generated:>11,} tiles  "
+                f"{sample.tiles_per_sec:>9,.0f} tiles/sec  "
+                f"tile_map {sample.tile_map_size:>9,}  "
+                f"RSS {sample.rss_bytes / 2 ** 20:7.1f} MiB",
+                file=sys.stderr,
+            )
+        for problem in check(samples, args.capacity):
+            print(f"  PROBLEM: {problem}", file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
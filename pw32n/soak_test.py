@@ -0,0 +1,84 @@
+import itertools
+import unittest
+
+from pw32n import soak
+from pw32n.metrics import rss_bytes
+from pw32n.soak import SoakSample, check
+
+
+class WalkTestCase(unittest.TestCase):
+    def take(self, walk: soak.Walk, count: int) -> list[soak.Move]:
+        return list(itertools.islice(walk(), count))
+
+    def test_spiral(self) -> None:
+        self.assertEqual(
+            self.take(soak.spiral, 6),
+            [(1, 0), (0, 1), (-1, 0), (-1, 0), (0, -1), (0, -1)],
+        )
+
+    def test_back_and_forth(self) -> None:
+        self.assertEqual(
+            self.take(soak.back_and_forth(2), 6),
+            [(1, 0), (1, 0), (-1, 0), (-1, 0), (1, 0), (1, 0)],
+        )
+
+    def test_random_walk_is_repeatable(self) -> None:
+        walk = soak.random_walk(seed=1)
+        self.assertEqual(self.take(walk, 100), self.take(walk, 100))
+
+
+class SoakTestCase(unittest.TestCase):
+    CAPACITY = 500
+
+    def test_walks_run_past_capacity(self) -> None:
+        for name, walk in soak.walks(self.CAPACITY).items():
+            with self.subTest(name):
+                samples = soak.soak(walk, steps=400, capacity=self.CAPACITY, samples=4)
+                self.assertEqual(len(samples), 4)
+                self.assertEqual(samples[-1].steps, 400)
+                self.assertGreater(samples[-1].tiles_generated, self.CAPACITY)
+                self.assertEqual(samples[-1].tile_map_size, self.CAPACITY)
+                # It's 0 on platforms where it can't be measured.
+                if rss_bytes():
+                    self.assertGreater(samples[-1].rss_bytes, 0)
+
+
+class CheckTestCase(unittest.TestCase):
+    CAPACITY = 100
+
+    def sample(
+        self,
+        tile_map_size: int = CAPACITY,
+        rss: int = 1000,
+        tiles_per_sec: float = 10.0,
+    ) -> SoakSample:
+        return SoakSample(
+            steps=0,
+            elapsed=0.0,
+            tiles_generated=0,
+            tiles_per_sec=tiles_per_sec,
+            tile_map_size=tile_map_size,
+            rss_bytes=rss,
+        )
+
+    def test_healthy(self) -> None:
+        samples = [self.sample(tile_map_size=50, rss=500)] + [
+            self.sample() for _ in range(4)
+        ]
+        self.assertEqual(check(samples, self.CAPACITY), [])
+
+    def test_over_capacity(self) -> None:
+        problems = check([self.sample(tile_map_size=101)], self.CAPACITY)
+        self.assertEqual(len(problems), 1)
+        self.assertIn("capacity", problems[0])
+
+    def test_memory_growth(self) -> None:
+        problems = check([self.sample(rss=1000), self.sample(rss=2000)], self.CAPACITY)
+        self.assertEqual(len(problems), 1)
+        self.assertIn("RSS", problems[0])
+
+    def test_slowdown(self) -> None:
+        samples = [self.sample(tiles_per_sec=i) for i in (100.0, 100.0, 10.0, 10.0)]
+        problems = check(samples, self.CAPACITY)
+        self.assertEqual(len(problems), 1)
+        self.assertIn("Throughput", problems[0])
@@ -0,0 +1,749 @@
+"""A read-only feed of what the player sees, for watching a session from somewhere else.
+
+Every frame, WorldView tells SpectatorStream which tiles it put on the screen and took off of it
+(a TilePointDiff, plus the tile IDs), and GameWindow ends the frame with the player's position
+and the EnemyPool. SpectatorEncoder turns that into a few bytes, and a background thread writes
+them to a file or to whoever is connected to a local socket. spectator_client renders the
+stream, and nothing else.
+
+Nearly everything is delta encoded, since very little changes from one frame to the next:
+
+* Each frame is its length, a byte of flags saying which sections follow, and the frame's
+  delta_time in milliseconds. A frame where nothing happened is 3 bytes.
+* The player's position is sent as the change since the last frame.
+* Tiles are addressed by tile index (col, row), like TileStore. They're sorted, and each one is
+  sent as the change from the one before it (starting from the player's tile), which is almost
+  always 0 or 1. So a new column of tiles costs 3 bytes a tile.
+* Enemies are diffed against what was last sent, by their index in the EnemyPool. A spawned
+  enemy is sent in full, relative to the player, a moving one as how far it moved, and a dead one
+  as just its index.
+
+Numbers are varints (7 bits per byte), and signed ones are zigzag encoded first, so small values
+of either sign take a single byte.
+
+The stream starts with a header that has the tile size. A spectator that connects to a socket in
+the middle of a session needs to know everything that's already on the screen, so it gets a
+keyframe first: a frame with the RESET flag that adds every tile and enemy. WorldView also calls
+reset when it's created (e.g. after a battle), since it starts over with no tiles.
+
+The target of a SpectatorStream is either a file, or "unix:path" or "host:port" for a socket
+that the game listens on (see world_protocol.parse_address).
+
+"""
+
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from pw32n import geography, tiles
+from pw32n.enemy_pool import EnemyPool
+from pw32n.world_protocol import format_address, parse_address
+
+MAGIC = b"PW32NSPC"
+
+# Flags.
+PLAYER_MOVED = 1
+TILES_ADDED = 2
+TILES_REMOVED = 4
+ENEMIES = 8
+RESET = 16
+
+TileKey = tuple[int, int]
+IntArray = npt.NDArray[np.int64]
+
+_NO_INDICES: IntArray = np.zeros(0, np.int64)
+
+
+def _put_uint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _put_int(out: bytearray, value: int) -> None:
+    _put_uint(out, value << 1 if value >= 0 else (~value << 1) | 1)
+
+
+def _zigzag(values: IntArray) -> IntArray:
+    """Vectorized zigzag encoding, the same as _put_int uses."""
+    return (values << 1) ^ (values >> 63)
+
+
+def _put_rows(out: bytearray, indices: IntArray, rows: IntArray = None) -> None:
+    """Append how many indices there are, then each index (as the difference from the one
+    before it) followed by its row of uints, if any.
+
+    In the usual case, every value fits in a byte, and this is a few NumPy calls instead of a
+    Python loop.
+
+    """
+    count = len(indices)
+    _put_uint(out, count)
+    if not count:
+        return
+    table = np.empty((count, 1 if rows is None else 1 + rows.shape[1]), np.int64)
+    table[0, 0] = indices[0]
+    table[1:, 0] = indices[1:] - indices[:-1]
+    if rows is not None:
+        table[:, 1:] = rows
+    if table.max() < 0x80:
+        out += table.astype(np.uint8).tobytes()
+        return
+    for value in table.ravel().tolist():
+        _put_uint(out, value)
+
+
+class _Reader:
+    def __init__(self, data: Union[bytes, bytearray], offset: int = 0) -> None:
+        self.data = data
+        self.offset = offset
+
+    def uint(self) -> int:
+        data = self.data
+        result = 0
+        shift = 0
+        while True:
+            byte = data[self.offset]
+            self.offset += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def sint(self) -> int:
+        value = self.uint()
+        return value >> 1 if not value & 1 else ~(value >> 1)
+
+    def byte(self) -> int:
+        self.offset += 1
+        return self.data[self.offset - 1]
+
+
+def header(geo: geography.Geography[tiles.Tile]) -> bytes:
+    out = bytearray(MAGIC)
+    _put_uint(out, geo.tile_width)
+    _put_uint(out, geo.tile_height)
+    return bytes(out)
+
+
+class SpectatorEncoder:
+
+    """Turn frames into bytes.
+
+    This remembers what it has sent (which is what the spectators know), both to send just the
+    changes and to write keyframes.
+
+    """
+
+    def __init__(self, geo: geography.Geography[tiles.Tile]) -> None:
+        self.geo = geo
+        self.position = geography.OriginPoint(0, 0)
+        self.tiles: dict[TileKey, int] = {}
+        self.is_reset = False
+
+        # This frame's TilePointDiff, as tile indexes.
+        self.tiles_added: dict[TileKey, int] = {}
+        self.tiles_removed: set[TileKey] = set()
+
+        # What we last sent about each slot in the EnemyPool.
+        self.enemy_alive = np.zeros(0, np.bool_)
+        self.enemy_generation = np.zeros(0, np.int64)
+        self.enemy_sprite_image_ids = np.zeros(0, np.int64)
+        self.enemy_positions = np.zeros((2, 0), np.int64)  # x and y
+
+        # The rounding error in the delta_times we've sent so far.
+        self.time_error = 0.0
+
+    def tile_key(self, tile_point: geography.OriginPoint) -> TileKey:
+        return tile_point.x // self.geo.tile_width, tile_point.y // self.geo.tile_height
+
+    def tile_added(self, tile_point: geography.OriginPoint, tile_id: int) -> None:
+        key = self.tile_key(tile_point)
+        self.tiles_removed.discard(key)
+        self.tiles_added[key] = tile_id
+
+    def tile_removed(self, tile_point: geography.OriginPoint) -> None:
+        key = self.tile_key(tile_point)
+        self.tiles_added.pop(key, None)
+        if key in self.tiles:
+            self.tiles_removed.add(key)
+
+    def reset(self) -> None:
+        """Forget every tile. The spectators will too."""
+        self.tiles.clear()
+        self.tiles_added.clear()
+        self.tiles_removed.clear()
+        self.is_reset = True
+
+    def end_frame(
+        self, delta_time: float, position: geography.OriginPoint, pool: EnemyPool
+    ) -> bytes:
+        """Return the encoded frame."""
+        out = bytearray()
+        flags = 0
+        if self.is_reset:
+            flags |= RESET
+            self.is_reset = False
+        delta_time += self.time_error
+        milliseconds = max(round(delta_time * 1000), 0)
+        self.time_error = delta_time - milliseconds / 1000
+        _put_uint(out, milliseconds)
+
+        if position != self.position:
+            flags |= PLAYER_MOVED
+            _put_int(out, position.x - self.position.x)
+            _put_int(out, position.y - self.position.y)
+            self.position = position
+        center = self.tile_key(position)
+
+        # Tiles that are already on the spectators' screens don't have to be sent again.
+        tiles = self.tiles
+        added = [
+            (key, tile_id)
+            for key, tile_id in self.tiles_added.items()
+            if tiles.get(key) != tile_id
+        ]
+        if added:
+            flags |= TILES_ADDED
+            added.sort()
+            _put_uint(out, len(added))
+            col, row = center
+            for (new_col, new_row), tile_id in added:
+                _put_int(out, new_col - col)
+                _put_int(out, new_row - row)
+                out.append(tile_id)
+                col = new_col
+                row = new_row
+                tiles[new_col, new_row] = tile_id
+            self.tiles_added.clear()
+        elif self.tiles_added:
+            self.tiles_added.clear()
+
+        if self.tiles_removed:
+            flags |= TILES_REMOVED
+            removed = sorted(self.tiles_removed)
+            _put_uint(out, len(removed))
+            col, row = center
+            for new_col, new_row in removed:
+                _put_int(out, new_col - col)
+                _put_int(out, new_row - row)
+                col = new_col
+                row = new_row
+                del tiles[new_col, new_row]
+            self.tiles_removed.clear()
+
+        if self.encode_enemies(out, pool):
+            flags |= ENEMIES
+
+        frame = bytearray()
+        _put_uint(frame, len(out) + 1)
+        frame.append(flags)
+        return bytes(frame + out)
+
+    def encode_enemies(self, out: bytearray, pool: EnemyPool) -> bool:
+        """Append the enemies that spawned, died or moved. Return False if there weren't any."""
+        capacity = pool.capacity
+        if len(self.enemy_alive) < capacity:
+            grow = capacity - len(self.enemy_alive)
+            self.enemy_alive = np.concatenate(
+                (self.enemy_alive, np.zeros(grow, np.bool_))
+            )
+            self.enemy_generation = np.concatenate(
+                (self.enemy_generation, np.zeros(grow, np.int64))
+            )
+            self.enemy_sprite_image_ids = np.concatenate(
+                (self.enemy_sprite_image_ids, np.zeros(grow, np.int64))
+            )
+            self.enemy_positions = np.concatenate(
+                (self.enemy_positions, np.zeros((2, grow), np.int64)), axis=1
+            )
+
+        alive = pool.alive
+        was_alive = self.enemy_alive[:capacity]
+        generation = self.enemy_generation[:capacity]
+        last_positions = self.enemy_positions[:, :capacity]
+
+        # If an enemy died and another one spawned in its slot, it's a death and a spawn.
+        replaced = (alive != was_alive) | (pool.generation != generation)
+        if replaced.any():
+            died = np.flatnonzero(was_alive & replaced)
+            spawned = np.flatnonzero(alive & replaced)
+            was_alive[:] = alive
+            generation[:] = pool.generation
+            self.enemy_sprite_image_ids[spawned] = pool.sprite_image_id[spawned]
+        elif not len(pool):
+            return False
+        else:
+            died = spawned = _NO_INDICES
+
+        positions = np.rint(np.stack((pool.x, pool.y))).astype(np.int64)
+        deltas = positions - last_positions
+        moved = np.flatnonzero(alive & ~replaced & deltas.any(axis=0))
+        if not len(died) and not len(spawned) and not len(moved):
+            return False
+        last_positions[:] = positions
+
+        _put_rows(out, died)
+        if len(spawned):
+            spawned_rows = np.empty((len(spawned), 3), np.int64)
+            spawned_rows[:, :2] = _zigzag(positions[:, spawned].T - self.position)
+            spawned_rows[:, 2] = self.enemy_sprite_image_ids[spawned]
+            _put_rows(out, spawned, spawned_rows)
+        else:
+            _put_uint(out, 0)
+        _put_rows(out, moved, _zigzag(deltas[:, moved].T))
+        return True
+
+    def keyframe(self) -> bytes:
+        """Return a frame that brings a new spectator up to date with what's been sent so far.
+
+        It doesn't change what the encoder remembers, so the next end_frame carries on from
+        here for every spectator.
+
+        """
+        out = bytearray()
+        _put_uint(out, 0)
+        _put_int(out, self.position.x)
+        _put_int(out, self.position.y)
+        flags = RESET | PLAYER_MOVED
+        if self.tiles:
+            flags |= TILES_ADDED
+            _put_uint(out, len(self.tiles))
+            col, row = self.tile_key(self.position)
+            for (new_col, new_row), tile_id in sorted(self.tiles.items()):
+                _put_int(out, new_col - col)
+                _put_int(out, new_row - row)
+                out.append(tile_id)
+                col = new_col
+                row = new_row
+        alive = np.flatnonzero(self.enemy_alive)
+        if len(alive):
+            flags |= ENEMIES
+            _put_uint(out, 0)
+            _put_uint(out, len(alive))
+            previous = 0
+            for index in alive.tolist():
+                _put_uint(out, index - previous)
+                x, y = self.enemy_positions[:, index].tolist()
+                _put_int(out, x - self.position.x)
+                _put_int(out, y - self.position.y)
+                _put_uint(out, int(self.enemy_sprite_image_ids[index]))
+                previous = index
+            _put_uint(out, 0)
+        frame = bytearray()
+        _put_uint(frame, len(out) + 1)
+        frame.append(flags)
+        return bytes(frame + out)
+
+
+class SpectatorEnemy(NamedTuple):
+    x: int
+    y: int
+    sprite_image_id: int
+
+
+class SpectatorFrame(NamedTuple):
+
+    """What SpectatorDecoder returns for each frame. The state itself is in the decoder."""
+
+    delta_time: float
+    position: geography.OriginPoint
+    reset: bool
+    tiles_added: list[tuple[int, int, int]]  # col, row, tile_id
+    tiles_removed: list[TileKey]
+    enemies_spawned: list[int]
+    enemies_moved: list[int]
+    enemies_died: list[int]
+
+
+class SpectatorDecoder:
+    def __init__(self) -> None:
+        # Everything before offset has been decoded.
+        self.buffer = bytearray()
+        self.offset = 0
+        self.tile_width = 0
+        self.tile_height = 0
+        self.position = geography.OriginPoint(0, 0)
+        self.tiles: dict[TileKey, int] = {}
+        self.enemies: dict[int, SpectatorEnemy] = {}
+
+    def feed(self, data: bytes) -> list[SpectatorFrame]:
+        """Add data and return every frame that's now complete."""
+        self.add(data)
+        frames: list[SpectatorFrame] = []
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return frames
+            frames.append(frame)
+
+    def add(self, data: bytes) -> None:
+        buffer = self.buffer
+        if self.offset:
+            del buffer[: self.offset]
+            self.offset = 0
+        buffer += data
+
+    def next_frame(self) -> Optional[SpectatorFrame]:
+        """Decode the next frame if it's complete. This is for playing frames back one by one."""
+        if not self.tile_width and not self.read_header():
+            return None
+        reader = _Reader(self.buffer, self.offset)
+        try:
+            length = reader.uint()
+        except IndexError:
+            return None
+        if len(self.buffer) - reader.offset < length:
+            return None
+        frame = self.decode(reader)
+        self.offset = reader.offset
+        return frame
+
+    def read_header(self) -> bool:
+        buffer = self.buffer
+        if len(buffer) < len(MAGIC):
+            return False
+        if not buffer.startswith(MAGIC):
+            raise ValueError("This isn't a spectator stream")
+        reader = _Reader(buffer, len(MAGIC))
+        try:
+            tile_width = reader.uint()
+            tile_height = reader.uint()
+        except IndexError:
+            return False
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.offset = reader.offset
+        return True
+
+    def decode(self, reader: _Reader) -> SpectatorFrame:
+        flags = reader.byte()
+        delta_time = reader.uint() / 1000
+        is_reset = bool(flags & RESET)
+        if is_reset:
+            self.tiles.clear()
+        if flags & PLAYER_MOVED:
+            self.position = geography.OriginPoint(
+                self.position.x + reader.sint(), self.position.y + reader.sint()
+            )
+        center_col = self.position.x // self.tile_width
+        center_row = self.position.y // self.tile_height
+
+        tiles_added = []
+        if flags & TILES_ADDED:
+            col, row = center_col, center_row
+            for _ in range(reader.uint()):
+                col += reader.sint()
+                row += reader.sint()
+                tile_id = reader.byte()
+                self.tiles[col, row] = tile_id
+                tiles_added.append((col, row, tile_id))
+
+        tiles_removed = []
+        if flags & TILES_REMOVED:
+            col, row = center_col, center_row
+            for _ in range(reader.uint()):
+                col += reader.sint()
+                row += reader.sint()
+                self.tiles.pop((col, row), None)
+                tiles_removed.append((col, row))
+
+        enemies_died = []
+        enemies_spawned = []
+        enemies_moved = []
+        if flags & ENEMIES:
+            index = 0
+            for _ in range(reader.uint()):
+                index += reader.uint()
+                self.enemies.pop(index, None)
+                enemies_died.append(index)
+            index = 0
+            for _ in range(reader.uint()):
+                index += reader.uint()
+                self.enemies[index] = SpectatorEnemy(
+                    self.position.x + reader.sint(),
+                    self.position.y + reader.sint(),
+                    reader.uint(),
+                )
+                enemies_spawned.append(index)
+            index = 0
+            for _ in range(reader.uint()):
+                index += reader.uint()
+                enemy = self.enemies[index]
+                self.enemies[index] = enemy._replace(
+                    x=enemy.x + reader.sint(), y=enemy.y + reader.sint()
+                )
+                enemies_moved.append(index)
+
+        return SpectatorFrame(
+            delta_time=delta_time,
+            position=self.position,
+            reset=is_reset,
+            tiles_added=tiles_added,
+            tiles_removed=tiles_removed,
+            enemies_spawned=enemies_spawned,
+            enemies_moved=enemies_moved,
+            enemies_died=enemies_died,
+        )
+
+
+def _is_address(target: str) -> bool:
+    try:
+        parse_address(target)
+    except ValueError:
+        return False
+    return True
+
+
+class _Spectator:
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.pending = bytearray()
+
+
+class SpectatorStream:
+
+    """Publish frames to a file or a socket without doing any I/O on the frame loop.
+
+    Like EventLog, the frame loop only appends to a deque, and a background thread does the
+    writing. Spectators that can't keep up are dropped rather than buffered forever.
+
+    """
+
+    # How often the writer wakes up to drain the buffer.
+    FLUSH_PERIOD = 0.05
+
+    # A spectator that falls this far behind is disconnected.
+    MAX_BACKLOG = 1024 * 1024
+
+    def __init__(self, target: str, geo: geography.Geography[tiles.Tile]) -> None:
+        self.target = target
+        self.encoder = SpectatorEncoder(geo)
+        self.header = header(geo)
+
+        # Only the frame loop appends, and only the writer pops. The bool is True for keyframes.
+        self.buffer: deque[tuple[bool, bytes]] = deque()
+
+        # The writer sets this when someone new connects, and the frame loop clears it.
+        self.keyframe_wanted = False
+
+        self.frames = 0
+        self.bytes_encoded = 0
+        self.encode_seconds = 0.0
+        self.stream_seconds = 0.0
+        self.spectators_connected = 0
+        self.spectators_dropped = 0
+
+        self.file = None
+        self.listener: Optional[socket.socket] = None
+        self.address = ""
+        if _is_address(target):
+            self.listener = self._listen(target)
+        else:
+            self.file = open(target, "wb")
+            self.file.write(self.header)
+        self._waiting: list[_Spectator] = []
+        self._spectators: list[_Spectator] = []
+
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="Spectator stream writer", daemon=True
+        )
+        self._thread.start()
+
+    def _listen(self, target: str) -> socket.socket:
+        address = parse_address(target)
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(address)
+        listener.listen()
+        listener.setblocking(False)
+        self.address = format_address(listener.getsockname())
+        return listener
+
+    # These are called on the frame loop.
+
+    def tile_added(self, tile_point: geography.OriginPoint, tile_id: int) -> None:
+        self.encoder.tile_added(tile_point, tile_id)
+
+    def tile_removed(self, tile_point: geography.OriginPoint) -> None:
+        self.encoder.tile_removed(tile_point)
+
+    def reset(self) -> None:
+        self.encoder.reset()
+
+    def end_frame(
+        self, delta_time: float, position: geography.OriginPoint, pool: EnemyPool
+    ) -> None:
+        started_at = time.perf_counter()
+        data = self.encoder.end_frame(delta_time, position, pool)
+        self.buffer.append((False, data))
+        if self.keyframe_wanted:
+            self.keyframe_wanted = False
+            self.buffer.append((True, self.encoder.keyframe()))
+        self.encode_seconds += time.perf_counter() - started_at
+        self.frames += 1
+        self.bytes_encoded += len(data)
+        self.stream_seconds += delta_time
+
+    # The rest runs on the writer thread, except for close.
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.FLUSH_PERIOD):
+            if self.listener is not None:
+                self._accept()
+            self._drain()
+            self._send()
+        self._drain()
+        self._send()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except (BlockingIOError, OSError):
+                return
+            sock.setblocking(False)
+            self._waiting.append(_Spectator(sock))
+            self.spectators_connected += 1
+            self.keyframe_wanted = True
+
+    def _drain(self) -> None:
+        buffer = self.buffer
+        while buffer:
+            is_keyframe, data = buffer.popleft()
+            if is_keyframe:
+                for spectator in self._waiting:
+                    spectator.pending += self.header
+                    spectator.pending += data
+                self._spectators += self._waiting
+                self._waiting = []
+                continue
+            if self.file is not None:
+                self.file.write(data)
+            for spectator in self._spectators:
+                spectator.pending += data
+
+    def _send(self) -> None:
+        if self.file is not None:
+            self.file.flush()
+        dropped = []
+        for spectator in self._spectators:
+            if not spectator.pending:
+                continue
+            try:
+                sent = spectator.sock.send(spectator.pending)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                dropped.append(spectator)
+                continue
+            del spectator.pending[:sent]
+            if len(spectator.pending) > self.MAX_BACKLOG:
+                dropped.append(spectator)
+        for spectator in dropped:
+            spectator.sock.close()
+            self._spectators.remove(spectator)
+            self.spectators_dropped += 1
+
+    def close(self) -> None:
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._thread.join()
+        if self.file is not None:
+            self.file.close()
+        for spectator in self._spectators + self._waiting:
+            spectator.sock.close()
+        if self.listener is not None:
+            self.listener.close()
+
+    def report(self) -> str:
+        frames = max(self.frames, 1)
+        seconds = max(self.stream_seconds, 1e-9)
+        return (
+            f"Spectator stream: {self.frames} frames ({self.bytes_encoded} bytes) to "
+            f"{self.address or self.target}, "
+            f"{self.encode_seconds / frames * 1e6:.1f} us and "
+            f"{self.bytes_encoded / frames:.1f} bytes per frame, "
+            f"{self.bytes_encoded / seconds:.0f} bytes/sec, "
+            f"{self.spectators_connected} spectators ({self.spectators_dropped} dropped)"
+        )
+
+
+class SpectatorSource:
+
+    """Read a spectator stream from a file (following it as it grows) or a socket.
+
+    A background thread does the reading, so read never blocks.
+
+    """
+
+    # How long to wait before looking for more of a file.
+    POLL_PERIOD = 0.05
+
+    def __init__(self, target: str) -> None:
+        self.target = target
+        self.chunks: deque[bytes] = deque()
+        self.is_closed = False
+        self.sock: Optional[socket.socket] = None
+        if _is_address(target):
+            address = parse_address(target)
+            family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+            self.sock = socket.socket(family, socket.SOCK_STREAM)
+            self.sock.connect(address)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="Spectator stream reader", daemon=True
+        )
+        self._thread.start()
+
+    def read(self) -> bytes:
+        """Return whatever has arrived since the last call."""
+        chunks = self.chunks
+        parts = []
+        while chunks:
+            parts.append(chunks.popleft())
+        return b"".join(parts)
+
+    def _run(self) -> None:
+        if self.sock is not None:
+            while not self._stopping.is_set():
+                try:
+                    data = self.sock.recv(65536)
+                except OSError:
+                    break
+                if not data:
+                    break
+                self.chunks.append(data)
+            self.is_closed = True
+            return
+        with open(self.target, "rb") as f:
+            while not self._stopping.is_set():
+                data = f.read(65536)
+                if data:
+                    self.chunks.append(data)
+                else:
+                    self._stopping.wait(self.POLL_PERIOD)
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # The game already hung up.
+            self.sock.close()
+        self._thread.join()
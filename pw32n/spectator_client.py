@@ -0,0 +1,144 @@
+"""Watch a game that's streaming to spectators (see spectator).
+
+This knows nothing about the world except what's in the stream: it doesn't generate tiles or
+simulate enemies, it just puts sprites where the frames say they are. Frames are played back at
+the speed they were recorded, so a file plays like a replay, and a socket plays a little behind
+the game. Start the game with --spectate, then:
+
+    python -m pw32n.spectator_client unix:/tmp/pw32n.sock
+    python -m pw32n.spectator_client recording.spc
+
+"""
+
+import argparse
+from typing import Optional
+
+import arcade
+from pyglet.math import Vec2  # type: ignore
+
+from pw32n import enemy_pool, sprite_images, tiles
+from pw32n.spectator import SpectatorDecoder, SpectatorFrame, SpectatorSource
+
+SCREEN_TITLE = "Lil Miss Vampire (spectating)"
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+
+class SpectatorWindow(arcade.Window):
+    BACKGROUND_COLOR = (57, 194, 114)
+
+    def __init__(self, source: SpectatorSource) -> None:
+        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, resizable=True)
+        self.source = source
+        self.decoder = SpectatorDecoder()
+
+        # How far playback is ahead of the frames we've applied. When it's positive, it's time
+        # for the next frame.
+        self.clock = 0.0
+
+        # Tiles are keyed by tile index, and enemies by their index in the game's EnemyPool.
+        self.tile_sprites: dict[tuple[int, int], arcade.Sprite] = {}
+        self.enemy_sprites: dict[int, arcade.Sprite] = {}
+        self.tile_sprite_list = arcade.SpriteList()
+        self.enemy_sprite_list = arcade.SpriteList()
+        self.player_list = arcade.SpriteList()
+        self.player_sprite: Optional[arcade.Sprite] = None
+        self.camera = arcade.Camera(self.width, self.height)
+        arcade.set_background_color(self.BACKGROUND_COLOR)
+
+    def on_resize(self, width: float, height: float) -> None:
+        super().on_resize(width, height)
+        self.camera.resize(int(width), int(height))
+
+    def on_update(self, delta_time: float) -> None:
+        decoder = self.decoder
+        decoder.add(self.source.read())
+        self.clock += delta_time
+        while self.clock > 0:
+            frame = decoder.next_frame()
+            if frame is None:
+                # We're caught up. Don't save up the time we spent waiting.
+                self.clock = 0.0
+                break
+            self.apply(frame)
+            self.clock -= frame.delta_time
+        if self.player_sprite is not None:
+            position = decoder.position
+            self.player_sprite.center_x = position.x
+            self.player_sprite.center_y = position.y
+            self.camera.move_to(
+                Vec2(position.x - self.width / 2, position.y - self.height / 2)
+            )
+
+    def apply(self, frame: SpectatorFrame) -> None:
+        decoder = self.decoder
+        tile_width = decoder.tile_width
+        tile_height = decoder.tile_height
+        if self.player_sprite is None:
+            self.player_sprite = self.create_sprite(sprite_images.PLAYER_IMAGE)
+            self.player_list.append(self.player_sprite)
+        if frame.reset:
+            self.tile_sprites.clear()
+            self.tile_sprite_list.clear()
+        for key in frame.tiles_removed:
+            sprite = self.tile_sprites.pop(key, None)
+            if sprite is not None:
+                sprite.kill()  # type: ignore
+        for col, row, tile_id in frame.tiles_added:
+            old_sprite = self.tile_sprites.pop((col, row), None)
+            if old_sprite is not None:
+                old_sprite.kill()  # type: ignore
+            sprite = self.create_sprite(tiles.TILES_BY_ID[tile_id].sprite_image)
+            sprite.left = col * tile_width
+            sprite.top = row * tile_height
+            self.tile_sprites[col, row] = sprite
+            self.tile_sprite_list.append(sprite)
+        for index in frame.enemies_died:
+            sprite = self.enemy_sprites.pop(index, None)
+            if sprite is not None:
+                sprite.kill()  # type: ignore
+        for index in frame.enemies_spawned:
+            enemy = decoder.enemies[index]
+            sprite = self.create_sprite(enemy_pool.SPRITE_IMAGES[enemy.sprite_image_id])
+            self.enemy_sprites[index] = sprite
+            self.enemy_sprite_list.append(sprite)
+            self.place_enemy_sprite(index)
+        for index in frame.enemies_moved:
+            self.place_enemy_sprite(index)
+
+    def create_sprite(self, sprite_image: sprite_images.SpriteImage) -> arcade.Sprite:
+        return arcade.Sprite(
+            sprite_image.filename,
+            scale=(self.decoder.tile_width / sprite_image.width),
+        )
+
+    def place_enemy_sprite(self, index: int) -> None:
+        enemy = self.decoder.enemies[index]
+        sprite = self.enemy_sprites[index]
+        sprite.left = enemy.x
+        sprite.top = enemy.y
+
+    def on_draw(self) -> None:
+        arcade.start_render()
+        self.camera.use()  # type: ignore
+        self.tile_sprite_list.draw()
+        self.enemy_sprite_list.draw()
+        self.player_list.draw()
+
+    def on_close(self) -> None:
+        self.source.close()
+        super().on_close()
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "target", help="A file the game streamed to, or unix:PATH or HOST:PORT"
+    )
+    args = parser.parse_args(argv)
+    SpectatorWindow(SpectatorSource(args.target))
+    arcade.run()  # type: ignore
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from pw32n import geography, sprite_images, tiles
+from pw32n.enemy_pool import EnemyPool
+from pw32n.headless import HeadlessWorld
+from pw32n.spectator import (
+    RESET,
+    SpectatorDecoder,
+    SpectatorEncoder,
+    SpectatorSource,
+    SpectatorStream,
+    header,
+)
+
+
+class FastSpectatorStream(SpectatorStream):
+    FLUSH_PERIOD = 0.01
+
+
+class Walk:
+
+    """Walk around a HeadlessWorld with some wandering enemies, encoding every frame."""
+
+    def __init__(
+        self,
+        encoder: SpectatorEncoder,
+        world: HeadlessWorld,
+        stream: SpectatorStream = None,
+    ) -> None:
+        self.encoder = encoder
+        self.world = world
+        self.stream = stream
+        self.pool = EnemyPool(capacity=4, seed=0)
+        self.frames: list[bytes] = []
+        self.spawn_enemies(10)
+        for tile_point in world.loaded:
+            encoder.tile_added(tile_point, world.tile_picker.get_tile(tile_point)[0].id)
+        self.frames.append(self.end_frame())
+
+    def spawn_enemies(self, count: int) -> None:
+        position = self.world.geo.position
+        for i in range(count):
+            self.pool.spawn(
+                geography.OriginPoint(position.x + 50 * i, position.y - 30 * i),
+                1.0,
+                sprite_images.ROBOT_IMAGE,
+            )
+
+    def end_frame(self) -> bytes:
+        """Return the frame, or b"" if it went to the stream."""
+        if self.stream is not None:
+            self.stream.end_frame(1 / 60, self.world.geo.position, self.pool)
+            return b""
+        return self.encoder.end_frame(1 / 60, self.world.geo.position, self.pool)
+
+    def step(self, delta_x: int, delta_y: int) -> bytes:
+        diff = self.world.move(delta_x, delta_y)
+        for tile_point in diff.removed:
+            self.encoder.tile_removed(tile_point)
+        for tile_point in diff.added:
+            tile, _ = self.world.tile_picker.get_tile(tile_point)
+            self.encoder.tile_added(tile_point, tile.id)
+        self.pool.update(1 / 60)
+        frame = self.end_frame()
+        self.frames.append(frame)
+        return frame
+
+    def play(self, frames: int) -> None:
+        for i in range(frames):
+            self.step(4 if i % 100 < 70 else 0, 3 if i % 50 < 20 else 0)
+            if i % 40 == 0:
+                self.pool.kill(int(self.pool.alive_indices()[0]))
+                self.spawn_enemies(1)
+
+    def tiles(self) -> dict[tuple[int, int], int]:
+        geo = self.world.geo
+        return {
+            (
+                p.x // geo.tile_width,
+                p.y // geo.tile_height,
+            ): self.world.tile_picker.get_tile(p)[0].id
+            for p in self.world.loaded
+        }
+
+    def enemies(self) -> dict[int, tuple[int, int, int]]:
+        pool = self.pool
+        return {
+            int(index): (
+                round(pool.x[index]),
+                round(pool.y[index]),
+                int(pool.sprite_image_id[index]),
+            )
+            for index in pool.alive_indices()
+        }
+
+
+class SpectatorTestCase(unittest.TestCase):
+    def assert_decoded(self, decoder: SpectatorDecoder, walk: Walk) -> None:
+        self.assertEqual(decoder.position, walk.world.geo.position)
+        self.assertEqual(decoder.tiles, walk.tiles())
+        self.assertEqual(
+            {index: tuple(enemy) for index, enemy in decoder.enemies.items()},
+            walk.enemies(),
+        )
+
+
+def make_geo() -> geography.Geography[tiles.Tile]:
+    geo: geography.Geography[tiles.Tile] = geography.Geography()
+    geo.screen_width = 800
+    geo.screen_height = 600
+    return geo
+
+
+class SpectatorEncoderTestCase(SpectatorTestCase):
+    def setUp(self) -> None:
+        random.seed(0)
+        self.geo = make_geo()
+        self.encoder = SpectatorEncoder(self.geo)
+        self.walk = Walk(self.encoder, HeadlessWorld(self.geo))
+
+    def test_decoder_keeps_up_with_a_walk(self) -> None:
+        self.walk.play(300)
+        decoder = SpectatorDecoder()
+        frames = decoder.feed(header(self.geo) + b"".join(self.walk.frames))
+        self.assertEqual(len(frames), 301)
+        self.assert_decoded(decoder, self.walk)
+        self.assertAlmostEqual(
+            sum(frame.delta_time for frame in frames), 301 / 60, delta=0.001
+        )
+
+    def test_decoder_handles_frames_split_anywhere(self) -> None:
+        self.walk.play(50)
+        data = header(self.geo) + b"".join(self.walk.frames)
+        decoder = SpectatorDecoder()
+        frames = []
+        for i in range(0, len(data), 7):
+            frames += decoder.feed(data[i : i + 7])
+        self.assertEqual(len(frames), 51)
+        self.assert_decoded(decoder, self.walk)
+
+    def test_a_quiet_frame_is_tiny(self) -> None:
+        self.walk.pool = EnemyPool(capacity=4, seed=0)
+        self.walk.step(0, 0)
+        self.assertEqual(len(self.walk.step(0, 0)), 3)
+
+    def test_keyframe_catches_up_a_new_spectator(self) -> None:
+        self.walk.play(100)
+        decoder = SpectatorDecoder()
+        decoder.feed(header(self.geo) + self.encoder.keyframe())
+        self.walk.play(100)
+        frames = decoder.feed(b"".join(self.walk.frames[-100:]))
+        self.assertEqual(len(frames), 100)
+        self.assert_decoded(decoder, self.walk)
+
+    def test_reset_clears_the_tiles(self) -> None:
+        self.encoder.reset()
+        frame = self.walk.step(0, 0)
+        self.assertTrue(frame[1] & RESET)
+        decoder = SpectatorDecoder()
+        decoder.feed(header(self.geo) + frame)
+        self.assertEqual(decoder.tiles, {})
+
+
+class SpectatorStreamTestCase(SpectatorTestCase):
+    def setUp(self) -> None:
+        random.seed(0)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.geo = make_geo()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def read_until(
+        self, source: SpectatorSource, decoder: SpectatorDecoder, frames: int
+    ) -> None:
+        count = 0
+        deadline = time.monotonic() + 5.0
+        while count < frames and time.monotonic() < deadline:
+            count += len(decoder.feed(source.read()))
+            time.sleep(0.01)
+        self.assertEqual(count, frames)
+
+    def test_writes_to_a_file(self) -> None:
+        path = os.path.join(self.tmp_dir.name, "stream")
+        stream = FastSpectatorStream(path, self.geo)
+        walk = Walk(stream.encoder, HeadlessWorld(self.geo), stream)
+        walk.play(50)
+        stream.close()
+        self.assertIn("51 frames", stream.report())
+
+        source = SpectatorSource(path)
+        decoder = SpectatorDecoder()
+        self.read_until(source, decoder, 51)
+        source.close()
+        self.assert_decoded(decoder, walk)
+
+    def test_serves_spectators_on_a_socket(self) -> None:
+        stream = FastSpectatorStream(
+            f"unix:{os.path.join(self.tmp_dir.name, 'spectate.sock')}", self.geo
+        )
+        walk = Walk(stream.encoder, HeadlessWorld(self.geo), stream)
+        walk.play(20)
+        source = SpectatorSource(stream.address)
+        deadline = time.monotonic() + 5.0
+        while not stream.keyframe_wanted and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # The spectator joins in the middle, so it starts from a keyframe, which comes after
+        # the next frame.
+        decoder = SpectatorDecoder()
+        walk.play(20)
+        self.read_until(source, decoder, 20)
+        self.assert_decoded(decoder, walk)
+        source.close()
+        stream.close()
+        self.assertIn("1 spectators", stream.report())
+
+
+if __name__ == "__main__":
+    unittest.main()
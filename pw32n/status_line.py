@@ -0,0 +1,33 @@
+"""Turn the values shown in the status bar into text, but only when they change.
+
+Formatting the status every frame is a waste, and so is laying out the text again. Hence, the
+views hand StatusLine the values they want to show (rounded to what's actually displayed), and it
+only calls format when they're different from last time. See hud.StatusBar for the drawing side.
+
+"""
+
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class StatusLine(Generic[T]):
+    def __init__(self, format: Callable[[T], str]) -> None:
+        self.format = format
+        self.values: Optional[T] = None
+        self.text = ""
+
+        # How many times the text was rebuilt. This is handy for tests and the profiler.
+        self.rebuilds = 0
+
+    def update(self, values: T) -> bool:
+        """Returns True if the text changed."""
+        if self.rebuilds and values == self.values:
+            return False
+        self.values = values
+        text = self.format(values)
+        self.rebuilds += 1
+        if text == self.text:
+            return False
+        self.text = text
+        return True
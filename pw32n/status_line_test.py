@@ -0,0 +1,24 @@
+import unittest
+
+from pw32n.status_line import StatusLine
+
+
+class StatusLineTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.status_line: StatusLine[tuple[int, float]] = StatusLine(
+            lambda values: f"Pos: {values[0]} Strength: {values[1]:.0f}"
+        )
+
+    def test_only_formats_when_the_values_change(self) -> None:
+        self.assertTrue(self.status_line.update((1, 2.0)))
+        self.assertEqual(self.status_line.text, "Pos: 1 Strength: 2")
+        self.assertFalse(self.status_line.update((1, 2.0)))
+        self.assertEqual(self.status_line.rebuilds, 1)
+        self.assertTrue(self.status_line.update((2, 2.0)))
+        self.assertEqual(self.status_line.text, "Pos: 2 Strength: 2")
+        self.assertEqual(self.status_line.rebuilds, 2)
+
+    def test_same_text_is_not_a_change(self) -> None:
+        self.status_line.update((1, 2.0))
+        self.assertFalse(self.status_line.update((1, 2.1)))
+        self.assertEqual(self.status_line.rebuilds, 2)
@@ -0,0 +1,72 @@
+"""Pack a tile's (col, row) into a single int.
+
+Geography.tile_map can hold a million tiles, and WorldView.sprite_map has one entry per tile on
+the screen. Keying them by OriginPoint costs a NamedTuple plus two ints per entry, which is about
+a hundred bytes more than a single small int. So instead, we key them by pack(col, row), and
+OriginPoint stays the API at the boundaries (see geography.TileMap).
+
+The world goes on forever in every direction, so first each coordinate is zigzag encoded
+(0, -1, 1, -2, 2, ... become 0, 1, 2, 3, 4, ...) to make it non-negative. Then their bits are
+interleaved (a Morton code, aka Z-order), col in the even bits and row in the odd ones. Tiles
+near the origin get small keys that fit in a machine word, and tiles that are near each other
+get nearby keys. In particular, zigzag encoding maps each 16 tile chunk of a coordinate (see
+tile_store) to a 32 value block, so all the tiles in a TileStore chunk share key >> 10 (along
+with the chunks mirrored across the axes, which differ in the lowest bits).
+
+"""
+
+
+def _spread_byte(value: int) -> int:
+    result = 0
+    for bit in range(8):
+        result |= ((value >> bit) & 1) << (2 * bit)
+    return result
+
+
+_SPREAD_BYTE = [_spread_byte(b) for b in range(256)]
+
+# _SPREAD[v] is the 16 bit value v with a 0 bit inserted above each of its bits. That covers
+# coordinates within 32,768 tiles of the origin with a single lookup each.
+_SPREAD = [_SPREAD_BYTE[v & 0xFF] | _SPREAD_BYTE[v >> 8] << 16 for v in range(0x10000)]
+
+# _EVEN[b] is the even bits of b squeezed together, which undoes _SPREAD.
+_EVEN = [sum(((b >> (2 * bit)) & 1) << bit for bit in range(4)) for b in range(256)]
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else ~(value >> 1)
+
+
+def _spread(value: int) -> int:
+    result = 0
+    shift = 0
+    while value:
+        result |= _SPREAD[value & 0xFFFF] << shift
+        value >>= 16
+        shift += 32
+    return result
+
+
+def pack(col: int, row: int) -> int:
+    """Return the key for the tile at (col, row)."""
+    # This is called for every tile_map lookup, so it inlines the zigzag encoding and the
+    # common case.
+    x = col << 1 if col >= 0 else (~col << 1) | 1
+    y = row << 1 if row >= 0 else (~row << 1) | 1
+    if x < 0x10000 and y < 0x10000:
+        return _SPREAD[x] | _SPREAD[y] << 1
+    return _spread(x) | _spread(y) << 1
+
+
+def unpack(key: int) -> tuple[int, int]:
+    """Return the (col, row) of the tile with this key."""
+    x = 0
+    y = 0
+    shift = 0
+    while key:
+        byte = key & 0xFF
+        x |= _EVEN[byte] << shift
+        y |= _EVEN[byte >> 1] << shift
+        key >>= 8
+        shift += 4
+    return _unzigzag(x), _unzigzag(y)
@@ -0,0 +1,41 @@
+import random
+import unittest
+
+from pw32n.tile_keys import pack, unpack
+
+
+class TileKeysTestCase(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        random.seed(0)
+        coordinates = [(col, row) for col in range(-40, 40) for row in range(-40, 40)]
+        coordinates += [
+            (
+                random.randrange(-(10 ** 12), 10 ** 12),
+                random.randrange(-(10 ** 6), 10 ** 6),
+            )
+            for _ in range(1000)
+        ]
+        keys = set()
+        for col, row in coordinates:
+            key = pack(col, row)
+            self.assertEqual(unpack(key), (col, row))
+            keys.add(key)
+        self.assertEqual(len(keys), len(coordinates))
+
+    def test_morton_order(self) -> None:
+        self.assertEqual(
+            [pack(col, row) for col, row in ((0, 0), (1, 0), (0, 1), (1, 1))],
+            [0, 4, 8, 12],
+        )
+        self.assertEqual(pack(-1, 0), 1)
+        self.assertEqual(pack(0, -1), 2)
+
+    def test_chunks_share_high_bits(self) -> None:
+        for col, row in ((0, 0), (16, 32), (-16, -48)):
+            blocks = {
+                pack(col + i, row + j) >> 10 for i in range(16) for j in range(16)
+            }
+            self.assertEqual(len(blocks), 1)
+
+    def test_keys_near_the_origin_are_small(self) -> None:
+        self.assertLess(pack(-16384, 16383), 2 ** 30)
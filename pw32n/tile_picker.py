@@ -0,0 +1,187 @@
+"""This decides which tile goes where as the world gets generated.
+
+It only needs a Geography, not a window, so it can be used headlessly (e.g. by benchmarks).
+
+Left to itself, the tile picker would sometimes wall the player in with crates. To keep that
+from happening, it keeps track of the walkable regions (see walkable_regions) and never lets one
+get sealed off from the tiles that haven't been generated yet. Usually that just means putting
+grass where a crate would have closed the last gap. Once in a while, a region is already
+surrounded by generated tiles, and we have to carve a path through some existing crates.
+
+"""
+
+import collections
+import random
+
+from pw32n import geography, tiles
+from pw32n.tile_store import TileStore
+from pw32n.walkable_regions import WalkableRegions
+
+
+class TilePicker:
+    # How many tiles carve_out may look at before giving up.
+    MAX_CARVE_SEARCH = 4096
+
+    def __init__(
+        self, geo: geography.Geography[tiles.Tile], tile_store: TileStore = None
+    ) -> None:
+        """If there's a tile_store, new tiles are recorded there too."""
+        self.geo = geo
+        self.tile_store = tile_store
+        self.regions = WalkableRegions(geo)
+
+        # The player starts out standing on these, so they'd better be walkable.
+        self.clearing = self.points_under(geo.initial_position)
+
+        # Tiles that were already generated but had their crate carved away. Whoever shows the
+        # tiles should redraw these and then clear the list.
+        self.carved: list[geography.OriginPoint] = []
+
+        # These are for metrics. A reused tile is a hit in geo.tile_map.
+        self.tiles_generated = 0
+        self.tiles_reused = 0
+        self.crates_avoided = 0
+        self.tiles_carved = 0
+
+    def get_tile(self, tile_point: geography.OriginPoint) -> tuple[tiles.Tile, bool]:
+        """Return the tile at tile_point, picking a new one if necessary.
+
+        The second value is True if the tile is new.
+
+        """
+        tile: tiles.Tile = self.geo.tile_map.get(tile_point)
+        if tile is not None:
+            self.tiles_reused += 1
+            return tile, False
+        tile = self.pick_new_tile(tile_point)
+        if not tile.is_walkable and (
+            tile_point in self.clearing or self.regions.would_seal(tile_point)
+        ):
+            tile = tiles.GRASS_TILE
+            self.crates_avoided += 1
+        self.geo.tile_map.put(tile_point, tile)
+        if self.tile_store is not None:
+            self.tile_store.set(tile_point, tile.id)
+        self.regions.on_tile_added(tile_point)
+        if tile.is_walkable and self.regions.is_sealed(tile_point):
+            self.carve_out(tile_point)
+        self.tiles_generated += 1
+        return tile, True
+
+    def on_tile_evicted(
+        self, tile_point: geography.OriginPoint, tile: tiles.Tile
+    ) -> None:
+        """Whoever owns geo.tile_map has to call this when it evicts a tile."""
+        self.regions.on_tile_evicted(tile_point, tile)
+
+    def points_under(
+        self, position: geography.OriginPoint
+    ) -> set[geography.OriginPoint]:
+        """Return the tile points under a tile sized sprite centered at position."""
+        geo = self.geo
+        half_width = geo.tile_width // 2
+        half_height = geo.tile_height // 2
+        return {
+            geo.align_point(geography.OriginPoint(position.x + dx, position.y + dy))
+            for dx in (-half_width, half_width - 1)
+            for dy in (-half_height + 1, half_height)
+        }
+
+    def carve_out(self, tile_point: geography.OriginPoint) -> bool:
+        """Connect tile_point's sealed region to the rest of the world.
+
+        This finds the path that goes through the fewest crates to either an ungenerated tile or
+        a region that isn't sealed, and turns those crates into grass. It returns False if it
+        couldn't find one within MAX_CARVE_SEARCH tiles.
+
+        """
+        geo = self.geo
+        regions = self.regions
+        sealed_root = regions.find(tile_point)
+
+        # This is a 0-1 BFS: stepping onto a walkable or ungenerated tile is free, and stepping
+        # onto a crate costs one crate.
+        crates = {tile_point: 0}
+        came_from = {tile_point: tile_point}
+        queue = collections.deque([tile_point])
+        goal = None
+        while queue and len(crates) <= self.MAX_CARVE_SEARCH:
+            p = queue.popleft()
+            tile = geo.tile_map.peek(p)
+            if tile is None or (tile.is_walkable and regions.find(p) != sealed_root):
+                goal = p
+                break
+            for neighbor in regions.neighbors(p):
+                neighbor_tile = geo.tile_map.peek(neighbor)
+                is_crate = neighbor_tile is not None and not neighbor_tile.is_walkable
+                neighbor_crates = crates[p] + is_crate
+                if neighbor_crates < crates.get(neighbor, neighbor_crates + 1):
+                    crates[neighbor] = neighbor_crates
+                    came_from[neighbor] = p
+                    if is_crate:
+                        queue.append(neighbor)
+                    else:
+                        queue.appendleft(neighbor)
+        if goal is None:
+            return False
+
+        p = goal
+        while p != tile_point:
+            tile = geo.tile_map.peek(p)
+            if tile is not None and not tile.is_walkable:
+                self.carve(p)
+            p = came_from[p]
+        return True
+
+    def carve(self, tile_point: geography.OriginPoint) -> None:
+        """Replace the crate at tile_point with grass."""
+        tile = tiles.GRASS_TILE
+        self.geo.tile_map.put(tile_point, tile)
+        if self.tile_store is not None:
+            self.tile_store.set(tile_point, tile.id)
+        self.regions.on_tile_carved(tile_point)
+        self.carved.append(tile_point)
+        self.tiles_carved += 1
+
+    def pick_new_tile(self, tile_point: geography.OriginPoint) -> tiles.Tile:
+        surrounding_tiles = self.get_surrounding_tiles(tile_point)
+
+        # About 60% of the time, just do the same as one of the neighboring tiles unless there
+        # aren't any. This makes the blocks of tiles "clumpier".
+        if surrounding_tiles and random.randrange(100) < 60:
+            tile = random.choice(surrounding_tiles)
+
+        # Otherwise, there's a 1 in 6 chance of picking a box crate.
+        elif random.randrange(6) == 0:
+            tile = tiles.BOX_CRATE_TILE
+
+        # Otherwise, pick grass.
+        else:
+            tile = tiles.GRASS_TILE
+
+        return tile
+
+    def get_surrounding_tiles(
+        self, tile_point: geography.OriginPoint
+    ) -> list[tiles.Tile]:
+        # This is the same as geo.surrounding_points, but by index so that it doesn't have to
+        # make 8 OriginPoints for every new tile.
+        geo = self.geo
+        col = tile_point.x // geo.tile_width
+        row = tile_point.y // geo.tile_height
+        get = geo.tile_map.get_by_index
+        surrounding_tiles = []
+        for neighbor_col, neighbor_row in (
+            (col - 1, row + 1),
+            (col, row + 1),
+            (col + 1, row + 1),
+            (col - 1, row),
+            (col + 1, row),
+            (col - 1, row - 1),
+            (col, row - 1),
+            (col + 1, row - 1),
+        ):
+            tile = get(neighbor_col, neighbor_row)
+            if tile is not None:
+                surrounding_tiles.append(tile)
+        return surrounding_tiles
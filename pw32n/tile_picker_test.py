@@ -0,0 +1,56 @@
+import random
+import unittest
+
+from pw32n import tiles
+from pw32n.geography import Geography, OriginPoint
+from pw32n.tile_picker import TilePicker
+from pw32n.tile_store import TileStore
+
+
+class TilePickerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(0)
+        self.geo: Geography[tiles.Tile] = Geography()
+        self.tile_picker = TilePicker(self.geo)
+
+    def test_get_tile_picks_and_remembers_new_tiles(self) -> None:
+        p = OriginPoint(0, 0)
+        tile, is_new = self.tile_picker.get_tile(p)
+        self.assertTrue(is_new)
+        self.assertIn(tile, (tiles.GRASS_TILE, tiles.BOX_CRATE_TILE))
+        self.assertEqual(self.geo.tile_map.get(p), tile)
+        self.assertEqual(self.tile_picker.get_tile(p), (tile, False))
+        self.assertEqual(self.tile_picker.tiles_generated, 1)
+        self.assertEqual(self.tile_picker.tiles_reused, 1)
+
+    def test_get_surrounding_tiles(self) -> None:
+        p = OriginPoint(0, 0)
+        self.assertEqual(self.tile_picker.get_surrounding_tiles(p), [])
+        self.geo.tile_map.put(self.geo.north(p), tiles.BOX_CRATE_TILE)
+        self.assertEqual(
+            self.tile_picker.get_surrounding_tiles(p), [tiles.BOX_CRATE_TILE]
+        )
+
+    def test_pick_new_tile_is_clumpy(self) -> None:
+        p = OriginPoint(0, 0)
+        for neighbor in self.geo.surrounding_points(p):
+            self.geo.tile_map.put(neighbor, tiles.BOX_CRATE_TILE)
+        picked = [self.tile_picker.pick_new_tile(p) for i in range(1000)]
+        self.assertGreater(picked.count(tiles.BOX_CRATE_TILE), 500)
+
+    def test_new_tiles_go_in_the_tile_store(self) -> None:
+        store = TileStore(self.geo)
+        tile_picker = TilePicker(self.geo, store)
+        p = OriginPoint(128, -64)
+        tile, _ = tile_picker.get_tile(p)
+        self.assertEqual(store.get(p), tile.id)
+
+    def test_leaves_evictions_to_the_owner(self) -> None:
+        geo: Geography[tiles.Tile] = Geography()
+        evicted: list[OriginPoint] = []
+        geo.tile_map.on_evict = lambda p, tile: evicted.append(p)
+        TilePicker(geo)
+        geo.tile_map.capacity = 1
+        geo.tile_map.put(OriginPoint(0, 0), tiles.GRASS_TILE)
+        geo.tile_map.put(OriginPoint(64, 0), tiles.GRASS_TILE)
+        self.assertEqual(evicted, [OriginPoint(0, 0)])
@@ -0,0 +1,257 @@
+"""A compact copy of the tile IDs in Geography.tile_map, stored in fixed size NumPy chunks.
+
+geo.tile_map maps OriginPoints to Tile tuples, which is handy for the game logic but useless
+for anything that wants to look at lots of tiles at once, like a zoomed out view or a minimap.
+TileStore keeps the same information as one small integer per tile in CHUNK_SIZE x CHUNK_SIZE
+uint8 arrays, keyed by chunk coordinates.
+
+Tiles are addressed by tile index (col, row), which is the OriginPoint divided by the tile size.
+Rows go up as you go north, just like OriginPoint.y. Within a chunk, chunk[row, col] is the tile
+at (chunk_x * CHUNK_SIZE + col, chunk_y * CHUNK_SIZE + row).
+
+The store mirrors geo.tile_map: when a tile is evicted from the LRU, it becomes unknown here too,
+and chunks that don't know any tiles are thrown away. Consumers that want to update themselves
+incrementally call subscribe to get a set that collects the keys of the chunks that changed.
+
+Anything that wants to look at an area of the world at once (pathfinding, connectivity checks,
+AI observations, analytics) should call query_region rather than asking geo.tile_map for one
+OriginPoint at a time.
+
+"""
+
+from typing import Any, Callable, NamedTuple, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from pw32n import geography, tiles
+
+CHUNK_SIZE = 16
+
+ChunkKey = tuple[int, int]
+TileIdArray = npt.NDArray[np.uint8]
+IndexArray = npt.NDArray[np.intp]
+BoolArray = npt.NDArray[np.bool_]
+
+# WALKABLE[tile_id] is True if the tile is walkable. Unknown tiles aren't.
+WALKABLE = np.zeros(tiles.TILE_ID_COUNT, np.bool_)
+for _tile in tiles.TILES_BY_ID.values():
+    WALKABLE[_tile.id] = _tile.is_walkable
+
+
+class Region(NamedTuple):
+
+    """What query_region returns.
+
+    tile_ids[row, col] is the tile at (left_col + col, bottom_row + row), and it's
+    UNKNOWN_TILE_ID if the tile hasn't been generated (or has been forgotten). walkable is the
+    matching mask.
+
+    """
+
+    left_col: int
+    bottom_row: int
+    tile_ids: TileIdArray
+    walkable: BoolArray
+
+
+class TileStore:
+    # get_by_indices copies the tiles in a rectangle up to this size instead of going chunk by
+    # chunk.
+    MAX_LOOKUP_RECT_AREA = 64 * CHUNK_SIZE * CHUNK_SIZE
+
+    def __init__(self, geo: geography.Geography[tiles.Tile]) -> None:
+        self.geo = geo
+        self.chunks: dict[ChunkKey, TileIdArray] = {}
+
+        # How many known tiles are in each chunk.
+        self.known_counts: dict[ChunkKey, int] = {}
+
+        self.dirty_sets: list[set[ChunkKey]] = []
+
+    def subscribe(self) -> set[ChunkKey]:
+        """Return a set that the store adds the key of every changed chunk to.
+
+        It's up to the subscriber to clear it once it has caught up.
+
+        """
+        dirty: set[ChunkKey] = set(self.chunks)
+        self.dirty_sets.append(dirty)
+        return dirty
+
+    def tile_index(self, tile_point: geography.OriginPoint) -> tuple[int, int]:
+        return tile_point.x // self.geo.tile_width, tile_point.y // self.geo.tile_height
+
+    def get(self, tile_point: geography.OriginPoint) -> int:
+        col, row = self.tile_index(tile_point)
+        return self.get_by_index(col, row)
+
+    def get_by_index(self, col: int, row: int) -> int:
+        chunk = self.chunks.get((col // CHUNK_SIZE, row // CHUNK_SIZE))
+        if chunk is None:
+            return tiles.UNKNOWN_TILE_ID
+        return int(chunk[row % CHUNK_SIZE, col % CHUNK_SIZE])
+
+    def get_by_indices(self, cols: IndexArray, rows: IndexArray) -> TileIdArray:
+        """Look up a bunch of tiles anywhere in the world at once.
+
+        If they're close together, we copy the rectangle around them and index into that.
+        Otherwise, they're sorted by chunk so that each chunk is only looked up once.
+
+        """
+        tile_ids = np.full(len(cols), tiles.UNKNOWN_TILE_ID, np.uint8)
+        if not len(cols):
+            return tile_ids
+        left_col = int(cols.min())
+        bottom_row = int(rows.min())
+        width = int(cols.max()) - left_col + 1
+        height = int(rows.max()) - bottom_row + 1
+        if width * height <= self.MAX_LOOKUP_RECT_AREA:
+            rect = self.region_tile_ids(left_col, bottom_row, width, height)
+            tile_ids[:] = rect[rows - bottom_row, cols - left_col]
+            return tile_ids
+
+        chunk_xs = cols // CHUNK_SIZE
+        chunk_ys = rows // CHUNK_SIZE
+        order = np.lexsort((chunk_ys, chunk_xs))
+        chunk_xs = chunk_xs[order]
+        chunk_ys = chunk_ys[order]
+        starts = np.flatnonzero(
+            np.concatenate(
+                (
+                    [True],
+                    (chunk_xs[1:] != chunk_xs[:-1]) | (chunk_ys[1:] != chunk_ys[:-1]),
+                )
+            )
+        )
+        ends = np.append(starts[1:], len(order))
+        local_cols = cols[order] % CHUNK_SIZE
+        local_rows = rows[order] % CHUNK_SIZE
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            chunk = self.chunks.get((int(chunk_xs[start]), int(chunk_ys[start])))
+            if chunk is not None:
+                tile_ids[order[start:end]] = chunk[
+                    local_rows[start:end], local_cols[start:end]
+                ]
+        return tile_ids
+
+    def copy_region(self, left_col: int, bottom_row: int, out: TileIdArray) -> None:
+        """Copy the tile IDs in a rectangle of tiles into out.
+
+        out[row, col] is the tile at (left_col + col, bottom_row + row). Tiles that aren't known
+        are UNKNOWN_TILE_ID. This copies a slice per chunk instead of a tile at a time.
+
+        """
+        height, width = out.shape
+        out.fill(tiles.UNKNOWN_TILE_ID)
+        for chunk_y in range(
+            bottom_row // CHUNK_SIZE, (bottom_row + height - 1) // CHUNK_SIZE + 1
+        ):
+            row_start = max(bottom_row, chunk_y * CHUNK_SIZE)
+            row_end = min(bottom_row + height, (chunk_y + 1) * CHUNK_SIZE)
+            for chunk_x in range(
+                left_col // CHUNK_SIZE, (left_col + width - 1) // CHUNK_SIZE + 1
+            ):
+                chunk = self.chunks.get((chunk_x, chunk_y))
+                if chunk is None:
+                    continue
+                col_start = max(left_col, chunk_x * CHUNK_SIZE)
+                col_end = min(left_col + width, (chunk_x + 1) * CHUNK_SIZE)
+                out[
+                    row_start - bottom_row : row_end - bottom_row,
+                    col_start - left_col : col_end - left_col,
+                ] = chunk[
+                    row_start - chunk_y * CHUNK_SIZE : row_end - chunk_y * CHUNK_SIZE,
+                    col_start - chunk_x * CHUNK_SIZE : col_end - chunk_x * CHUNK_SIZE,
+                ]
+
+    def query_region(
+        self,
+        rect: geography.TileRect,
+        generate: Callable[[geography.OriginPoint], Any] = None,
+    ) -> Region:
+        """Return the tiles in rect, which has to be aligned, like geo.tile_rect().
+
+        If rect is inside a single chunk, tile_ids is a read only view of the chunk instead of a
+        copy, so it's only good until the next change to the store. Otherwise, it's a new array.
+
+        If generate is given, it's called with the OriginPoint of each unknown tile first, e.g.
+        TilePicker.get_tile (as long as the TilePicker records its tiles here).
+
+        """
+        left_col = rect.left // self.geo.tile_width
+        right_col = rect.right // self.geo.tile_width
+        bottom_row = rect.bottom // self.geo.tile_height + 1
+        top_row = rect.top // self.geo.tile_height + 1
+        width = max(right_col - left_col, 0)
+        height = max(top_row - bottom_row, 0)
+
+        tile_ids = self.region_tile_ids(left_col, bottom_row, width, height)
+        if generate is not None:
+            unknown = np.argwhere(tile_ids == tiles.UNKNOWN_TILE_ID)
+            if len(unknown):
+                for row, col in unknown.tolist():
+                    generate(
+                        geography.OriginPoint(
+                            (left_col + col) * self.geo.tile_width,
+                            (bottom_row + row) * self.geo.tile_height,
+                        )
+                    )
+                tile_ids = self.region_tile_ids(left_col, bottom_row, width, height)
+        return Region(left_col, bottom_row, tile_ids, WALKABLE[tile_ids])
+
+    def region_tile_ids(
+        self, left_col: int, bottom_row: int, width: int, height: int
+    ) -> TileIdArray:
+        """See query_region."""
+        chunk_x = left_col // CHUNK_SIZE
+        chunk_y = bottom_row // CHUNK_SIZE
+        if (
+            width
+            and height
+            and (left_col + width - 1) // CHUNK_SIZE == chunk_x
+            and (bottom_row + height - 1) // CHUNK_SIZE == chunk_y
+        ):
+            chunk = self.chunks.get((chunk_x, chunk_y))
+            if chunk is None:
+                return np.broadcast_to(np.uint8(tiles.UNKNOWN_TILE_ID), (height, width))
+            local_col = left_col - chunk_x * CHUNK_SIZE
+            local_row = bottom_row - chunk_y * CHUNK_SIZE
+            view = chunk[local_row : local_row + height, local_col : local_col + width]
+            view.flags.writeable = False
+            return view
+        out = np.empty((height, width), np.uint8)
+        self.copy_region(left_col, bottom_row, out)
+        return out
+
+    def set(self, tile_point: geography.OriginPoint, tile_id: int) -> None:
+        col, row = self.tile_index(tile_point)
+        self.set_by_index(col, row, tile_id)
+
+    def set_by_index(self, col: int, row: int, tile_id: int) -> None:
+        key = (col // CHUNK_SIZE, row // CHUNK_SIZE)
+        chunk: Optional[TileIdArray] = self.chunks.get(key)
+        if chunk is None:
+            if tile_id == tiles.UNKNOWN_TILE_ID:
+                return
+            chunk = self.chunks[key] = np.zeros((CHUNK_SIZE, CHUNK_SIZE), np.uint8)
+            self.known_counts[key] = 0
+
+        local_row = row % CHUNK_SIZE
+        local_col = col % CHUNK_SIZE
+        old_tile_id = chunk[local_row, local_col]
+        if old_tile_id == tile_id:
+            return
+        chunk[local_row, local_col] = tile_id
+        if old_tile_id == tiles.UNKNOWN_TILE_ID:
+            self.known_counts[key] += 1
+        elif tile_id == tiles.UNKNOWN_TILE_ID:
+            self.known_counts[key] -= 1
+            if not self.known_counts[key]:
+                del self.chunks[key]
+                del self.known_counts[key]
+        for dirty in self.dirty_sets:
+            dirty.add(key)
+
+    def on_tile_evicted(self, tile_point: geography.OriginPoint) -> None:
+        self.set(tile_point, tiles.UNKNOWN_TILE_ID)
@@ -0,0 +1,128 @@
+import unittest
+
+import numpy as np
+
+from pw32n import tiles
+from pw32n.geography import Geography, OriginPoint, TileRect
+from pw32n.tile_picker import TilePicker
+from pw32n.tile_store import CHUNK_SIZE, TileStore
+
+
+class TileStoreTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.geo: Geography[tiles.Tile] = Geography()
+        self.store = TileStore(self.geo)
+
+    def test_get_and_set(self) -> None:
+        p = OriginPoint(-64, 128)
+        self.assertEqual(self.store.get(p), tiles.UNKNOWN_TILE_ID)
+        self.store.set(p, tiles.BOX_CRATE_TILE.id)
+        self.assertEqual(self.store.get(p), tiles.BOX_CRATE_TILE.id)
+        self.assertEqual(self.store.tile_index(p), (-1, 2))
+        chunk = self.store.chunks[(-1, 0)]
+        self.assertEqual(chunk[2, CHUNK_SIZE - 1], tiles.BOX_CRATE_TILE.id)
+
+    def test_get_by_indices(self) -> None:
+        self.store.set_by_index(-1, 2, tiles.BOX_CRATE_TILE.id)
+        self.store.set_by_index(4000, 100, tiles.GRASS_TILE.id)
+        cols = np.array([4000, -1, 0, 4000, -1], np.intp)
+        rows = np.array([100, 2, 0, 100, 3], np.intp)
+        self.assertEqual(
+            self.store.get_by_indices(cols, rows).tolist(),
+            [self.store.get_by_index(col, row) for col, row in zip(cols, rows)],
+        )
+        self.assertEqual(len(self.store.get_by_indices(cols[:0], rows[:0])), 0)
+
+        # These are close together, so they're looked up in a rectangle instead.
+        self.assertEqual(
+            self.store.get_by_indices(cols[1:3], rows[1:3]).tolist(),
+            [tiles.BOX_CRATE_TILE.id, tiles.UNKNOWN_TILE_ID],
+        )
+
+    def test_unknown_chunks_are_thrown_away(self) -> None:
+        self.store.set_by_index(0, 0, tiles.GRASS_TILE.id)
+        self.store.set_by_index(1, 0, tiles.GRASS_TILE.id)
+        self.store.set_by_index(0, 0, tiles.UNKNOWN_TILE_ID)
+        self.assertIn((0, 0), self.store.chunks)
+        self.store.on_tile_evicted(OriginPoint(64, 0))
+        self.assertEqual(self.store.chunks, {})
+        self.assertEqual(self.store.known_counts, {})
+
+        # Forgetting a tile we never knew doesn't create a chunk.
+        self.store.set_by_index(100, 100, tiles.UNKNOWN_TILE_ID)
+        self.assertEqual(self.store.chunks, {})
+
+    def test_subscribe(self) -> None:
+        self.store.set_by_index(0, 0, tiles.GRASS_TILE.id)
+        dirty = self.store.subscribe()
+        self.assertEqual(dirty, {(0, 0)})
+        dirty.clear()
+        self.store.set_by_index(0, 0, tiles.GRASS_TILE.id)
+        self.assertEqual(dirty, set())
+        self.store.set_by_index(CHUNK_SIZE, -1, tiles.GRASS_TILE.id)
+        self.assertEqual(dirty, {(1, -1)})
+
+    def test_copy_region(self) -> None:
+        expected = {}
+        for col, row in [(-20, -3), (-1, 0), (0, 0), (5, 17), (15, 15), (16, 16)]:
+            self.store.set_by_index(col, row, tiles.GRASS_TILE.id)
+            expected[col, row] = tiles.GRASS_TILE.id
+        out = np.full((40, 50), 255, np.uint8)
+        self.store.copy_region(-25, -10, out)
+        for row in range(40):
+            for col in range(50):
+                self.assertEqual(
+                    out[row, col],
+                    expected.get((col - 25, row - 10), tiles.UNKNOWN_TILE_ID),
+                )
+
+    def tile_rect(
+        self, left_col: int, bottom_row: int, width: int, height: int
+    ) -> TileRect:
+        """Return the aligned TileRect that query_region turns into these tiles."""
+        tile_width = self.geo.tile_width
+        tile_height = self.geo.tile_height
+        return TileRect(
+            left=left_col * tile_width,
+            right=(left_col + width) * tile_width,
+            top=(bottom_row + height - 1) * tile_height,
+            bottom=(bottom_row - 1) * tile_height,
+        )
+
+    def test_query_region_within_a_chunk_is_a_view(self) -> None:
+        self.store.set_by_index(2, 3, tiles.BOX_CRATE_TILE.id)
+        self.store.set_by_index(3, 3, tiles.GRASS_TILE.id)
+        region = self.store.query_region(self.tile_rect(1, 2, 4, 3))
+        self.assertEqual((region.left_col, region.bottom_row), (1, 2))
+        self.assertEqual(region.tile_ids.shape, (3, 4))
+        self.assertTrue(np.shares_memory(region.tile_ids, self.store.chunks[(0, 0)]))
+        self.assertFalse(region.tile_ids.flags.writeable)
+        self.assertEqual(region.tile_ids[1, 1], tiles.BOX_CRATE_TILE.id)
+        self.assertEqual(region.tile_ids[1, 2], tiles.GRASS_TILE.id)
+        self.assertEqual(region.tile_ids[0, 0], tiles.UNKNOWN_TILE_ID)
+        self.assertEqual(region.walkable.sum(), 1)
+        self.assertTrue(region.walkable[1, 2])
+
+        # A chunk that doesn't exist is all unknown.
+        region = self.store.query_region(self.tile_rect(100, 100, 2, 2))
+        self.assertTrue((region.tile_ids == tiles.UNKNOWN_TILE_ID).all())
+
+    def test_query_region_across_chunks_matches_geo(self) -> None:
+        tile_picker = TilePicker(self.geo, self.store)
+        left_col, bottom_row, width, height = -20, -5, 40, 30
+        region = self.store.query_region(
+            self.tile_rect(left_col, bottom_row, width, height),
+            generate=tile_picker.get_tile,
+        )
+        self.assertEqual(region.tile_ids.shape, (height, width))
+        self.assertFalse(np.shares_memory(region.tile_ids, self.store.chunks[(0, 0)]))
+        for row in range(height):
+            for col in range(width):
+                tile = self.geo.tile_map.peek(
+                    OriginPoint(
+                        (left_col + col) * self.geo.tile_width,
+                        (bottom_row + row) * self.geo.tile_height,
+                    )
+                )
+                self.assertEqual(region.tile_ids[row, col], tile.id)
+                self.assertEqual(region.walkable[row, col], tile.is_walkable)
@@ -0,0 +1,113 @@
+"""Load tiles a few at a time instead of all at once.
+
+When the window gets much bigger or the player jumps somewhere new, update_tiles suddenly has
+thousands of tiles to load. Doing them all in one frame is a big stall. Instead, WorldView puts
+them in a TileLoadQueue and loads as many as it can each frame within a time budget, nearest to
+the player first. Until a tile is loaded, its cell just shows the background color.
+
+The tiles right around the player are the exception. They're always loaded immediately so that
+the player can't walk through a crate that hasn't shown up yet.
+
+"""
+
+import heapq
+import time
+from typing import Callable, Iterable
+
+from pw32n import geography, tiles
+
+
+class TileLoadQueue:
+    def __init__(self, geo: geography.Geography[tiles.Tile]) -> None:
+        self.geo = geo
+
+        # The heap may contain points that are no longer pending; they're skipped when popped.
+        self.pending: set[geography.OriginPoint] = set()
+        self.heap: list[tuple[int, geography.OriginPoint]] = []
+
+        # This is the aligned player position that the heap's priorities are relative to.
+        self.center = geography.OriginPoint(0, 0)
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def __contains__(self, tile_point: geography.OriginPoint) -> bool:
+        return tile_point in self.pending
+
+    def distance_squared(self, tile_point: geography.OriginPoint) -> int:
+        dx = tile_point.x - self.center.x
+        dy = tile_point.y - self.center.y
+        return dx * dx + dy * dy
+
+    def add(self, tile_points: Iterable[geography.OriginPoint]) -> None:
+        self._recenter()
+        for tile_point in tile_points:
+            if tile_point not in self.pending:
+                self.pending.add(tile_point)
+                heapq.heappush(
+                    self.heap, (self.distance_squared(tile_point), tile_point)
+                )
+
+    def discard(self, tile_point: geography.OriginPoint) -> bool:
+        """Forget about a tile that scrolled away before it got loaded.
+
+        Returns True if it was pending.
+
+        """
+        if tile_point in self.pending:
+            self.pending.remove(tile_point)
+            if not self.pending:
+                self.heap.clear()
+            return True
+        return False
+
+    def _recenter(self) -> None:
+        """If the player has crossed into another tile, reprioritize what's left."""
+        center = self.geo.align_point(self.geo.position)
+        if center == self.center:
+            return
+        self.center = center
+        self.heap = [(self.distance_squared(p), p) for p in self.pending]
+        heapq.heapify(self.heap)
+
+    def load_surroundings(self, load: Callable[[geography.OriginPoint], object]) -> int:
+        """Immediately load the player's tile and its neighbors if they're pending."""
+        center = self.geo.align_point(self.geo.position)
+        loaded = 0
+        for tile_point in [center] + self.geo.surrounding_points(center):
+            if self.discard(tile_point):
+                load(tile_point)
+                loaded += 1
+        return loaded
+
+    def drain(
+        self,
+        load: Callable[[geography.OriginPoint], object],
+        budget: float,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> int:
+        """Load pending tiles, nearest first, until they're done or the budget is spent.
+
+        At least one tile is loaded per call so that loading always makes progress. Returns
+        how many tiles were loaded.
+
+        """
+        loaded = self.load_surroundings(load)
+        if not self.pending:
+            return loaded
+        self._recenter()
+        deadline = clock() + budget
+        heap = self.heap
+        pending = self.pending
+        while heap:
+            _, tile_point = heapq.heappop(heap)
+            if tile_point not in pending:
+                continue
+            pending.remove(tile_point)
+            load(tile_point)
+            loaded += 1
+            if clock() >= deadline:
+                break
+        if not pending:
+            heap.clear()
+        return loaded
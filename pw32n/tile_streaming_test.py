@@ -0,0 +1,82 @@
+import unittest
+
+from pw32n import tiles
+from pw32n.geography import Geography, OriginPoint
+from pw32n.tile_streaming import TileLoadQueue
+
+
+class FakeClock:
+
+    """Every tile takes 1 second to load."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TileLoadQueueTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.geo: Geography[tiles.Tile] = Geography()
+        self.queue = TileLoadQueue(self.geo)
+        self.clock = FakeClock()
+        self.loaded: list[OriginPoint] = []
+
+    def load(self, tile_point: OriginPoint) -> None:
+        self.loaded.append(tile_point)
+        self.clock.now += 1.0
+
+    def drain(self, budget: float) -> int:
+        return self.queue.drain(self.load, budget, clock=self.clock)
+
+    def test_loads_nearest_first_within_the_budget(self) -> None:
+        far = [OriginPoint(64 * i, 64 * 10) for i in range(5)]
+        self.queue.add(far)
+        near = OriginPoint(64 * 3, 0)
+        self.queue.add([near])
+
+        self.assertEqual(self.drain(budget=2.5), 3)
+        self.assertEqual(self.loaded[0], near)
+        self.assertEqual(self.loaded[1:], far[:2])
+        self.assertEqual(len(self.queue), 3)
+
+        # No matter how much is pending, every frame stays within its budget (plus the tile
+        # that was in progress when it ran out).
+        self.queue.add(OriginPoint(64 * i, 64 * 20) for i in range(1000))
+        for _ in range(10):
+            start = self.clock.now
+            self.drain(budget=3.0)
+            self.assertLessEqual(self.clock.now - start, 3.0)
+
+    def test_always_makes_progress(self) -> None:
+        self.queue.add([OriginPoint(640, 640), OriginPoint(1280, 1280)])
+        self.assertEqual(self.drain(budget=0.0), 1)
+        self.assertEqual(self.drain(budget=0.0), 1)
+        self.assertEqual(self.drain(budget=0.0), 0)
+        self.assertFalse(self.queue)
+
+    def test_the_players_surroundings_load_immediately(self) -> None:
+        around_the_player = [OriginPoint(0, 0)] + self.geo.surrounding_points(
+            OriginPoint(0, 0)
+        )
+        self.queue.add([OriginPoint(640, 0)] + around_the_player)
+        self.drain(budget=0.0)
+        self.assertEqual(set(self.loaded[:9]), set(around_the_player))
+
+    def test_reprioritizes_when_the_player_moves(self) -> None:
+        east = OriginPoint(64 * 20, 0)
+        west = OriginPoint(-64 * 10, 0)
+        self.queue.add([east, west])
+        self.geo.position = OriginPoint(64 * 15, 0)
+        self.drain(budget=0.0)
+        self.assertEqual(self.loaded, [east])
+
+    def test_discard(self) -> None:
+        p = OriginPoint(640, 640)
+        self.queue.add([p, OriginPoint(1280, 1280)])
+        self.assertTrue(self.queue.discard(p))
+        self.assertFalse(self.queue.discard(p))
+        self.assertFalse(p in self.queue)
+        self.drain(budget=10.0)
+        self.assertEqual(self.loaded, [OriginPoint(1280, 1280)])
@@ -2,12 +2,33 @@ from typing import NamedTuple
 
 from pw32n import sprite_images
 
+# Tile IDs are small integers for storing tiles compactly. See tile_store.
+UNKNOWN_TILE_ID = 0
+
 
 class Tile(NamedTuple):
     sprite_image: sprite_images.SpriteImage
     is_walkable: bool
+    id: int = UNKNOWN_TILE_ID
+
+    # Roughly the average color of the sprite image, for zoomed out views and the minimap.
+    color: tuple[int, int, int] = (0, 0, 0)
+
 
+GRASS_TILE = Tile(
+    sprite_images.GRASS_TILE_IMAGE, is_walkable=True, id=1, color=(57, 194, 114)
+)
+BOX_CRATE_TILE = Tile(
+    sprite_images.BOX_CRATE_TILE_IMAGE, is_walkable=False, id=2, color=(166, 118, 62)
+)
+GRASS_SIDE_VIEW_TILE = Tile(
+    sprite_images.GRASS_SIDE_VIEW_TILE_IMAGE,
+    is_walkable=True,
+    id=3,
+    color=(107, 170, 61),
+)
 
-GRASS_TILE = Tile(sprite_images.GRASS_TILE_IMAGE, is_walkable=True)
-BOX_CRATE_TILE = Tile(sprite_images.BOX_CRATE_TILE_IMAGE, is_walkable=False)
-GRASS_SIDE_VIEW_TILE = Tile(sprite_images.GRASS_SIDE_VIEW_TILE_IMAGE, is_walkable=True)
+TILES_BY_ID = {
+    tile.id: tile for tile in (GRASS_TILE, BOX_CRATE_TILE, GRASS_SIDE_VIEW_TILE)
+}
+TILE_ID_COUNT = max(TILES_BY_ID) + 1
@@ -12,11 +12,19 @@ class TimedStep(NamedTuple):
 
 class TimedWorkflow:
 
-    """See TimedWorkflowExample in timed_workflow_test.py."""
+    """See TimedWorkflowExample in timed_workflow_test.py.
 
-    def __init__(self, name: str, steps: list[TimedStep]) -> None:
+    If carry_late_by is True, when a step fires late, the next step is shortened by the same
+    amount. That keeps the whole workflow on schedule no matter how coarsely it's updated.
+
+    """
+
+    def __init__(
+        self, name: str, steps: list[TimedStep], carry_late_by: bool = False
+    ) -> None:
         self.name = name
         self.steps = steps
+        self.carry_late_by = carry_late_by
         self.initial_countdown = self.countdown = Secs(0.0)
         self._set_next_countdown()
 
@@ -28,8 +36,11 @@ class TimedWorkflow:
         self.countdown -= delta_time
         if self.countdown <= 0.0:
             step = self.steps.pop(0)
-            step.callback(-self.countdown)
+            late_by = -self.countdown
+            step.callback(late_by)
             self._set_next_countdown()
+            if self.carry_late_by:
+                self.countdown -= late_by
 
     def _set_next_countdown(self) -> None:
         if len(self.steps):
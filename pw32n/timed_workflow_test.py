@@ -94,6 +94,21 @@ class TimedWorkflowTestCase(unittest.TestCase):
             f"You forgot to cleanup your workflow; you should do that in your last step: {self.example.main_workflow}",
         )
 
+    def test_carry_late_by(self) -> None:
+        late_by: list[Secs] = []
+        workflow = TimedWorkflow(
+            name="CARRY",
+            steps=[
+                TimedStep(Secs(1.0), late_by.append),
+                TimedStep(Secs(1.0), late_by.append),
+            ],
+            carry_late_by=True,
+        )
+        workflow.on_update(Secs(1.25))
+        self.assertEqual(workflow.countdown, Secs(0.75))
+        workflow.on_update(Secs(0.75))
+        self.assertEqual(late_by, [Secs(0.25), Secs(0.0)])
+
     def test_avoid_dividing_by_zero(self) -> None:
         main_workflow = self.example.main_workflow
         main_workflow.initial_countdown = 0.0
@@ -0,0 +1,351 @@
+"""This keeps track of which walkable tiles are connected to each other, one new tile at a time.
+
+The tile picker places crates at random, so without some help it can wall the player in. To
+prevent that, we keep a union-find (disjoint set forest) of the walkable tiles in geo.tile_map,
+joined up and down and left and right. Each region also keeps a count of its frontier edges,
+i.e. the places where one of its tiles touches a tile point that hasn't been generated yet. A
+region whose count drops to zero is sealed: nothing that gets generated later can ever connect
+it to the rest of the world. Since frontier counts simply add up when two regions merge, adding a
+tile only touches the tile and its 4 neighbors.
+
+Tiles that get evicted from geo.tile_map turn back into frontier for their neighbors. Taking a
+tile out of a union-find isn't possible, so the evicted tile stays behind as a "ghost" that still
+connects the regions it used to connect. A ghost's tile point is ungenerated, so every region it
+connects has a frontier edge there anyway, and none of them can be sealed. That stays true until
+the ghost's tile point is generated again. If it comes back walkable, the ghost comes back to
+life and the connections are real again. If it comes back as a crate, the ghost is "buried": it
+connects regions through a crate. While there are buried ghosts, and whenever the tile point in
+question is a ghost's, a region that looks unsealed is double checked with a small flood fill.
+
+Ghosts are cleaned up by compaction, which builds a new union-find from the tiles that are still
+in geo.tile_map and then takes its place. Rather than doing that all at once, which takes
+seconds for a big map, every tile that's added or carved copies COMPACTION_STEP nodes into the
+new union-find. (Not evicted, because geo.tile_map evicts a tile in the middle of putting a new
+one, before the new one has been added here.) The new union-find also gets told about the tiles
+that change in the meantime, so it's up to date when it's done. Compaction starts as soon as a
+ghost is buried, or when there are more ghosts than real tiles, so the memory use stays
+proportional to geo.tile_map.
+
+"""
+
+from typing import Optional
+
+from pw32n import geography, tiles
+from pw32n.tile_keys import pack, unpack
+
+
+class WalkableRegions:
+    # Don't bother compacting until there are at least this many ghosts (or a buried one).
+    MIN_GHOSTS_TO_COMPACT = 10_000
+
+    # How many nodes each tile that's added or carved copies into the compacted union-find.
+    COMPACTION_STEP = 32
+
+    # How many tiles the flood fill that double checks a region may look at before it assumes
+    # the region isn't sealed.
+    MAX_SEAL_SEARCH = 256
+
+    def __init__(self, geo: geography.Geography[tiles.Tile]) -> None:
+        self.geo = geo
+
+        # These are keyed by geo.tile_map.key(tile_point), which is tile_keys.pack(col, row).
+        # The roots are keys too.
+        self.parent: dict[int, int] = {}
+
+        # These are only kept for the roots.
+        self.size: dict[int, int] = {}
+        self.frontier: dict[int, int] = {}
+
+        # Every key in parent, in the order they were added. Compaction goes through these.
+        self.keys: list[int] = []
+
+        self.ghosts = 0
+        self.buried_ghosts = 0
+
+        # While compacting, this is the union-find that will take this one's place, and
+        # keys[:compacted_keys] have been copied into it.
+        self.compacted: Optional[WalkableRegions] = None
+        self.compacted_keys = 0
+
+        self.compactions = 0
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        """Return the number of tiles, including ghosts."""
+        return len(self.parent)
+
+    def neighbors(
+        self, tile_point: geography.OriginPoint
+    ) -> tuple[
+        geography.OriginPoint,
+        geography.OriginPoint,
+        geography.OriginPoint,
+        geography.OriginPoint,
+    ]:
+        geo = self.geo
+        return (
+            geo.north(tile_point),
+            geo.south(tile_point),
+            geo.east(tile_point),
+            geo.west(tile_point),
+        )
+
+    def index(self, tile_point: geography.OriginPoint) -> tuple[int, int]:
+        geo = self.geo
+        return tile_point.x // geo.tile_width, tile_point.y // geo.tile_height
+
+    def count_unknown_neighbors(self, col: int, row: int) -> int:
+        peek = self.geo.tile_map.peek_by_index
+        return (
+            (peek(col, row + 1) is None)
+            + (peek(col, row - 1) is None)
+            + (peek(col + 1, row) is None)
+            + (peek(col - 1, row) is None)
+        )
+
+    def walkable_neighbor_keys(self, col: int, row: int) -> list[int]:
+        """Return the keys of the walkable neighbors that are in this union-find.
+
+        That's all of them, except in the middle of being compacted.
+
+        """
+        peek = self.geo.tile_map.peek_by_index
+        parent = self.parent
+        keys = []
+        for neighbor_col, neighbor_row in (
+            (col, row + 1),
+            (col, row - 1),
+            (col + 1, row),
+            (col - 1, row),
+        ):
+            tile = peek(neighbor_col, neighbor_row)
+            if tile is not None and tile.is_walkable:
+                key = pack(neighbor_col, neighbor_row)
+                if key in parent:
+                    keys.append(key)
+        return keys
+
+    def find(self, tile_point: geography.OriginPoint) -> int:
+        """Return the root of tile_point's region."""
+        return self.find_key(self.geo.tile_map.key(tile_point))
+
+    def find_key(self, key: int) -> int:
+        parent = self.parent
+        root = key
+        while parent[root] != root:
+            root = parent[root]
+
+        # Path compression.
+        while parent[key] != root:
+            parent[key], key = root, parent[key]
+        return root
+
+    def union(self, a: int, b: int) -> int:
+        a = self.find_key(a)
+        b = self.find_key(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+        self.frontier[a] += self.frontier.pop(b)
+        return a
+
+    def is_sealed(self, tile_point: geography.OriginPoint) -> bool:
+        """Is tile_point in a region that can't reach any ungenerated tiles?"""
+        if self.frontier[self.find(tile_point)] == 0:
+            return True
+        # A buried ghost can make a region look connected to one that it isn't anymore.
+        return bool(self.buried_ghosts) and not self.reaches_frontier(
+            *self.index(tile_point)
+        )
+
+    def would_seal(self, tile_point: geography.OriginPoint) -> bool:
+        """Would putting something unwalkable at tile_point seal one of its neighbors' regions?
+
+        tile_point must not have been generated yet.
+
+        """
+        col, row = self.index(tile_point)
+        neighbor_keys = self.walkable_neighbor_keys(col, row)
+        edges: dict[int, int] = {}
+        for key in neighbor_keys:
+            root = self.find_key(key)
+            edges[root] = edges.get(root, 0) + 1
+        if any(self.frontier[root] == count for root, count in edges.items()):
+            return True
+
+        # If tile_point is a ghost's, it's still connecting its neighbors, and putting a crate
+        # there would bury it.
+        key = pack(col, row)
+        if not self.buried_ghosts and key not in self.parent:
+            return False
+        return any(
+            not self.reaches_frontier(*unpack(neighbor_key), key)
+            for neighbor_key in neighbor_keys
+        )
+
+    def reaches_frontier(self, col: int, row: int, ignored_key: int = None) -> bool:
+        """Flood fill from the walkable tile at (col, row) looking for an ungenerated tile.
+
+        The one with ignored_key doesn't count. This gives up and returns True after looking at
+        MAX_SEAL_SEARCH tiles.
+
+        """
+        peek = self.geo.tile_map.peek_by_index
+        seen = {pack(col, row)}
+        stack = [(col, row)]
+        while stack:
+            col, row = stack.pop()
+            for neighbor_col, neighbor_row in (
+                (col, row + 1),
+                (col, row - 1),
+                (col + 1, row),
+                (col - 1, row),
+            ):
+                key = pack(neighbor_col, neighbor_row)
+                if key in seen:
+                    continue
+                tile = peek(neighbor_col, neighbor_row)
+                if tile is None:
+                    if key != ignored_key:
+                        return True
+                elif tile.is_walkable:
+                    if len(seen) >= self.MAX_SEAL_SEARCH:
+                        return True
+                    seen.add(key)
+                    stack.append((neighbor_col, neighbor_row))
+        return False
+
+    def on_tile_added(self, tile_point: geography.OriginPoint) -> None:
+        """Call this right after tile_point is put in geo.tile_map for the first time."""
+        col, row = self.index(tile_point)
+        key = pack(col, row)
+        self.add_tile(key, col, row)
+        if self.compacted is not None:
+            self.compacted.add_tile(key, col, row)
+        self.compact()
+
+    def on_tile_carved(self, tile_point: geography.OriginPoint) -> None:
+        """Call this right after an unwalkable tile in geo.tile_map is made walkable."""
+        col, row = self.index(tile_point)
+        key = pack(col, row)
+        self.carve_tile(key, col, row)
+        if self.compacted is not None:
+            self.compacted.carve_tile(key, col, row)
+        self.compact()
+
+    def on_tile_evicted(
+        self, tile_point: geography.OriginPoint, tile: tiles.Tile
+    ) -> None:
+        """Call this right after tile_point is taken out of geo.tile_map."""
+        col, row = self.index(tile_point)
+        key = pack(col, row)
+        self.evict_tile(key, col, row, tile)
+        if self.compacted is not None:
+            self.compacted.evict_tile(key, col, row, tile)
+
+    def add_tile(self, key: int, col: int, row: int) -> None:
+        """See on_tile_added."""
+        is_walkable = self.geo.tile_map.peek_by_index(col, row).is_walkable
+        if key in self.parent:
+            self.ghosts -= 1
+            if is_walkable:
+                self.frontier[self.find_key(key)] += self.count_unknown_neighbors(
+                    col, row
+                )
+            else:
+                self.buried_ghosts += 1
+        elif is_walkable:
+            self.add_node(key, self.count_unknown_neighbors(col, row))
+        for neighbor_key in self.walkable_neighbor_keys(col, row):
+            # The tile used to be part of the neighbor's frontier.
+            self.frontier[self.find_key(neighbor_key)] -= 1
+            if is_walkable:
+                self.union(key, neighbor_key)
+
+    def carve_tile(self, key: int, col: int, row: int) -> None:
+        """See on_tile_carved."""
+        if key in self.parent:
+            self.buried_ghosts -= 1
+            self.frontier[self.find_key(key)] += self.count_unknown_neighbors(col, row)
+        else:
+            self.add_node(key, self.count_unknown_neighbors(col, row))
+        for neighbor_key in self.walkable_neighbor_keys(col, row):
+            self.union(key, neighbor_key)
+
+    def evict_tile(self, key: int, col: int, row: int, tile: tiles.Tile) -> None:
+        """See on_tile_evicted."""
+        if key in self.parent:
+            self.ghosts += 1
+            if tile.is_walkable:
+                # Its region loses the frontier edges that went through it.
+                self.frontier[self.find_key(key)] -= self.count_unknown_neighbors(
+                    col, row
+                )
+            else:
+                self.buried_ghosts -= 1
+        for neighbor_key in self.walkable_neighbor_keys(col, row):
+            self.frontier[self.find_key(neighbor_key)] += 1
+
+    def copy_tile(self, key: int, col: int, row: int) -> None:
+        """Add a walkable tile that has been in geo.tile_map for a while."""
+        self.add_node(key, self.count_unknown_neighbors(col, row))
+        for neighbor_key in self.walkable_neighbor_keys(col, row):
+            self.union(key, neighbor_key)
+
+    def add_node(self, key: int, frontier: int) -> None:
+        self.parent[key] = key
+        self.size[key] = 1
+        self.frontier[key] = frontier
+        self.keys.append(key)
+
+    def compact(self) -> None:
+        """Do the next COMPACTION_STEP nodes' worth of compaction, if it's time to."""
+        compacted = self.compacted
+        if compacted is None:
+            if not self.buried_ghosts and self.ghosts <= max(
+                self.MIN_GHOSTS_TO_COMPACT, len(self.parent) // 2
+            ):
+                return
+            compacted = self.compacted = WalkableRegions(self.geo)
+            self.compacted_keys = 0
+
+        peek = self.geo.tile_map.peek_by_index
+        keys = self.keys
+        start = self.compacted_keys
+        end = self.compacted_keys = min(start + self.COMPACTION_STEP, len(keys))
+        for key in keys[start:end]:
+            if key in compacted.parent:
+                # It was added while we were compacting.
+                continue
+            col, row = unpack(key)
+            tile = peek(col, row)
+            if tile is not None and tile.is_walkable:
+                compacted.copy_tile(key, col, row)
+        if end < len(keys):
+            return
+
+        self.parent = compacted.parent
+        self.size = compacted.size
+        self.frontier = compacted.frontier
+        self.keys = compacted.keys
+        self.ghosts = compacted.ghosts
+        self.buried_ghosts = compacted.buried_ghosts
+        self.compacted = None
+        self.compactions += 1
+
+    def rebuild(self) -> None:
+        """Start over using just the walkable tiles that are in geo.tile_map, all at once."""
+        self.parent = {}
+        self.size = {}
+        self.frontier = {}
+        self.keys = []
+        self.ghosts = 0
+        self.buried_ghosts = 0
+        self.compacted = None
+        self.rebuilds += 1
+        for key, col, row, tile in self.geo.tile_map.items_by_index():
+            if tile.is_walkable:
+                self.copy_tile(key, col, row)
@@ -0,0 +1,206 @@
+import random
+import unittest
+from unittest.mock import patch
+
+from pw32n import tiles
+from pw32n.geography import Geography, OriginPoint
+from pw32n.headless import HeadlessWorld
+from pw32n.tile_picker import TilePicker
+from pw32n.walkable_regions import WalkableRegions
+
+
+def find_sealed_tiles(geo: Geography[tiles.Tile]) -> set[OriginPoint]:
+    """Flood fill every walkable region and return the tiles in regions with no frontier."""
+    tile_map = geo.tile_map
+    seen: set[OriginPoint] = set()
+    sealed: set[OriginPoint] = set()
+    for start, tile in list(tile_map.items()):
+        if not tile.is_walkable or start in seen:
+            continue
+        region = {start}
+        stack = [start]
+        has_frontier = False
+        while stack:
+            p = stack.pop()
+            for neighbor in (geo.north(p), geo.south(p), geo.east(p), geo.west(p)):
+                neighbor_tile = tile_map.peek(neighbor)
+                if neighbor_tile is None:
+                    has_frontier = True
+                elif neighbor_tile.is_walkable and neighbor not in region:
+                    region.add(neighbor)
+                    stack.append(neighbor)
+        seen |= region
+        if not has_frontier:
+            sealed |= region
+    return sealed
+
+
+class WalkableRegionsTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.geo: Geography[tiles.Tile] = Geography()
+        self.regions = WalkableRegions(self.geo)
+
+    def put(self, col: int, row: int, tile: tiles.Tile) -> OriginPoint:
+        p = OriginPoint(col * self.geo.tile_width, row * self.geo.tile_height)
+        self.geo.tile_map.put(p, tile)
+        self.regions.on_tile_added(p)
+        return p
+
+    def test_frontier_counts(self) -> None:
+        a = self.put(0, 0, tiles.GRASS_TILE)
+        self.assertEqual(self.regions.frontier[self.geo.tile_map.key(a)], 4)
+        b = self.put(1, 0, tiles.GRASS_TILE)
+        self.assertEqual(self.regions.find(a), self.regions.find(b))
+        self.assertEqual(self.regions.frontier[self.regions.find(a)], 6)
+        self.put(0, 1, tiles.BOX_CRATE_TILE)
+        self.assertEqual(self.regions.frontier[self.regions.find(a)], 5)
+
+    def test_would_seal(self) -> None:
+        a = self.put(0, 0, tiles.GRASS_TILE)
+        self.put(0, 1, tiles.BOX_CRATE_TILE)
+        self.put(0, -1, tiles.BOX_CRATE_TILE)
+        self.put(-1, 0, tiles.BOX_CRATE_TILE)
+        self.assertTrue(self.regions.would_seal(self.geo.east(a)))
+        self.assertFalse(self.regions.would_seal(OriginPoint(640, 640)))
+
+    def test_eviction_reopens_the_frontier(self) -> None:
+        a = self.put(0, 0, tiles.GRASS_TILE)
+        crates = [
+            self.put(0, 1, tiles.BOX_CRATE_TILE),
+            self.put(0, -1, tiles.BOX_CRATE_TILE),
+            self.put(-1, 0, tiles.BOX_CRATE_TILE),
+            self.put(1, 0, tiles.BOX_CRATE_TILE),
+        ]
+        self.assertTrue(self.regions.is_sealed(a))
+        self.geo.tile_map.pop(crates[0])
+        self.regions.on_tile_evicted(crates[0], tiles.BOX_CRATE_TILE)
+        self.assertFalse(self.regions.is_sealed(a))
+
+    def test_regenerating_a_ghost_forgets_what_it_connected(self) -> None:
+        a = self.put(0, 0, tiles.GRASS_TILE)
+        self.put(0, 1, tiles.BOX_CRATE_TILE)
+        self.put(0, -1, tiles.BOX_CRATE_TILE)
+        self.put(-1, 0, tiles.BOX_CRATE_TILE)
+        b = self.put(1, 0, tiles.GRASS_TILE)
+        self.put(2, 0, tiles.GRASS_TILE)
+        self.geo.tile_map.pop(b)
+        self.regions.on_tile_evicted(b, tiles.GRASS_TILE)
+        self.assertEqual(self.regions.ghosts, 1)
+
+        # b comes back as a crate, which seals a in.
+        self.regions.COMPACTION_STEP = 1
+        self.put(1, 0, tiles.BOX_CRATE_TILE)
+        self.assertEqual(self.regions.ghosts, 0)
+        self.assertEqual(self.regions.buried_ghosts, 1)
+        self.assertTrue(self.regions.is_sealed(a))
+
+        # Compaction gets rid of the buried ghost a couple of tiles later.
+        self.put(10, 10, tiles.BOX_CRATE_TILE)
+        self.put(10, 12, tiles.BOX_CRATE_TILE)
+        self.assertEqual(self.regions.compactions, 1)
+        self.assertEqual(self.regions.buried_ghosts, 0)
+        self.assertNotIn(self.geo.tile_map.key(b), self.regions.parent)
+        self.assertTrue(self.regions.is_sealed(a))
+
+    def test_would_seal_a_ghosts_tile_point(self) -> None:
+        self.put(0, 0, tiles.GRASS_TILE)
+        self.put(0, 1, tiles.BOX_CRATE_TILE)
+        self.put(0, -1, tiles.BOX_CRATE_TILE)
+        self.put(-1, 0, tiles.BOX_CRATE_TILE)
+        b = self.put(1, 0, tiles.GRASS_TILE)
+        self.put(2, 0, tiles.GRASS_TILE)
+        self.geo.tile_map.pop(b)
+        self.regions.on_tile_evicted(b, tiles.GRASS_TILE)
+
+        # The ghost still connects a to (2, 0), but a crate at b would seal a in.
+        self.assertTrue(self.regions.would_seal(b))
+
+    def test_rebuild(self) -> None:
+        for col in range(5):
+            self.put(col, 0, tiles.GRASS_TILE)
+        self.regions.rebuild()
+        root = self.regions.find(OriginPoint(0, 0))
+        self.assertEqual(self.regions.size[root], 5)
+        self.assertEqual(self.regions.frontier[root], 12)
+
+
+class TilePickerConnectivityTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        random.seed(0)
+        self.geo: Geography[tiles.Tile] = Geography()
+        self.tile_picker = TilePicker(self.geo)
+
+    def test_the_player_starts_on_walkable_tiles(self) -> None:
+        points = self.tile_picker.points_under(self.geo.initial_position)
+        self.assertEqual(len(points), 4)
+        self.tile_picker.pick_new_tile = lambda tile_point: tiles.BOX_CRATE_TILE  # type: ignore
+        for p in points:
+            tile, _ = self.tile_picker.get_tile(p)
+            self.assertTrue(tile.is_walkable)
+
+    def test_carves_out_sealed_regions(self) -> None:
+        p = OriginPoint(640, 640)
+        for neighbor in self.geo.surrounding_points(p):
+            self.geo.tile_map.put(neighbor, tiles.BOX_CRATE_TILE)
+        self.tile_picker.pick_new_tile = lambda tile_point: tiles.GRASS_TILE  # type: ignore
+        self.tile_picker.get_tile(p)
+        self.assertEqual(self.tile_picker.tiles_carved, 1)
+        self.assertEqual(len(self.tile_picker.carved), 1)
+        self.assertEqual(
+            self.geo.tile_map.peek(self.tile_picker.carved[0]), tiles.GRASS_TILE
+        )
+        self.assertFalse(self.tile_picker.regions.is_sealed(p))
+        self.assertEqual(find_sealed_tiles(self.geo), set())
+
+    def test_walking_never_seals_a_region(self) -> None:
+        world = HeadlessWorld()
+        for i in range(2000):
+            world.move(23, 17 if i % 400 < 200 else -29)
+        self.assertGreater(world.tile_picker.tiles_generated, 1000)
+        self.assertEqual(find_sealed_tiles(world.geo), set())
+
+    def test_eviction_and_compaction(self) -> None:
+        geo: Geography[tiles.Tile] = Geography()
+        geo.tile_map.capacity = 500
+        world = HeadlessWorld(geo)
+        regions = world.tile_picker.regions
+        regions.MIN_GHOSTS_TO_COMPACT = 100
+        for i in range(2000):
+            # Double back every so often to regenerate evicted tiles.
+            world.move(31 if i % 300 < 150 else -31, 11 if i % 100 < 50 else -13)
+        self.assertGreater(regions.compactions, 0)
+        self.assertEqual(regions.rebuilds, 0)
+        self.assertLessEqual(len(regions), 2 * len(geo.tile_map))
+        self.assertEqual(find_sealed_tiles(geo), set())
+
+    def test_regenerating_a_ghost_does_a_bounded_amount_of_work(self) -> None:
+        regions = self.tile_picker.regions
+        w = self.geo.tile_width
+        h = self.geo.tile_height
+        for col in range(60):
+            for row in range(60):
+                self.tile_picker.get_tile(OriginPoint(col * w, row * h))
+        p = next(
+            p
+            for p, tile in self.geo.tile_map.items()
+            if tile.is_walkable
+            and all(
+                self.geo.tile_map.peek(n, tiles.BOX_CRATE_TILE).is_walkable
+                for n in regions.neighbors(p)
+            )
+        )
+        self.tile_picker.on_tile_evicted(p, self.geo.tile_map.pop(p))
+
+        self.tile_picker.pick_new_tile = lambda tile_point: tiles.BOX_CRATE_TILE  # type: ignore
+        with patch.object(regions, "rebuild") as m_rebuild, patch.object(
+            WalkableRegions,
+            "copy_tile",
+            autospec=True,
+            side_effect=WalkableRegions.copy_tile,
+        ) as m_copy_tile:
+            tile, _ = self.tile_picker.get_tile(p)
+        self.assertEqual(tile, tiles.BOX_CRATE_TILE)
+        m_rebuild.assert_not_called()
+        self.assertIsNotNone(regions.compacted)
+        self.assertLessEqual(m_copy_tile.call_count, regions.COMPACTION_STEP)
+        self.assertLess(regions.COMPACTION_STEP, len(regions) // 10)
@@ -0,0 +1,236 @@
+"""The binary messages that world_server and its clients send each other.
+
+Every message is a 3 byte header (the length of the body and the kind of message) followed by
+the body. Most bodies are a single small struct. Tiles are sent a TileStore chunk at a time:
+CHUNK carries all CHUNK_SIZE x CHUNK_SIZE tile IDs of a chunk the client hasn't seen, and
+CHUNK_DELTA carries (index, tile_id) pairs for just the tiles that changed since the client last
+saw it, when that's smaller. The index of chunk[row, col] is row * CHUNK_SIZE + col. PLAYERS and
+ENEMIES are lists of fixed size entries, so their length says how many there are.
+
+Positions are OriginPoints, as 32 bit ints. That's plenty for a world that's 33 million tiles
+across.
+
+Addresses are either "host:port" for TCP or "unix:path" for a Unix socket.
+
+"""
+
+import asyncio
+import struct
+from typing import Any, Callable, NamedTuple, Union
+
+import numpy as np
+import numpy.typing as npt
+
+from pw32n import battle_moves
+from pw32n.tile_store import CHUNK_SIZE, ChunkKey, TileIdArray
+
+HEADER = struct.Struct("<HB")  # Length of the body and kind.
+MAX_BODY_SIZE = 0xFFFF
+
+CHUNK_TILES = CHUNK_SIZE * CHUNK_SIZE
+
+# Client to server.
+MOVE = 1  # Take a step in a direction (-1, 0, or 1 each). seq comes back in MOVED.
+BATTLE_MOVE = 2  # Attempt BATTLE_MOVES[move].
+
+# Server to client.
+WELCOME = 10  # Your player ID and starting position.
+MOVED = 11  # Where you are after the MOVE with this seq (which may be where you were).
+CHUNK = 12  # A whole chunk.
+CHUNK_DELTA = 13  # The tiles in a chunk that changed.
+PLAYERS = 14  # The other players you can see.
+ENEMIES = 15  # The enemies you can see.
+BATTLE_STARTED = 16  # You walked into this enemy.
+BATTLE_STATE = 17  # Sent every tick during a battle.
+BATTLE_ENDED = 18  # The enemy died or you left.
+
+STRUCTS = {
+    MOVE: struct.Struct("<Hbb"),  # seq, dx, dy
+    BATTLE_MOVE: struct.Struct("<B"),  # move
+    WELCOME: struct.Struct("<IiiHH"),  # player_id, x, y, tile_width, tile_height
+    MOVED: struct.Struct("<Hii"),  # seq, x, y
+    CHUNK: struct.Struct("<ii"),  # chunk_x, chunk_y, followed by CHUNK_TILES tile IDs
+    CHUNK_DELTA: struct.Struct(
+        "<ii"
+    ),  # chunk_x, chunk_y, followed by (index, tile_id)s
+    BATTLE_STARTED: struct.Struct("<If"),  # enemy index, enemy strength
+    BATTLE_STATE: struct.Struct("<ff"),  # player strength, enemy strength
+    BATTLE_ENDED: struct.Struct("<?f"),  # enemy_died, player strength
+}
+
+PLAYER_ENTRY = struct.Struct("<Iii")  # player_id, x, y
+ENEMY_ENTRY = struct.Struct("<IiiB")  # enemy_index, x, y, sprite_image_id
+
+# The same, for the server, which builds them with NumPy.
+PLAYER_DTYPE = np.dtype([("player_id", "<u4"), ("x", "<i4"), ("y", "<i4")])
+ENEMY_DTYPE = np.dtype(
+    [("enemy_index", "<u4"), ("x", "<i4"), ("y", "<i4"), ("sprite_image_id", "u1")]
+)
+
+BATTLE_MOVES = (battle_moves.DODGE, battle_moves.JAB, battle_moves.UPPERCUT)
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+class PlayerEntry(NamedTuple):
+    player_id: int
+    x: int
+    y: int
+
+
+class EnemyEntry(NamedTuple):
+    enemy_index: int
+    x: int
+    y: int
+    sprite_image_id: int
+
+
+def message(kind: int, body: bytes) -> bytes:
+    return HEADER.pack(len(body), kind) + body
+
+
+def pack(kind: int, *fields: Any) -> bytes:
+    """Return a whole message of one of the kinds in STRUCTS."""
+    record = STRUCTS[kind]
+    return HEADER.pack(record.size, kind) + record.pack(*fields)
+
+
+def unpack(kind: int, body: bytes) -> tuple[Any, ...]:
+    record = STRUCTS[kind]
+    if len(body) != record.size:
+        raise ProtocolError(f"Message {kind} should be {record.size} bytes long")
+    return record.unpack(body)
+
+
+def pack_table(kind: int, table: npt.NDArray[Any]) -> bytes:
+    """Return a PLAYERS or ENEMIES message from an array of PLAYER_DTYPE or ENEMY_DTYPE.
+
+    Entries that don't fit are left off.
+
+    """
+    return message(kind, table[: MAX_BODY_SIZE // table.itemsize].tobytes())
+
+
+def unpack_players(body: bytes) -> list[PlayerEntry]:
+    return [PlayerEntry(*fields) for fields in PLAYER_ENTRY.iter_unpack(body)]
+
+
+def unpack_enemies(body: bytes) -> list[EnemyEntry]:
+    return [EnemyEntry(*fields) for fields in ENEMY_ENTRY.iter_unpack(body)]
+
+
+def encode_chunk(
+    key: ChunkKey, tile_ids: TileIdArray, previous: TileIdArray = None
+) -> bytes:
+    """Return the message that turns previous (what the client has) into tile_ids.
+
+    That's a CHUNK if the client has nothing or if a delta wouldn't be smaller, a CHUNK_DELTA
+    otherwise, and b"" if nothing changed.
+
+    """
+    if previous is not None:
+        changed = np.flatnonzero(tile_ids != previous)
+        if not len(changed):
+            return b""
+        if 2 * len(changed) < CHUNK_TILES:
+            pairs = np.empty((len(changed), 2), np.uint8)
+            pairs[:, 0] = changed
+            pairs[:, 1] = tile_ids.ravel()[changed]
+            return message(
+                CHUNK_DELTA, STRUCTS[CHUNK_DELTA].pack(*key) + pairs.tobytes()
+            )
+    return message(CHUNK, STRUCTS[CHUNK].pack(*key) + tile_ids.tobytes())
+
+
+def apply_chunk(
+    chunks: dict[ChunkKey, TileIdArray], kind: int, body: bytes
+) -> ChunkKey:
+    """Apply a CHUNK or CHUNK_DELTA to the client's copy of the chunks. Return the chunk key."""
+    record = STRUCTS[kind]
+    if len(body) < record.size:
+        raise ProtocolError(f"Message {kind} is too short")
+    key: ChunkKey = record.unpack_from(body)
+    data = np.frombuffer(body, np.uint8, offset=record.size)
+    if kind == CHUNK:
+        if len(data) != CHUNK_TILES:
+            raise ProtocolError("CHUNK has the wrong number of tiles")
+        chunks[key] = data.reshape((CHUNK_SIZE, CHUNK_SIZE)).copy()
+        return key
+    chunk = chunks.get(key)
+    if chunk is None or len(data) % 2:
+        raise ProtocolError("Bad CHUNK_DELTA")
+    pairs = data.reshape((-1, 2))
+    chunk.ravel()[pairs[:, 0]] = pairs[:, 1]
+    return key
+
+
+class MessageReader:
+
+    """Split a stream of bytes back into messages."""
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[tuple[int, bytes]]:
+        """Add data and return the (kind, body) of every message that's now complete."""
+        buffer = self.buffer
+        buffer += data
+        messages = []
+        offset = 0
+        header_size = HEADER.size
+        while len(buffer) - offset >= header_size:
+            length, kind = HEADER.unpack_from(buffer, offset)
+            start = offset + header_size
+            if len(buffer) - start < length:
+                break
+            messages.append((kind, bytes(buffer[start : start + length])))
+            offset = start + length
+        if offset:
+            del buffer[:offset]
+        return messages
+
+
+Address = Union[str, tuple[str, int]]
+
+# asyncio's default is 100, which isn't enough for a load test that connects hundreds of clients
+# at once.
+BACKLOG = 1024
+
+
+def parse_address(address: str) -> Address:
+    """Return a Unix socket path or a (host, port)."""
+    if address.startswith("unix:"):
+        return address[len("unix:") :]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"{address!r} should be host:port or unix:path")
+    return host, int(port)
+
+
+def format_address(address: Any) -> str:
+    """The inverse of parse_address, given what a socket's getsockname returns."""
+    if isinstance(address, str):
+        return f"unix:{address}"
+    return f"{address[0]}:{address[1]}"
+
+
+async def create_server(
+    protocol_factory: Callable[[], asyncio.Protocol], address: str
+) -> asyncio.Server:
+    loop = asyncio.get_running_loop()
+    parsed = parse_address(address)
+    if isinstance(parsed, str):
+        return await loop.create_unix_server(protocol_factory, parsed, backlog=BACKLOG)
+    return await loop.create_server(protocol_factory, *parsed, backlog=BACKLOG)
+
+
+async def create_connection(
+    protocol_factory: Callable[[], asyncio.Protocol], address: str
+) -> tuple[asyncio.BaseTransport, asyncio.Protocol]:
+    loop = asyncio.get_running_loop()
+    parsed = parse_address(address)
+    if isinstance(parsed, str):
+        return await loop.create_unix_connection(protocol_factory, parsed)
+    return await loop.create_connection(protocol_factory, *parsed)
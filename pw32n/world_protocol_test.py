@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+
+from pw32n.tile_store import CHUNK_SIZE
+from pw32n.world_protocol import (
+    CHUNK,
+    CHUNK_DELTA,
+    MOVE,
+    PLAYER_DTYPE,
+    PLAYERS,
+    MessageReader,
+    PlayerEntry,
+    ProtocolError,
+    apply_chunk,
+    encode_chunk,
+    pack,
+    pack_table,
+    parse_address,
+    unpack,
+    unpack_players,
+)
+
+
+class WorldProtocolTestCase(unittest.TestCase):
+    def test_reader_handles_messages_split_anywhere(self) -> None:
+        data = pack(MOVE, 1, 1, 0) + pack(MOVE, 2, -1, -1)
+        for split in range(len(data) + 1):
+            reader = MessageReader()
+            messages = reader.feed(data[:split]) + reader.feed(data[split:])
+            self.assertEqual(
+                [unpack(kind, body) for kind, body in messages],
+                [(1, 1, 0), (2, -1, -1)],
+            )
+            self.assertEqual(reader.buffer, b"")
+
+    def test_unpack_checks_the_length(self) -> None:
+        with self.assertRaises(ProtocolError):
+            unpack(MOVE, b"\x00")
+
+    def test_chunks_and_deltas(self) -> None:
+        tile_ids = np.zeros((CHUNK_SIZE, CHUNK_SIZE), np.uint8)
+        tile_ids[0, :] = 1
+        client: dict[tuple[int, int], np.ndarray] = {}
+        reader = MessageReader()
+
+        ((kind, body),) = reader.feed(encode_chunk((-1, 2), tile_ids))
+        self.assertEqual(kind, CHUNK)
+        self.assertEqual(apply_chunk(client, kind, body), (-1, 2))
+        np.testing.assert_array_equal(client[(-1, 2)], tile_ids)
+
+        previous = tile_ids.copy()
+        self.assertEqual(encode_chunk((-1, 2), tile_ids, previous), b"")
+        tile_ids[3, 5] = 2
+        data = encode_chunk((-1, 2), tile_ids, previous)
+        self.assertEqual(len(data), 3 + 8 + 2)
+        ((kind, body),) = reader.feed(data)
+        self.assertEqual(kind, CHUNK_DELTA)
+        apply_chunk(client, kind, body)
+        np.testing.assert_array_equal(client[(-1, 2)], tile_ids)
+
+        # When most of the chunk changed, the whole chunk is smaller.
+        ((kind, body),) = reader.feed(encode_chunk((-1, 2), tile_ids + 1, tile_ids))
+        self.assertEqual(kind, CHUNK)
+
+    def test_delta_for_an_unknown_chunk(self) -> None:
+        with self.assertRaises(ProtocolError):
+            apply_chunk({}, CHUNK_DELTA, b"\x00" * 8 + b"\x01\x01")
+
+    def test_players(self) -> None:
+        table = np.zeros(2, PLAYER_DTYPE)
+        table[1] = (7, -64, 128)
+        ((kind, body),) = MessageReader().feed(pack_table(PLAYERS, table))
+        self.assertEqual(kind, PLAYERS)
+        self.assertEqual(
+            unpack_players(body), [PlayerEntry(0, 0, 0), PlayerEntry(7, -64, 128)]
+        )
+
+    def test_parse_address(self) -> None:
+        self.assertEqual(parse_address("127.0.0.1:8032"), ("127.0.0.1", 8032))
+        self.assertEqual(parse_address("unix:/tmp/world.sock"), "/tmp/world.sock")
+        with self.assertRaises(ValueError):
+            parse_address("localhost")
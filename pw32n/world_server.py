@@ -0,0 +1,598 @@
+"""An authoritative server for a world that several players roam at once.
+
+WorldServer owns everything the players share: the Geography and its TileStore, the TilePicker
+that generates new tiles, the EnemyPool, and the battles. Clients only send inputs (MOVE and
+BATTLE_MOVE, see world_protocol), and the server decides what happens.
+
+A MOVE is handled as soon as it arrives. The player takes a step of STEP_DISTANCE if her speed
+allows it (a client can't walk faster by sending MOVEs faster) and the tiles under her are
+walkable. The tiles around her new position are generated if necessary, and the server answers
+with MOVED plus whatever chunks of her view she hasn't seen or that changed since she last saw
+them. The server remembers the copy of each chunk it sent her, so a change (e.g. a crate being
+carved away) goes out as a CHUNK_DELTA of just the tiles that changed.
+
+Everything else happens in tick, TICK_RATE times a second: enemies wander (the server has
+several players to think about, so they don't chase anyone), enemies that are far from every
+player are culled, battles advance, and each player gets the other players and enemies in her
+view if they changed. Walking into an enemy starts a battle, which runs on the server just like
+BattleView runs it, with the client's BATTLE_MOVEs scheduled at the time they arrived.
+
+The Geography has no player of its own. Its position is moved to whichever player the server is
+looking at, since that's what tile_rect works from.
+
+The server is single threaded asyncio, with one asyncio.Protocol per client and no task per
+client, so that dozens of clients fit on one core. See load_tester for how to measure that.
+
+Run it with:
+
+    python -m pw32n.world_server --address 127.0.0.1:8032
+
+"""
+
+import argparse
+import asyncio
+import functools
+import math
+import random
+import sys
+import time
+from typing import Any, Callable, Optional, cast
+
+import numpy as np
+import numpy.typing as npt
+
+from pw32n import enemy_pool, geography, models, tiles
+from pw32n.tile_picker import TilePicker
+from pw32n.tile_store import CHUNK_SIZE, ChunkKey, TileIdArray, TileStore
+from pw32n.units import Secs
+from pw32n.world_protocol import (
+    BATTLE_ENDED,
+    BATTLE_MOVE,
+    BATTLE_MOVES,
+    BATTLE_STARTED,
+    BATTLE_STATE,
+    CHUNK,
+    ENEMIES,
+    ENEMY_DTYPE,
+    MOVE,
+    MOVED,
+    PLAYER_DTYPE,
+    PLAYERS,
+    WELCOME,
+    MessageReader,
+    ProtocolError,
+    create_server,
+    encode_chunk,
+    format_address,
+    pack,
+    pack_table,
+    unpack,
+)
+
+DEFAULT_ADDRESS = "127.0.0.1:8032"
+
+Send = Callable[[bytes], None]
+Clock = Callable[[], float]
+
+_UNKNOWN_CHUNK = np.zeros((CHUNK_SIZE, CHUNK_SIZE), np.uint8)
+
+
+class Player:
+    def __init__(
+        self, player_id: int, send: Send, position: geography.OriginPoint
+    ) -> None:
+        self.player_id = player_id
+        self.send = send
+        self.position = position
+        self.player_model = models.PlayerModel()
+        self.battle: Optional[Battle] = None
+
+        # How far she may walk right now. See WorldServer.move.
+        self.allowance = 0.0
+
+        # The TileRect she was last shown and the keys of the chunks it covers.
+        self.rect = geography.EMPTY_TILE_RECT
+        self.chunk_keys: list[ChunkKey] = []
+
+        # The chunks she has, as we sent them, along with their versions. See send_chunks.
+        self.chunks: dict[ChunkKey, tuple[Optional[int], TileIdArray]] = {}
+
+        # The last PLAYERS and ENEMIES messages she got, so we only send changes.
+        self.players_message = b""
+        self.enemies_message = b""
+
+
+class Battle:
+    def __init__(
+        self, player: Player, enemy_model: enemy_pool.PooledEnemyModel
+    ) -> None:
+        self.player = player
+        self.enemy_model = enemy_model
+
+        # (arrived_at, move) for every BATTLE_MOVE since the last tick.
+        self.pending_moves: list[tuple[float, int]] = []
+
+
+class WorldServer:
+    TICK_RATE = 20
+
+    # Like WorldView.PLAYER_MOVEMENT_SPEED, in OriginDistance per second.
+    PLAYER_MOVEMENT_SPEED = 300.0
+
+    # How far a MOVE goes. At full speed, that's 30 MOVEs a second.
+    STEP_DISTANCE = 10
+    DIAGONAL_STEP = round(STEP_DISTANCE / math.sqrt(2))
+
+    # How far ahead of her speed a player can get, e.g. when a few MOVEs arrive at once.
+    MAX_ALLOWANCE = PLAYER_MOVEMENT_SPEED / 4
+
+    # Like WorldView.possibly_create_an_enemy.
+    ENEMY_CHANCE = 1 / 150
+
+    # Enemies further than this from every player are culled, like
+    # WorldView.ENEMY_DISTANCE_KEEPALIVE_RATIO times the screen size.
+    ENEMY_DISTANCE_KEEPALIVE_RATIO = 3
+
+    def __init__(self, seed: int = None, clock: Clock = time.monotonic) -> None:
+        if seed is not None:
+            random.seed(seed)
+        self.clock = clock
+        self.geo: geography.Geography[tiles.Tile] = geography.Geography()
+        self.tile_store = TileStore(self.geo)
+        self.tile_picker = TilePicker(self.geo, self.tile_store)
+        self.geo.tile_map.on_evict = self.on_tile_evicted
+        self.enemy_pool = enemy_pool.EnemyPool(seed=seed)
+
+        # Every chunk gets a new version whenever it changes, so we only have to compare the
+        # tiles of the chunks that changed since a player last saw them.
+        self.dirty_chunks = self.tile_store.subscribe()
+        self.chunk_versions: dict[ChunkKey, int] = {}
+        self.version = 0
+        self.players: dict[int, Player] = {}
+        self.battles: list[Battle] = []
+        self.next_player_id = 1
+        self.last_tick_at = clock()
+
+        # These are for curiosity's sake.
+        self.messages_received = 0
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.chunks_sent = 0
+        self.chunk_deltas_sent = 0
+        self.moves_rejected = 0
+        self.battles_started = 0
+        self.enemies_killed = 0
+        self.ticks = 0
+
+    def send(self, player: Player, data: bytes) -> None:
+        player.send(data)
+        self.messages_sent += 1
+        self.bytes_sent += len(data)
+
+    def on_tile_evicted(
+        self, tile_point: geography.OriginPoint, tile: tiles.Tile
+    ) -> None:
+        # Like GameWindow.on_tile_evicted, the store and the regions forget it too.
+        self.tile_picker.on_tile_evicted(tile_point, tile)
+        self.tile_store.on_tile_evicted(tile_point)
+
+    def connect(self, send: Send) -> Player:
+        player = Player(self.next_player_id, send, self.geo.initial_position)
+        self.next_player_id += 1
+        self.players[player.player_id] = player
+        self.send(
+            player,
+            pack(
+                WELCOME,
+                player.player_id,
+                player.position.x,
+                player.position.y,
+                self.geo.tile_width,
+                self.geo.tile_height,
+            ),
+        )
+        self.update_view(player, spawn_enemies=False)
+        return player
+
+    def disconnect(self, player: Player) -> None:
+        if player.battle is not None:
+            self.end_battle(player.battle)
+        self.players.pop(player.player_id, None)
+
+    def receive(self, player: Player, kind: int, body: bytes) -> None:
+        self.messages_received += 1
+        if kind == MOVE:
+            seq, dx, dy = unpack(MOVE, body)
+            self.move(player, seq, dx, dy)
+        elif kind == BATTLE_MOVE:
+            (move,) = unpack(BATTLE_MOVE, body)
+            if move >= len(BATTLE_MOVES):
+                raise ProtocolError(f"There's no battle move {move}")
+            if player.battle is not None:
+                player.battle.pending_moves.append((self.clock(), move))
+        else:
+            raise ProtocolError(f"Clients can't send message {kind}")
+
+    def move(self, player: Player, seq: int, dx: int, dy: int) -> None:
+        dx = max(-1, min(dx, 1))
+        dy = max(-1, min(dy, 1))
+        if (dx or dy) and player.battle is None:
+            step = self.STEP_DISTANCE if not dx or not dy else self.DIAGONAL_STEP
+            distance = step if not dx or not dy else step * math.sqrt(2)
+            new_position = geography.OriginPoint(
+                player.position.x + dx * step, player.position.y + dy * step
+            )
+            if player.allowance >= distance and self.is_walkable(new_position):
+                player.allowance -= distance
+                player.position = new_position
+                self.update_view(player)
+                self.start_battle_if_touching_an_enemy(player)
+            else:
+                self.moves_rejected += 1
+        self.send(player, pack(MOVED, seq, player.position.x, player.position.y))
+
+    def is_walkable(self, position: geography.OriginPoint) -> bool:
+        # The tiles under position have to exist before we can check them. The rest of the
+        # view waits until she's actually there.
+        return all(
+            self.tile_picker.get_tile(p)[0].is_walkable
+            for p in self.tile_picker.points_under(position)
+        )
+
+    def view_rect(self, position: geography.OriginPoint) -> geography.TileRect:
+        self.geo.position = position
+        return self.geo.tile_rect()
+
+    def update_view(
+        self,
+        player: Player,
+        position: geography.OriginPoint = None,
+        spawn_enemies: bool = True,
+    ) -> None:
+        """Generate the tiles in the view from position and send her the chunks that changed."""
+        rect = self.view_rect(position or player.position)
+        if rect != player.rect:
+            generate = (
+                self.generate_tile if spawn_enemies else self.tile_picker.get_tile
+            )
+            self.tile_store.query_region(rect, generate)
+            player.rect = rect
+            player.chunk_keys = self.chunk_keys(rect)
+
+            # Forget the chunks she can't see anymore. If she comes back, she gets them again.
+            if len(player.chunks) > len(player.chunk_keys):
+                for key in set(player.chunks).difference(player.chunk_keys):
+                    del player.chunks[key]
+        self.send_chunks(player)
+
+    def chunk_keys(self, rect: geography.TileRect) -> list[ChunkKey]:
+        left_col = rect.left // self.geo.tile_width
+        right_col = rect.right // self.geo.tile_width - 1
+        bottom_row = rect.bottom // self.geo.tile_height + 1
+        top_row = rect.top // self.geo.tile_height
+        return [
+            (chunk_x, chunk_y)
+            for chunk_x in range(left_col // CHUNK_SIZE, right_col // CHUNK_SIZE + 1)
+            for chunk_y in range(bottom_row // CHUNK_SIZE, top_row // CHUNK_SIZE + 1)
+        ]
+
+    def update_chunk_versions(self) -> None:
+        if not self.dirty_chunks:
+            return
+        chunks = self.tile_store.chunks
+        for key in self.dirty_chunks:
+            if key in chunks:
+                self.version += 1
+                self.chunk_versions[key] = self.version
+            else:
+                self.chunk_versions.pop(key, None)
+        self.dirty_chunks.clear()
+
+    def send_chunks(self, player: Player) -> None:
+        """Send her the chunks in her view that she hasn't seen or that changed."""
+        self.update_chunk_versions()
+        sent = player.chunks
+        versions = self.chunk_versions
+        for key in player.chunk_keys:
+            version = versions.get(key)
+            previous = sent.get(key)
+            if previous is None:
+                if version is None:
+                    continue
+            elif previous[0] == version:
+                continue
+            tile_ids = self.tile_store.chunks.get(key, _UNKNOWN_CHUNK)
+            data = encode_chunk(
+                key, tile_ids, None if previous is None else previous[1]
+            )
+            sent[key] = (version, tile_ids.copy())
+            if not data:
+                continue
+            self.send(player, data)
+            if data[2] == CHUNK:
+                self.chunks_sent += 1
+            else:
+                self.chunk_deltas_sent += 1
+
+    def generate_tile(self, tile_point: geography.OriginPoint) -> tiles.Tile:
+        tile, is_new = self.tile_picker.get_tile(tile_point)
+        if is_new and tile.is_walkable and random.random() < self.ENEMY_CHANCE:
+            self.enemy_pool.spawn(
+                tile_point,
+                models.pick_enemy_strength(tile_point),
+                random.choice(enemy_pool.SPRITE_IMAGES),
+            )
+        return tile
+
+    def touching_enemies(self, player: Player) -> np.ndarray:
+        """Return the indices of the enemies whose sprites overlap hers."""
+        pool = self.enemy_pool
+        tile_width = self.geo.tile_width
+        tile_height = self.geo.tile_height
+        return np.flatnonzero(
+            pool.alive
+            & (pool.state != enemy_pool.FIGHTING)
+            & (np.abs(pool.x + tile_width / 2 - player.position.x) < tile_width)
+            & (np.abs(pool.y - tile_height / 2 - player.position.y) < tile_height)
+        )
+
+    def start_battle_if_touching_an_enemy(self, player: Player) -> None:
+        touching = self.touching_enemies(player)
+        if not len(touching):
+            return
+        enemy_model = self.enemy_pool.battle_model(
+            int(touching[0]), player.player_model
+        )
+        battle = Battle(player, enemy_model)
+        player.battle = battle
+        self.battles.append(battle)
+        player.player_model.on_battle_view_begin()
+        enemy_model.on_battle_view_begin()
+        self.battles_started += 1
+        self.send(player, pack(BATTLE_STARTED, enemy_model.index, enemy_model.strength))
+
+    def end_battle(self, battle: Battle) -> None:
+        player = battle.player
+        enemy_model = battle.enemy_model
+        enemy_died = enemy_model.is_dead
+        if enemy_died:
+            player.player_model.on_enemy_died(enemy_model)
+            self.enemy_pool.kill(enemy_model.index)
+            self.enemies_killed += 1
+        else:
+            enemy_model.on_battle_view_end()
+        player.battle = None
+        self.battles.remove(battle)
+        self.send(player, pack(BATTLE_ENDED, enemy_died, player.player_model.strength))
+
+    def tick(self) -> None:
+        now = self.clock()
+        tick_began = self.last_tick_at
+        delta_time = Secs(now - tick_began)
+        self.last_tick_at = now
+        self.ticks += 1
+
+        for player in self.players.values():
+            player.allowance = min(
+                player.allowance + self.PLAYER_MOVEMENT_SPEED * delta_time,
+                self.MAX_ALLOWANCE,
+            )
+            if player.battle is None:
+                player.player_model.on_world_view_update(delta_time)
+
+        self.update_enemies(delta_time)
+
+        for battle in list(self.battles):
+            self.advance_battle(battle, tick_began, delta_time)
+
+        players = self.player_table()
+        enemies = self.enemy_table()
+        for player in self.players.values():
+            self.send_chunks(player)
+            self.send_neighbors(player, players, enemies)
+
+    def update_enemies(self, delta_time: Secs) -> None:
+        pool = self.enemy_pool
+        pool.update(delta_time, tile_store=self.tile_store)
+        if not self.players or not len(pool):
+            return
+        positions = np.array([p.position for p in self.players.values()], np.float64)
+        alive = pool.alive_indices()
+        max_distance_x = self.ENEMY_DISTANCE_KEEPALIVE_RATIO * self.geo.screen_width
+        max_distance_y = self.ENEMY_DISTANCE_KEEPALIVE_RATIO * self.geo.screen_height
+        near_someone = (
+            (np.abs(pool.x[alive, None] - positions[None, :, 0]) <= max_distance_x)
+            & (np.abs(pool.y[alive, None] - positions[None, :, 1]) <= max_distance_y)
+        ).any(axis=1)
+        for index in alive[~near_someone & (pool.state[alive] != enemy_pool.FIGHTING)]:
+            pool.kill(int(index))
+
+    def advance_battle(
+        self, battle: Battle, tick_began: float, delta_time: Secs
+    ) -> None:
+        player_model = battle.player.player_model
+        enemy_model = battle.enemy_model
+        inputs = [
+            models.ScheduledInput(
+                offset=Secs(arrived_at - tick_began),
+                apply=functools.partial(
+                    player_model.attempt_battle_move, BATTLE_MOVES[move], enemy_model
+                ),
+            )
+            for arrived_at, move in battle.pending_moves
+        ]
+        battle.pending_moves.clear()
+        models.advance_battle(player_model, enemy_model, delta_time, inputs)
+        self.send(
+            battle.player,
+            pack(BATTLE_STATE, player_model.strength, enemy_model.strength),
+        )
+        if enemy_model.is_dead:
+            self.end_battle(battle)
+
+    def player_table(self) -> npt.NDArray[Any]:
+        table = np.empty(len(self.players), PLAYER_DTYPE)
+        table["player_id"] = list(self.players)
+        positions = [player.position for player in self.players.values()]
+        table["x"] = [position.x for position in positions]
+        table["y"] = [position.y for position in positions]
+        return table
+
+    def enemy_table(self) -> npt.NDArray[Any]:
+        pool = self.enemy_pool
+        alive = pool.alive_indices()
+        table = np.empty(len(alive), ENEMY_DTYPE)
+        table["enemy_index"] = alive
+        table["x"] = np.round(pool.x[alive])
+        table["y"] = np.round(pool.y[alive])
+        table["sprite_image_id"] = pool.sprite_image_id[alive]
+        return table
+
+    def send_neighbors(
+        self, player: Player, players: npt.NDArray[Any], enemies: npt.NDArray[Any]
+    ) -> None:
+        """Send her the other players and the enemies in her view, if they changed.
+
+        players and enemies are what player_table and enemy_table returned.
+
+        """
+        rect = self.view_rect(player.position)
+        x = players["x"]
+        y = players["y"]
+        data = pack_table(
+            PLAYERS,
+            players[
+                (players["player_id"] != player.player_id)
+                & (x >= rect.left)
+                & (x < rect.right)
+                & (y > rect.bottom)
+                & (y <= rect.top)
+            ],
+        )
+        if data != player.players_message:
+            self.send(player, data)
+            player.players_message = data
+
+        x = enemies["x"]
+        y = enemies["y"]
+        data = pack_table(
+            ENEMIES,
+            enemies[
+                (x >= rect.left)
+                & (x < rect.right)
+                & (y > rect.bottom)
+                & (y <= rect.top)
+            ],
+        )
+        if data != player.enemies_message:
+            self.send(player, data)
+            player.enemies_message = data
+
+    def report(self) -> str:
+        return (
+            f"World server: {len(self.players)} players, {self.ticks} ticks, "
+            f"{self.messages_received} messages received, {self.messages_sent} messages "
+            f"({self.bytes_sent} bytes) sent, {self.chunks_sent} chunks and "
+            f"{self.chunk_deltas_sent} chunk deltas, {self.moves_rejected} moves rejected, "
+            f"{self.battles_started} battles, {self.enemies_killed} enemies killed, "
+            f"{len(self.geo.tile_map)} tiles"
+        )
+
+
+class Connection(asyncio.Protocol):
+
+    """Connects one client's socket to the WorldServer."""
+
+    # Clients that fall this far behind on reading are disconnected.
+    MAX_WRITE_BUFFER = 1024 * 1024
+
+    def __init__(self, world: WorldServer) -> None:
+        self.world = world
+        self.reader = MessageReader()
+        self.transport: Optional[asyncio.Transport] = None
+        self.player: Optional[Player] = None
+        self.pending: list[bytes] = []
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = cast(asyncio.Transport, transport)
+        self.player = self.world.connect(self.send)
+
+    def send(self, data: bytes) -> None:
+        # A MOVE usually gets a few messages back, so write them all at once when we're done.
+        if not self.pending:
+            asyncio.get_running_loop().call_soon(self.flush)
+        self.pending.append(data)
+
+    def flush(self) -> None:
+        transport = self.transport
+        data = b"".join(self.pending)
+        self.pending.clear()
+        if transport.is_closing():
+            return
+        transport.write(data)
+        if transport.get_write_buffer_size() > self.MAX_WRITE_BUFFER:
+            transport.abort()
+
+    def data_received(self, data: bytes) -> None:
+        try:
+            for kind, body in self.reader.feed(data):
+                self.world.receive(self.player, kind, body)
+        except ProtocolError:
+            self.transport.abort()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self.player is not None:
+            self.world.disconnect(self.player)
+            self.player = None
+
+
+async def serve(
+    world: WorldServer,
+    address: str = DEFAULT_ADDRESS,
+    on_listening: Callable[[str], None] = None,
+) -> None:
+    """Serve the world and tick it until cancelled.
+
+    on_listening is called with the address, which is handy when the port is 0.
+
+    """
+    server = await create_server(lambda: Connection(world), address)
+    if on_listening is not None:
+        on_listening(format_address(server.sockets[0].getsockname()))
+    loop = asyncio.get_running_loop()
+    period = 1.0 / world.TICK_RATE
+    async with server:
+        next_tick_at = loop.time() + period
+        while True:
+            await asyncio.sleep(max(next_tick_at - loop.time(), 0.0))
+            world.tick()
+            # If we fell behind, don't try to catch up all at once.
+            next_tick_at = max(next_tick_at + period, loop.time())
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--address",
+        default=DEFAULT_ADDRESS,
+        help="host:port, or unix:path for a Unix socket",
+    )
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    world = WorldServer(seed=args.seed)
+
+    def on_listening(address: str) -> None:
+        # load_tester waits for this line.
+        print(f"Listening on {address}", flush=True)
+
+    try:
+        asyncio.run(serve(world, args.address, on_listening))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(world.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from typing import Any
+
+import numpy as np
+
+from pw32n import enemy_pool, geography
+from pw32n.load_tester import run_load_test
+from pw32n.tile_store import ChunkKey, TileIdArray
+from pw32n.world_protocol import (
+    BATTLE_ENDED,
+    BATTLE_MOVE,
+    BATTLE_STARTED,
+    CHUNK,
+    CHUNK_DELTA,
+    MOVE,
+    MOVED,
+    PLAYERS,
+    WELCOME,
+    MessageReader,
+    apply_chunk,
+    pack,
+    unpack,
+    unpack_players,
+)
+from pw32n.world_server import Player, WorldServer, serve
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.reader = MessageReader()
+        self.messages: list[tuple[int, bytes]] = []
+        self.chunks: dict[ChunkKey, TileIdArray] = {}
+
+    def send(self, data: bytes) -> None:
+        for kind, body in self.reader.feed(data):
+            self.messages.append((kind, body))
+            if kind == CHUNK or kind == CHUNK_DELTA:
+                apply_chunk(self.chunks, kind, body)
+
+    def take(self, kind: int) -> list[bytes]:
+        bodies = [body for k, body in self.messages if k == kind]
+        self.messages = [(k, body) for k, body in self.messages if k != kind]
+        return bodies
+
+    def unpack(self, kind: int) -> list[tuple[Any, ...]]:
+        return [unpack(kind, body) for body in self.take(kind)]
+
+
+class WorldServerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.world = WorldServer(seed=0, clock=self.clock)
+
+    def connect(self) -> tuple[Player, FakeClient]:
+        client = FakeClient()
+        player = self.world.connect(client.send)
+        return player, client
+
+    def tick(self, seconds: float = 0.05) -> None:
+        self.clock.now += seconds
+        self.world.tick()
+
+    def assert_client_is_up_to_date(self, player: Player, client: FakeClient) -> None:
+        self.assertTrue(player.chunk_keys)
+        for key in player.chunk_keys:
+            expected = self.world.tile_store.chunks.get(key)
+            if expected is not None:
+                np.testing.assert_array_equal(client.chunks[key], expected)
+
+    def test_connect(self) -> None:
+        player, client = self.connect()
+        self.assertEqual(client.unpack(WELCOME), [(player.player_id, 0, 0, 64, 64)])
+        self.assert_client_is_up_to_date(player, client)
+
+    def test_moves_at_the_speed_limit(self) -> None:
+        player, client = self.connect()
+
+        # She hasn't been standing around long enough to take a step.
+        self.world.receive(player, MOVE, pack(MOVE, 1, 1, 0)[3:])
+        self.assertEqual(client.unpack(MOVED), [(1, 0, 0)])
+
+        self.tick()
+        seqs = []
+        for seq in range(2, 10):
+            self.world.move(player, seq, 1, 0)
+            seqs.append(client.unpack(MOVED)[0])
+        # 0.05s at 300 per second is only enough for one step.
+        self.assertEqual(seqs[0], (2, WorldServer.STEP_DISTANCE, 0))
+        self.assertEqual(seqs[-1], (9, WorldServer.STEP_DISTANCE, 0))
+        self.assertGreater(self.world.moves_rejected, 0)
+
+    def test_rejected_moves_leave_the_view_alone(self) -> None:
+        player, client = self.connect()
+        rect = player.rect
+        tiles_generated = self.world.tile_picker.tiles_generated
+        enemies = len(self.world.enemy_pool)
+
+        # She hasn't been standing around long enough to take a step.
+        self.world.move(player, 1, 1, 1)
+        self.assertEqual(client.unpack(MOVED), [(1, 0, 0)])
+        self.assertEqual(player.rect, rect)
+        self.assertEqual(self.world.tile_picker.tiles_generated, tiles_generated)
+        self.assertEqual(len(self.world.enemy_pool), enemies)
+
+    def test_streams_chunks_as_she_goes(self) -> None:
+        player, client = self.connect()
+        first_keys = player.chunk_keys
+
+        # Put her wherever she'd be if nothing were in the way.
+        for x in range(0, 3000, WorldServer.STEP_DISTANCE):
+            player.position = geography.OriginPoint(x, x // 2)
+            self.world.update_view(player)
+        self.assert_client_is_up_to_date(player, client)
+
+        # Chunks she walked away from are forgotten.
+        self.assertEqual(set(player.chunks), set(player.chunk_keys))
+        self.assertFalse(set(first_keys) & set(player.chunks))
+
+    def test_the_tile_store_forgets_evicted_tiles(self) -> None:
+        self.world.geo.tile_map.capacity = 3000
+        player, client = self.connect()
+        for x in range(0, 400 * 64, 64):
+            player.position = geography.OriginPoint(x, 0)
+            self.world.update_view(player)
+        self.assertEqual(len(self.world.geo.tile_map), 3000)
+        known = sum(self.world.tile_store.known_counts.values())
+        self.assertEqual(known, 3000)
+        self.assert_client_is_up_to_date(player, client)
+
+    def test_changes_are_sent_as_deltas(self) -> None:
+        player, client = self.connect()
+        client.messages.clear()
+        key = player.chunk_keys[0]
+        col = key[0] * 16 + 3
+        row = key[1] * 16 + 4
+        tile_store = self.world.tile_store
+        tile_store.set_by_index(col, row, 3 - tile_store.get_by_index(col, row))
+        self.tick()
+        self.assertEqual(len(client.take(CHUNK_DELTA)), 1)
+        self.assert_client_is_up_to_date(player, client)
+
+    def test_players_see_each_other(self) -> None:
+        player_1, client_1 = self.connect()
+        player_2, client_2 = self.connect()
+        self.tick()
+        (body,) = client_1.take(PLAYERS)
+        self.assertEqual([p.player_id for p in unpack_players(body)], [2])
+
+        # Nothing changed, so nothing is sent.
+        self.tick()
+        self.assertEqual(client_1.take(PLAYERS), [])
+
+        self.world.disconnect(player_2)
+        self.tick()
+        self.assertEqual(client_1.take(PLAYERS), [b""])
+
+    def test_battle(self) -> None:
+        player, client = self.connect()
+        pool = self.world.enemy_pool
+        handle = pool.spawn(
+            geography.OriginPoint(-32 + 64, 32), 0.5, enemy_pool.SPRITE_IMAGES[0]
+        )
+        self.tick()
+        self.world.move(player, 1, 1, 0)
+        self.assertEqual(client.unpack(BATTLE_STARTED), [(handle.index, 0.5)])
+
+        # She can't walk away in the middle of a battle.
+        self.tick()
+        self.world.move(player, 2, -1, 0)
+        self.assertEqual(client.unpack(MOVED)[-1], (2, WorldServer.STEP_DISTANCE, 0))
+
+        for _ in range(100):
+            if player.battle is None:
+                break
+            self.world.receive(player, BATTLE_MOVE, pack(BATTLE_MOVE, 1)[3:])
+            self.tick()
+        ((enemy_died, strength),) = client.unpack(BATTLE_ENDED)
+        self.assertTrue(enemy_died)
+        self.assertFalse(handle.is_alive)
+        self.assertEqual(self.world.battles, [])
+
+    def test_disconnecting_in_a_battle_lets_the_enemy_go(self) -> None:
+        player, _ = self.connect()
+        handle = self.world.enemy_pool.spawn(
+            geography.OriginPoint(32, 32), 100.0, enemy_pool.SPRITE_IMAGES[0]
+        )
+        self.tick()
+        self.world.move(player, 1, 1, 0)
+        self.assertIsNotNone(player.battle)
+        self.world.disconnect(player)
+        self.assertEqual(self.world.battles, [])
+        self.assertEqual(handle.state, enemy_pool.STANDING)
+
+
+class LoadTestTestCase(unittest.TestCase):
+    def test_bots(self) -> None:
+        async def run(address: str) -> None:
+            world = WorldServer(seed=0)
+            listening = asyncio.get_running_loop().create_future()
+            server = asyncio.create_task(serve(world, address, listening.set_result))
+            try:
+                result = await run_load_test(
+                    await listening, bots=3, duration=0.5, moves_per_second=20
+                )
+                # Let the server notice that they hung up.
+                await asyncio.sleep(0.1)
+            finally:
+                server.cancel()
+            self.assertEqual(result.disconnected, 0)
+            self.assertGreater(len(result.latencies), 15)
+            self.assertGreater(result.messages_received, result.messages_sent)
+            self.assertIn("p99", result.report())
+            self.assertEqual(len(world.players), 0)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            asyncio.run(run(f"unix:{os.path.join(tmp_dir, 'world.sock')}"))